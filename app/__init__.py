@@ -10,6 +10,7 @@ from govuk_frontend_wtf.main import WTFormsHelpers
 from jinja2 import ChoiceLoader, PackageLoader, PrefixLoader
 
 from app.logger_config import setup_logging
+from app.main.db.indexes import db_indexes_cli, report_missing_indexes
 from app.main.db.models import db
 from app.main.util.search_utils import OPENSEARCH_FIELD_NAME_MAP
 
@@ -135,6 +136,9 @@ def create_app(config_class, database_uri=None):
             db.create_all()
         else:
             db.Model.metadata.reflect(bind=db.engine, schema="public")
+            report_missing_indexes()
+
+    app.cli.add_command(db_indexes_cli)
 
     # Register blueprints
     from app.main import bp as main_bp
@@ -188,9 +192,13 @@ def create_app(config_class, database_uri=None):
     @app.after_request
     def add_no_caching_headers(r):
         """
-        Add headers to tell browsers not to cache the pages to protected routes
+        Add headers to tell browsers not to cache the pages to protected routes,
+        other than the responses those routes have set a private cache policy on
         """
-        if g.get("access_token_sign_in_required"):
+        if (
+            g.get("access_token_sign_in_required")
+            and not r.cache_control.private
+        ):
             r.headers["Cache-Control"] = (
                 "public, max-age=0, no-cache, no-store, must-revalidate"
             )
@@ -2,9 +2,14 @@ import os
 from functools import wraps
 
 import keycloak
-from flask import flash, g, redirect, request, session, url_for
+from flask import current_app, flash, g, redirect, request, session, url_for
 
 from app.main.authorize.ayr_user import AYRUser
+from app.main.authorize.jwks_token_validator import (
+    JWKSUnavailableError,
+    decode_access_token_locally,
+)
+from app.main.authorize.token_cache import introspect_access_token
 from app.main.flask_config_helpers import (
     get_keycloak_instance_from_flask_config,
 )
@@ -67,8 +72,8 @@ def access_token_sign_in_required(view_func):
             session["access_token"] = access_token
             session["refresh_token"] = refresh_token
             keycloak_openid = get_keycloak_instance_from_flask_config()
-            decoded_access_token = keycloak_openid.introspect(
-                session["access_token"]
+            decoded_access_token = introspect_access_token(
+                keycloak_openid, session["access_token"]
             )
 
             session["user_groups"] = decoded_access_token["groups"]
@@ -77,8 +82,15 @@ def access_token_sign_in_required(view_func):
                 session["user_type"] = "all_access_user"
             else:
                 session["user_type"] = "standard_user"
+            session["transferring_body"] = (
+                ayr_user.transferring_body.to_session()
+                if ayr_user.transferring_body
+                else None
+            )
 
-        ayr_user = AYRUser(session["user_groups"])
+        ayr_user = AYRUser(
+            session["user_groups"], session.get("transferring_body")
+        )
 
         if not ayr_user.can_access_ayr:
             flash(
@@ -106,7 +118,7 @@ def _validate_or_refresh_tokens(access_token, refresh_token):
 
     keycloak_openid = get_keycloak_instance_from_flask_config()
 
-    decoded_token = keycloak_openid.introspect(access_token)
+    decoded_token = _decode_access_token(keycloak_openid, access_token)
 
     if decoded_token["active"] is False:
         try:
@@ -123,5 +135,20 @@ def _validate_or_refresh_tokens(access_token, refresh_token):
     return access_token, refresh_token, tokens_are_refreshed
 
 
+def _decode_access_token(keycloak_openid, access_token):
+    """
+    Verify the access token locally in `jwks` mode, falling back to Keycloak
+    introspection if the JWKS cannot be fetched, otherwise introspect it.
+    """
+    if current_app.config.get("TOKEN_VALIDATION_MODE") == "jwks":
+        try:
+            return decode_access_token_locally(access_token)
+        except JWKSUnavailableError as e:
+            current_app.app_logger.warning(
+                f"Failed to fetch JWKS, falling back to introspection: {e}"
+            )
+    return introspect_access_token(keycloak_openid, access_token)
+
+
 class InvalidAccessToken(Exception):
     pass
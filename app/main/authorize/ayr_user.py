@@ -1,16 +1,38 @@
-from typing import List
+import uuid
+from functools import cached_property
+from typing import List, NamedTuple
 
-import sqlalchemy
+from flask import current_app
 
 from app.main.authorize.keycloak_manager import (
     get_user_transferring_body_keycloak_groups,
 )
-from app.main.db.models import Body
+from app.main.db.models import Body, db
+from app.main.util.cache import TTLCache
+
+
+class TransferringBody(NamedTuple):
+    BodyId: uuid.UUID
+    Name: str
+
+    def to_session(self) -> dict:
+        return {"BodyId": str(self.BodyId), "Name": self.Name}
+
+    @classmethod
+    def from_session(cls, value: dict | None) -> "TransferringBody | None":
+        if not value:
+            return None
+        return cls(BodyId=uuid.UUID(value["BodyId"]), Name=value["Name"])
 
 
 class AYRUser:
-    def __init__(self, groups: List[str]) -> None:
+    def __init__(
+        self, groups: List[str], transferring_body: dict | None = None
+    ) -> None:
         self.groups = groups
+        self._session_transferring_body = TransferringBody.from_session(
+            transferring_body
+        )
 
     @property
     def can_access_ayr(self):
@@ -28,8 +50,8 @@ class AYRUser:
     def is_standard_user(self) -> bool:
         return "/ayr_user_type/view_dept" in self.groups
 
-    @property
-    def transferring_body(self) -> Body | None:
+    @cached_property
+    def transferring_body(self) -> TransferringBody | None:
         transferring_body_names = get_user_transferring_body_keycloak_groups(
             self.groups
         )
@@ -39,10 +61,48 @@ class AYRUser:
 
         transferring_body_name = transferring_body_names[0]
 
-        try:
-            body = Body.query.filter(
-                Body.Name == transferring_body_name
-            ).one_or_none()
-        except sqlalchemy.orm.exc.MultipleResultsFound:
-            return None
-        return body
+        if (
+            self._session_transferring_body
+            and self._session_transferring_body.Name == transferring_body_name
+        ):
+            return self._session_transferring_body
+
+        return get_transferring_body_by_name(transferring_body_name)
+
+
+def get_transferring_body_by_name(name: str) -> TransferringBody | None:
+    """
+    Resolve a transferring body name to its id, using a process level name to
+    BodyId map for the current Flask app so repeated lookups avoid querying `Body`.
+
+    Returns None if there is no body, or more than one body, with the given name.
+    Only successful lookups are cached, for `TRANSFERRING_BODY_CACHE_TTL` seconds.
+    """
+    cache = current_app.extensions.get("transferring_body_cache")
+    if cache is None:
+        cache = TTLCache(
+            max_size=1024,
+            default_ttl=current_app.config.get(
+                "TRANSFERRING_BODY_CACHE_TTL", 300
+            ),
+        )
+        current_app.extensions["transferring_body_cache"] = cache
+
+    transferring_body = cache.get(name)
+    if transferring_body is not None:
+        return transferring_body
+
+    bodies = (
+        db.session.query(Body.BodyId, Body.Name)
+        .filter(Body.Name == name)
+        .limit(2)
+        .all()
+    )
+    if len(bodies) != 1:
+        return None
+
+    transferring_body = TransferringBody(
+        BodyId=bodies[0].BodyId, Name=bodies[0].Name
+    )
+    cache.set(name, transferring_body)
+    return transferring_body
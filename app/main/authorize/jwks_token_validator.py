@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+
+import keycloak
+from flask import current_app
+from jwcrypto import jwk, jws, jwt
+from jwcrypto.common import JWException
+
+from app.main.flask_config_helpers import (
+    get_keycloak_instance_from_flask_config,
+)
+
+
+class JWKSUnavailableError(Exception):
+    """Raised when the JSON Web Key Set cannot be fetched or read."""
+
+
+class JWKSKeyStore:
+    """
+    Holds the JSON Web Key Set used to verify Keycloak access tokens locally.
+
+    The key set is fetched on first use and only fetched again when a token is
+    signed with a key id (`kid`) that is not in the current set, which is how a
+    Keycloak key rotation shows up. Refreshes are rate limited by
+    `min_refresh_interval` seconds so tokens with unknown key ids cannot be used
+    to hammer Keycloak.
+
+    Args:
+        fetch_jwks (callable): Returns the JWKS as a dict, e.g. `{"keys": [...]}`.
+        min_refresh_interval (float): Minimum seconds between two refreshes.
+        clock (callable, optional): Monotonic clock used to rate limit refreshes.
+    """
+
+    def __init__(
+        self, fetch_jwks, min_refresh_interval=30, clock=time.monotonic
+    ):
+        self.fetch_jwks = fetch_jwks
+        self.min_refresh_interval = min_refresh_interval
+        self._clock = clock
+        self._key_set = None
+        self._last_refreshed_at = None
+        self._lock = threading.Lock()
+
+    def get_key_set(self, kid=None) -> jwk.JWKSet:
+        with self._lock:
+            if self._key_set is None:
+                self._refresh()
+            elif kid is not None and self._key_set.get_key(kid) is None:
+                if (
+                    self._clock() - self._last_refreshed_at
+                    >= self.min_refresh_interval
+                ):
+                    self._refresh()
+            return self._key_set
+
+    def _refresh(self):
+        try:
+            key_set = jwk.JWKSet()
+            key_set.import_keyset(json.dumps(self.fetch_jwks()))
+        except (
+            OSError,
+            JWException,
+            ValueError,
+            keycloak.exceptions.KeycloakError,
+        ) as e:
+            raise JWKSUnavailableError(str(e)) from e
+        self._key_set = key_set
+        self._last_refreshed_at = self._clock()
+
+
+def _load_jwks_file(path):
+    with open(path) as jwks_file:
+        return json.load(jwks_file)
+
+
+def get_jwks_key_store() -> JWKSKeyStore:
+    """
+    Return the JWKS key store for the current Flask app, creating it on first use.
+
+    Keys are read from `KEYCLOAK_JWKS_FILE` when it is set, which allows a local
+    stand-in key set to be used offline, otherwise they are fetched from the
+    Keycloak realm's certs endpoint.
+    """
+    key_store = current_app.extensions.get("jwks_key_store")
+    if key_store is None:
+        jwks_file = current_app.config.get("KEYCLOAK_JWKS_FILE")
+        if jwks_file:
+
+            def fetch_jwks():
+                return _load_jwks_file(jwks_file)
+
+        else:
+            keycloak_openid = get_keycloak_instance_from_flask_config()
+            fetch_jwks = keycloak_openid.certs
+        key_store = JWKSKeyStore(fetch_jwks)
+        current_app.extensions["jwks_key_store"] = key_store
+    return key_store
+
+
+def get_expected_token_issuer():
+    issuer = current_app.config.get("KEYCLOAK_TOKEN_ISSUER")
+    if issuer:
+        return issuer
+    base_uri = current_app.config["KEYCLOAK_BASE_URI"].rstrip("/")
+    return f"{base_uri}/realms/{current_app.config['KEYCLOAK_REALM_NAME']}"
+
+
+def is_issued_to_client(claims, client_id):
+    """
+    Return whether an access token was issued to, or for, the AYR client.
+
+    Keycloak sets the authorized party (`azp`) to the client a token was
+    issued to, and lists the clients it may be used with in the audience
+    (`aud`), a string or list.
+    """
+    if claims.get("azp") == client_id:
+        return True
+    audience = claims.get("aud", [])
+    if isinstance(audience, str):
+        audience = [audience]
+    return client_id in audience
+
+
+def decode_access_token_locally(access_token):
+    """
+    Verify a Keycloak access token against the realm's JWKS without calling Keycloak.
+
+    Returns a dict shaped like a Keycloak introspection response: the token's claims
+    (e.g. `sub`, `groups` and `exp`) with `active` set to True when the signature,
+    issuer and expiry are valid and the token was issued to `KEYCLOAK_CLIENT_ID`,
+    or just `{"active": False}` otherwise.
+
+    Raises:
+        JWKSUnavailableError: If the JWKS could not be fetched, so the token
+            could not be checked either way.
+    """
+    try:
+        jws_token = jws.JWS()
+        jws_token.deserialize(access_token)
+        kid = jws_token.jose_header.get("kid")
+
+        key_set = get_jwks_key_store().get_key_set(kid)
+        verified_token = jwt.JWT(
+            jwt=access_token,
+            key=key_set,
+            check_claims={"exp": None, "iss": get_expected_token_issuer()},
+            expected_type="JWS",
+        )
+        claims = json.loads(verified_token.claims)
+    except (JWException, ValueError):
+        return {"active": False}
+
+    if not is_issued_to_client(
+        claims, current_app.config["KEYCLOAK_CLIENT_ID"]
+    ):
+        return {"active": False}
+
+    return {**claims, "active": True}
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import time
+
+import redis
+from flask import current_app
+
+from app.main.util.cache import TTLCache
+
+REDIS_KEY_PREFIX = "ayr:token_introspection:"
+
+
+class TokenIntrospectionCache:
+    """
+    Cache of active Keycloak token introspection responses.
+
+    Entries are keyed on a SHA-256 hash of the access token so raw tokens are never
+    held as keys, and live for at most `ttl` seconds, further bounded by the `exp`
+    claim of the introspected token. Inactive introspection responses are never
+    cached so the refresh flow always sees the current state of a token.
+
+    An optional Redis client adds a shared second tier so that workers can reuse
+    each other's introspection results. Redis failures are logged and treated as
+    cache misses.
+    """
+
+    def __init__(self, max_size, ttl, redis_client=None):
+        self.ttl = ttl
+        self.redis_client = redis_client
+        self._local_cache = TTLCache(max_size=max_size, default_ttl=ttl)
+
+    @staticmethod
+    def hash_token(access_token):
+        return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+    def get(self, access_token):
+        token_hash = self.hash_token(access_token)
+        introspection = self._local_cache.get(token_hash)
+        if introspection is not None:
+            return introspection
+
+        introspection = self._get_from_redis(token_hash)
+        if introspection is not None:
+            self._local_cache.set(
+                token_hash, introspection, ttl=self._get_ttl(introspection)
+            )
+        return introspection
+
+    def set(self, access_token, introspection):
+        if not introspection.get("active"):
+            return
+
+        ttl = self._get_ttl(introspection)
+        if ttl <= 0:
+            return
+
+        token_hash = self.hash_token(access_token)
+        self._local_cache.set(token_hash, introspection, ttl=ttl)
+        self._set_in_redis(token_hash, introspection, ttl)
+
+    def invalidate(self, access_token):
+        token_hash = self.hash_token(access_token)
+        self._local_cache.pop(token_hash)
+        if self.redis_client is None:
+            return
+        try:
+            self.redis_client.delete(f"{REDIS_KEY_PREFIX}{token_hash}")
+        except redis.exceptions.RedisError as e:
+            current_app.app_logger.warning(
+                f"Failed to invalidate token introspection in Redis: {e}"
+            )
+
+    def _get_ttl(self, introspection):
+        """Return the number of seconds an introspection response may be cached for."""
+        ttl = self.ttl
+        expires_at = introspection.get("exp")
+        if expires_at is not None:
+            ttl = min(ttl, int(expires_at - time.time()))
+        return ttl
+
+    def _get_from_redis(self, token_hash):
+        if self.redis_client is None:
+            return None
+        try:
+            cached_value = self.redis_client.get(
+                f"{REDIS_KEY_PREFIX}{token_hash}"
+            )
+        except redis.exceptions.RedisError as e:
+            current_app.app_logger.warning(
+                f"Failed to read token introspection from Redis: {e}"
+            )
+            return None
+        if cached_value is None:
+            return None
+        return json.loads(cached_value)
+
+    def _set_in_redis(self, token_hash, introspection, ttl):
+        if self.redis_client is None:
+            return
+        try:
+            self.redis_client.setex(
+                f"{REDIS_KEY_PREFIX}{token_hash}",
+                ttl,
+                json.dumps(introspection),
+            )
+        except redis.exceptions.RedisError as e:
+            current_app.app_logger.warning(
+                f"Failed to write token introspection to Redis: {e}"
+            )
+
+
+def get_token_introspection_cache():
+    """
+    Return the token introspection cache for the current Flask app, creating it
+    from the app config on first use.
+    """
+    cache = current_app.extensions.get("token_introspection_cache")
+    if cache is None:
+        redis_url = current_app.config.get("TOKEN_CACHE_REDIS_URL")
+        redis_client = redis.Redis.from_url(redis_url) if redis_url else None
+        cache = TokenIntrospectionCache(
+            max_size=current_app.config.get("TOKEN_CACHE_MAX_SIZE", 1024),
+            ttl=current_app.config.get("TOKEN_CACHE_TTL", 60),
+            redis_client=redis_client,
+        )
+        current_app.extensions["token_introspection_cache"] = cache
+    return cache
+
+
+def introspect_access_token(keycloak_openid, access_token):
+    """
+    Introspect `access_token` with Keycloak, reusing a cached response while the
+    token is known to be active.
+    """
+    cache = get_token_introspection_cache()
+    decoded_token = cache.get(access_token)
+    if decoded_token is None:
+        decoded_token = keycloak_openid.introspect(access_token)
+        cache.set(access_token, decoded_token)
+    return decoded_token
@@ -0,0 +1,197 @@
+import re
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, text
+from sqlalchemy.schema import CreateIndex
+
+from app.main.db.models import (
+    Body,
+    Consignment,
+    File,
+    FileMetadata,
+    Series,
+    db,
+)
+
+# Indexes on the Metadata Store tables that the webapp's queries rely on. The
+# tables are defined externally, so these are only created by `flask db-indexes
+# apply`, or by `db.create_all()` in tests, and are reported at startup if missing.
+AYR_INDEXES = [
+    # files of a consignment, which are always filtered on lower("FileType")
+    db.Index(
+        "ix_file_consignment_id_lower_file_type",
+        File.ConsignmentId,
+        func.lower(File.FileType),
+    ),
+    # metadata properties of a file, pivoted or looked up by name
+    db.Index(
+        "ix_file_metadata_file_id_property_name",
+        FileMetadata.FileId,
+        FileMetadata.PropertyName,
+    ),
+    db.Index("ix_consignment_series_id", Consignment.SeriesId),
+    db.Index(
+        "ix_consignment_consignment_reference",
+        Consignment.ConsignmentReference,
+    ),
+    db.Index("ix_series_body_id", Series.BodyId),
+    db.Index("ix_body_name", Body.Name),
+]
+
+
+EXISTING_INDEX_KEYS_QUERY = """
+SELECT
+    t.relname AS table_name,
+    array(
+        SELECT pg_get_indexdef(ix.indexrelid, k, true)
+        FROM generate_series(1, ix.indnkeyatts) AS k
+        ORDER BY k
+    ) AS index_keys
+FROM pg_index ix
+JOIN pg_class t ON t.oid = ix.indrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE n.nspname = current_schema() AND ix.indpred IS NULL AND ix.indisvalid
+"""
+
+
+def _normalise_index_key(index_key: str) -> str:
+    """
+    Strip the quotes, parentheses, casts and whitespace from an indexed column
+    or expression, which PostgreSQL adds to or removes from its definition.
+    """
+    index_key = re.sub(r"::[\w ]+", "", index_key)
+    return re.sub(r'[\s"()]', "", index_key)
+
+
+def _get_index_keys(index, dialect) -> tuple[str, ...]:
+    return tuple(
+        _normalise_index_key(
+            str(
+                expression.compile(
+                    dialect=dialect,
+                    compile_kwargs={
+                        "include_table": False,
+                        "literal_binds": True,
+                    },
+                )
+            )
+        )
+        for expression in index.expressions
+    )
+
+
+def get_missing_indexes(connection) -> list:
+    """
+    Return the indexes in `AYR_INDEXES` that are not covered by an index in the
+    database: one on the same table, whatever its name, whose leading indexed
+    columns or expressions are those of the index, and that is neither partial
+    nor invalid, as left by a failed or cancelled CREATE INDEX CONCURRENTLY.
+    """
+    existing_index_keys = {}
+    for table_name, index_keys in connection.execute(
+        text(EXISTING_INDEX_KEYS_QUERY)
+    ):
+        existing_index_keys.setdefault(table_name, []).append(
+            tuple(_normalise_index_key(index_key) for index_key in index_keys)
+        )
+
+    missing_indexes = []
+    for index in AYR_INDEXES:
+        index_keys = _get_index_keys(index, connection.dialect)
+        if not any(
+            keys[: len(index_keys)] == index_keys
+            for keys in existing_index_keys.get(index.table.name, [])
+        ):
+            missing_indexes.append(index)
+    return missing_indexes
+
+
+def apply_indexes(engine, concurrently: bool = True) -> list[str]:
+    """
+    Create the indexes in `AYR_INDEXES` that do not exist in the database,
+    first dropping any index under the same name, such as an invalid one left
+    by a failed build, which would otherwise stop it being created.
+
+    With `concurrently` set the indexes are built with CREATE INDEX CONCURRENTLY,
+    which does not block writes to the tables while they are built, so they can
+    be applied to a live database.
+
+    Returns the names of the indexes created.
+    """
+    created_index_names = []
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as connection:
+        for index in get_missing_indexes(connection):
+            index_name = connection.dialect.identifier_preparer.quote(
+                index.name
+            )
+            connection.execute(
+                text(
+                    f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}"
+                    f"IF EXISTS {index_name}"
+                )
+            )
+            statement = str(
+                CreateIndex(index, if_not_exists=True).compile(
+                    dialect=connection.dialect
+                )
+            )
+            if concurrently:
+                statement = statement.replace(
+                    "CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1
+                )
+            connection.execute(text(statement))
+            created_index_names.append(index.name)
+    return created_index_names
+
+
+def report_missing_indexes() -> list[str]:
+    """
+    Log a warning listing the indexes in `AYR_INDEXES` that do not exist in the
+    database of the current Flask app, and return their names.
+    """
+    with db.engine.connect() as connection:
+        missing_index_names = [
+            index.name for index in get_missing_indexes(connection)
+        ]
+    if missing_index_names:
+        current_app.app_logger.warning(
+            "Missing database indexes, apply them with `flask db-indexes apply`: "
+            + ", ".join(missing_index_names)
+        )
+    return missing_index_names
+
+
+db_indexes_cli = AppGroup(
+    "db-indexes", help="Manage the indexes the webapp's queries rely on."
+)
+
+
+@db_indexes_cli.command("check")
+def check_indexes_command():
+    """List the indexes that do not exist in the database."""
+    with db.engine.connect() as connection:
+        missing_indexes = get_missing_indexes(connection)
+    for index in missing_indexes:
+        click.echo(f"Missing: {index.name} on {index.table.name}")
+    if missing_indexes:
+        raise SystemExit(1)
+    click.echo("All indexes exist.")
+
+
+@db_indexes_cli.command("apply")
+@click.option(
+    "--concurrently/--no-concurrently",
+    default=True,
+    help="Build the indexes without blocking writes to the tables.",
+)
+def apply_indexes_command(concurrently):
+    """Create the indexes that do not exist in the database."""
+    created_index_names = apply_indexes(db.engine, concurrently=concurrently)
+    for index_name in created_index_names:
+        click.echo(f"Created: {index_name}")
+    if not created_index_names:
+        click.echo("All indexes exist.")
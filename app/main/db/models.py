@@ -1,5 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 
 db = SQLAlchemy()
@@ -96,3 +104,83 @@ class FFIDMetadata(db.Model):
         foreign_keys=[FileId],
         uselist=False,
     )
+
+
+class FileMetadataFlat(db.Model):
+    """
+    One row per file with its `FileMetadata` properties pivoted into typed
+    columns. Maintained on ingest by the opensearch indexer, see
+    `data_management/opensearch_indexer/opensearch_indexer/file_metadata_flat.py`.
+    """
+
+    __tablename__ = "file_metadata_flat"
+    FileId = db.Column(
+        UUID(as_uuid=True), db.ForeignKey("File.FileId"), primary_key=True
+    )
+    ConsignmentId = db.Column(
+        UUID(as_uuid=True), ForeignKey("Consignment.ConsignmentId")
+    )
+    former_reference = db.Column(Text)
+    alternative_title = db.Column(Text)
+    description = db.Column(Text)
+    alternative_description = db.Column(Text)
+    closure_type = db.Column(Text)
+    closure_start_date = db.Column(Date)
+    closure_period = db.Column(Text)
+    opening_date = db.Column(Date)
+    date_last_modified = db.Column(Date)
+    end_date = db.Column(Date)
+    foi_exemption_code = db.Column(Text)
+    translated_title = db.Column(Text)
+    related_material = db.Column(Text)
+    restrictions_on_use = db.Column(Text)
+    note = db.Column(Text)
+    held_by = db.Column(Text)
+    legal_status = db.Column(Text)
+    rights_copyright = db.Column(Text)
+    language = db.Column(Text)
+    __table_args__ = (
+        db.Index("ix_file_metadata_flat_consignment_id", "ConsignmentId"),
+        db.Index("ix_file_metadata_flat_closure_type", "closure_type"),
+        db.Index("ix_file_metadata_flat_end_date", "end_date"),
+        db.Index(
+            "ix_file_metadata_flat_date_last_modified", "date_last_modified"
+        ),
+        db.Index("ix_file_metadata_flat_opening_date", "opening_date"),
+    )
+
+
+class ConsignmentBrowseSummary(db.Model):
+    """
+    One row per consignment holding files, with the number of files it holds.
+    Maintained on ingest by the opensearch indexer, see
+    `data_management/opensearch_indexer/opensearch_indexer/consignment_browse_summary.py`.
+    """
+
+    __tablename__ = "consignment_browse_summary"
+    ConsignmentId = db.Column(
+        UUID(as_uuid=True),
+        ForeignKey("Consignment.ConsignmentId"),
+        primary_key=True,
+    )
+    ConsignmentReference = db.Column(Text)
+    SeriesId = db.Column(UUID(as_uuid=True), ForeignKey("Series.SeriesId"))
+    TransferCompleteDatetime = db.Column(DateTime)
+    records_held = db.Column(Integer, nullable=False)
+    __table_args__ = (
+        db.Index("ix_consignment_browse_summary_series_id", "SeriesId"),
+    )
+
+
+class SearchIndexGeneration(db.Model):
+    """
+    One row per transferring body with the number of times one of its
+    consignments has been indexed in OpenSearch. Maintained by the opensearch
+    indexer, see
+    `data_management/opensearch_indexer/opensearch_indexer/search_index_generation.py`.
+    """
+
+    __tablename__ = "search_index_generation"
+    BodyId = db.Column(UUID(as_uuid=True), primary_key=True)
+    generation = db.Column(Integer, nullable=False)
+    indexed_at = db.Column(DateTime, nullable=False)
@@ -1,34 +1,33 @@
+import base64
+import binascii
+import json
 import uuid
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
 
 from flask import current_app
-from sqlalchemy import DATE, and_, desc, func
+from sqlalchemy import DATE, Date, and_, desc, func, or_
 
-from app.main.db.models import Body, Consignment, File, FileMetadata, Series, db
+from app.main.db.models import (
+    Body,
+    Consignment,
+    ConsignmentBrowseSummary,
+    FFIDMetadata,
+    File,
+    FileMetadata,
+    FileMetadataFlat,
+    Series,
+    db,
+)
 
 
 def build_browse_query(
     transferring_body_id=None, filters=None, sorting_orders=None
 ):
-    sub_query = (
-        db.session.query(
-            Body.BodyId.label("transferring_body_id"),
-            Body.Name.label("transferring_body"),
-            Series.SeriesId.label("series_id"),
-            Series.Name.label("series"),
-            func.max(Consignment.TransferCompleteDatetime).label(
-                "last_record_transferred"
-            ),
-            func.count(func.distinct(Consignment.ConsignmentReference)).label(
-                "consignment_in_series"
-            ),
-            func.count(func.distinct(File.FileId)).label("records_held"),
-        )
-        .join(File.consignment)
-        .join(Consignment.series)
-        .join(Series.body)
-        .where(func.lower(File.FileType) == "file")
-        .group_by(Body.BodyId, Series.SeriesId)
-    ).subquery()
+    if current_app.config.get("USE_CONSIGNMENT_BROWSE_SUMMARY"):
+        sub_query = _build_summary_browse_sub_query()
+    else:
+        sub_query = _build_browse_sub_query()
 
     query = db.session.query(
         sub_query.c.transferring_body_id,
@@ -61,28 +60,58 @@ def build_browse_query(
     return query
 
 
-def build_browse_series_query(series_id, filters=None, sorting_orders=None):
-    sub_query = (
+def _build_browse_sub_query():
+    return (
         db.session.query(
+            Body.BodyId.label("transferring_body_id"),
             Body.Name.label("transferring_body"),
+            Series.SeriesId.label("series_id"),
             Series.Name.label("series"),
             func.max(Consignment.TransferCompleteDatetime).label(
                 "last_record_transferred"
             ),
+            func.count(func.distinct(Consignment.ConsignmentReference)).label(
+                "consignment_in_series"
+            ),
             func.count(func.distinct(File.FileId)).label("records_held"),
-            Consignment.ConsignmentId.label("consignment_id"),
-            Consignment.ConsignmentReference.label("consignment_reference"),
         )
         .join(File.consignment)
         .join(Consignment.series)
         .join(Series.body)
-        .where(
-            (func.lower(File.FileType) == "file")
-            & (Series.SeriesId == series_id)
+        .where(func.lower(File.FileType) == "file")
+        .group_by(Body.BodyId, Series.SeriesId)
+    ).subquery()
+
+
+def _build_summary_browse_sub_query():
+    return (
+        db.session.query(
+            Body.BodyId.label("transferring_body_id"),
+            Body.Name.label("transferring_body"),
+            Series.SeriesId.label("series_id"),
+            Series.Name.label("series"),
+            func.max(ConsignmentBrowseSummary.TransferCompleteDatetime).label(
+                "last_record_transferred"
+            ),
+            func.count(
+                func.distinct(ConsignmentBrowseSummary.ConsignmentReference)
+            ).label("consignment_in_series"),
+            func.sum(ConsignmentBrowseSummary.records_held).label(
+                "records_held"
+            ),
         )
-        .group_by(Body.BodyId, Series.SeriesId, Consignment.ConsignmentId)
+        .join(Series, ConsignmentBrowseSummary.SeriesId == Series.SeriesId)
+        .join(Series.body)
+        .group_by(Body.BodyId, Series.SeriesId)
     ).subquery()
 
+
+def build_browse_series_query(series_id, filters=None, sorting_orders=None):
+    if current_app.config.get("USE_CONSIGNMENT_BROWSE_SUMMARY"):
+        sub_query = _build_summary_browse_series_sub_query(series_id)
+    else:
+        sub_query = _build_browse_series_sub_query(series_id)
+
     query = db.session.query(
         sub_query.c.transferring_body,
         sub_query.c.series,
@@ -110,9 +139,310 @@ def build_browse_series_query(series_id, filters=None, sorting_orders=None):
     return query
 
 
+def _build_browse_series_sub_query(series_id):
+    return (
+        db.session.query(
+            Body.Name.label("transferring_body"),
+            Series.Name.label("series"),
+            func.max(Consignment.TransferCompleteDatetime).label(
+                "last_record_transferred"
+            ),
+            func.count(func.distinct(File.FileId)).label("records_held"),
+            Consignment.ConsignmentId.label("consignment_id"),
+            Consignment.ConsignmentReference.label("consignment_reference"),
+        )
+        .join(File.consignment)
+        .join(Consignment.series)
+        .join(Series.body)
+        .where(
+            (func.lower(File.FileType) == "file")
+            & (Series.SeriesId == series_id)
+        )
+        .group_by(Body.BodyId, Series.SeriesId, Consignment.ConsignmentId)
+    ).subquery()
+
+
+def _build_summary_browse_series_sub_query(series_id):
+    return (
+        db.session.query(
+            Body.Name.label("transferring_body"),
+            Series.Name.label("series"),
+            ConsignmentBrowseSummary.TransferCompleteDatetime.label(
+                "last_record_transferred"
+            ),
+            ConsignmentBrowseSummary.records_held,
+            ConsignmentBrowseSummary.ConsignmentId.label("consignment_id"),
+            ConsignmentBrowseSummary.ConsignmentReference.label(
+                "consignment_reference"
+            ),
+        )
+        .join(Series, ConsignmentBrowseSummary.SeriesId == Series.SeriesId)
+        .join(Series.body)
+        .where(ConsignmentBrowseSummary.SeriesId == series_id)
+    ).subquery()
+
+
+# sort fields of the browse consignment page whose sort column is a date
+BROWSE_CONSIGNMENT_DATE_SORT_FIELDS = (
+    "date_last_modified",
+    "end_date",
+    "opening_date",
+    "date_of_record",
+)
+
+
+class BrowseConsignmentCursor(NamedTuple):
+    """
+    Position in the rows of a browse consignment query that a keyset paginated
+    page starts after, or ends before if `before` is True.
+
+    `sort` is the sort key, e.g. "file_name-asc", the cursor was created for and
+    `sort_value`, `file_name` and `file_id` are the sort column value, file name
+    and file id of the row at the position. `total` is the number of rows counted
+    on the page the cursor was created from, so pages found from it are not
+    counted again.
+    """
+
+    sort: str
+    sort_value: str | None
+    file_name: str | None
+    file_id: str
+    before: bool = False
+    total: int | None = None
+
+    @classmethod
+    def from_row(
+        cls, sort: str, row, before: bool = False, total: int | None = None
+    ) -> "BrowseConsignmentCursor":
+        """Create a cursor at a row of a keyset paginated browse query."""
+        sort_value = row.sort_value
+        if isinstance(sort_value, date):
+            sort_value = sort_value.isoformat()
+        elif sort_value is not None:
+            sort_value = str(sort_value)
+        return cls(
+            sort, sort_value, row.file_name, str(row.file_id), before, total
+        )
+
+    def encode(self) -> str:
+        token = json.dumps(self._asdict(), separators=(",", ":"))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "BrowseConsignmentCursor":
+        """Decode a cursor token, raising ValueError if it is not valid."""
+        try:
+            padded_token = token + "=" * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded_token))
+            cursor = cls(**values)
+            uuid.UUID(cursor.file_id)
+        except (
+            binascii.Error,
+            UnicodeDecodeError,
+            TypeError,
+            AttributeError,
+            json.JSONDecodeError,
+        ) as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+        if not isinstance(cursor.sort, str) or not all(
+            value is None or isinstance(value, str)
+            for value in (cursor.sort_value, cursor.file_name)
+        ):
+            raise ValueError("Invalid cursor: values are not strings")
+        if cursor.total is not None and (
+            type(cursor.total) is not int or cursor.total < 0
+        ):
+            raise ValueError("Invalid cursor: total is not a count")
+        sort_field = cursor.sort.rsplit("-", 1)[0]
+        if (
+            sort_field in BROWSE_CONSIGNMENT_DATE_SORT_FIELDS
+            and cursor.sort_value is not None
+        ):
+            date.fromisoformat(cursor.sort_value)
+        return cursor
+
+
 def build_browse_consignment_query(
-    consignment_id: uuid.UUID, filters=None, sorting_orders=None
+    consignment_id: uuid.UUID,
+    filters=None,
+    sorting_orders=None,
+    keyset=False,
+    cursor: BrowseConsignmentCursor | None = None,
 ):
+    """
+    Build the query for the files of a consignment on the browse consignment page.
+
+    With `keyset` set, rows are ordered by the active sort column with the file id
+    as a tiebreaker and hold two extra columns: `sort_value`, the raw value of the
+    sort column used to create cursors, and `total_count`, the number of rows
+    before any cursor is applied. A `cursor` then restricts the rows to those
+    after, or before, it, in which case rows are returned in reverse order, and
+    if it holds the total number of rows they are not counted again, so rows
+    have no `total_count`.
+    """
+    if current_app.config.get("USE_FILE_METADATA_FLAT"):
+        sub_query = _build_flat_browse_consignment_sub_query(consignment_id)
+    else:
+        sub_query = _build_pivoted_browse_consignment_sub_query(consignment_id)
+
+    query = db.session.query(
+        sub_query.c.file_id,
+        sub_query.c.file_name,
+        func.to_char(
+            sub_query.c.date_last_modified,
+            current_app.config["DEFAULT_DATE_FORMAT"],
+        ).label("date_last_modified"),
+        func.to_char(
+            sub_query.c.end_date,
+            current_app.config["DEFAULT_DATE_FORMAT"],
+        ).label("end_date"),
+        sub_query.c.closure_type,
+        func.to_char(
+            sub_query.c.opening_date,
+            current_app.config["DEFAULT_DATE_FORMAT"],
+        ).label("opening_date"),
+        func.to_char(
+            func.coalesce(sub_query.c.end_date, sub_query.c.date_last_modified),
+            current_app.config["DEFAULT_DATE_FORMAT"],
+        ).label("date_of_record"),
+    )
+
+    if filters:
+        record_status = filters.get("record_status")
+        if record_status and record_status.lower() != "all":
+            query = query.filter(
+                func.lower(sub_query.c.closure_type) == record_status.lower()
+            )
+
+        date_filter = None
+        date_filter_field = filters.get("date_filter_field")
+        if (
+            date_filter_field
+            and date_filter_field.lower() == "date_last_modified"
+        ):
+            date_filter = _build_date_of_record_range_filter(
+                sub_query, filters.get("date_from"), filters.get("date_to")
+            )
+        elif date_filter_field and date_filter_field.lower() == "opening_date":
+            date_filter = _build_date_range_filter(
+                sub_query.c.opening_date,
+                filters.get("date_from"),
+                filters.get("date_to"),
+            )
+
+        if date_filter is not None:
+            query = query.filter(date_filter)
+
+    if keyset:
+        return _build_keyset_browse_consignment_query(
+            query, sub_query, sorting_orders, cursor
+        )
+
+    return _build_browse_consignment_sorting_orders(
+        query, sub_query, sorting_orders
+    )
+
+
+def _build_browse_consignment_sorting_orders(query, sub_query, sorting_orders):
+    if sorting_orders:
+        if "date_of_record" in sorting_orders:
+            sort_field = sub_query.c.sort_date
+            if sorting_orders["date_of_record"] == "desc":
+                return query.order_by(desc(sort_field))
+            return query.order_by(sort_field)
+        return _build_sorting_orders(query, sub_query, sorting_orders)
+    return query.order_by(sub_query.c.file_name)
+
+
+def get_browse_consignment_sort_key(sorting_orders) -> str:
+    """
+    Return the key, e.g. "file_name-asc", of the column a keyset paginated browse
+    consignment query is sorted on, which is the first of its sorting orders or
+    the file name in ascending order if there are none.
+    """
+    for field, order in (sorting_orders or {}).items():
+        return f"{field}-{order}"
+    return "file_name-asc"
+
+
+def _build_keyset_browse_consignment_query(
+    query, sub_query, sorting_orders, cursor
+):
+    sort_key = get_browse_consignment_sort_key(sorting_orders)
+    field, order = sort_key.rsplit("-", 1)
+    if field == "date_of_record":
+        sort_column = sub_query.c.sort_date
+    else:
+        sort_column = getattr(sub_query.c, field, sub_query.c.file_name)
+
+    # rows with the same sort value are ordered by file name, as they were
+    # before keyset pagination, and then by file id so the order is total
+    keyset = [
+        (sort_column, order == "desc"),
+        (sub_query.c.file_name, False),
+        (sub_query.c.file_id, False),
+    ]
+
+    if cursor is not None and cursor.sort != sort_key:
+        cursor = None
+
+    query = query.add_columns(sort_column.label("sort_value"))
+    if cursor is None or cursor.total is None:
+        query = query.add_columns(
+            db.session.query(func.count())
+            .select_from(query.order_by(None).subquery())
+            .scalar_subquery()
+            .label("total_count")
+        )
+
+    if cursor is not None:
+        if cursor.before:
+            keyset = [(column, not descending) for column, descending in keyset]
+        sort_value = cursor.sort_value
+        if sort_value is not None and isinstance(sort_column.type, Date):
+            sort_value = date.fromisoformat(sort_value)
+        query = query.filter(
+            _build_keyset_filter(
+                keyset,
+                [sort_value, cursor.file_name, uuid.UUID(cursor.file_id)],
+            )
+        )
+
+    return query.order_by(
+        *(
+            desc(column) if descending else column
+            for column, descending in keyset
+        )
+    )
+
+
+def _build_keyset_filter(keyset, values):
+    """
+    Build the condition for the rows after the row with the given values of the
+    keyset columns, in the order given by the columns and whether each is sorted
+    in descending order. PostgreSQL sorts NULLs last in ascending and first in
+    descending order.
+    """
+    conditions = []
+    equal_conditions = []
+    for (column, descending), value in zip(keyset, values):
+        if value is None:
+            after = column.is_not(None) if descending else None
+            equal = column.is_(None)
+        else:
+            after = (
+                column < value
+                if descending
+                else or_(column > value, column.is_(None))
+            )
+            equal = column == value
+        if after is not None:
+            conditions.append(and_(*equal_conditions, after))
+        equal_conditions.append(equal)
+    return or_(*conditions)
+
+
+def _build_pivoted_browse_consignment_sub_query(consignment_id: uuid.UUID):
     select = db.session.query(
         File.FileId.label("file_id"),
         File.FileName.label("file_name"),
@@ -190,69 +520,28 @@ def build_browse_consignment_query(
         .order_by(File.FileName)
     ).subquery()
 
-    query = db.session.query(
-        sub_query.c.file_id,
-        sub_query.c.file_name,
-        func.to_char(
-            sub_query.c.date_last_modified,
-            current_app.config["DEFAULT_DATE_FORMAT"],
-        ).label("date_last_modified"),
-        func.to_char(
-            sub_query.c.end_date,
-            current_app.config["DEFAULT_DATE_FORMAT"],
-        ).label("end_date"),
-        sub_query.c.closure_type,
-        func.to_char(
-            sub_query.c.opening_date,
-            current_app.config["DEFAULT_DATE_FORMAT"],
-        ).label("opening_date"),
-        func.to_char(
-            func.coalesce(sub_query.c.end_date, sub_query.c.date_last_modified),
-            current_app.config["DEFAULT_DATE_FORMAT"],
-        ).label("date_of_record"),
-    )
-
-    if filters:
-        record_status = filters.get("record_status")
-        if record_status and record_status.lower() != "all":
-            query = query.filter(
-                func.lower(sub_query.c.closure_type) == record_status.lower()
-            )
-
-        date_filter = None
-        date_filter_field = filters.get("date_filter_field")
-        if (
-            date_filter_field
-            and date_filter_field.lower() == "date_last_modified"
-        ):
-            date_filter = _build_date_range_filter(
-                sub_query.c.sort_date,
-                filters.get("date_from"),
-                filters.get("date_to"),
-            )
-        elif date_filter_field and date_filter_field.lower() == "opening_date":
-            date_filter = _build_date_range_filter(
-                sub_query.c.opening_date,
-                filters.get("date_from"),
-                filters.get("date_to"),
-            )
-
-        if date_filter is not None:
-            query = query.filter(date_filter)
+    return sub_query
 
-    if sorting_orders:
-        if "date_of_record" in sorting_orders:
-            sort_field = sub_query.c.sort_date
-            if sorting_orders["date_of_record"] == "desc":
-                query = query.order_by(desc(sort_field))
-            else:
-                query = query.order_by(sort_field)
-        else:
-            query = _build_sorting_orders(query, sub_query, sorting_orders)
-    else:
-        query = query.order_by(sub_query.c.file_name)
 
-    return query
+def _build_flat_browse_consignment_sub_query(consignment_id: uuid.UUID):
+    return (
+        db.session.query(
+            File.FileId.label("file_id"),
+            File.FileName.label("file_name"),
+            FileMetadataFlat.date_last_modified,
+            FileMetadataFlat.end_date,
+            FileMetadataFlat.closure_type,
+            FileMetadataFlat.opening_date,
+            func.coalesce(
+                FileMetadataFlat.end_date, FileMetadataFlat.date_last_modified
+            ).label("sort_date"),
+        )
+        .outerjoin(FileMetadataFlat, File.FileId == FileMetadataFlat.FileId)
+        .filter(
+            File.ConsignmentId == consignment_id,
+            func.lower(File.FileType) == "file",
+        )
+    ).subquery()
 
 
 def _build_browse_filters(query, sub_query, filters):
@@ -298,6 +587,53 @@ def _build_sorting_orders(query, sub_query, sorting_orders):
     return query
 
 
+class FileRecord(NamedTuple):
+    FileId: uuid.UUID
+    FileName: str
+    CiteableReference: str | None
+    ConsignmentId: uuid.UUID
+    ConsignmentReference: str
+    SeriesId: uuid.UUID
+    SeriesName: str
+    BodyId: uuid.UUID
+    BodyName: str
+    PUID: str | None
+    Extension: str | None
+
+
+def get_file_record(file_id: uuid.UUID) -> FileRecord | None:
+    """
+    Load a file together with its consignment, series, transferring body and
+    FFID metadata in a single query.
+
+    Returns None if there is no file with the given id.
+    """
+    row = (
+        db.session.query(
+            File.FileId,
+            File.FileName,
+            File.CiteableReference,
+            Consignment.ConsignmentId,
+            Consignment.ConsignmentReference,
+            Series.SeriesId,
+            Series.Name.label("SeriesName"),
+            Body.BodyId,
+            Body.Name.label("BodyName"),
+            FFIDMetadata.PUID,
+            FFIDMetadata.Extension,
+        )
+        .join(File.consignment)
+        .join(Consignment.series)
+        .join(Series.body)
+        .outerjoin(File.ffid_metadata)
+        .filter(File.FileId == file_id)
+        .one_or_none()
+    )
+    if row is None:
+        return None
+    return FileRecord(**row._mapping)
+
+
 def get_file_metadata(file_id: uuid.UUID):
     query = _get_file_metadata_query(file_id)
     row = query.first_or_404()
@@ -305,6 +641,64 @@ def get_file_metadata(file_id: uuid.UUID):
 
 
 def _get_file_metadata_query(file_id: uuid.UUID):
+    if current_app.config.get("USE_FILE_METADATA_FLAT"):
+        sub_query = _get_flat_file_metadata_sub_query(file_id)
+    else:
+        sub_query = _get_pivoted_file_metadata_sub_query(file_id)
+
+    query = (
+        db.session.query(
+            sub_query.c.file_id,
+            sub_query.c.file_name,
+            sub_query.c.file_path,
+            sub_query.c.citeable_reference,
+            sub_query.c.alternative_title,
+            sub_query.c.description,
+            sub_query.c.alternative_description,
+            sub_query.c.closure_type,
+            func.to_char(
+                sub_query.c.closure_start_date,
+                current_app.config["DEFAULT_DATE_FORMAT"],
+            ).label("closure_start_date"),
+            sub_query.c.closure_period,
+            func.to_char(
+                sub_query.c.opening_date,
+                current_app.config["DEFAULT_DATE_FORMAT"],
+            ).label("opening_date"),
+            func.to_char(
+                func.coalesce(
+                    sub_query.c.end_date, sub_query.c.date_last_modified
+                ),
+                current_app.config["DEFAULT_DATE_FORMAT"],
+            ).label("date_of_record"),
+            func.to_char(
+                sub_query.c.end_date,
+                current_app.config["DEFAULT_DATE_FORMAT"],
+            ).label("end_date"),
+            sub_query.c.foi_exemption_code,
+            sub_query.c.file_reference,
+            sub_query.c.former_reference,
+            sub_query.c.translated_title,
+            sub_query.c.related_material,
+            sub_query.c.restrictions_on_use,
+            sub_query.c.note,
+            sub_query.c.held_by,
+            sub_query.c.legal_status,
+            sub_query.c.rights_copyright,
+            sub_query.c.language,
+            Body.Name.label("transferring_body"),
+            Series.Name.label("series"),
+            Consignment.ConsignmentReference.label("consignment_reference"),
+        )
+        .join(File.consignment)
+        .join(Consignment.series)
+        .join(Series.body)
+    ).where(sub_query.c.file_id == File.FileId)
+
+    return query
+
+
+def _get_pivoted_file_metadata_sub_query(file_id: uuid.UUID):
     select = db.session.query(
         File.FileId.label("file_id"),
         File.FileName.label("file_name"),
@@ -497,68 +891,91 @@ def _get_file_metadata_query(file_id: uuid.UUID):
         .group_by(File.FileId)
     ).subquery()
 
-    query = (
+    return sub_query
+
+
+def _get_flat_file_metadata_sub_query(file_id: uuid.UUID):
+    return (
         db.session.query(
-            sub_query.c.file_id,
-            sub_query.c.file_name,
-            sub_query.c.file_path,
-            sub_query.c.citeable_reference,
-            sub_query.c.alternative_title,
-            sub_query.c.description,
-            sub_query.c.alternative_description,
-            sub_query.c.closure_type,
-            func.to_char(
-                sub_query.c.closure_start_date,
-                current_app.config["DEFAULT_DATE_FORMAT"],
-            ).label("closure_start_date"),
-            sub_query.c.closure_period,
-            func.to_char(
-                sub_query.c.opening_date,
-                current_app.config["DEFAULT_DATE_FORMAT"],
-            ).label("opening_date"),
-            func.to_char(
-                func.coalesce(
-                    sub_query.c.end_date, sub_query.c.date_last_modified
-                ),
-                current_app.config["DEFAULT_DATE_FORMAT"],
-            ).label("date_of_record"),
-            func.to_char(
-                sub_query.c.end_date,
-                current_app.config["DEFAULT_DATE_FORMAT"],
-            ).label("end_date"),
-            sub_query.c.foi_exemption_code,
-            sub_query.c.file_reference,
-            sub_query.c.former_reference,
-            sub_query.c.translated_title,
-            sub_query.c.related_material,
-            sub_query.c.restrictions_on_use,
-            sub_query.c.note,
-            sub_query.c.held_by,
-            sub_query.c.legal_status,
-            sub_query.c.rights_copyright,
-            sub_query.c.language,
-            Body.Name.label("transferring_body"),
-            Series.Name.label("series"),
-            Consignment.ConsignmentReference.label("consignment_reference"),
+            File.FileId.label("file_id"),
+            File.FileName.label("file_name"),
+            File.FilePath.label("file_path"),
+            File.FileReference.label("file_reference"),
+            File.CiteableReference.label("citeable_reference"),
+            FileMetadataFlat.former_reference,
+            FileMetadataFlat.alternative_title,
+            FileMetadataFlat.description,
+            FileMetadataFlat.alternative_description,
+            FileMetadataFlat.closure_type,
+            FileMetadataFlat.closure_start_date,
+            FileMetadataFlat.closure_period,
+            FileMetadataFlat.opening_date,
+            FileMetadataFlat.date_last_modified,
+            FileMetadataFlat.end_date,
+            FileMetadataFlat.foi_exemption_code,
+            FileMetadataFlat.translated_title,
+            FileMetadataFlat.related_material,
+            FileMetadataFlat.restrictions_on_use,
+            FileMetadataFlat.note,
+            FileMetadataFlat.held_by,
+            FileMetadataFlat.legal_status,
+            FileMetadataFlat.rights_copyright,
+            FileMetadataFlat.language,
         )
-        .join(File.consignment)
-        .join(Consignment.series)
-        .join(Series.body)
-    ).where(sub_query.c.file_id == File.FileId)
-
-    return query
+        .outerjoin(FileMetadataFlat, File.FileId == FileMetadataFlat.FileId)
+        .filter(File.FileId == file_id, func.lower(File.FileType) == "file")
+    ).subquery()
 
 
 def _build_date_range_filter(date_field, date_from, date_to):
-    date_filter = None
-    if date_from and date_to:
-        date_filter = and_(
-            func.to_char(date_field, "YYYY-MM-DD") >= date_from,
-            func.to_char(date_field, "YYYY-MM-DD") <= date_to,
-        )
-    elif date_from:
-        date_filter = func.to_char(date_field, "YYYY-MM-DD") >= date_from
-    elif date_to:
-        date_filter = func.to_char(date_field, "YYYY-MM-DD") <= date_to
+    """
+    Build the condition for a date or timestamp column to be within the inclusive
+    range of "YYYY-MM-DD" dates `date_from` to `date_to`, either of which may be
+    omitted.
+
+    The column is compared directly to date values, with the day after `date_to`
+    as an exclusive upper bound so timestamps on `date_to` are included, rather
+    than being formatted as text on every row, so the condition can use an index
+    on the column.
+    """
+    conditions = []
+    if date_from:
+        conditions.append(date_field >= _to_date(date_from))
+    if date_to:
+        conditions.append(date_field < _to_date(date_to) + timedelta(days=1))
+
+    if not conditions:
+        return None
+    return and_(*conditions)
+
+
+def _build_date_of_record_range_filter(sub_query, date_from, date_to):
+    """
+    Build the condition for the date of a record, its end date or, if it has
+    none, its date last modified, to be within a date range.
+
+    The condition is on the two columns rather than on their coalesced value so
+    that each can use its own index.
+    """
+    end_date_filter = _build_date_range_filter(
+        sub_query.c.end_date, date_from, date_to
+    )
+    if end_date_filter is None:
+        return None
+    return or_(
+        end_date_filter,
+        and_(
+            sub_query.c.end_date.is_(None),
+            _build_date_range_filter(
+                sub_query.c.date_last_modified, date_from, date_to
+            ),
+        ),
+    )
+
 
-    return date_filter
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
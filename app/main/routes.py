@@ -1,4 +1,5 @@
 import uuid
+from functools import partial
 
 import boto3
 from botocore.exceptions import ClientError
@@ -6,13 +7,14 @@ from flask import (
     Response,
     abort,
     current_app,
+    jsonify,
+    make_response,
     redirect,
     render_template,
     request,
     session,
     url_for,
 )
-from sqlalchemy import func
 from werkzeug.exceptions import HTTPException
 
 from app.main import bp
@@ -23,12 +25,16 @@ from app.main.authorize.ayr_user import AYRUser
 from app.main.authorize.permissions_helpers import (
     validate_body_user_groups_or_404,
 )
-from app.main.db.models import Body, Consignment, File, Series, db
+from app.main.authorize.token_cache import get_token_introspection_cache
+from app.main.db.models import Body, Consignment, Series, db
 from app.main.db.queries import (
+    BrowseConsignmentCursor,
     build_browse_consignment_query,
     build_browse_query,
     build_browse_series_query,
+    get_browse_consignment_sort_key,
     get_file_metadata,
+    get_file_record,
 )
 from app.main.flask_config_helpers import (
     get_keycloak_instance_from_flask_config,
@@ -41,14 +47,39 @@ from app.main.util.filter_sort_builder import (
     build_filters,
     build_sorting_orders,
 )
+from app.main.util.http_caching import (
+    cacheable_response,
+    make_etag,
+    not_modified_response,
+)
+from app.main.util.iiif_image import (
+    IIIF_SUPPORTED_IMAGE_FORMATS,
+    IIIFImageRequest,
+    IIIFImageSource,
+    generate_iiif_image_info,
+    parse_iiif_image_request,
+    render_iiif_image,
+)
+from app.main.util.page_image_cache import (
+    PageImageKey,
+    get_page_image_cache,
+)
+from app.main.util.page_render_scheduler import get_page_render_scheduler
 from app.main.util.pagination import (
     calculate_total_pages,
     get_pagination,
-    paginate,
+    paginate_keyset_query,
+    paginate_query,
 )
+from app.main.util.pdf_document_cache import (
+    PDFDocumentKey,
+    get_pdf_document_cache,
+)
+from app.main.util.pdf_metadata_store import get_pdf_metadata
 from app.main.util.render_utils import (
     create_presigned_url,
     create_presigned_url_for_access_copy,
+    encode_pixmap_as_jpeg,
     extract_single_page_as_image,
     extract_single_page_as_thumbnail,
     generate_breadcrumb_values,
@@ -57,7 +88,10 @@ from app.main.util.render_utils import (
     get_download_filename,
     get_file_extension,
     get_file_puid,
+    get_page_image_bucket,
     get_pdf_from_s3,
+    get_s3_image_info,
+    get_s3_object_etag,
 )
 from app.main.util.request_validation_utils import validate_request
 from app.main.util.schemas import (
@@ -68,22 +102,31 @@ from app.main.util.schemas import (
     CallbackRequestSchema,
     DownloadRequestSchema,
     GenerateManifestRequestSchema,
+    IIIFImageRequestSchema,
     PageImageRequestSchema,
+    PageImageVariantRequestSchema,
     RecordRequestSchema,
     SearchRequestSchema,
     SearchResultsSummaryRequestSchema,
     SearchTransferringBodyRequestSchema,
 )
+from app.main.util.search_result_cache import (
+    SearchResultKey,
+    get_search_result_cache,
+)
 from app.main.util.search_utils import (
+    SearchCursor,
     build_search_results_summary_query,
     build_search_transferring_body_query,
     check_additional_term,
-    execute_search,
+    execute_aggregation_search,
+    execute_paginated_search,
     extract_search_terms,
     get_open_search_fields_to_search_on_and_sorting,
+    get_opensearch_client,
     get_pagination_info,
+    get_search_cursors,
     post_process_opensearch_results,
-    setup_opensearch,
 )
 from configs.base_config import CONVERTIBLE_PUIDS
 
@@ -101,6 +144,7 @@ def index():
 def sign_out():
     keycloak_openid = get_keycloak_instance_from_flask_config()
     keycloak_openid.logout(session["refresh_token"])
+    get_token_introspection_cache().invalidate(session["access_token"])
     session.clear()
 
     return redirect("/signed-out")
@@ -151,6 +195,10 @@ def callback():
         current_app.app_logger.error(f"Failed to introspect access token: {e}")
         return redirect(url_for("main.sign_in"))
 
+    get_token_introspection_cache().set(
+        access_token_response["access_token"], decoded_access_token
+    )
+
     session["access_token"] = access_token_response["access_token"]
     session["refresh_token"] = access_token_response["refresh_token"]
     session["user_groups"] = decoded_access_token["groups"]
@@ -160,6 +208,11 @@ def callback():
         session["user_type"] = "all_access_user"
     else:
         session["user_type"] = "standard_user"
+    session["transferring_body"] = (
+        ayr_user.transferring_body.to_session()
+        if ayr_user.transferring_body
+        else None
+    )
 
     return redirect(url_for("main.browse"))
 
@@ -177,7 +230,9 @@ def browse():
     form = SearchForm()
     transferring_bodies = []
 
-    ayr_user = AYRUser(session.get("user_groups"))
+    ayr_user = AYRUser(
+        session.get("user_groups"), session.get("transferring_body")
+    )
     if ayr_user.is_standard_user:
         return redirect(
             f"/browse/transferring_body/{ayr_user.transferring_body.BodyId}"
@@ -223,16 +278,10 @@ def browse():
             sorting_orders=sorting_orders,
         )
 
-        browse_results = query.paginate(page=page, per_page=per_page)
-
-        total_records = db.session.query(
-            func.sum(query.subquery().c.records_held)
-        ).scalar()
-
-        if total_records:
-            num_records_found = total_records
-        else:
-            num_records_found = 0
+        browse_results = paginate_query(
+            query, page, per_page, sum_column="records_held"
+        )
+        num_records_found = browse_results.column_total
 
         pagination = get_pagination(page, browse_results.pages)
 
@@ -314,16 +363,10 @@ def browse_transferring_body(_id: uuid.UUID):
         sorting_orders=sorting_orders,
     )
 
-    browse_results = query.paginate(page=page, per_page=per_page)
-
-    total_records = db.session.query(
-        func.sum(query.subquery().c.records_held)
-    ).scalar()
-
-    if total_records:
-        num_records_found = total_records
-    else:
-        num_records_found = 0
+    browse_results = paginate_query(
+        query, page, per_page, sum_column="records_held"
+    )
+    num_records_found = browse_results.column_total
 
     pagination = get_pagination(page, browse_results.pages)
 
@@ -409,16 +452,10 @@ def browse_series(_id: uuid.UUID):
         sorting_orders=sorting_orders,
     )
 
-    browse_results = query.paginate(page=page, per_page=per_page)
-
-    total_records = db.session.query(
-        func.sum(query.subquery().c.records_held)
-    ).scalar()
-
-    if total_records:
-        num_records_found = total_records
-    else:
-        num_records_found = 0
+    browse_results = paginate_query(
+        query, page, per_page, sum_column="records_held"
+    )
+    num_records_found = browse_results.column_total
 
     pagination = get_pagination(page, browse_results.pages)
 
@@ -501,21 +538,51 @@ def browse_consignment(_id: uuid.UUID):
     if len(sorting_orders) == 0:
         sorting_orders["date_last_modified"] = "desc"
 
+    sort_key = get_browse_consignment_sort_key(sorting_orders)
+    cursor = None
+    if validated_data.get("cursor"):
+        try:
+            cursor = BrowseConsignmentCursor.decode(validated_data["cursor"])
+        except ValueError:
+            abort(400)
+        # a cursor from before the sort order was changed no longer applies
+        if cursor.sort != sort_key:
+            cursor = None
+
     query = build_browse_consignment_query(
         consignment_id=_id,
         filters=filters,
         sorting_orders=sorting_orders,
+        keyset=True,
+        cursor=cursor,
     )
 
-    browse_results = query.paginate(page=page, per_page=per_page)
-
-    total_records = query.count()
-    if total_records:
-        num_records_found = total_records
-    else:
-        num_records_found = 0
-
-    pagination = get_pagination(page, browse_results.pages)
+    browse_results = paginate_keyset_query(
+        query,
+        page,
+        per_page,
+        from_cursor=cursor is not None,
+        reverse=cursor is not None and cursor.before,
+        total=cursor.total if cursor is not None else None,
+    )
+    num_records_found = browse_results.total
+
+    previous_cursor = None
+    next_cursor = None
+    if browse_results.items:
+        previous_cursor = BrowseConsignmentCursor.from_row(
+            sort_key,
+            browse_results.items[0],
+            before=True,
+            total=num_records_found,
+        ).encode()
+        next_cursor = BrowseConsignmentCursor.from_row(
+            sort_key, browse_results.items[-1], total=num_records_found
+        ).encode()
+
+    pagination = get_pagination(
+        page, browse_results.pages, previous_cursor, next_cursor
+    )
 
     return render_template(
         "browse.html",
@@ -543,17 +610,15 @@ def search():
     validated_data = request.validated_data
     transferring_body_id = validated_data["transferring_body_id"]
 
-    ayr_user = AYRUser(session.get("user_groups"))
+    ayr_user = AYRUser(
+        session.get("user_groups"), session.get("transferring_body")
+    )
 
     redirect_params = request.validated_data_non_defaults
 
     if ayr_user.is_standard_user or transferring_body_id:
         if not transferring_body_id:
-            transferring_body_id = str(
-                Body.query.filter(Body.Name == ayr_user.transferring_body.Name)
-                .first()
-                .BodyId
-            )
+            transferring_body_id = str(ayr_user.transferring_body.BodyId)
         return redirect(
             url_for(
                 "main.search_transferring_body",
@@ -587,28 +652,24 @@ def search_results_summary():
 
     if query:
         quoted_phrases, single_terms = extract_search_terms(query)
-        open_search = setup_opensearch()
-        search_fields, sorting = (
-            get_open_search_fields_to_search_on_and_sorting(search_area)
+        open_search = get_opensearch_client()
+        search_fields, _ = get_open_search_fields_to_search_on_and_sorting(
+            search_area
         )
         dsl_query = build_search_results_summary_query(
-            search_fields, quoted_phrases, single_terms, sorting
+            search_fields, quoted_phrases, single_terms, page, per_page
+        )
+        search_results = execute_aggregation_search(open_search, dsl_query)
+        aggregations = search_results["aggregations"]
+        paginated_results = aggregations["aggregate_by_transferring_body"][
+            "buckets"
+        ]
+
+        page_count = calculate_total_pages(
+            aggregations["transferring_body_count"]["value"], per_page
         )
-        search_results = execute_search(open_search, dsl_query, page, per_page)
-        results = search_results["aggregations"][
-            "aggregate_by_transferring_body"
-        ]["buckets"]
-
-        total_records = 0
-        for bucket in results:
-            total_records += bucket["doc_count"]
-
-        page_count = calculate_total_pages(len(results), per_page)
         pagination = get_pagination(page, page_count)
-        paginated_results = paginate(results, page, per_page)
-
-        if total_records:
-            num_records_found = total_records
+        num_records_found = search_results["hits"]["total"]["value"]
 
     return render_template(
         "search-results-summary.html",
@@ -676,26 +737,61 @@ def search_transferring_body(_id: uuid.UUID):
         )
         breadcrumb_values[3]["search_terms"] = display_terms or query
 
-        open_search = setup_opensearch()
-        search_fields, sorting = (
-            get_open_search_fields_to_search_on_and_sorting(search_area, sort)
-        )
-        dsl_query = build_search_transferring_body_query(
-            search_fields,
-            _id,
-            highlight_tag,
-            quoted_phrases,
-            single_terms,
-            sorting,
-        )
+        cursor = None
+        if validated_data.get("cursor"):
+            try:
+                cursor = SearchCursor.decode(validated_data["cursor"])
+            except ValueError:
+                abort(400)
+            # a cursor from before the sort order was changed no longer applies
+            if cursor.sort != sort:
+                cursor = None
+
+        def search(search_highlight_tag):
+            search_fields, sorting = (
+                get_open_search_fields_to_search_on_and_sorting(
+                    search_area, sort
+                )
+            )
+            dsl_query = build_search_transferring_body_query(
+                search_fields,
+                _id,
+                search_highlight_tag,
+                quoted_phrases,
+                single_terms,
+                sorting,
+            )
+            return execute_paginated_search(
+                get_opensearch_client(), dsl_query, page, per_page, cursor
+            )
 
-        search_results = execute_search(open_search, dsl_query, page, per_page)
+        search_result_cache = get_search_result_cache()
+        if search_result_cache is None:
+            search_results = search(highlight_tag)
+        else:
+            search_results = search_result_cache.get_or_search(
+                SearchResultKey.for_search(
+                    _id,
+                    quoted_phrases,
+                    single_terms,
+                    search_area,
+                    sort,
+                    page,
+                    per_page,
+                    cursor,
+                ),
+                highlight_tag,
+                search,
+            )
         results = post_process_opensearch_results(
             search_results["hits"]["hits"], sort
         )
 
         total_records, pagination = get_pagination_info(
-            search_results, page, per_page
+            search_results,
+            page,
+            per_page,
+            *get_search_cursors(search_results, sort, page, per_page),
         )
         num_records_found = total_records
 
@@ -733,7 +829,7 @@ def record(record_id: uuid.UUID):
         A rendered HTML page with record details.
     """
     form = SearchForm()
-    file = db.session.get(File, record_id)
+    file = get_file_record(record_id)
     ayr_user = AYRUser(session.get("user_groups"))
     can_download_records = ayr_user.can_download_records
     presigned_url = None
@@ -741,7 +837,7 @@ def record(record_id: uuid.UUID):
     if file is None:
         abort(404)
 
-    validate_body_user_groups_or_404(file.consignment.series.body.Name)
+    validate_body_user_groups_or_404(file.BodyName)
 
     file_metadata = get_file_metadata(file.FileId)
 
@@ -796,7 +892,7 @@ def record(record_id: uuid.UUID):
 @validate_request(DownloadRequestSchema, location="path")
 def download_record(record_id: uuid.UUID):
     s3 = boto3.client("s3")
-    file = db.session.get(File, record_id)
+    file = get_file_record(record_id)
     ayr_user = AYRUser(session.get("user_groups"))
     can_download_records = ayr_user.can_download_records
 
@@ -806,10 +902,10 @@ def download_record(record_id: uuid.UUID):
     if file is None:
         abort(404)
 
-    validate_body_user_groups_or_404(file.consignment.series.body.Name)
+    validate_body_user_groups_or_404(file.BodyName)
 
     bucket = current_app.config["RECORD_BUCKET_NAME"]
-    key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+    key = f"{file.ConsignmentReference}/{file.FileId}"
 
     try:
         s3.head_object(Bucket=bucket, Key=key)
@@ -846,10 +942,10 @@ def download_record(record_id: uuid.UUID):
 @log_page_view
 @validate_request(GenerateManifestRequestSchema, location="path")
 def generate_manifest(record_id: uuid.UUID) -> Response:
-    file = db.session.get(File, record_id)
+    file = get_file_record(record_id)
     if file is None:
         abort(404)
-    validate_body_user_groups_or_404(file.consignment.series.body.Name)
+    validate_body_user_groups_or_404(file.BodyName)
 
     file_name = file.FileName
     manifest_url = f"{url_for('main.generate_manifest', record_id=record_id, _external=True)}"
@@ -858,29 +954,34 @@ def generate_manifest(record_id: uuid.UUID) -> Response:
     if (
         puid
         in current_app.config["UNIVERSAL_VIEWER_SUPPORTED_APPLICATION_PUIDS"]
+        or puid in CONVERTIBLE_PUIDS
     ):
-        return generate_pdf_manifest(
-            file_name,
-            manifest_url,
-            bucket=current_app.config["RECORD_BUCKET_NAME"],
-            key=f"{file.consignment.ConsignmentReference}/{file.FileId}",
-            record_id=str(record_id),
+        bucket = get_page_image_bucket(file)
+        key = f"{file.ConsignmentReference}/{file.FileId}"
+        response = make_response(
+            generate_pdf_manifest(
+                file_name,
+                manifest_url,
+                bucket=bucket,
+                key=key,
+                record_id=str(record_id),
+                image_format=negotiate_page_image_format(),
+            )
         )
+        # the page images are declared in the format they are served in
+        response.vary.add("Accept")
+        schedule_pdf_page_prerender(bucket, key)
+        return cacheable_response(response)
     elif puid in current_app.config["UNIVERSAL_VIEWER_SUPPORTED_IMAGE_PUIDS"]:
+        # Not cacheable, as it links to the image through a short-lived
+        # presigned URL
         file_url = create_presigned_url(file)
         return generate_image_manifest(
             file_name,
             file_url,
             manifest_url,
             bucket=current_app.config["RECORD_BUCKET_NAME"],
-            key=f"{file.consignment.ConsignmentReference}/{file.FileId}",
-        )
-    elif puid in CONVERTIBLE_PUIDS:
-        return generate_pdf_manifest(
-            file.FileName,
-            manifest_url,
-            bucket=current_app.config["ACCESS_COPY_BUCKET"],
-            key=f"{file.consignment.ConsignmentReference}/{file.FileId}",
+            key=f"{file.ConsignmentReference}/{file.FileId}",
             record_id=str(record_id),
         )
 
@@ -890,52 +991,214 @@ def generate_manifest(record_id: uuid.UUID) -> Response:
     abort(400)
 
 
+def get_pdf_document(
+    bucket: str, key: str, etag: str, filetype: str | None = "pdf"
+):
+    """
+    Context manager giving the parsed PDF for a version of an S3 object from
+    the shared document cache, fetching it from S3 if it is not cached.
+    """
+    return get_pdf_document_cache().document(
+        PDFDocumentKey(bucket, key, etag),
+        lambda: get_pdf_from_s3(bucket=bucket, key=key, etag=etag),
+        filetype=filetype,
+    )
+
+
+def negotiate_page_image_format() -> str:
+    """
+    Return "webp" if the request's `Accept` header lists WebP, or "jpeg".
+
+    Browsers that can display WebP list it explicitly, so wildcards are not
+    taken to accept it.
+    """
+    for mimetype, quality in request.accept_mimetypes:
+        if mimetype == "image/webp" and quality > 0:
+            return "webp"
+    return "jpeg"
+
+
+def get_page_image_width(width: int | None) -> int | None:
+    """
+    Round a requested page image width up to the next of `PAGE_IMAGE_WIDTHS`,
+    or None for the full size image if it is above all of them.
+    """
+    if width is None:
+        return None
+    for page_image_width in current_app.config["PAGE_IMAGE_WIDTHS"]:
+        if page_image_width >= width:
+            return page_image_width
+    return None
+
+
+def get_page_image_size(
+    thumbnail: bool, width: int | None, image_format: str
+) -> str:
+    """
+    Return the size of a page image variant in the page image cache, which
+    keeps the JPEG full size and thumbnail variants under "full" and
+    "thumbnail".
+    """
+    size = "thumbnail" if thumbnail else f"w{width}" if width else "full"
+    if image_format != "jpeg":
+        size = f"{size}.{image_format}"
+    return size
+
+
+def page_image_response(
+    image_bytes: bytes, image_format: str, cache_key: PageImageKey
+) -> Response:
+    """
+    Return a page image response the browser can cache, with an ETag derived
+    from the image's key in the page image cache.
+    """
+    response = Response(image_bytes, mimetype=f"image/{image_format}")
+    response.vary.add("Accept")
+    return cacheable_response(response, make_etag(*cache_key))
+
+
+def page_image_not_modified_response(
+    cache_key: PageImageKey,
+) -> Response | None:
+    """
+    Return a 304 Not Modified response if the browser has the page image in
+    `cache_key` cached, or None.
+    """
+    response = not_modified_response(make_etag(*cache_key))
+    if response is not None:
+        response.vary.add("Accept")
+    return response
+
+
+def render_pdf_page(
+    cache_key: PageImageKey,
+    thumbnail: bool = False,
+    width: int = None,
+    image_format: str = "jpeg",
+) -> bytes:
+    """Render the page image or thumbnail identified by `cache_key`."""
+    with get_pdf_document(
+        cache_key.bucket, cache_key.key, cache_key.etag
+    ) as pdf_document:
+        if thumbnail:
+            return extract_single_page_as_thumbnail(
+                pdf_document, cache_key.page_number, image_format=image_format
+            )
+        return extract_single_page_as_image(
+            pdf_document,
+            cache_key.page_number,
+            width=width,
+            image_format=image_format,
+        )
+
+
+def schedule_pdf_page_prerender(bucket: str, key: str):
+    """
+    Queue background renders of the first `PAGE_PRERENDER_FIRST_PAGES` pages
+    and every thumbnail of a PDF, which the viewer requests as soon as it has
+    loaded the PDF's manifest.
+    """
+    scheduler = get_page_render_scheduler()
+    first_pages = current_app.config["PAGE_PRERENDER_FIRST_PAGES"]
+
+    def schedule_pages():
+        etag = get_s3_object_etag(bucket=bucket, key=key)
+        pdf_metadata = get_pdf_metadata(
+            PDFDocumentKey(bucket, key, etag),
+            lambda: get_pdf_from_s3(bucket=bucket, key=key, etag=etag),
+        )
+        for page_number in range(1, pdf_metadata.page_count + 1):
+            sizes = ["full", "thumbnail"]
+            if page_number > first_pages:
+                sizes = ["thumbnail"]
+            for size in sizes:
+                cache_key = PageImageKey(bucket, key, etag, page_number, size)
+                scheduler.schedule(
+                    cache_key,
+                    partial(
+                        render_pdf_page,
+                        cache_key,
+                        thumbnail=size == "thumbnail",
+                    ),
+                )
+
+    scheduler.submit(schedule_pages)
+
+
 @bp.route("/record/<uuid:record_id>/page/<int:page_number>", methods=["GET"])
 @access_token_sign_in_required
 @log_page_view
-@validate_request(PageImageRequestSchema, location="path")
+@validate_request(PageImageVariantRequestSchema, location="combined")
 def get_page_image(record_id: uuid.UUID, page_number: int):
     """
-    Serve a specific page from a PDF as a full-size JPEG image.
+    Serve a specific page from a PDF as a WebP image, if the browser accepts
+    it, or a progressive JPEG.
 
     Args:
         record_id: The file UUID
         page_number: 1-indexed page number
 
+    Query parameters:
+        width: The width the page is displayed at, rounded up to the next of
+            `PAGE_IMAGE_WIDTHS`. The full size image is served without it.
+
     Returns:
-        Image response (JPEG)
+        Image response (WebP or JPEG)
     """
-    file = db.session.get(File, record_id)
+    file = get_file_record(record_id)
     if file is None:
         abort(404)
 
-    validate_body_user_groups_or_404(file.consignment.series.body.Name)
+    validate_body_user_groups_or_404(file.BodyName)
 
-    puid = get_file_puid(file)
+    bucket = get_page_image_bucket(file)
 
-    # Determine which bucket to use
-    if puid in CONVERTIBLE_PUIDS:
-        bucket = current_app.config["ACCESS_COPY_BUCKET"]
-    else:
-        bucket = current_app.config["RECORD_BUCKET_NAME"]
-
-    # Fetch PDF from S3
-    key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+    # Render from the PDF in S3, unless the page has been rendered from this
+    # version
+    key = f"{file.ConsignmentReference}/{file.FileId}"
 
     try:
-        pdf_bytes = get_pdf_from_s3(bucket=bucket, key=key)
+        etag = get_s3_object_etag(bucket=bucket, key=key)
     except ClientError as e:
         current_app.app_logger.error(
             f"Failed to fetch PDF from S3 for page image: {e}"
         )
         abort(404)
 
+    image_format = negotiate_page_image_format()
+    width = get_page_image_width(request.validated_data["width"])
+    page_image_cache = get_page_image_cache()
+    cache_key = PageImageKey(
+        bucket,
+        key,
+        etag,
+        page_number,
+        get_page_image_size(False, width, image_format),
+    )
+    not_modified = page_image_not_modified_response(cache_key)
+    if not_modified is not None:
+        return not_modified
+    cached_image_bytes = page_image_cache.get(cache_key)
+    if cached_image_bytes is not None:
+        return page_image_response(cached_image_bytes, image_format, cache_key)
+
     # Extract the specific page as image
     try:
-        image_bytes = extract_single_page_as_image(pdf_bytes, page_number)
-        response = Response(image_bytes, mimetype="image/jpeg")
-
-        return response
+        image_bytes = get_page_render_scheduler().render(
+            cache_key,
+            partial(
+                render_pdf_page,
+                cache_key,
+                width=width,
+                image_format=image_format,
+            ),
+        )
+        return page_image_response(image_bytes, image_format, cache_key)
+    except ClientError as e:
+        current_app.app_logger.error(
+            f"Failed to fetch PDF from S3 for page image: {e}"
+        )
+        abort(404)
     except ValueError as e:
         current_app.app_logger.error(f"Invalid page number {page_number}: {e}")
         abort(400)
@@ -954,46 +1217,71 @@ def get_page_image(record_id: uuid.UUID, page_number: int):
 @validate_request(PageImageRequestSchema, location="path")
 def get_page_thumbnail(record_id: uuid.UUID, page_number: int):
     """
-    Serve a thumbnail for a specific PDF page.
+    Serve a thumbnail for a specific PDF page, as WebP if the browser
+    accepts it.
 
     Args:
         record_id: The file UUID
         page_number: 1-indexed page number
 
     Returns:
-        Thumbnail image response (JPEG, 150x200 max)
+        Thumbnail image response (WebP or JPEG, 150x200 max)
     """
-    file = db.session.get(File, record_id)
+    file = get_file_record(record_id)
     if file is None:
         abort(404)
 
-    validate_body_user_groups_or_404(file.consignment.series.body.Name)
+    validate_body_user_groups_or_404(file.BodyName)
 
-    puid = get_file_puid(file)
+    bucket = get_page_image_bucket(file)
 
-    # Determine which bucket to use
-    if puid in CONVERTIBLE_PUIDS:
-        bucket = current_app.config["ACCESS_COPY_BUCKET"]
-    else:
-        bucket = current_app.config["RECORD_BUCKET_NAME"]
-
-    # Fetch PDF from S3
-    key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+    # Render from the PDF in S3, unless the page has been rendered from this
+    # version
+    key = f"{file.ConsignmentReference}/{file.FileId}"
 
     try:
-        pdf_bytes = get_pdf_from_s3(bucket=bucket, key=key)
+        etag = get_s3_object_etag(bucket=bucket, key=key)
     except ClientError as e:
         current_app.app_logger.error(
             f"Failed to fetch PDF from S3 for thumbnail: {e}"
         )
         abort(404)
 
+    image_format = negotiate_page_image_format()
+    page_image_cache = get_page_image_cache()
+    cache_key = PageImageKey(
+        bucket,
+        key,
+        etag,
+        page_number,
+        get_page_image_size(True, None, image_format),
+    )
+    not_modified = page_image_not_modified_response(cache_key)
+    if not_modified is not None:
+        return not_modified
+    cached_thumbnail_bytes = page_image_cache.get(cache_key)
+    if cached_thumbnail_bytes is not None:
+        return page_image_response(
+            cached_thumbnail_bytes, image_format, cache_key
+        )
+
     # Extract the specific page as thumbnail
     try:
-        thumbnail_bytes = extract_single_page_as_thumbnail(
-            pdf_bytes, page_number
+        thumbnail_bytes = get_page_render_scheduler().render(
+            cache_key,
+            partial(
+                render_pdf_page,
+                cache_key,
+                thumbnail=True,
+                image_format=image_format,
+            ),
         )
-        return Response(thumbnail_bytes, mimetype="image/jpeg")
+        return page_image_response(thumbnail_bytes, image_format, cache_key)
+    except ClientError as e:
+        current_app.app_logger.error(
+            f"Failed to fetch PDF from S3 for thumbnail: {e}"
+        )
+        abort(404)
     except ValueError as e:
         current_app.app_logger.error(
             f"Invalid page number {page_number} for thumbnail: {e}"
@@ -1006,6 +1294,204 @@ def get_page_thumbnail(record_id: uuid.UUID, page_number: int):
         abort(500)
 
 
+def get_iiif_image_source(
+    record_id: uuid.UUID, page_number: int
+) -> IIIFImageSource:
+    """
+    Return the page of a PDF record, or the image of an image record, served
+    through the IIIF Image API, aborting with 404 if there is none.
+
+    PDF pages are served at `IIIF_PDF_DPI` and images at their own size.
+    """
+    file = get_file_record(record_id)
+    if file is None:
+        abort(404)
+    validate_body_user_groups_or_404(file.BodyName)
+
+    bucket = get_page_image_bucket(file)
+    key = f"{file.ConsignmentReference}/{file.FileId}"
+    puid = get_file_puid(file)
+
+    try:
+        etag = get_s3_object_etag(bucket=bucket, key=key)
+        if puid in current_app.config["UNIVERSAL_VIEWER_SUPPORTED_IMAGE_PUIDS"]:
+            image_info = get_s3_image_info(bucket, key, etag=etag)
+            if (
+                page_number == 1
+                and image_info.format in IIIF_SUPPORTED_IMAGE_FORMATS
+            ):
+                return IIIFImageSource(
+                    bucket,
+                    key,
+                    etag,
+                    None,
+                    1,
+                    image_info.width,
+                    image_info.height,
+                )
+        elif (
+            puid
+            in current_app.config[
+                "UNIVERSAL_VIEWER_SUPPORTED_APPLICATION_PUIDS"
+            ]
+            or puid in CONVERTIBLE_PUIDS
+        ):
+            pdf_metadata = get_pdf_metadata(
+                PDFDocumentKey(bucket, key, etag),
+                lambda: get_pdf_from_s3(bucket=bucket, key=key, etag=etag),
+            )
+            if page_number <= pdf_metadata.page_count:
+                page_width, page_height = pdf_metadata.page_sizes[
+                    page_number - 1
+                ]
+                scale = current_app.config["IIIF_PDF_DPI"] / 72
+                return IIIFImageSource(
+                    bucket,
+                    key,
+                    etag,
+                    "pdf",
+                    page_number,
+                    round(page_width * scale),
+                    round(page_height * scale),
+                )
+    except ClientError as e:
+        current_app.app_logger.error(
+            f"Failed to fetch {key} from S3 for IIIF image: {e}"
+        )
+    abort(404)
+
+
+def render_iiif_tile(
+    source: IIIFImageSource, image_request: IIIFImageRequest
+) -> bytes:
+    """Render the region of a IIIF image source in `image_request` as JPEG."""
+    with get_pdf_document(
+        source.bucket, source.key, source.etag, filetype=source.filetype
+    ) as pdf_document:
+        pix = render_iiif_image(
+            pdf_document.load_page(source.page_number - 1),
+            source.width,
+            source.height,
+            image_request,
+        )
+        return encode_pixmap_as_jpeg(pix, 75)
+
+
+@bp.route(
+    "/record/<uuid:record_id>/page/<int:page_number>/iiif", methods=["GET"]
+)
+@access_token_sign_in_required
+@validate_request(PageImageRequestSchema, location="path")
+def get_iiif_image_base(record_id: uuid.UUID, page_number: int):
+    """Redirect the base URI of a IIIF image to its info.json."""
+    return redirect(
+        url_for(
+            "main.get_iiif_image_info",
+            record_id=record_id,
+            page_number=page_number,
+        ),
+        code=303,
+    )
+
+
+@bp.route(
+    "/record/<uuid:record_id>/page/<int:page_number>/iiif/info.json",
+    methods=["GET"],
+)
+@access_token_sign_in_required
+@log_page_view
+@validate_request(PageImageRequestSchema, location="path")
+def get_iiif_image_info(record_id: uuid.UUID, page_number: int):
+    """
+    Serve the IIIF Image API info.json of a PDF page or image, describing the
+    tiles the viewer can request at each zoom level.
+    """
+    source = get_iiif_image_source(record_id, page_number)
+    info = jsonify(
+        generate_iiif_image_info(
+            url_for(
+                "main.get_iiif_image_base",
+                record_id=record_id,
+                page_number=page_number,
+                _external=True,
+            ),
+            source.width,
+            source.height,
+            current_app.config["IIIF_TILE_SIZE"],
+            current_app.config["IIIF_MAX_WIDTH"],
+            current_app.config["IIIF_MAX_AREA"],
+        )
+    )
+    return cacheable_response(info)
+
+
+@bp.route(
+    "/record/<uuid:record_id>/page/<int:page_number>/iiif/"
+    "<region>/<size>/<rotation>/<quality>.<image_format>",
+    methods=["GET"],
+)
+@access_token_sign_in_required
+@log_page_view
+@validate_request(IIIFImageRequestSchema, location="path")
+def get_iiif_image(
+    record_id: uuid.UUID,
+    page_number: int,
+    region: str,
+    size: str,
+    rotation: str,
+    quality: str,
+    image_format: str,
+):
+    """
+    Serve a region of a PDF page or image, scaled and rotated, following the
+    IIIF Image API. Only the region is rendered, and each rendered region is
+    cached in the page image cache.
+    """
+    source = get_iiif_image_source(record_id, page_number)
+
+    try:
+        image_request = parse_iiif_image_request(
+            region,
+            size,
+            rotation,
+            quality,
+            source.width,
+            source.height,
+            current_app.config["IIIF_MAX_WIDTH"],
+            current_app.config["IIIF_MAX_AREA"],
+        )
+    except ValueError as e:
+        current_app.app_logger.error(f"Invalid IIIF image request: {e}")
+        abort(400)
+
+    page_image_cache = get_page_image_cache()
+    cache_key = PageImageKey(
+        source.bucket,
+        source.key,
+        source.etag,
+        page_number,
+        f"iiif/{image_request.canonical}",
+    )
+    not_modified = not_modified_response(make_etag(*cache_key))
+    if not_modified is not None:
+        return not_modified
+    image_bytes = page_image_cache.get(cache_key)
+    if image_bytes is None:
+        try:
+            image_bytes = get_page_render_scheduler().render(
+                cache_key, partial(render_iiif_tile, source, image_request)
+            )
+        except Exception as e:
+            current_app.app_logger.error(
+                f"Failed to render IIIF image {cache_key.size}: {e}"
+            )
+            abort(500)
+
+    return cacheable_response(
+        Response(image_bytes, mimetype="image/jpeg"), make_etag(*cache_key)
+    )
+
+
 @bp.route("/signed-out", methods=["GET"])
 def signed_out():
     return render_template("signed-out.html")
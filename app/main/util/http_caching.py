@@ -0,0 +1,53 @@
+import hashlib
+
+from flask import Response, current_app, request
+
+
+def make_etag(*parts) -> str:
+    """
+    Return a strong ETag for a response derived from `parts`, such as the
+    ETag of the S3 object it is rendered from and the render parameters.
+    """
+    return hashlib.sha256(
+        "\0".join(str(part) for part in parts).encode()
+    ).hexdigest()[:32]
+
+
+def set_private_cache_policy(response: Response) -> Response:
+    """
+    Let browsers keep `response` for `PRIVATE_CACHE_MAX_AGE` seconds in their
+    own cache, and revalidate it with its ETag after that.
+
+    Protected routes are otherwise not cached. Only responses whose content
+    for their URL does not change, other than when their source object in S3
+    is replaced, should be cached.
+    """
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config["PRIVATE_CACHE_MAX_AGE"]
+    return response
+
+
+def not_modified_response(etag: str) -> Response | None:
+    """
+    Return a 304 Not Modified response if the request's `If-None-Match`
+    header matches `etag`, or None if the response has to be generated.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return set_private_cache_policy(response)
+
+
+def cacheable_response(response: Response, etag: str = None) -> Response:
+    """
+    Set the private cache policy and the ETag of a successful `response`,
+    hashing its content if `etag` is not given, and answer with 304 Not
+    Modified if the request's `If-None-Match` header matches it.
+    """
+    if etag is None:
+        response.add_etag()
+    else:
+        response.set_etag(etag)
+    set_private_cache_policy(response)
+    return response.make_conditional(request)
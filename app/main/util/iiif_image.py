@@ -0,0 +1,237 @@
+import math
+import re
+from typing import NamedTuple
+
+import pymupdf
+
+IIIF_IMAGE_CONTEXT = "http://iiif.io/api/image/2/context.json"
+IIIF_IMAGE_PROFILE = "http://iiif.io/api/image/2/level1.json"
+
+# Image formats pymupdf can open as a single page document
+IIIF_SUPPORTED_IMAGE_FORMATS = {"GIF", "JPEG", "PNG", "TIFF"}
+
+
+class IIIFImageSource(NamedTuple):
+    """
+    A page of a PDF, or an image, in S3 served through the IIIF Image API, and
+    the size in pixels of its full image.
+
+    `filetype` is passed to pymupdf to open the object, None to detect it.
+    """
+
+    bucket: str
+    key: str
+    etag: str
+    filetype: str | None
+    page_number: int
+    width: int
+    height: int
+
+
+class IIIFImageRequest(NamedTuple):
+    """
+    A parsed IIIF Image API request: the region of the full image in pixels,
+    the size in pixels it is scaled to, the rotation in degrees and the
+    quality.
+    """
+
+    region: tuple
+    size: tuple
+    rotation: int
+    quality: str
+
+    @property
+    def canonical(self) -> str:
+        x, y, w, h = self.region
+        return (
+            f"{x},{y},{w},{h}/{self.size[0]},{self.size[1]}/"
+            f"{self.rotation}/{self.quality}"
+        )
+
+
+def _parse_region(region: str, width: int, height: int) -> tuple:
+    if region == "full":
+        return 0, 0, width, height
+    if region == "square":
+        side = min(width, height)
+        return (width - side) // 2, (height - side) // 2, side, side
+
+    match = re.fullmatch(r"(pct:)?([\d.]+),([\d.]+),([\d.]+),([\d.]+)", region)
+    if match is None:
+        raise ValueError(f"Invalid region: {region}")
+    x, y, w, h = (float(value) for value in match.groups()[1:])
+    if match.group(1):
+        x, w = x * width / 100, w * width / 100
+        y, h = y * height / 100, h * height / 100
+    x, y, w, h = round(x), round(y), round(w), round(h)
+    if w <= 0 or h <= 0 or x >= width or y >= height:
+        raise ValueError(f"Region {region} is outside the image")
+    return x, y, min(w, width - x), min(h, height - y)
+
+
+def _max_scale(
+    width: float, height: float, max_width: int | None, max_area: int | None
+) -> float:
+    """
+    Return the largest scale, at most 1, at which an image of `width` by
+    `height` pixels fits `max_width`, which also limits the height as no
+    maxHeight is advertised, and `max_area`.
+    """
+    scale = 1
+    if max_width is not None:
+        scale = min(scale, max_width / width, max_width / height)
+    if max_area is not None:
+        scale = min(scale, math.sqrt(max_area / (width * height)))
+    return scale
+
+
+def _parse_size(
+    size: str,
+    region_width: int,
+    region_height: int,
+    max_width: int | None = None,
+    max_area: int | None = None,
+) -> tuple:
+    if size in ("full", "max"):
+        scale = _max_scale(region_width, region_height, max_width, max_area)
+        return (
+            max(math.floor(region_width * scale), 1),
+            max(math.floor(region_height * scale), 1),
+        )
+
+    match = re.fullmatch(r"pct:([\d.]+)", size)
+    if match is not None:
+        scale = float(match.group(1)) / 100
+        width, height = region_width * scale, region_height * scale
+    else:
+        match = re.fullmatch(r"(!)?(\d*),(\d*)", size)
+        if match is None or not (match.group(2) or match.group(3)):
+            raise ValueError(f"Invalid size: {size}")
+        best_fit, width, height = match.groups()
+        width = int(width) if width else None
+        height = int(height) if height else None
+        if best_fit and (width is None or height is None):
+            raise ValueError(f"Invalid size: {size}")
+        if best_fit or height is None or width is None:
+            scale = min(
+                width / region_width if width else float("inf"),
+                height / region_height if height else float("inf"),
+            )
+            width, height = region_width * scale, region_height * scale
+
+    width, height = max(round(width), 1), max(round(height), 1)
+    if width > region_width or height > region_height:
+        raise ValueError(f"Size {size} is larger than the region")
+    if _max_scale(width, height, max_width, max_area) < 1:
+        raise ValueError(f"Size {size} is larger than the maximum size")
+    return width, height
+
+
+def parse_iiif_image_request(
+    region: str,
+    size: str,
+    rotation: str,
+    quality: str,
+    width: int,
+    height: int,
+    max_width: int = None,
+    max_area: int = None,
+) -> IIIFImageRequest:
+    """
+    Parse the region, size, rotation and quality of an IIIF Image API request
+    for a full image of `width` by `height` pixels.
+
+    The "full" and "max" sizes are scaled down to fit `max_width`, for both
+    sides, and `max_area` in pixels, if given.
+
+    Raises:
+        ValueError: If the request is invalid for the image, or asks for it
+            larger than its full size or the maximum size
+    """
+    x, y, w, h = _parse_region(region, width, height)
+    return IIIFImageRequest(
+        (x, y, w, h),
+        _parse_size(size, w, h, max_width, max_area),
+        int(rotation),
+        "color" if quality == "default" else quality,
+    )
+
+
+def generate_iiif_image_info(
+    image_id: str,
+    width: int,
+    height: int,
+    tile_size: int,
+    max_width: int = None,
+    max_area: int = None,
+) -> dict:
+    """
+    Generate the IIIF Image API info.json of an image, advertising the
+    maximum width and area in pixels of the images served, if given.
+    """
+    limits = {}
+    if max_width is not None:
+        limits["maxWidth"] = max_width
+    if max_area is not None:
+        limits["maxArea"] = max_area
+
+    scale_factors = [1]
+    while tile_size * scale_factors[-1] < max(width, height):
+        scale_factors.append(scale_factors[-1] * 2)
+
+    return {
+        "@context": IIIF_IMAGE_CONTEXT,
+        "@id": image_id,
+        "protocol": "http://iiif.io/api/image",
+        "width": width,
+        "height": height,
+        "tiles": [{"width": tile_size, "scaleFactors": scale_factors}],
+        "profile": [
+            IIIF_IMAGE_PROFILE,
+            {
+                "formats": ["jpg"],
+                "qualities": ["default", "color", "gray"],
+                **limits,
+            },
+        ],
+    }
+
+
+def generate_iiif_image_service(image_id: str) -> dict:
+    """Generate the `service` block referencing an image's IIIF Image API."""
+    return {
+        "@context": IIIF_IMAGE_CONTEXT,
+        "@id": image_id,
+        "profile": IIIF_IMAGE_PROFILE,
+    }
+
+
+def render_iiif_image(
+    page: pymupdf.Page, width: int, height: int, image_request: IIIFImageRequest
+) -> pymupdf.Pixmap:
+    """
+    Render the region of `page` in `image_request`, scaled and rotated, where
+    the full page is rendered at `width` by `height` pixels. Only the region is
+    rendered.
+    """
+    scale_x = width / page.rect.width
+    scale_y = height / page.rect.height
+    x, y, w, h = image_request.region
+    clip = pymupdf.Rect(
+        page.rect.x0 + x / scale_x,
+        page.rect.y0 + y / scale_y,
+        page.rect.x0 + (x + w) / scale_x,
+        page.rect.y0 + (y + h) / scale_y,
+    )
+    size_width, size_height = image_request.size
+    matrix = pymupdf.Matrix(
+        size_width / clip.width, size_height / clip.height
+    ).prerotate(image_request.rotation)
+    return page.get_pixmap(
+        matrix=matrix,
+        clip=clip,
+        colorspace=(
+            pymupdf.csGRAY if image_request.quality == "gray" else pymupdf.csRGB
+        ),
+        alpha=False,
+    )
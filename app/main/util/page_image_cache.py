@@ -0,0 +1,283 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+from flask import current_app
+
+# extensions of the page image sizes whose images are not JPEG
+PAGE_IMAGE_MEDIA_TYPES = {".webp": "image/webp"}
+
+# prefix of the files page images are written to before they are moved into
+# place, which eviction leaves alone as they may still be being written
+DISK_CACHE_TEMP_FILE_PREFIX = ".tmp-"
+
+
+class PageImageKey(NamedTuple):
+    """
+    Identifies a rendered image of a page of a document version in S3.
+
+    `etag` is the ETag of the S3 object the page was rendered from, so images of
+    a replaced object are never served, and `size` the rendition, e.g. "full" or
+    "thumbnail", with the image format as an extension unless it is JPEG, e.g.
+    "w800.webp".
+    """
+
+    bucket: str
+    key: str
+    etag: str
+    page_number: int
+    size: str
+
+    @property
+    def media_type(self) -> str:
+        """The media type of the image, from the extension of its size."""
+        return PAGE_IMAGE_MEDIA_TYPES.get(
+            os.path.splitext(self.size)[1], "image/jpeg"
+        )
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(
+            "\0".join(str(field) for field in self).encode()
+        ).hexdigest()
+
+
+class MemoryPageImageCache:
+    """
+    Thread-safe LRU cache of rendered page images bounded by their total size.
+
+    Images are evicted least recently used first once their total size exceeds
+    `max_bytes`, and images larger than `max_bytes` are not cached.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, cache_key: PageImageKey) -> bytes | None:
+        with self._lock:
+            image_bytes = self._entries.get(cache_key)
+            if image_bytes is not None:
+                self._entries.move_to_end(cache_key)
+            return image_bytes
+
+    def set(self, cache_key: PageImageKey, image_bytes: bytes):
+        if len(image_bytes) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(cache_key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[cache_key] = image_bytes
+            self._size += len(image_bytes)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskPageImageCache:
+    """
+    Cache of rendered page images as files in a directory, e.g. the Lambda's
+    `/tmp`, so images outlive the memory tier within a worker's lifetime.
+
+    Files are written atomically so concurrent readers never see partial images.
+    Once their total size exceeds `max_bytes` the least recently modified files
+    are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, cache_key: PageImageKey) -> str:
+        digest = cache_key.digest
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, cache_key: PageImageKey) -> bytes | None:
+        try:
+            with open(self._path(cache_key), "rb") as image_file:
+                return image_file.read()
+        except OSError:
+            return None
+
+    def set(self, cache_key: PageImageKey, image_bytes: bytes):
+        if len(image_bytes) > self.max_bytes:
+            return
+        path = self._path(cache_key)
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(path),
+                prefix=DISK_CACHE_TEMP_FILE_PREFIX,
+                delete=False,
+            ) as image_file:
+                temp_path = image_file.name
+                image_file.write(image_bytes)
+            os.replace(temp_path, path)
+        except OSError as e:
+            current_app.app_logger.warning(
+                f"Failed to write page image to disk cache: {e}"
+            )
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                self._size += len(image_bytes)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        for root, _, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                if file_name.startswith(DISK_CACHE_TEMP_FILE_PREFIX):
+                    continue
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self):
+        files = sorted(self._files())
+        self._size = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+
+class S3PageImageCache:
+    """
+    Cache of rendered page images as objects under a prefix of an S3 bucket,
+    shared by every worker. Failures to read or write it are logged and treated
+    as misses so they never prevent a page from being served.
+    """
+
+    def __init__(self, bucket: str, prefix: str):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, cache_key: PageImageKey) -> str:
+        return f"{self.prefix}{cache_key.digest}"
+
+    def get(self, cache_key: PageImageKey) -> bytes | None:
+        s3 = boto3.client("s3")
+        try:
+            s3_object = s3.get_object(
+                Bucket=self.bucket, Key=self._key(cache_key)
+            )
+            return s3_object["Body"].read()
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+                current_app.app_logger.warning(
+                    f"Failed to read page image from S3 cache: {e}"
+                )
+        except BotoCoreError as e:
+            current_app.app_logger.warning(
+                f"Failed to read page image from S3 cache: {e}"
+            )
+        return None
+
+    def set(self, cache_key: PageImageKey, image_bytes: bytes):
+        s3 = boto3.client("s3")
+        try:
+            s3.put_object(
+                Bucket=self.bucket,
+                Key=self._key(cache_key),
+                Body=image_bytes,
+                ContentType=cache_key.media_type,
+            )
+        except (ClientError, BotoCoreError) as e:
+            current_app.app_logger.warning(
+                f"Failed to write page image to S3 cache: {e}"
+            )
+
+
+class TieredPageImageCache:
+    """
+    Looks rendered page images up in each tier in turn, fastest first, copying
+    images found in a slower tier into the faster ones, and stores images in
+    every tier.
+    """
+
+    def __init__(self, tiers: list):
+        self.tiers = tiers
+
+    def get(self, cache_key: PageImageKey) -> bytes | None:
+        for index, tier in enumerate(self.tiers):
+            image_bytes = tier.get(cache_key)
+            if image_bytes is not None:
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(cache_key, image_bytes)
+                return image_bytes
+        return None
+
+    def set(self, cache_key: PageImageKey, image_bytes: bytes):
+        for tier in self.tiers:
+            tier.set(cache_key, image_bytes)
+
+
+def get_page_image_cache() -> TieredPageImageCache:
+    """
+    Return the rendered page image cache for the current Flask app, creating it
+    on first use from the `PAGE_IMAGE_CACHE_*` config values.
+
+    It always has an in-memory tier, followed by a disk tier if
+    `PAGE_IMAGE_CACHE_DIR` is set and an S3 tier if `PAGE_IMAGE_CACHE_S3_BUCKET`
+    is set.
+    """
+    cache = current_app.extensions.get("page_image_cache")
+    if cache is None:
+        config = current_app.config
+        tiers = [
+            MemoryPageImageCache(
+                int(config.get("PAGE_IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+            )
+        ]
+        if config.get("PAGE_IMAGE_CACHE_DIR"):
+            tiers.append(
+                DiskPageImageCache(
+                    config["PAGE_IMAGE_CACHE_DIR"],
+                    int(
+                        config.get(
+                            "PAGE_IMAGE_CACHE_DIR_MAX_BYTES", 512 * 1024 * 1024
+                        )
+                    ),
+                )
+            )
+        if config.get("PAGE_IMAGE_CACHE_S3_BUCKET"):
+            tiers.append(
+                S3PageImageCache(
+                    config["PAGE_IMAGE_CACHE_S3_BUCKET"],
+                    config.get("PAGE_IMAGE_CACHE_S3_PREFIX", "page-images/"),
+                )
+            )
+        cache = TieredPageImageCache(tiers)
+        current_app.extensions["page_image_cache"] = cache
+    return cache
@@ -0,0 +1,179 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable
+
+from flask import Flask, current_app
+
+from app.main.util.page_image_cache import PageImageKey, get_page_image_cache
+
+
+class PageRenderScheduler:
+    """
+    Renders page images into the page image cache, either for a request or
+    ahead of it on a bounded pool of background threads.
+
+    Renders are de-duplicated while in flight: a request for a page that is
+    already being rendered, by another request or in the background, waits up
+    to `wait_timeout` seconds for that render before rendering the page itself.
+    A request for a page whose background render is still queued cancels it and
+    renders the page itself, so requests never wait behind the queue. At most
+    `max_pending` background renders are queued at once and further ones are
+    dropped, to be rendered on demand instead. With `max_workers` 0 nothing is
+    rendered in the background.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        page_image_cache,
+        max_workers: int,
+        max_pending: int,
+        wait_timeout: float = 10,
+    ):
+        self.app = app
+        self.page_image_cache = page_image_cache
+        self.max_pending = max_pending
+        self.wait_timeout = wait_timeout
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="page-render"
+            )
+            if max_workers > 0
+            else None
+        )
+        self._in_flight = {}
+        self._queued = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def render(
+        self, cache_key: PageImageKey, render_page: Callable[[], bytes]
+    ) -> bytes:
+        """
+        Return the image for `cache_key` rendered by `render_page` and store it
+        in the page image cache, or wait for the render already in flight.
+        Exceptions raised by the render are raised to every waiting caller.
+        """
+        with self._lock:
+            future = self._in_flight.get(cache_key)
+            if future is None:
+                future = self._in_flight[cache_key] = Future()
+                in_flight = False
+            else:
+                # take over a background render that has not started yet
+                queued = self._queued.pop(cache_key, None)
+                in_flight = queued is None or not queued.cancel()
+                if not in_flight:
+                    self._pending -= 1
+
+        if not in_flight:
+            return self._render(cache_key, render_page, future)
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            current_app.app_logger.warning(
+                f"Timed out waiting for page image {cache_key.key} page "
+                f"{cache_key.page_number} ({cache_key.size}), rendering it"
+            )
+            return self._render(cache_key, render_page, Future())
+
+    def _render(
+        self, cache_key, render_page, future: Future, check_cache=False
+    ) -> bytes:
+        try:
+            image_bytes = (
+                self.page_image_cache.get(cache_key) if check_cache else None
+            )
+            if image_bytes is None:
+                image_bytes = render_page()
+                self.page_image_cache.set(cache_key, image_bytes)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(image_bytes)
+            return image_bytes
+        finally:
+            with self._lock:
+                if self._in_flight.get(cache_key) is future:
+                    del self._in_flight[cache_key]
+
+    def schedule(
+        self, cache_key: PageImageKey, render_page: Callable[[], bytes]
+    ) -> bool:
+        """
+        Queue a background render of the image for `cache_key` unless it is
+        already in flight or the queue is full, returning whether it was
+        queued. The image is not rendered again if it is already cached.
+        """
+        if self._executor is None:
+            return False
+        with self._lock:
+            if (
+                cache_key in self._in_flight
+                or self._pending >= self.max_pending
+            ):
+                return False
+            future = self._in_flight[cache_key] = Future()
+            self._pending += 1
+            self._queued[cache_key] = self._executor.submit(
+                self._run_scheduled, cache_key, render_page, future
+            )
+        return True
+
+    def _run_scheduled(self, cache_key, render_page, future: Future):
+        with self._lock:
+            self._queued.pop(cache_key, None)
+            self._pending -= 1
+        with self.app.app_context():
+            try:
+                self._render(cache_key, render_page, future, check_cache=True)
+            except Exception as e:
+                current_app.app_logger.warning(
+                    f"Failed to pre-render page image {cache_key.key} page "
+                    f"{cache_key.page_number} ({cache_key.size}): {e}"
+                )
+
+    def submit(self, job: Callable[[], None]) -> bool:
+        """
+        Run `job`, e.g. one scheduling the renders of a document's pages, on
+        the background pool in an app context, returning whether it was queued.
+        """
+        if self._executor is None:
+            return False
+        self._executor.submit(self._run_job, job)
+        return True
+
+    def _run_job(self, job: Callable[[], None]):
+        with self.app.app_context():
+            try:
+                job()
+            except Exception as e:
+                current_app.app_logger.warning(
+                    f"Failed to schedule page pre-rendering: {e}"
+                )
+
+
+def get_page_render_scheduler() -> PageRenderScheduler:
+    """
+    Return the page render scheduler for the current Flask app, creating it on
+    first use from the `PAGE_PRERENDER_*` config values.
+    """
+    scheduler = current_app.extensions.get("page_render_scheduler")
+    if scheduler is None:
+        scheduler = PageRenderScheduler(
+            current_app._get_current_object(),
+            get_page_image_cache(),
+            max_workers=int(
+                current_app.config.get("PAGE_PRERENDER_WORKERS", 1)
+            ),
+            max_pending=int(
+                current_app.config.get("PAGE_PRERENDER_MAX_PENDING", 256)
+            ),
+            wait_timeout=float(
+                current_app.config.get("PAGE_RENDER_WAIT_TIMEOUT", 10)
+            ),
+        )
+        current_app.extensions["page_render_scheduler"] = scheduler
+    return scheduler
@@ -1,4 +1,13 @@
-def get_pagination(current_page: int, total_pages: int) -> dict | None:
+from flask import abort
+from sqlalchemy import func
+
+
+def get_pagination(
+    current_page: int,
+    total_pages: int,
+    previous_cursor: str | None = None,
+    next_cursor: str | None = None,
+) -> dict | None:
     """
     Generate pagination details for a given page within a total number of pages based on GDS rules.
 
@@ -8,6 +17,8 @@ def get_pagination(current_page: int, total_pages: int) -> dict | None:
     Parameters:
     current_page: int - The current active page.
     total_pages: int - The total number of pages available.
+    previous_cursor: str | None - Cursor token for the previous page link of a keyset paginated page.
+    next_cursor: str | None - Cursor token for the next page link of a keyset paginated page.
 
     Returns: dict | None
     """
@@ -39,11 +50,17 @@ def get_pagination(current_page: int, total_pages: int) -> dict | None:
     previous_page = current_page - 1 if current_page > 1 else None
     next_page = current_page + 1 if current_page < total_pages else None
 
-    return {
+    pagination = {
         "pages": pages,
         "previous": previous_page,
         "next": next_page,
     }
+    if previous_cursor and previous_page:
+        pagination["previous_cursor"] = previous_cursor
+    if next_cursor and next_page:
+        pagination["next_cursor"] = next_cursor
+
+    return pagination
 
 
 def calculate_total_pages(total_records: int, records_per_page: int) -> int:
@@ -63,27 +80,128 @@ def calculate_total_pages(total_records: int, records_per_page: int) -> int:
     return (total_records + records_per_page - 1) // records_per_page
 
 
-def paginate(items: list, current_page: int, page_size: int):
+class QueryPage:
+    """
+    A page of rows of a query, with the total number of rows across all pages and
+    optionally the total of one of its columns across all pages.
+
+    Iterating over it iterates over the rows of the page. Each row also holds the
+    `total_count` column, and the `<sum_column>_total` column if a `sum_column`
+    was given, used to compute these totals.
+    """
+
+    def __init__(self, items, page, per_page, total, column_total=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.column_total = column_total
+
+    @property
+    def pages(self) -> int:
+        return calculate_total_pages(self.total, self.per_page)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def paginate_query(
+    query, page: int, per_page: int, sum_column: str | None = None
+) -> QueryPage:
     """
-    Paginate a list of items based on the current page and page size
+    Fetch a page of rows of a query together with the total number of rows, and
+    optionally the total of the `sum_column` column, in a single round trip.
+
+    The totals are computed with window functions over the whole result of the
+    query, which are evaluated before its LIMIT and OFFSET are applied.
 
     Parameters:
-    items: list - The list of items
-    current_page: int - Current page.
-    page_size: int - Amount of items displayed per page,
+    query: Query - The query to paginate, including its ordering.
+    page: int - The page to fetch, starting from 1.
+    per_page: int - The maximum number of rows on a page.
+    sum_column: str | None - The name of a column of the query to total.
 
-    Returns: list
+    Returns: QueryPage
+
+    Aborts with a 404 if there are no rows on a page after the first, as
+    Flask-SQLAlchemy's `paginate` does.
+    """
+    window_columns = [func.count().over().label("total_count")]
+    if sum_column:
+        column = next(
+            description["expr"]
+            for description in query.column_descriptions
+            if description["name"] == sum_column
+        )
+        window_columns.append(
+            func.sum(column).over().label(f"{sum_column}_total")
+        )
+
+    items = (
+        query.add_columns(*window_columns)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
+
+    if not items:
+        if page != 1:
+            abort(404)
+        return QueryPage(items, page, per_page, 0, 0 if sum_column else None)
+
+    return QueryPage(
+        items,
+        page,
+        per_page,
+        items[0].total_count,
+        getattr(items[0], f"{sum_column}_total") if sum_column else None,
+    )
+
+
+def paginate_keyset_query(
+    query,
+    page: int,
+    per_page: int,
+    from_cursor: bool = False,
+    reverse: bool = False,
+    total: int | None = None,
+) -> QueryPage:
     """
-    if current_page <= 0 or page_size <= 0:
-        return []
+    Fetch a page of rows of a keyset paginated query, whose rows hold a
+    `total_count` column with the total number of rows across all pages unless
+    the total is given, e.g. as carried by the cursor the query starts from.
 
-    total_items = len(items)
-    total_pages = (total_items + page_size - 1) // page_size
+    If `from_cursor` is set the query is already restricted to the rows after a
+    cursor, so the page is its first `per_page` rows and is found in constant time
+    whatever the page number. Otherwise the page is found with OFFSET, as used to
+    jump straight to a page from the page list. With `reverse` set the query is
+    restricted to the rows before a cursor in reverse order, so the page's rows
+    are put back in order.
 
-    if current_page > total_pages:
-        return []
+    Parameters:
+    query: Query - The query to paginate, including its ordering.
+    page: int - The page to fetch, starting from 1.
+    per_page: int - The maximum number of rows on a page.
+    from_cursor: bool - Whether the query is restricted to the rows after a cursor.
+    reverse: bool - Whether the query returns the page's rows in reverse order.
+    total: int - The total number of rows, if already known.
 
-    start_index = (current_page - 1) * page_size
-    end_index = min(start_index + page_size, total_items)
+    Returns: QueryPage
 
-    return items[start_index:end_index]
+    Aborts with a 404 if there are no rows on a page after the first.
+    """
+    query = query.limit(per_page)
+    if not from_cursor:
+        query = query.offset((page - 1) * per_page)
+    items = query.all()
+    if reverse:
+        items.reverse()
+
+    if not items:
+        if page != 1:
+            abort(404)
+        return QueryPage(items, page, per_page, 0)
+
+    if total is None:
+        total = items[0].total_count
+    return QueryPage(items, page, per_page, total)
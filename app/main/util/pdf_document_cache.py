@@ -0,0 +1,266 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, NamedTuple
+
+import pymupdf
+from flask import current_app
+
+from app.main.util.s3_streaming import (
+    get_s3_object_content_size,
+    open_s3_object_document,
+)
+
+# pymupdf does not support being used by several threads at once, so documents
+# are only opened, used and closed while holding this lock, whatever thread,
+# request or background render, they are used by.
+PYMUPDF_LOCK = threading.RLock()
+
+
+class PDFDocumentKey(NamedTuple):
+    """Identifies a version of a PDF in S3 by its bucket, key and ETag."""
+
+    bucket: str
+    key: str
+    etag: str
+
+
+class PDFDocumentCacheFullError(Exception):
+    """
+    Raised when a PDF cannot be opened without the documents open in a
+    worker exceeding their maximum total size.
+    """
+
+
+class _CachedPDFDocument:
+    def __init__(self, document: pymupdf.Document, size: int):
+        self.document = document
+        self.size = size
+        self.cached = False
+        self.closed = False
+        self.on_close = None
+        # pymupdf documents must not be used by two threads at once
+        self.lock = threading.Lock()
+
+    def close(self):
+        # A document in use is closed by its user once released
+        if self.lock.acquire(blocking=False):
+            try:
+                if not self.closed:
+                    self.closed = True
+                    with PYMUPDF_LOCK:
+                        self.document.close()
+                    if self.on_close is not None:
+                        self.on_close(self)
+            finally:
+                self.lock.release()
+
+
+class PDFDocumentCache:
+    """
+    Thread-safe LRU cache of open pymupdf documents, bounded by the number of
+    documents and the total size of the PDFs they hold, in memory or, for
+    large PDFs streamed to a temporary file by `read_s3_object`, on disk.
+
+    If `max_open_bytes` is set, the total size of every document open in the
+    worker, cached or in use, is also bounded. A document that would exceed it
+    evicts idle cached documents and then waits up to `wait_timeout` seconds
+    for documents in use to be closed, raising `PDFDocumentCacheFullError`
+    after. A document is always opened if no other is.
+
+    Concurrent requests for a document that is not cached share a single
+    download and parse: the first loads it while the others wait for it.
+    Documents are used one thread at a time, and only one document at a time
+    is used across threads, holding `PYMUPDF_LOCK`. An evicted document is
+    closed once the thread using it is done with it. A document larger than
+    `max_bytes` is loaded for its request but not cached.
+
+    `hits`, `misses` and `evictions` count the documents served from the cache,
+    loaded and evicted.
+    """
+
+    def __init__(
+        self,
+        max_documents: int,
+        max_bytes: int,
+        max_open_bytes: int = None,
+        wait_timeout: float = 10,
+    ):
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.max_open_bytes = max_open_bytes
+        self.wait_timeout = wait_timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._size = 0
+        self._open_size = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Condition(self._lock)
+
+    @contextmanager
+    def document(
+        self,
+        cache_key: PDFDocumentKey,
+        load_pdf: Callable[[], bytes | str],
+        filetype: str | None = "pdf",
+    ):
+        """
+        Context manager giving exclusive use of the open document for
+        `cache_key`, opened from the bytes or temporary file path returned by
+        `load_pdf` if it is not cached. `filetype` is passed to pymupdf, e.g.
+        None to open an image as a single page document.
+        """
+        while True:
+            entry = self._get_or_load(cache_key, load_pdf, filetype)
+            try:
+                with entry.lock, PYMUPDF_LOCK:
+                    if entry.closed:
+                        # evicted between being looked up and locked
+                        continue
+                    yield entry.document
+                    return
+            finally:
+                if not entry.cached:
+                    entry.close()
+
+    def _get_or_load(self, cache_key, load_pdf, filetype) -> _CachedPDFDocument:
+        while True:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return entry
+                loading = self._loading.get(cache_key)
+                if loading is None:
+                    self._loading[cache_key] = threading.Event()
+                    self.misses += 1
+                    break
+            loading.wait()
+
+        evicted_entries = []
+        try:
+            pdf = load_pdf()
+            size = get_s3_object_content_size(pdf)
+            with PYMUPDF_LOCK:
+                document = open_s3_object_document(pdf, filetype)
+            entry = _CachedPDFDocument(document, size)
+            try:
+                self._reserve(size)
+            except BaseException:
+                entry.close()
+                raise
+            entry.on_close = self._release
+            with self._lock:
+                evicted_entries = self._add(cache_key, entry)
+        finally:
+            with self._lock:
+                self._loading.pop(cache_key).set()
+
+        for evicted_entry in evicted_entries:
+            evicted_entry.close()
+        return entry
+
+    def _reserve(self, size: int):
+        """Count `size` bytes as open, once they fit in `max_open_bytes`."""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                if (
+                    self.max_open_bytes is None
+                    or self._open_size == 0
+                    or self._open_size + size <= self.max_open_bytes
+                ):
+                    self._open_size += size
+                    return
+                idle_entry = self._evict_idle_entry()
+                if idle_entry is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PDFDocumentCacheFullError(
+                            f"{self._open_size} bytes of PDFs are open, "
+                            f"no room for {size} more"
+                        )
+                    self._closed.wait(remaining)
+                    continue
+            idle_entry.close()
+
+    def _release(self, entry: _CachedPDFDocument):
+        with self._lock:
+            self._open_size -= entry.size
+            self._closed.notify_all()
+
+    def _evict_idle_entry(self) -> _CachedPDFDocument | None:
+        for cache_key, entry in self._entries.items():
+            if not entry.lock.locked():
+                del self._entries[cache_key]
+                self._size -= entry.size
+                entry.cached = False
+                self.evictions += 1
+                return entry
+        return None
+
+    def _add(self, cache_key, entry) -> list:
+        if self.max_documents <= 0 or entry.size > self.max_bytes:
+            return []
+
+        entry.cached = True
+        self._entries[cache_key] = entry
+        self._size += entry.size
+
+        evicted_entries = []
+        while (
+            len(self._entries) > self.max_documents
+            or self._size > self.max_bytes
+        ):
+            _, evicted_entry = self._entries.popitem(last=False)
+            self._size -= evicted_entry.size
+            evicted_entry.cached = False
+            self.evictions += 1
+            evicted_entries.append(evicted_entry)
+        return evicted_entries
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "documents": len(self._entries),
+                "bytes": self._size,
+                "open_bytes": self._open_size,
+            }
+
+
+def get_pdf_document_cache() -> PDFDocumentCache:
+    """
+    Return the open PDF document cache for the current Flask app, creating it on
+    first use from the `PDF_DOCUMENT_CACHE_*` config values.
+    """
+    cache = current_app.extensions.get("pdf_document_cache")
+    if cache is None:
+        cache = PDFDocumentCache(
+            max_documents=int(
+                current_app.config.get("PDF_DOCUMENT_CACHE_MAX_DOCUMENTS", 8)
+            ),
+            max_bytes=int(
+                current_app.config.get(
+                    "PDF_DOCUMENT_CACHE_MAX_BYTES", 128 * 1024 * 1024
+                )
+            ),
+            max_open_bytes=int(
+                current_app.config.get(
+                    "PDF_DOCUMENT_MAX_OPEN_BYTES", 512 * 1024 * 1024
+                )
+            ),
+            wait_timeout=float(
+                current_app.config.get("PAGE_RENDER_WAIT_TIMEOUT", 10)
+            ),
+        )
+        current_app.extensions["pdf_document_cache"] = cache
+    return cache
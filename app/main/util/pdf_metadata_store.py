@@ -0,0 +1,172 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+import boto3
+import pymupdf
+from botocore.exceptions import BotoCoreError, ClientError
+from flask import current_app
+
+from app.main.util.pdf_document_cache import (
+    PDFDocumentKey,
+    get_pdf_document_cache,
+)
+
+
+class PDFMetadata(NamedTuple):
+    """The size, in points, of each page of a PDF."""
+
+    page_sizes: list
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_sizes)
+
+    @classmethod
+    def from_document(cls, pdf_document: pymupdf.Document) -> "PDFMetadata":
+        return cls(
+            [
+                (page.rect.width, page.rect.height)
+                for page in pdf_document.pages()
+            ]
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({"page_sizes": self.page_sizes})
+
+    @classmethod
+    def from_json(cls, metadata_json: str | bytes) -> "PDFMetadata":
+        return cls(
+            [
+                (width, height)
+                for width, height in json.loads(metadata_json)["page_sizes"]
+            ]
+        )
+
+
+class PDFMetadataStore:
+    """
+    Store of the page sizes of versions of PDFs in S3, so manifests can be
+    generated without downloading and parsing the PDF again.
+
+    Metadata is kept in a thread-safe LRU of at most `max_entries` PDFs and,
+    if `s3_bucket` is set, persisted as JSON objects under `s3_prefix` in that
+    bucket, named after the PDF's bucket, key and ETag, and shared by every
+    worker. Failures to read or write S3 are logged and treated as misses.
+    """
+
+    def __init__(
+        self, max_entries: int, s3_bucket: str = None, s3_prefix: str = ""
+    ):
+        self.max_entries = max_entries
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = s3_prefix
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _s3_key(self, cache_key: PDFDocumentKey) -> str:
+        return (
+            f"{self.s3_prefix}{cache_key.bucket}/{cache_key.key}/"
+            f"{cache_key.etag}.json"
+        )
+
+    def get(self, cache_key: PDFDocumentKey) -> PDFMetadata | None:
+        with self._lock:
+            metadata = self._entries.get(cache_key)
+            if metadata is not None:
+                self._entries.move_to_end(cache_key)
+                return metadata
+
+        metadata = self._get_from_s3(cache_key)
+        if metadata is not None:
+            self._set_in_memory(cache_key, metadata)
+        return metadata
+
+    def set(self, cache_key: PDFDocumentKey, metadata: PDFMetadata):
+        self._set_in_memory(cache_key, metadata)
+        self._set_in_s3(cache_key, metadata)
+
+    def _set_in_memory(self, cache_key, metadata):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[cache_key] = metadata
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_from_s3(self, cache_key):
+        if not self.s3_bucket:
+            return None
+        s3 = boto3.client("s3")
+        try:
+            s3_object = s3.get_object(
+                Bucket=self.s3_bucket, Key=self._s3_key(cache_key)
+            )
+            return PDFMetadata.from_json(s3_object["Body"].read())
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+                current_app.app_logger.warning(
+                    f"Failed to read PDF metadata from S3: {e}"
+                )
+        except (BotoCoreError, ValueError, KeyError) as e:
+            current_app.app_logger.warning(
+                f"Failed to read PDF metadata from S3: {e}"
+            )
+        return None
+
+    def _set_in_s3(self, cache_key, metadata):
+        if not self.s3_bucket:
+            return
+        s3 = boto3.client("s3")
+        try:
+            s3.put_object(
+                Bucket=self.s3_bucket,
+                Key=self._s3_key(cache_key),
+                Body=metadata.to_json(),
+                ContentType="application/json",
+            )
+        except (ClientError, BotoCoreError) as e:
+            current_app.app_logger.warning(
+                f"Failed to write PDF metadata to S3: {e}"
+            )
+
+
+def get_pdf_metadata_store() -> PDFMetadataStore:
+    """
+    Return the PDF metadata store for the current Flask app, creating it on
+    first use from the `PDF_METADATA_*` config values.
+    """
+    store = current_app.extensions.get("pdf_metadata_store")
+    if store is None:
+        store = PDFMetadataStore(
+            max_entries=int(
+                current_app.config.get("PDF_METADATA_CACHE_MAX_ENTRIES", 1024)
+            ),
+            s3_bucket=current_app.config.get("PDF_METADATA_S3_BUCKET"),
+            s3_prefix=current_app.config.get(
+                "PDF_METADATA_S3_PREFIX", "pdf-metadata/"
+            ),
+        )
+        current_app.extensions["pdf_metadata_store"] = store
+    return store
+
+
+def get_pdf_metadata(
+    cache_key: PDFDocumentKey, load_pdf: Callable[[], bytes | str]
+) -> PDFMetadata:
+    """
+    Return the metadata of the PDF version identified by `cache_key` from the
+    store, or read it from the PDF, loaded through the PDF document cache from
+    the bytes or temporary file path returned by `load_pdf`, and store it.
+    """
+    store = get_pdf_metadata_store()
+    metadata = store.get(cache_key)
+    if metadata is None:
+        with get_pdf_document_cache().document(
+            cache_key, load_pdf
+        ) as pdf_document:
+            metadata = PDFMetadata.from_document(pdf_document)
+        store.set(cache_key, metadata)
+    return metadata
@@ -1,45 +1,63 @@
 import base64
 import io
-from typing import List
+import warnings
+from typing import List, NamedTuple
 
 import boto3
 import pymupdf
 from botocore.exceptions import ClientError
-from flask import Response, current_app, jsonify
+from flask import Response, abort, current_app, jsonify, url_for
 from PIL import Image
 
-from app.main.db.models import File
+from app.main.db.queries import FileRecord
+from app.main.util.cache import TTLCache
+from app.main.util.iiif_image import (
+    IIIF_SUPPORTED_IMAGE_FORMATS,
+    generate_iiif_image_service,
+)
+from app.main.util.pdf_document_cache import PDFDocumentKey
+from app.main.util.pdf_metadata_store import PDFMetadata, get_pdf_metadata
+from app.main.util.s3_streaming import open_s3_object_file, read_s3_object
+from configs.base_config import CONVERTIBLE_PUIDS
 
 
-def generate_breadcrumb_values(file):
+def generate_breadcrumb_values(file: FileRecord):
     """Generate breadcrumb values for the record template."""
-    consignment = file.consignment
-    body = consignment.series.body
-    series = consignment.series
     return {
-        0: {"transferring_body_id": body.BodyId},
-        1: {"transferring_body": body.Name},
-        2: {"series_id": series.SeriesId},
-        3: {"series": series.Name},
-        4: {"consignment_id": consignment.ConsignmentId},
-        5: {"consignment_reference": consignment.ConsignmentReference},
+        0: {"transferring_body_id": file.BodyId},
+        1: {"transferring_body": file.BodyName},
+        2: {"series_id": file.SeriesId},
+        3: {"series": file.SeriesName},
+        4: {"consignment_id": file.ConsignmentId},
+        5: {"consignment_reference": file.ConsignmentReference},
         6: {"file_name": file.FileName},
     }
 
 
-def get_file_extension(file):
+def get_file_extension(file: FileRecord):
     """Extarct file_extension"""
-    if file.ffid_metadata and file.ffid_metadata.Extension is not None:
-        file_extension = file.ffid_metadata.Extension.lower()
+    if file.Extension is not None:
+        file_extension = file.Extension.lower()
     else:
         file_extension = file.FileName.split(".")[-1].lower()
     return file_extension
 
 
-def get_file_puid(file):
+def get_file_puid(file: FileRecord):
     """Extract file PUID from FFIDMetadata"""
-    puid = file.ffid_metadata.PUID.lower()
-    return puid
+    if file.PUID is None:
+        return None
+    return file.PUID.lower()
+
+
+def get_page_image_bucket(file: FileRecord) -> str:
+    """
+    Return the bucket holding the PDF whose pages are served for a record, the
+    access copy bucket for convertible formats or otherwise the record bucket.
+    """
+    if get_file_puid(file) in CONVERTIBLE_PUIDS:
+        return current_app.config["ACCESS_COPY_BUCKET"]
+    return current_app.config["RECORD_BUCKET_NAME"]
 
 
 def get_download_filename(file):
@@ -52,10 +70,10 @@ def get_download_filename(file):
     return None
 
 
-def create_presigned_url(file: File) -> str:
+def create_presigned_url(file: FileRecord) -> str:
     s3 = boto3.client("s3")
     bucket = current_app.config["RECORD_BUCKET_NAME"]
-    key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+    key = f"{file.ConsignmentReference}/{file.FileId}"
 
     presigned_url = s3.generate_presigned_url(
         "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=10
@@ -121,76 +139,145 @@ def extract_pdf_pages_as_images(pdf_bytes: bytes) -> List[dict]:
 
 
 def extract_single_page_as_image(
-    pdf_bytes: bytes, page_number: int, thumbnail: bool = False
+    pdf: bytes | pymupdf.Document,
+    page_number: int,
+    thumbnail: bool = False,
+    width: int = None,
+    image_format: str = "jpeg",
 ) -> bytes:
     """
-    Extract a single page from PDF as JPEG bytes.
+    Extract a single page from PDF as JPEG or WebP bytes.
 
     Args:
-        pdf_bytes: The PDF file bytes
+        pdf: The PDF file bytes, or the PDF already opened with pymupdf
         page_number: 1-indexed page number
         thumbnail: If True, return thumbnail size (150x200)
+        width: If set, render the page at most this many pixels wide
+        image_format: "jpeg" for a JPEG, progressive unless a thumbnail, or
+            "webp"
 
     Returns:
-        JPEG image bytes
+        Image bytes
 
     Raises:
         ValueError: If page_number is invalid
     """
+    if isinstance(pdf, pymupdf.Document):
+        return _render_page_as_image(
+            pdf, page_number, thumbnail, width, image_format
+        )
+
+    with pymupdf.open("pdf", io.BytesIO(pdf)) as pdf_document:
+        return _render_page_as_image(
+            pdf_document, page_number, thumbnail, width, image_format
+        )
+
+
+def _render_page_as_image(
+    pdf_document: pymupdf.Document,
+    page_number: int,
+    thumbnail: bool,
+    width: int = None,
+    image_format: str = "jpeg",
+) -> bytes:
     DPI = 150
 
-    with pymupdf.open("pdf", io.BytesIO(pdf_bytes)) as pdf_document:
-        if page_number < 1 or page_number > pdf_document.page_count:
-            raise ValueError(
-                f"Invalid page number: {page_number}. PDF has {pdf_document.page_count} pages."
-            )
+    if page_number < 1 or page_number > pdf_document.page_count:
+        raise ValueError(
+            f"Invalid page number: {page_number}. PDF has {pdf_document.page_count} pages."
+        )
 
-        # Load page (convert 1-indexed to 0-indexed)
-        page = pdf_document.load_page(page_number - 1)
-        mat = pymupdf.Matrix(DPI / 72, DPI / 72)
-        pix = page.get_pixmap(matrix=mat)
-        img_bytes = pix.tobytes("png")
+    # Load page (convert 1-indexed to 0-indexed)
+    page = pdf_document.load_page(page_number - 1)
+    zoom = DPI / 72
 
-        # Convert to PIL Image
-        page_image = Image.open(io.BytesIO(img_bytes))
+    if thumbnail:
+        # Render at the thumbnail's resolution rather than downscaling the
+        # full size render, and never above the full size resolution
+        zoom = min(zoom, 150 / page.rect.width, 200 / page.rect.height)
+        quality = 70
+    else:
+        quality = 75
+    if width:
+        zoom = min(zoom, width / page.rect.width)
 
-        if thumbnail:
-            page_image.thumbnail((150, 200), Image.Resampling.LANCZOS)
-            quality = 70
-        else:
-            quality = 75
+    pix = page.get_pixmap(
+        matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csRGB, alpha=False
+    )
+    if image_format == "webp":
+        return encode_pixmap_as_webp(pix, quality)
+    # Progressive JPEGs are smaller than baseline ones for all but small
+    # images, and display at low resolution before they have fully loaded
+    return encode_pixmap_as_jpeg(pix, quality, progressive=not thumbnail)
+
+
+def _pixmap_as_pil_image(pix: pymupdf.Pixmap) -> Image.Image:
+    mode = "L" if pix.n == 1 else "RGB"
+    return Image.frombuffer(
+        mode,
+        (pix.width, pix.height),
+        pix.samples_mv,
+        "raw",
+        mode,
+        pix.stride,
+        1,
+    )
 
-        # Convert to JPEG
-        output_buffer = io.BytesIO()
-        page_image.save(output_buffer, format="JPEG", quality=quality)
 
-        # Clean up
-        page_image.close()
-        pix = None
+def encode_pixmap_as_jpeg(
+    pix: pymupdf.Pixmap, quality: int, progressive: bool = False
+) -> bytes:
+    """
+    Encode an RGB or greyscale pixmap without alpha as JPEG.
+
+    The pixmap's samples are encoded straight to JPEG, without a PNG round
+    trip. PIL wraps them without copying, and its JPEG encoder is much faster
+    than pymupdf's.
+    """
+    output_buffer = io.BytesIO()
+    _pixmap_as_pil_image(pix).save(
+        output_buffer, format="JPEG", quality=quality, progressive=progressive
+    )
+    return output_buffer.getvalue()
 
-        return output_buffer.getvalue()
+
+def encode_pixmap_as_webp(pix: pymupdf.Pixmap, quality: int) -> bytes:
+    """
+    Encode an RGB or greyscale pixmap without alpha as lossy WebP.
+
+    Encoder method 2 takes about half the time of the default for nearly the
+    same size.
+    """
+    output_buffer = io.BytesIO()
+    _pixmap_as_pil_image(pix).save(
+        output_buffer, format="WEBP", quality=quality, method=2
+    )
+    return output_buffer.getvalue()
 
 
 def extract_single_page_as_thumbnail(
-    pdf_bytes: bytes, page_number: int
+    pdf: bytes | pymupdf.Document, page_number: int, image_format: str = "jpeg"
 ) -> bytes:
     """
-    Extract a single page from PDF as a thumbnail JPEG.
+    Extract a single page from PDF as a thumbnail JPEG or WebP.
 
     Args:
-        pdf_bytes: The PDF file bytes
+        pdf: The PDF file bytes, or the PDF already opened with pymupdf
         page_number: 1-indexed page number
+        image_format: "jpeg" or "webp"
 
     Returns:
-        JPEG thumbnail bytes (150x200 max)
+        Thumbnail image bytes (150x200 max)
     """
-    return extract_single_page_as_image(pdf_bytes, page_number, thumbnail=True)
+    return extract_single_page_as_image(
+        pdf, page_number, thumbnail=True, image_format=image_format
+    )
 
 
-def create_presigned_url_for_access_copy(file: File) -> str:
+def create_presigned_url_for_access_copy(file: FileRecord) -> str:
     s3 = boto3.client("s3")
     bucket = current_app.config["ACCESS_COPY_BUCKET"]
-    key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+    key = f"{file.ConsignmentReference}/{file.FileId}"
     try:
         s3.head_object(Bucket=bucket, Key=key)
     except ClientError as e:
@@ -209,6 +296,7 @@ def generate_pdf_manifest(
     bucket: str = None,
     key: str = None,
     record_id: str = None,
+    image_format: str = "jpeg",
 ) -> Response:
     """
     Generate an IIIF manifest for a PDF file with URLs to page images.
@@ -218,6 +306,8 @@ def generate_pdf_manifest(
         manifest_url (str): The manifest's own URL.
         file_obj (Any, optional): The File object for S3 access.
         record_id (str, optional): The record UUID for generating image URLs.
+        image_format (str, optional): The format the page image URLs return
+            for the request, "jpeg" or "webp".
 
     Returns:
         Response: Flask JSON response containing the IIIF manifest.
@@ -226,75 +316,76 @@ def generate_pdf_manifest(
         f"Generating PDF manifest for {file_name}, record_id: {record_id}"
     )
 
-    # Read PDF to get page count and dimensions
-    pdf_bytes = get_pdf_from_s3(bucket, key)
-    current_app.logger.info(f"PDF bytes length: {len(pdf_bytes)}")
+    # Read page count and dimensions, from the PDF only on its first view
+    pdf_metadata = get_s3_pdf_metadata(bucket, key)
+    current_app.logger.info(f"PDF has {pdf_metadata.page_count} pages")
 
     canvas_items = []
 
-    with pymupdf.open("pdf", io.BytesIO(pdf_bytes)) as pdf_document:
-        page_count = pdf_document.page_count
-        current_app.logger.info(f"PDF has {page_count} pages")
-
-        for page_num in range(page_count):
-            page = pdf_document.load_page(page_num)
-            rect = page.rect
-
-            # Calculate dimensions at 150 DPI
-            DPI = 150
-            width = int(rect.width * DPI / 72)
-            height = int(rect.height * DPI / 72)
-
-            page_number = page_num + 1
-
-            # Generate URLs for this page
-            from flask import url_for
-
-            page_image_url = url_for(
-                "main.get_page_image",
-                record_id=record_id,
-                page_number=page_number,
-                _external=True,
-            )
-
-            thumbnail_url = url_for(
-                "main.get_page_thumbnail",
-                record_id=record_id,
-                page_number=page_number,
-                _external=True,
-            )
-
-            canvas_id = f"{manifest_url}/canvas/{page_number}"
-            canvas_items.append(
-                {
-                    "@type": "sc:Canvas",
-                    "@id": canvas_id,
-                    "label": f"Page {page_number}",
-                    "width": width,
-                    "height": height,
-                    "thumbnail": {
-                        "@id": thumbnail_url,
-                        "@type": "dctypes:Image",
-                        "format": "image/jpeg",
-                        "width": 150,
-                        "height": 200,
-                    },
-                    "images": [
-                        {
-                            "@type": "oa:Annotation",
-                            "motivation": "sc:painting",
-                            "resource": {
-                                "@id": page_image_url,
-                                "@type": "dctypes:Image",
-                                "format": "image/jpeg",
-                                "width": width,
-                                "height": height,
-                            },
-                            "on": canvas_id,
-                        }
-                    ],
-                }
-            )
+    for page_number, (page_width, page_height) in enumerate(
+        pdf_metadata.page_sizes, start=1
+    ):
+        # Calculate dimensions at 150 DPI
+        DPI = 150
+        width = int(page_width * DPI / 72)
+        height = int(page_height * DPI / 72)
+
+        # Generate URLs for this page
+        page_image_url = url_for(
+            "main.get_page_image",
+            record_id=record_id,
+            page_number=page_number,
+            _external=True,
+        )
+
+        thumbnail_url = url_for(
+            "main.get_page_thumbnail",
+            record_id=record_id,
+            page_number=page_number,
+            _external=True,
+        )
+
+        iiif_image_url = url_for(
+            "main.get_iiif_image_base",
+            record_id=record_id,
+            page_number=page_number,
+            _external=True,
+        )
+
+        canvas_id = f"{manifest_url}/canvas/{page_number}"
+        canvas_items.append(
+            {
+                "@type": "sc:Canvas",
+                "@id": canvas_id,
+                "label": f"Page {page_number}",
+                "width": width,
+                "height": height,
+                "thumbnail": {
+                    "@id": thumbnail_url,
+                    "@type": "dctypes:Image",
+                    "format": f"image/{image_format}",
+                    "width": 150,
+                    "height": 200,
+                },
+                "images": [
+                    {
+                        "@type": "oa:Annotation",
+                        "motivation": "sc:painting",
+                        "resource": {
+                            "@id": page_image_url,
+                            "@type": "dctypes:Image",
+                            "format": f"image/{image_format}",
+                            "width": width,
+                            "height": height,
+                            "service": generate_iiif_image_service(
+                                iiif_image_url
+                            ),
+                        },
+                        "on": canvas_id,
+                    }
+                ],
+            }
+        )
 
     manifest = {
         "@context": "https://iiif.io/api/presentation/3/context.json",
@@ -328,13 +419,13 @@ def generate_image_manifest(
     manifest_url: str,
     bucket: str = None,
     key: str = None,
+    record_id: str = None,
 ) -> Response:
-    pdf_bytes = get_pdf_from_s3(bucket, key)
-    image = Image.open(io.BytesIO(pdf_bytes))
-    image_width, image_height = image.size
+    image_info = get_s3_image_info_or_abort(bucket, key)
+    image_width, image_height, image_format = image_info
 
     # Detect image format
-    image_format = image.format.lower() if image.format else "png"
+    image_format = image_format.lower() if image_format else "png"
     if image_format == "jpeg":
         mime_type = "image/jpeg"
     elif image_format == "png":
@@ -348,6 +439,27 @@ def generate_image_manifest(
     else:
         mime_type = f"image/{image_format}"
 
+    image_resource = {
+        "@id": file_url,
+        "@type": "dctypes:Image",
+        "format": mime_type,
+        "width": image_width,
+        "height": image_height,
+    }
+    # Let the viewer fetch tiles of images pymupdf can render
+    if (
+        record_id is not None
+        and image_info.format in IIIF_SUPPORTED_IMAGE_FORMATS
+    ):
+        image_resource["service"] = generate_iiif_image_service(
+            url_for(
+                "main.get_iiif_image_base",
+                record_id=record_id,
+                page_number=1,
+                _external=True,
+            )
+        )
+
     manifest = {
         "@context": "https://iiif.io/api/presentation/3/context.json",
         "@id": manifest_url,
@@ -370,13 +482,7 @@ def generate_image_manifest(
                                 "@id": file_url,
                                 "@type": "oa:Annotation",
                                 "motivation": "sc:painting",
-                                "resource": {
-                                    "@id": file_url,
-                                    "@type": "dctypes:Image",
-                                    "format": mime_type,
-                                    "width": image_width,
-                                    "height": image_height,
-                                },
+                                "resource": image_resource,
                                 "on": file_url,
                             }
                         ],
@@ -391,10 +497,146 @@ def generate_image_manifest(
     return response
 
 
-def get_pdf_from_s3(bucket: str, key: str) -> bytes:
-    """fetch PDF file from S3 and return its bytes."""
+def get_pdf_from_s3(bucket: str, key: str, etag: str = None) -> bytes | str:
+    """
+    Fetch PDF file from S3 and return its bytes, or the path of the temporary
+    file it is streamed to if it is larger than `S3_SPOOL_MAX_MEMORY_BYTES`.
+
+    If `etag` is given only that version is fetched, raising a
+    PreconditionFailed ClientError if the object has been replaced.
+    """
+    return read_s3_object(bucket, key, etag=etag)
+
+
+def get_s3_object_etag(bucket: str, key: str) -> str:
+    """Return the ETag of an S3 object, without its surrounding quotes."""
+    s3 = boto3.client("s3")
+    return s3.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+
+
+def get_s3_pdf_metadata(bucket: str, key: str) -> PDFMetadata:
+    """
+    Return the page count and page sizes of the current version of a PDF in
+    S3, stored per version by its ETag, looking the ETag up again if the
+    object is replaced before the PDF is read.
+    """
+    try:
+        return _get_s3_pdf_metadata(
+            bucket, key, get_s3_object_etag(bucket=bucket, key=key)
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "PreconditionFailed":
+            raise
+    return _get_s3_pdf_metadata(
+        bucket, key, get_s3_object_etag(bucket=bucket, key=key)
+    )
+
+
+def _get_s3_pdf_metadata(bucket: str, key: str, etag: str) -> PDFMetadata:
+    return get_pdf_metadata(
+        PDFDocumentKey(bucket, key, etag),
+        lambda: get_pdf_from_s3(bucket, key, etag=etag),
+    )
+
+
+class ImageInfo(NamedTuple):
+    width: int
+    height: int
+    format: str | None
+
+
+def read_image_info(image_bytes: bytes) -> ImageInfo | None:
+    """
+    Read an image's dimensions and format from its bytes, which may be only
+    its leading bytes, returning None if they are not enough to tell.
+    """
+    try:
+        with warnings.catch_warnings():
+            # PIL warns about the truncated data it is not asked to decode
+            warnings.simplefilter("ignore")
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                return ImageInfo(*image.size, image.format)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+def get_s3_image_info(bucket: str, key: str, etag: str = None) -> ImageInfo:
+    """
+    Return the dimensions and format of an image in S3, cached per version of
+    the object by its ETag.
+
+    Only the first `IMAGE_HEADER_PROBE_BYTES` bytes of the image are fetched,
+    which hold the header of every format the viewer supports, unless they are
+    not enough to tell, e.g. for a TIFF whose header is at the end of the file.
+    The object's ETag is looked up unless given, and looked up again if the
+    object is replaced before its header is read.
+    """
+    if etag is not None:
+        return _get_cached_s3_image_info(bucket, key, etag)
+
+    try:
+        return _get_cached_s3_image_info(
+            bucket, key, get_s3_object_etag(bucket=bucket, key=key)
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "PreconditionFailed":
+            raise
+    return _get_cached_s3_image_info(
+        bucket, key, get_s3_object_etag(bucket=bucket, key=key)
+    )
+
+
+def get_s3_image_info_or_abort(bucket: str, key: str) -> ImageInfo:
+    """
+    Return the dimensions and format of an image in S3, aborting with 404 if
+    there is no image or it is empty.
+    """
+    try:
+        return get_s3_image_info(bucket, key)
+    except ClientError as e:
+        error_code = e.response["Error"]["Code"]
+        if error_code == "InvalidRange":
+            # Not even the first byte of an empty object can be read
+            current_app.app_logger.error(f"Image {key} is empty: {e}")
+            abort(404)
+        if error_code in ("404", "NoSuchKey"):
+            abort(404)
+        raise
+
+
+def _get_cached_s3_image_info(bucket: str, key: str, etag: str) -> ImageInfo:
+    cache = current_app.extensions.get("image_info_cache")
+    if cache is None:
+        cache = TTLCache(max_size=1024)
+        current_app.extensions["image_info_cache"] = cache
+
+    cache_key = (bucket, key, etag)
+    image_info = cache.get(cache_key)
+    if image_info is None:
+        image_info = _probe_s3_image_info(bucket, key, etag)
+        cache.set(cache_key, image_info)
+    return image_info
+
+
+def _probe_s3_image_info(bucket: str, key: str, etag: str) -> ImageInfo:
+    probe_bytes = current_app.config.get("IMAGE_HEADER_PROBE_BYTES", 65536)
     s3 = boto3.client("s3")
-    s3_object = s3.get_object(Bucket=bucket, Key=key)
-    pdf_bytes = s3_object["Body"].read()
+    s3_object = s3.get_object(
+        Bucket=bucket,
+        Key=key,
+        Range=f"bytes=0-{probe_bytes - 1}",
+        IfMatch=f'"{etag}"',
+    )
+    image_info = read_image_info(s3_object["Body"].read())
+    if image_info is not None:
+        return image_info
 
-    return pdf_bytes
+    current_app.app_logger.info(
+        f"Header of image {key} not in its first {probe_bytes} bytes, "
+        "reading the whole image"
+    )
+    with open_s3_object_file(
+        get_pdf_from_s3(bucket, key, etag=etag)
+    ) as image_file:
+        with Image.open(image_file) as image:
+            return ImageInfo(*image.size, image.format)
@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+from typing import BinaryIO
+
+import boto3
+import pymupdf
+from flask import current_app
+
+S3_CHUNK_SIZE = 1024 * 1024
+
+
+def read_s3_object(bucket: str, key: str, etag: str = None) -> bytes | str:
+    """
+    Read an S3 object into memory if it is no larger than
+    `S3_SPOOL_MAX_MEMORY_BYTES`, or stream it in chunks to a temporary file in
+    `S3_SPOOL_DIR` and return the file's path.
+
+    If `etag` is given only that version of the object is read, and a
+    PreconditionFailed ClientError is raised if it has been replaced, so
+    content is never cached under the ETag of another version.
+
+    A worker so never holds more than `S3_SPOOL_MAX_MEMORY_BYTES` of an object
+    in memory while reading it. The temporary file is removed by
+    `open_s3_object_document` and `open_s3_object_file` once it is open, and
+    its space freed once closed. The PDF document cache bounds the total size
+    of the objects a worker holds open.
+    """
+    s3 = boto3.client("s3")
+    conditions = {} if etag is None else {"IfMatch": f'"{etag}"'}
+    s3_object = s3.get_object(Bucket=bucket, Key=key, **conditions)
+    body = s3_object["Body"]
+    try:
+        if s3_object["ContentLength"] <= int(
+            current_app.config["S3_SPOOL_MAX_MEMORY_BYTES"]
+        ):
+            return body.read()
+
+        with tempfile.NamedTemporaryFile(
+            prefix="s3-object-",
+            dir=current_app.config.get("S3_SPOOL_DIR"),
+            delete=False,
+        ) as spool_file:
+            try:
+                for chunk in body.iter_chunks(S3_CHUNK_SIZE):
+                    spool_file.write(chunk)
+            except BaseException:
+                os.remove(spool_file.name)
+                raise
+        return spool_file.name
+    finally:
+        body.close()
+
+
+def get_s3_object_content_size(content: bytes | str) -> int:
+    """
+    Return the size of the content returned by `read_s3_object`, held in
+    memory or, until it is opened, in a temporary file.
+    """
+    if isinstance(content, bytes):
+        return len(content)
+    return os.path.getsize(content)
+
+
+def open_s3_object_document(
+    content: bytes | str, filetype: str | None = "pdf"
+) -> pymupdf.Document:
+    """
+    Open the content returned by `read_s3_object` with pymupdf. `filetype` is
+    passed to pymupdf, e.g. None to open an image as a single page document.
+
+    A temporary file is opened by its path, so pages are read from disk as
+    they are used rather than the whole file being loaded, and removed once
+    open: the document keeps it open until it is closed.
+    """
+    if isinstance(content, bytes):
+        return pymupdf.open(filetype, io.BytesIO(content))
+    try:
+        return pymupdf.open(content, filetype=filetype)
+    finally:
+        os.remove(content)
+
+
+def open_s3_object_file(content: bytes | str) -> BinaryIO:
+    """
+    Open the content returned by `read_s3_object` as a binary file. A
+    temporary file is removed once open, and freed when the file is closed.
+    """
+    if isinstance(content, bytes):
+        return io.BytesIO(content)
+    try:
+        return open(content, "rb")
+    finally:
+        os.remove(content)
@@ -62,6 +62,9 @@ class BrowseConsignmentRequestSchema(PaginationSchema, BrowseFilterSchema):
     """Browse consignment request validation schema."""
 
     _id = UUIDField(required=True, data_key="_id")
+    cursor = fields.String(
+        allow_none=True, load_default=None, validate=validate.Length(max=1000)
+    )
 
     class Meta:
         unknown = EXCLUDE
@@ -89,6 +92,9 @@ class SearchTransferringBodyRequestSchema(PaginationSchema, SearchQuerySchema):
     """Search transferring body request validation schema."""
 
     _id = UUIDField(required=True, data_key="_id")
+    cursor = fields.String(
+        allow_none=True, load_default=None, validate=validate.Length(max=2000)
+    )
 
     class Meta:
         unknown = EXCLUDE
@@ -129,3 +135,31 @@ class PageImageRequestSchema(Schema):
 
     class Meta:
         unknown = EXCLUDE
+
+
+class PageImageVariantRequestSchema(PageImageRequestSchema):
+    """Schema for page image request parameters, with its requested width."""
+
+    width = fields.Integer(
+        load_default=None, validate=validate.Range(min=1, max=10000)
+    )
+
+
+class IIIFImageRequestSchema(PageImageRequestSchema):
+    """Schema for IIIF Image API request parameters."""
+
+    region = fields.String(
+        required=True,
+        validate=validate.Regexp(r"^(full|square|(pct:)?[\d.]+(,[\d.]+){3})$"),
+    )
+    size = fields.String(
+        required=True,
+        validate=validate.Regexp(r"^(full|max|pct:[\d.]+|!?\d*,\d*)$"),
+    )
+    rotation = fields.String(
+        required=True, validate=validate.OneOf(["0", "90", "180", "270"])
+    )
+    quality = fields.String(
+        required=True, validate=validate.OneOf(["default", "color", "gray"])
+    )
+    image_format = fields.String(required=True, validate=validate.Equal("jpg"))
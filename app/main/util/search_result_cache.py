@@ -0,0 +1,137 @@
+import json
+import uuid
+from typing import Callable, NamedTuple
+
+from flask import current_app
+from sqlalchemy.exc import ProgrammingError
+
+from app.main.db.models import SearchIndexGeneration, db
+from app.main.util.cache import TTLCache
+
+# The error code Postgres raises for a table that does not exist
+UNDEFINED_TABLE_PGCODE = "42P01"
+
+
+class SearchResultKey(NamedTuple):
+    """
+    Identifies a page of the results of a search within a transferring body.
+
+    The search terms are sorted and deduplicated, as each is a separate clause
+    of the query whatever its position. `generation` is the transferring body's
+    search index generation, bumped by the indexer whenever one of its
+    consignments is indexed, so results from before that are never served.
+    `cursor` is the encoded cursor a deep page is found from, if any.
+    """
+
+    transferring_body_id: str
+    generation: int
+    quoted_phrases: tuple
+    single_terms: tuple
+    search_area: str
+    sort: str
+    page: int
+    per_page: int
+    cursor: str | None
+
+    @classmethod
+    def for_search(
+        cls,
+        transferring_body_id,
+        quoted_phrases,
+        single_terms,
+        search_area,
+        sort,
+        page,
+        per_page,
+        cursor=None,
+    ) -> "SearchResultKey":
+        return cls(
+            str(transferring_body_id),
+            get_search_index_generation(transferring_body_id),
+            tuple(sorted(set(quoted_phrases))),
+            tuple(sorted(set(single_terms))),
+            search_area,
+            sort,
+            page,
+            per_page,
+            cursor.encode() if cursor else None,
+        )
+
+
+def get_search_index_generation(transferring_body_id) -> int:
+    """
+    Return the search index generation of a transferring body, 0 if none of its
+    consignments have been indexed since the indexer started recording it, or
+    the indexer has not yet created `search_index_generation`.
+    """
+    try:
+        # in a savepoint, so a missing table leaves the transaction usable
+        with db.session.begin_nested():
+            search_index_generation = db.session.get(
+                SearchIndexGeneration, transferring_body_id
+            )
+    except ProgrammingError as e:
+        if getattr(e.orig, "pgcode", None) != UNDEFINED_TABLE_PGCODE:
+            raise
+        return 0
+    if search_index_generation is None:
+        return 0
+    return search_index_generation.generation
+
+
+class SearchResultCache:
+    """
+    Thread-safe, size-bounded LRU cache of OpenSearch search results whose
+    entries expire after `ttl` seconds.
+
+    Searches are run with `highlight_placeholder` as their highlight tag, and
+    results are held as JSON, so a cached result is shared between requests
+    with different highlight tags: each read substitutes its own tag for the
+    placeholder. The placeholder is random per cache so it cannot be guessed
+    and planted in a record's content.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.highlight_placeholder = f"uuid_prefix_{uuid.uuid4().hex}"
+        self._cache = TTLCache(max_size=max_size, default_ttl=ttl)
+
+    def get_or_search(
+        self,
+        cache_key: SearchResultKey,
+        highlight_tag: str,
+        search: Callable[[str], dict],
+    ) -> dict:
+        """
+        Return the cached results for `cache_key`, or call `search` with the
+        highlight placeholder and cache its results, with `highlight_tag`
+        substituted for the placeholder.
+        """
+        results = self._cache.get(cache_key)
+        if results is None:
+            results = json.dumps(search(self.highlight_placeholder))
+            self._cache.set(cache_key, results)
+        return json.loads(
+            results.replace(self.highlight_placeholder, highlight_tag)
+        )
+
+    def __len__(self):
+        return len(self._cache)
+
+
+def get_search_result_cache() -> SearchResultCache | None:
+    """
+    Return the search result cache for the current Flask app, creating it from
+    the app config on first use, or None if `SEARCH_RESULT_CACHE_MAX_SIZE` is 0.
+    """
+    max_size = current_app.config.get("SEARCH_RESULT_CACHE_MAX_SIZE", 0)
+    if max_size <= 0:
+        return None
+
+    cache = current_app.extensions.get("search_result_cache")
+    if cache is None:
+        cache = SearchResultCache(
+            max_size=max_size,
+            ttl=current_app.config.get("SEARCH_RESULT_CACHE_TTL", 60),
+        )
+        current_app.extensions["search_result_cache"] = cache
+    return cache
@@ -1,5 +1,12 @@
+import base64
+import binascii
+import json
 import re
+import threading
+import time
 import urllib.parse
+from collections import deque
+from typing import NamedTuple
 
 import opensearchpy
 from flask import abort, current_app, redirect, url_for
@@ -8,6 +15,25 @@ from opensearchpy import OpenSearch, RequestsHttpConnection
 from app.main.util.date_validator import format_opensearch_date
 from app.main.util.pagination import calculate_total_pages, get_pagination
 
+SEARCH_INDEX = "documents"
+
+# unique tiebreaker so results have a total order to page through
+FILE_ID_SORT = {"file_id.keyword": {"order": "asc"}}
+
+# The document fields the search results template renders. Hits only return
+# these, as the rest of a document, notably its extracted `content`, is only
+# shown through highlights and can be megabytes per file.
+SEARCH_RESULT_SOURCE_FIELDS = [
+    "file_id",
+    "file_name",
+    "series_id",
+    "series_name",
+    "consignment_id",
+    "consignment_reference",
+    "closure_type",
+    "opening_date",
+]
+
 OPENSEARCH_FIELD_NAME_MAP = {
     "file_name": {"display_name": "File name", "allow_fuzzy": True},
     "description": {"display_name": "Description", "allow_fuzzy": True},
@@ -233,9 +259,144 @@ def setup_opensearch():
         use_ssl=current_app.config.get("OPEN_SEARCH_USE_SSL", True),
         verify_certs=verify_certs,
         ca_certs=ca_certs,
+        pool_maxsize=current_app.config.get("OPEN_SEARCH_POOL_MAXSIZE", 10),
+    )
+
+
+def _opensearch_client_settings() -> tuple:
+    config = current_app.config
+    return (
+        config.get("OPEN_SEARCH_HOST"),
+        # refreshable AWS4Auth signs with rotated credentials itself, so only
+        # a change to the auth object itself needs a new client
+        config.get("OPEN_SEARCH_HTTP_AUTH"),
+        config.get("OPEN_SEARCH_USE_SSL", True),
+        config.get("OPEN_SEARCH_VERIFY_CERTS", True),
+        config.get("OPEN_SEARCH_CA_CERTS"),
+        config.get("OPEN_SEARCH_POOL_MAXSIZE", 10),
     )
 
 
+class OpenSearchClientRegistry:
+    """
+    Thread-safe holder of the OpenSearch client shared by every request of a
+    worker, so searches reuse its pool of keep-alive connections rather than
+    each setting up a client and its TLS connections.
+
+    The client is rebuilt, closing the connections of the one it replaces,
+    when its connection settings change and when it fails a health check, made
+    at most every `health_check_interval` seconds.
+    """
+
+    def __init__(self, health_check_interval: float):
+        self.health_check_interval = health_check_interval
+        self._client = None
+        self._settings = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def client(self) -> OpenSearch:
+        settings = _opensearch_client_settings()
+        with self._lock:
+            if self._client is None or settings != self._settings:
+                return self._build(settings)
+            client = self._client
+            check_health = (
+                time.monotonic() - self._checked_at
+                >= self.health_check_interval
+            )
+            if check_health:
+                self._checked_at = time.monotonic()
+
+        if check_health and not client.ping():
+            current_app.app_logger.warning(
+                "OpenSearch client failed its health check, rebuilding it"
+            )
+            with self._lock:
+                if self._client is client:
+                    return self._build(settings)
+                return self._client
+        return client
+
+    def _build(self, settings) -> OpenSearch:
+        old_client = self._client
+        self._client = setup_opensearch()
+        if old_client is not None:
+            try:
+                old_client.transport.close()
+            except Exception as e:
+                current_app.app_logger.warning(
+                    f"Failed to close replaced OpenSearch client: {e}"
+                )
+        self._settings = settings
+        self._checked_at = time.monotonic()
+        return self._client
+
+
+def get_opensearch_client() -> OpenSearch:
+    """
+    Return the OpenSearch client shared by the current Flask app's requests,
+    creating its registry on first use from the `OPEN_SEARCH_*` config values.
+    """
+    registry = current_app.extensions.get("opensearch_client_registry")
+    if registry is None:
+        registry = OpenSearchClientRegistry(
+            health_check_interval=float(
+                current_app.config.get("OPEN_SEARCH_HEALTH_CHECK_INTERVAL", 60)
+            )
+        )
+        current_app.extensions["opensearch_client_registry"] = registry
+    return registry.client()
+
+
+class PointInTimeRegistry:
+    """
+    Thread-safe record of the points in time a worker has opened to page
+    through deep search results, oldest first, closing the oldest once there
+    are more than `max_pits`.
+
+    Closing a point in time a user is still paging through is safe, as a
+    cursor whose point in time is gone carries on from its position in a new
+    one.
+    """
+
+    def __init__(self, max_pits: int):
+        self.max_pits = max_pits
+        self._pit_ids = deque()
+        self._lock = threading.Lock()
+
+    def add(self, open_search, pit_id: str):
+        with self._lock:
+            self._pit_ids.append(pit_id)
+            closed_pit_ids = []
+            while len(self._pit_ids) > self.max_pits:
+                closed_pit_ids.append(self._pit_ids.popleft())
+
+        if closed_pit_ids:
+            try:
+                open_search.delete_pit(body={"pit_id": closed_pit_ids})
+            except opensearchpy.exceptions.OpenSearchException as e:
+                current_app.app_logger.warning(
+                    f"Failed to close points in time: {e}"
+                )
+
+
+def get_point_in_time_registry() -> PointInTimeRegistry:
+    """
+    Return the registry of the points in time opened by the current Flask
+    app, creating it on first use from `OPEN_SEARCH_MAX_OPEN_PITS`.
+    """
+    registry = current_app.extensions.get("point_in_time_registry")
+    if registry is None:
+        registry = PointInTimeRegistry(
+            max_pits=int(
+                current_app.config.get("OPEN_SEARCH_MAX_OPEN_PITS", 10)
+            )
+        )
+        current_app.extensions["point_in_time_registry"] = registry
+    return registry
+
+
 def execute_search(open_search, dsl_query, page, per_page):
     """Execute the search query using OpenSearch"""
     from_ = per_page * (page - 1)
@@ -250,13 +411,227 @@ def execute_search(open_search, dsl_query, page, per_page):
         abort(504)
 
 
-def get_pagination_info(results, page, per_page):
+class SearchCursor(NamedTuple):
+    """
+    Position in the results of a search within a transferring body that a deep
+    page starts after, or ends before if `before` is True.
+
+    `sort` is the sort option, e.g. "file_name", the cursor was created for,
+    `sort_values` the `_score` and file id of the hit at the position and
+    `pit_id` the point in time the results are paged through, if any.
+    """
+
+    sort: str
+    sort_values: list
+    pit_id: str | None = None
+    before: bool = False
+
+    @classmethod
+    def from_hit(
+        cls, sort: str, hit: dict, pit_id: str | None, before: bool = False
+    ) -> "SearchCursor":
+        """Create a cursor at a hit of a search sorted with `FILE_ID_SORT`."""
+        return cls(sort, hit["sort"], pit_id, before)
+
+    def encode(self) -> str:
+        token = json.dumps(self._asdict(), separators=(",", ":"))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "SearchCursor":
+        """Decode a cursor token, raising ValueError if it is not valid."""
+        try:
+            padded_token = token + "=" * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded_token))
+            cursor = cls(**values)
+        except (
+            binascii.Error,
+            UnicodeDecodeError,
+            TypeError,
+            json.JSONDecodeError,
+        ) as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+        if not (
+            isinstance(cursor.sort, str)
+            and isinstance(cursor.sort_values, list)
+            and len(cursor.sort_values) == 2
+            and isinstance(cursor.sort_values[0], (int, float))
+            and isinstance(cursor.sort_values[1], str)
+            and (cursor.pit_id is None or isinstance(cursor.pit_id, str))
+            and isinstance(cursor.before, bool)
+        ):
+            raise ValueError("Invalid cursor: unexpected values")
+        return cursor
+
+
+def reverse_sorting(sorting):
+    """Reverse the order of each field of an OpenSearch sort"""
+    return [
+        {
+            field: {
+                **options,
+                "order": "asc" if options.get("order") == "desc" else "desc",
+            }
+            for field, options in sort_field.items()
+        }
+        for sort_field in sorting
+    ]
+
+
+def execute_paginated_search(
+    open_search, dsl_query, page, per_page, cursor=None
+):
+    """
+    Execute the search query using OpenSearch, paging with `from` while the
+    page is within the first `OPEN_SEARCH_MAX_RESULT_WINDOW` results, which
+    OpenSearch limits `from` paging to.
+
+    Deeper pages are found with `search_after` from `cursor` through a point
+    in time, so they cost the same whatever their depth. A deep page without a
+    cursor, e.g. the last page, is found by searching in reverse order if it is
+    within `OPEN_SEARCH_MAX_RESULT_WINDOW` results of the end.
+
+    The query must be sorted with `FILE_ID_SORT` as its tiebreaker. Aborts with
+    a 400 if a deep page cannot be reached without a cursor, and a 404 if the
+    page is after the last result.
+    """
+    max_result_window = current_app.config.get(
+        "OPEN_SEARCH_MAX_RESULT_WINDOW", 10000
+    )
+    if page * per_page <= max_result_window:
+        return execute_search(open_search, dsl_query, page, per_page)
+    if cursor is not None:
+        return execute_search_after(open_search, dsl_query, per_page, cursor)
+
+    try:
+        total_records = open_search.count(body={"query": dsl_query["query"]})[
+            "count"
+        ]
+    except opensearchpy.exceptions.ConnectionTimeout:
+        abort(504)
+    start = (page - 1) * per_page
+    if start >= total_records:
+        abort(404)
+    size = min(per_page, total_records - start)
+    from_end = total_records - start - size
+    if from_end + size > max_result_window:
+        abort(400)
+
+    try:
+        results = open_search.search(
+            body={**dsl_query, "sort": reverse_sorting(dsl_query["sort"])},
+            from_=from_end,
+            size=size,
+            timeout=current_app.config["OPEN_SEARCH_TIMEOUT"],
+        )
+    except opensearchpy.exceptions.ConnectionTimeout:
+        abort(504)
+    results["hits"]["hits"].reverse()
+    return results
+
+
+def execute_search_after(open_search, dsl_query, per_page, cursor):
+    """
+    Execute the search query using OpenSearch for the page after, or before,
+    `cursor` through its point in time, opening a new point in time kept alive
+    for `OPEN_SEARCH_PIT_KEEP_ALIVE` if it has none or its point in time has
+    expired, been closed or is not valid.
+
+    The results hold the `pit_id` to create the cursors of the next pages with.
+    Aborts with a 400 if the cursor's position is not valid for the query.
+    """
+    keep_alive = current_app.config.get("OPEN_SEARCH_PIT_KEEP_ALIVE", "1m")
+    sorting = dsl_query["sort"]
+    if cursor.before:
+        sorting = reverse_sorting(sorting)
+
+    try:
+        pit_id = cursor.pit_id
+        if pit_id is None:
+            pit_id = open_search.create_pit(
+                index=SEARCH_INDEX, params={"keep_alive": keep_alive}
+            )["pit_id"]
+            get_point_in_time_registry().add(open_search, pit_id)
+        try:
+            results = open_search.search(
+                body={
+                    **dsl_query,
+                    "sort": sorting,
+                    "pit": {"id": pit_id, "keep_alive": keep_alive},
+                    "search_after": cursor.sort_values,
+                },
+                size=per_page,
+                timeout=current_app.config["OPEN_SEARCH_TIMEOUT"],
+            )
+        except (
+            opensearchpy.exceptions.NotFoundError,
+            opensearchpy.exceptions.RequestError,
+        ) as e:
+            if cursor.pit_id is not None:
+                # carry on from the cursor in a new point in time
+                return execute_search_after(
+                    open_search,
+                    dsl_query,
+                    per_page,
+                    cursor._replace(pit_id=None),
+                )
+            if isinstance(e, opensearchpy.exceptions.RequestError):
+                current_app.app_logger.error(f"Invalid search cursor: {e}")
+                abort(400)
+            raise
+    except opensearchpy.exceptions.ConnectionTimeout:
+        abort(504)
+
+    if cursor.before:
+        results["hits"]["hits"].reverse()
+    return results
+
+
+def get_search_cursors(results, sort, page, per_page):
+    """
+    Return the encoded cursors to the pages before and after a page of search
+    results, only for pages deeper than `OPEN_SEARCH_MAX_RESULT_WINDOW` results
+    as shallower pages are found with `from`.
+    """
+    hits = results["hits"]["hits"]
+    if not hits:
+        return None, None
+
+    max_result_window = current_app.config.get(
+        "OPEN_SEARCH_MAX_RESULT_WINDOW", 10000
+    )
+    pit_id = results.get("pit_id")
+    previous_cursor = None
+    next_cursor = None
+    if (page - 1) * per_page > max_result_window:
+        previous_cursor = SearchCursor.from_hit(
+            sort, hits[0], pit_id, before=True
+        ).encode()
+    if (page + 1) * per_page > max_result_window:
+        next_cursor = SearchCursor.from_hit(sort, hits[-1], pit_id).encode()
+    return previous_cursor, next_cursor
+
+
+def execute_aggregation_search(open_search, dsl_query):
+    """Execute a search query whose body sets its size using OpenSearch"""
+    try:
+        return open_search.search(
+            body=dsl_query,
+            timeout=current_app.config["OPEN_SEARCH_TIMEOUT"],
+        )
+    except opensearchpy.exceptions.ConnectionTimeout:
+        abort(504)
+
+
+def get_pagination_info(
+    results, page, per_page, previous_cursor=None, next_cursor=None
+):
     """Calculate pagination information"""
     total_records = (
         results["hits"]["total"]["value"] if "hits" in results else 0
     )
     page_count = calculate_total_pages(total_records, per_page)
-    pagination = get_pagination(page, page_count)
+    pagination = get_pagination(page, page_count, previous_cursor, next_cursor)
     return total_records, pagination
 
 
@@ -356,7 +731,7 @@ def build_dsl_search_query(
             }
         },
         "sort": sorting,
-        "_source": True,
+        "_source": {"includes": SEARCH_RESULT_SOURCE_FIELDS},
     }
 
     return query_structure
@@ -366,32 +741,54 @@ def build_search_results_summary_query(
     search_fields,
     quoted_phrases,
     single_terms,
-    sorting,
+    page,
+    per_page,
 ):
-    filter_clauses = []
+    """
+    Constructs an aggregation only DSL query for a page of the number of
+    matching records per transferring body, ordered by the number of records.
+
+    The page of buckets is cut server side with `bucket_sort`, and the number
+    of transferring bodies for the page count is a `cardinality` aggregation,
+    so no hits are fetched and only the page's buckets are returned.
+    """
     dsl_query = build_dsl_search_query(
         search_fields,
-        filter_clauses,
+        [],
         quoted_phrases,
         single_terms,
-        sorting,
+        None,
     )
-    aggregations = {
+    return {
+        "query": dsl_query["query"],
+        "size": 0,
+        "track_total_hits": True,
         "aggs": {
             "aggregate_by_transferring_body": {
-                "terms": {"field": "transferring_body_id.keyword"},
+                "terms": {
+                    "field": "transferring_body_id.keyword",
+                    "size": page * per_page,
+                },
                 "aggs": {
                     "top_transferring_body_hits": {
                         "top_hits": {
                             "size": 1,
                             "_source": ["transferring_body"],
                         }
-                    }
+                    },
+                    "transferring_body_page": {
+                        "bucket_sort": {
+                            "from": (page - 1) * per_page,
+                            "size": per_page,
+                        }
+                    },
                 },
-            }
+            },
+            "transferring_body_count": {
+                "cardinality": {"field": "transferring_body_id.keyword"}
+            },
         },
     }
-    return {**dsl_query, **aggregations}
 
 
 def build_search_transferring_body_query(
@@ -410,8 +807,10 @@ def build_search_transferring_body_query(
         filter_clauses,
         quoted_phrases,
         single_terms,
-        sorting,
+        [*sorting, FILE_ID_SORT],
     )
+    # count every match, so pages past 10,000 results are reachable
+    dsl_query["track_total_hits"] = True
     highlighting = {
         "highlight": {
             "pre_tags": [f"<{highlight_tag}>"],
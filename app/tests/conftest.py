@@ -1,12 +1,22 @@
+from datetime import datetime
 from unittest.mock import patch
 
 import pytest
 from flask.testing import FlaskClient
+from sqlalchemy import func
 from testing.postgresql import PostgresqlFactory
 
 from app import create_app
 from app.main.authorize.ayr_user import AYRUser
-from app.main.db.models import Body, db
+from app.main.db.models import (
+    Body,
+    Consignment,
+    ConsignmentBrowseSummary,
+    File,
+    FileMetadata,
+    FileMetadataFlat,
+    db,
+)
 from app.tests.factories import (
     BodyFactory,
     ConsignmentFactory,
@@ -105,6 +115,105 @@ def client(app):
     yield app.test_client()
 
 
+FILE_METADATA_FLAT_COLUMNS = {
+    "former_reference_department": "former_reference",
+    "title_alternate": "alternative_title",
+    "description": "description",
+    "description_alternate": "alternative_description",
+    "closure_type": "closure_type",
+    "closure_start_date": "closure_start_date",
+    "closure_period": "closure_period",
+    "opening_date": "opening_date",
+    "date_last_modified": "date_last_modified",
+    "end_date": "end_date",
+    "foi_exemption_code": "foi_exemption_code",
+    "file_name_translation": "translated_title",
+    "related_material": "related_material",
+    "restrictions_on_use": "restrictions_on_use",
+    "note": "note",
+    "held_by": "held_by",
+    "legal_status": "legal_status",
+    "rights_copyright": "rights_copyright",
+    "language": "language",
+}
+FILE_METADATA_FLAT_DATE_COLUMNS = {
+    "closure_start_date",
+    "opening_date",
+    "date_last_modified",
+    "end_date",
+}
+
+
+@pytest.fixture(scope="function")
+def use_file_metadata_flat(app):
+    """
+    Fill file_metadata_flat from the FileMetadata of every file in the database,
+    as the opensearch indexer does on ingest, and switch the query builders to it.
+    """
+
+    def _use_file_metadata_flat():
+        for file in File.query.all():
+            values = {}
+            for file_metadata in FileMetadata.query.filter(
+                FileMetadata.FileId == file.FileId
+            ):
+                column = FILE_METADATA_FLAT_COLUMNS.get(
+                    file_metadata.PropertyName
+                )
+                if column is None:
+                    continue
+                value = file_metadata.Value
+                if value and column in FILE_METADATA_FLAT_DATE_COLUMNS:
+                    value = datetime.fromisoformat(value).date()
+                values[column] = value
+            db.session.add(
+                FileMetadataFlat(
+                    FileId=file.FileId,
+                    ConsignmentId=file.ConsignmentId,
+                    **values,
+                )
+            )
+        db.session.flush()
+        app.config["USE_FILE_METADATA_FLAT"] = True
+
+    yield _use_file_metadata_flat
+
+    app.config["USE_FILE_METADATA_FLAT"] = False
+
+
+@pytest.fixture(scope="function")
+def use_consignment_browse_summary(app):
+    """
+    Fill consignment_browse_summary from every consignment holding files in the
+    database, as the opensearch indexer does on ingest, and switch the browse
+    query builders to it.
+    """
+
+    def _use_consignment_browse_summary():
+        consignments = (
+            db.session.query(Consignment, func.count(File.FileId))
+            .join(File, File.ConsignmentId == Consignment.ConsignmentId)
+            .filter(func.lower(File.FileType) == "file")
+            .group_by(Consignment.ConsignmentId)
+        )
+        for consignment, records_held in consignments:
+            db.session.add(
+                ConsignmentBrowseSummary(
+                    ConsignmentId=consignment.ConsignmentId,
+                    ConsignmentReference=consignment.ConsignmentReference,
+                    SeriesId=consignment.SeriesId,
+                    TransferCompleteDatetime=consignment.TransferCompleteDatetime,
+                    records_held=records_held,
+                )
+            )
+        db.session.flush()
+        app.config["USE_CONSIGNMENT_BROWSE_SUMMARY"] = True
+
+    yield _use_consignment_browse_summary
+
+    app.config["USE_CONSIGNMENT_BROWSE_SUMMARY"] = False
+
+
 @pytest.fixture(scope="session")
 def browser_context_args(browser_context_args):
     return {**browser_context_args, "ignore_https_errors": True}
@@ -254,6 +254,7 @@ class TestAccessTokenSignInRequiredDecorator:
                 )
                 assert updated_session["user_groups"] == valid_groups
                 assert updated_session["user_type"] == "all_access_user"
+                assert updated_session["transferring_body"] is None
 
     @staticmethod
     @patch(
@@ -297,6 +298,51 @@ class TestAccessTokenSignInRequiredDecorator:
         assert response.status_code == 200
         assert response.data.decode() == "Access granted"
 
+    @staticmethod
+    @patch(
+        "app.main.authorize.access_token_sign_in_required.get_keycloak_instance_from_flask_config"
+    )
+    def test_an_active_access_token_is_only_introspected_once_across_requests(
+        mock_keycloak,
+        app,
+    ):
+        """
+        Given an active access token in the session,
+        When accessing a route protected by the 'access_token_sign_in_required' decorator
+            several times,
+        Then the token should only be introspected with Keycloak once
+        And every request should be granted access
+        """
+        view_name = "/protected_view"
+        with app.test_client() as client:
+
+            @app.route(view_name)
+            @access_token_sign_in_required
+            def protected_view():
+                return "Access granted"
+
+            valid_groups = [
+                "/ayr_user_type/view_dept",
+                "/transferring_body_user/foo",
+            ]
+
+            with client.session_transaction() as session:
+                session["access_token"] = "active_access_token"
+                session["refresh_token"] = "active_refresh_token"
+                session["user_groups"] = valid_groups
+
+            mock_keycloak.return_value.introspect.return_value = {
+                "active": True,
+                "groups": valid_groups,
+            }
+
+            responses = [client.get(view_name) for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [200] * 3
+        mock_keycloak.return_value.introspect.assert_called_once_with(
+            "active_access_token"
+        )
+
 
 def test_expected_unprotected_routes_decorated_by_access_token_sign_in_required(
     app,
@@ -321,6 +367,9 @@ def test_expected_unprotected_routes_decorated_by_access_token_sign_in_required(
         "main.generate_manifest",
         "main.get_page_image",
         "main.get_page_thumbnail",
+        "main.get_iiif_image_base",
+        "main.get_iiif_image_info",
+        "main.get_iiif_image",
     ]
     expected_unprotected_routes = [
         "static",
@@ -476,6 +525,36 @@ def test_no_cache_headers_set_on_response_for_protected_view(app):
     assert response.headers["Expires"] == "0"
 
 
+def test_private_cache_policy_kept_on_response_for_protected_view(
+    app, mock_all_access_user
+):
+    """
+    Given a view that is protected by the 'access_token_sign_in_required' decorator,
+    And that sets a private cache policy on its response,
+    When a user accesses the view,
+    Then the response headers should let browsers cache the response privately
+    """
+    from flask import Response
+
+    from app.main.util.http_caching import set_private_cache_policy
+
+    view_name = "/protected_cacheable_view"
+    app.config["PRIVATE_CACHE_MAX_AGE"] = 60
+
+    @app.route(view_name)
+    @access_token_sign_in_required
+    def protected_cacheable_view():
+        return set_private_cache_policy(Response("Protected View"))
+
+    with app.test_client() as client:
+        mock_all_access_user(client)
+        response = client.get(view_name)
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, max-age=60"
+    assert all(key not in response.headers for key in ["Expires", "Pragma"])
+
+
 def test_no_cache_headers_not_set_on_response_for_unprotected_view(app):
     """
     Given a view that is NOT protected by the 'access_token_sign_in_required' decorator,
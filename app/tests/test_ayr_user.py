@@ -1,4 +1,11 @@
-from app.main.authorize.ayr_user import AYRUser
+import uuid
+from unittest.mock import patch
+
+from app.main.authorize.ayr_user import (
+    AYRUser,
+    TransferringBody,
+    get_transferring_body_by_name,
+)
 from app.tests.factories import BodyFactory
 
 
@@ -33,7 +40,7 @@ class TestAYRUser:
         groups = ["/ayr_user_type/view_dept", "/transferring_body_user/foo"]
         user = AYRUser(groups)
         assert user.is_standard_user
-        assert user.transferring_body == body
+        assert user.transferring_body == (body.BodyId, body.Name)
         assert user.can_access_ayr
 
     def test_cannot_access_ayr_when_all_access_user_and_some_bodies(self, app):
@@ -61,7 +68,7 @@ class TestAYRUser:
             "/transferring_body_user/bar",
         ]
         user = AYRUser(groups)
-        assert user.transferring_body == body
+        assert user.transferring_body == (body.BodyId, body.Name)
 
     def test_transferring_body_is_none_when_no_valid_transferring_body_in_groups(
         self, app
@@ -95,3 +102,77 @@ class TestAYRUser:
 
         user = AYRUser(groups)
         assert user.transferring_body is None
+
+    def test_transferring_body_from_session_is_used_without_querying(self, app):
+        session_body = {
+            "BodyId": "8ba5d9a4-0f25-4a55-9c3c-05c6e8f7d0e3",
+            "Name": "foo",
+        }
+        groups = ["/ayr_user_type/view_dept", "/transferring_body_user/foo"]
+
+        with patch("app.main.authorize.ayr_user.db.session") as mock_session:
+            user = AYRUser(groups, session_body)
+            assert user.transferring_body == TransferringBody(
+                uuid.UUID(session_body["BodyId"]), "foo"
+            )
+            mock_session.query.assert_not_called()
+
+    def test_transferring_body_from_session_is_ignored_when_groups_differ(
+        self, app
+    ):
+        body = BodyFactory(Name="bar")
+        session_body = {
+            "BodyId": "8ba5d9a4-0f25-4a55-9c3c-05c6e8f7d0e3",
+            "Name": "foo",
+        }
+        groups = ["/ayr_user_type/view_dept", "/transferring_body_user/bar"]
+
+        user = AYRUser(groups, session_body)
+        assert user.transferring_body == (body.BodyId, "bar")
+
+    def test_transferring_body_is_resolved_once_per_user(self, app):
+        BodyFactory(Name="foo")
+        groups = ["/ayr_user_type/view_dept", "/transferring_body_user/foo"]
+        user = AYRUser(groups)
+
+        with patch(
+            "app.main.authorize.ayr_user.get_transferring_body_by_name"
+        ) as mock_get_transferring_body_by_name:
+            user.transferring_body
+            user.transferring_body
+
+        mock_get_transferring_body_by_name.assert_called_once_with("foo")
+
+
+def test_get_transferring_body_by_name_caches_successful_lookups(app):
+    body = BodyFactory(Name="foo")
+
+    assert get_transferring_body_by_name("foo") == (body.BodyId, "foo")
+
+    with patch("app.main.authorize.ayr_user.db.session") as mock_session:
+        assert get_transferring_body_by_name("foo") == (body.BodyId, "foo")
+        mock_session.query.assert_not_called()
+
+
+def test_get_transferring_body_by_name_does_not_cache_missing_bodies(app):
+    assert get_transferring_body_by_name("foo") is None
+
+    body = BodyFactory(Name="foo")
+    assert get_transferring_body_by_name("foo") == (body.BodyId, "foo")
+
+
+def test_get_transferring_body_by_name_returns_none_for_duplicate_names(app):
+    BodyFactory(Name="foo")
+    BodyFactory(Name="foo")
+
+    assert get_transferring_body_by_name("foo") is None
+
+
+def test_transferring_body_session_round_trip():
+    transferring_body = TransferringBody(uuid.uuid4(), "foo")
+
+    assert (
+        TransferringBody.from_session(transferring_body.to_session())
+        == transferring_body
+    )
+    assert TransferringBody.from_session(None) is None
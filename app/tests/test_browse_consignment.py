@@ -1,7 +1,10 @@
+import uuid
+
 import pytest
 from bs4 import BeautifulSoup
 from flask.testing import FlaskClient
 
+from app.main.db.queries import BrowseConsignmentCursor
 from app.tests.assertions import assert_contains_html
 from app.tests.factories import (
     BodyFactory,
@@ -433,3 +436,82 @@ class TestConsignment:
         response = client.get(f"{self.route_url}/{consignment.ConsignmentId}")
 
         assert response.status_code == 404
+
+    def test_browse_consignment_previous_and_next_links_use_cursors(
+        self,
+        client: FlaskClient,
+        mock_standard_user,
+        browse_consignment_files,
+    ):
+        """
+        Given a standard user viewing the second page of a consignment's records
+        When they follow the next link and then the previous link
+        Then the links carry cursors
+        And they see the same records as the third and second pages reached by
+            page number
+        """
+        mock_standard_user(
+            client, browse_consignment_files[0].consignment.series.body.Name
+        )
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+        url = f"{self.route_url}/{consignment_id}?sort=file_name-asc&per_page=2"
+
+        def get_rows_and_links(page_url):
+            response = client.get(page_url)
+            assert response.status_code == 200
+            soup = BeautifulSoup(response.data, "html.parser")
+            decompose_desktop_invisible_elements(soup)
+            rows = [
+                row.text.split() for row in soup.find("tbody").find_all("tr")
+            ]
+            links = {
+                link["rel"][0]: link["href"].strip().split("#")[0]
+                for link in soup.find_all("a", rel=["prev", "next"])
+            }
+            return rows, links
+
+        second_page_rows, links = get_rows_and_links(f"{url}&page=2")
+        third_page_rows, _ = get_rows_and_links(f"{url}&page=3")
+        assert "cursor=" in links["next"]
+        assert "cursor=" in links["prev"]
+
+        next_page_rows, next_page_links = get_rows_and_links(links["next"])
+        assert next_page_rows == third_page_rows
+
+        previous_page_rows, _ = get_rows_and_links(next_page_links["prev"])
+        assert previous_page_rows == second_page_rows
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "not-a-cursor",
+            BrowseConsignmentCursor(
+                "date_last_modified-desc",
+                "not-a-date",
+                "first_file.docx",
+                str(uuid.uuid4()),
+            ).encode(),
+        ],
+    )
+    def test_browse_consignment_invalid_cursor(
+        self,
+        client: FlaskClient,
+        mock_standard_user,
+        browse_consignment_files,
+        cursor,
+    ):
+        """
+        Given a standard user with access to a consignment
+        When they make a GET request for it with a cursor that is not valid
+        Then they should receive a 400 response
+        """
+        mock_standard_user(
+            client, browse_consignment_files[0].consignment.series.body.Name
+        )
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+
+        response = client.get(
+            f"{self.route_url}/{consignment_id}?page=2&cursor={cursor}"
+        )
+
+        assert response.status_code == 400
@@ -1,6 +1,17 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
 from flask.testing import FlaskClient
+from sqlalchemy import insert, text
 
-from app.main.db.queries import build_browse_consignment_query
+from app.main.db.models import File, FileMetadataFlat, db
+from app.main.db.queries import (
+    BrowseConsignmentCursor,
+    build_browse_consignment_query,
+    get_browse_consignment_sort_key,
+)
+from app.tests.factories import ConsignmentFactory
 
 
 class TestBrowseConsignment:
@@ -99,3 +110,320 @@ class TestBrowseConsignment:
         for result in results:
             date = result[2]
             assert "2023" in date
+
+    @pytest.mark.parametrize(
+        "filters, sorting_orders",
+        [
+            (None, None),
+            ({"record_status": "closed"}, None),
+            (
+                {
+                    "date_filter_field": "date_last_modified",
+                    "date_from": "2023-01-01",
+                    "date_to": "2023-12-31",
+                },
+                {"date_of_record": "desc"},
+            ),
+            (
+                {
+                    "date_filter_field": "opening_date",
+                    "date_from": "2023-01-01",
+                },
+                {"closure_type": "asc", "file_name": "desc"},
+            ),
+        ],
+    )
+    def test_build_browse_consignment_query_from_file_metadata_flat(
+        self,
+        client: FlaskClient,
+        browse_consignment_files,
+        use_file_metadata_flat,
+        filters,
+        sorting_orders,
+    ):
+        """
+        Given files in a consignment
+        When build_browse_consignment_query is called and executed with
+            USE_FILE_METADATA_FLAT enabled
+        Then the same rows are returned as when FileMetadata is pivoted
+        """
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+        expected_results = build_browse_consignment_query(
+            consignment_id, filters, sorting_orders
+        ).all()
+
+        use_file_metadata_flat()
+
+        results = build_browse_consignment_query(
+            consignment_id, filters, sorting_orders
+        ).all()
+        assert results == expected_results
+
+    @pytest.mark.parametrize(
+        "sorting_orders",
+        [
+            None,
+            {"file_name": "desc"},
+            {"date_of_record": "desc"},
+            {"date_of_record": "asc"},
+            {"opening_date": "asc"},
+            {"opening_date": "desc"},
+            {"closure_type": "asc"},
+        ],
+    )
+    def test_build_browse_consignment_query_keyset_cursors_walk_all_rows(
+        self, client: FlaskClient, browse_consignment_files, sorting_orders
+    ):
+        """
+        Given files in a consignment, some without a value in the sort column
+        When build_browse_consignment_query is called with keyset set and a cursor
+            at the last row of each page in turn, and then with a cursor before the
+            first row of each page in turn
+        Then every row is returned exactly once in the order of the whole query,
+            each with the total number of rows
+        """
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+        sort_key = get_browse_consignment_sort_key(sorting_orders)
+        all_rows = build_browse_consignment_query(
+            consignment_id, sorting_orders=sorting_orders, keyset=True
+        ).all()
+        assert len(all_rows) == 5
+        assert {row.total_count for row in all_rows} == {5}
+
+        rows = all_rows[:2]
+        walked_rows = list(rows)
+        while rows:
+            cursor = BrowseConsignmentCursor.decode(
+                BrowseConsignmentCursor.from_row(sort_key, rows[-1]).encode()
+            )
+            rows = (
+                build_browse_consignment_query(
+                    consignment_id,
+                    sorting_orders=sorting_orders,
+                    keyset=True,
+                    cursor=cursor,
+                )
+                .limit(2)
+                .all()
+            )
+            assert {row.total_count for row in rows} <= {5}
+            walked_rows.extend(rows)
+        assert walked_rows == all_rows
+
+        rows = all_rows[-2:]
+        walked_rows = list(rows)
+        while rows:
+            cursor = BrowseConsignmentCursor.from_row(
+                sort_key, rows[0], before=True
+            )
+            rows = (
+                build_browse_consignment_query(
+                    consignment_id,
+                    sorting_orders=sorting_orders,
+                    keyset=True,
+                    cursor=cursor,
+                )
+                .limit(2)
+                .all()
+            )
+            rows.reverse()
+            walked_rows = rows + walked_rows
+        assert walked_rows == all_rows
+
+    def test_build_browse_consignment_query_keyset_cursor_with_total_is_not_counted(
+        self, client: FlaskClient, browse_consignment_files
+    ):
+        """
+        Given a cursor holding the total number of rows
+        When build_browse_consignment_query is called with keyset set and the cursor
+        Then the rows after the cursor are returned without counting the rows
+        """
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+        all_rows = build_browse_consignment_query(
+            consignment_id, keyset=True
+        ).all()
+        cursor = BrowseConsignmentCursor.from_row(
+            "file_name-asc", all_rows[1], total=5
+        )
+
+        query = build_browse_consignment_query(
+            consignment_id, keyset=True, cursor=cursor
+        )
+
+        assert "total_count" not in str(query)
+        assert [row.file_id for row in query.all()] == [
+            row.file_id for row in all_rows[2:]
+        ]
+
+    def test_build_browse_consignment_query_keyset_ignores_cursor_of_other_sort(
+        self, client: FlaskClient, browse_consignment_files
+    ):
+        """
+        Given a cursor created for a different sort order
+        When build_browse_consignment_query is called with keyset set and the cursor
+        Then the cursor is ignored and every row is returned
+        """
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+        cursor = BrowseConsignmentCursor(
+            "file_name-asc",
+            "third_file.docx",
+            "third_file.docx",
+            str(uuid.uuid4()),
+        )
+
+        rows = build_browse_consignment_query(
+            consignment_id,
+            sorting_orders={"file_name": "desc"},
+            keyset=True,
+            cursor=cursor,
+        ).all()
+
+        assert len(rows) == 5
+
+    @pytest.mark.parametrize(
+        "date_filter_field, expected_indexes",
+        [
+            (
+                "date_last_modified",
+                [
+                    "ix_file_metadata_flat_end_date",
+                    "ix_file_metadata_flat_date_last_modified",
+                ],
+            ),
+            ("opening_date", ["ix_file_metadata_flat_opening_date"]),
+        ],
+    )
+    def test_build_browse_consignment_query_date_filters_use_indexes(
+        self, app, client: FlaskClient, date_filter_field, expected_indexes
+    ):
+        """
+        Given two consignments of 2000 files each in file_metadata_flat, one
+            file a day
+        When build_browse_consignment_query is called with a date range filter
+            with USE_FILE_METADATA_FLAT enabled and the query is explained
+        Then the plan reads file_metadata_flat with the date columns' indexes
+        And the files within the date range are returned
+        """
+        consignment = ConsignmentFactory()
+        other_consignment = ConsignmentFactory()
+        files = []
+        files_metadata = []
+        for consignment_id in (
+            consignment.ConsignmentId,
+            other_consignment.ConsignmentId,
+        ):
+            for day in range(2000):
+                file_id = uuid.uuid4()
+                files.append(
+                    {
+                        "FileId": file_id,
+                        "ConsignmentId": consignment_id,
+                        "FileReference": f"file-{day}",
+                        "FileType": "File",
+                        "FileName": f"file-{day}.txt",
+                        "FilePath": f"/path/file-{day}.txt",
+                    }
+                )
+                files_metadata.append(
+                    {
+                        "FileId": file_id,
+                        "ConsignmentId": consignment_id,
+                        "date_last_modified": date(2000, 1, 1)
+                        + timedelta(days=day),
+                        "opening_date": date(2000, 1, 1) + timedelta(days=day),
+                    }
+                )
+        db.session.execute(insert(File), files)
+        db.session.execute(insert(FileMetadataFlat), files_metadata)
+        db.session.execute(text('ANALYZE "File"'))
+        db.session.execute(text("ANALYZE file_metadata_flat"))
+        app.config["USE_FILE_METADATA_FLAT"] = True
+
+        query = build_browse_consignment_query(
+            consignment.ConsignmentId,
+            filters={
+                "date_filter_field": date_filter_field,
+                "date_from": "2001-01-01",
+                "date_to": "2001-01-31",
+            },
+        )
+        statement = query.statement.compile(
+            dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+        plan = "\n".join(
+            db.session.execute(text(f"EXPLAIN {statement}")).scalars()
+        )
+
+        for index in expected_indexes:
+            assert f"Bitmap Index Scan on {index}" in plan
+        assert not [
+            line
+            for line in plan.splitlines()
+            if "to_char" in line and ("Cond:" in line or "Filter:" in line)
+        ]
+        assert len(query.all()) == 31
+
+
+class TestBrowseConsignmentCursor:
+    def test_encode_decode_round_trip(self):
+        """
+        Given a browse consignment cursor
+        When it is encoded and the token decoded
+        Then the same cursor is returned and the token is URL safe
+        """
+        cursor = BrowseConsignmentCursor(
+            "date_of_record-desc",
+            "2023-02-25",
+            "first_file.docx",
+            str(uuid.uuid4()),
+            True,
+        )
+
+        token = cursor.encode()
+
+        assert BrowseConsignmentCursor.decode(token) == cursor
+        assert all(c.isalnum() or c in "-_" for c in token)
+
+    @pytest.mark.parametrize(
+        "token",
+        [
+            "not-a-cursor",
+            "e30",  # {}
+            "WzFd",  # [1]
+            "eyJzb3J0IjoiYSIsInNvcnRfdmFsdWUiOm51bGwsImZpbGVfaWQiOiJ4In0",
+        ],
+    )
+    def test_decode_invalid_token_raises_value_error(self, token):
+        """
+        Given a token that is not an encoded browse consignment cursor
+        When it is decoded
+        Then a ValueError is raised
+        """
+        with pytest.raises(ValueError):
+            BrowseConsignmentCursor.decode(token)
+
+    @pytest.mark.parametrize(
+        "sort, sort_value, total",
+        [
+            ("date_of_record-desc", "not-a-date", None),
+            ("opening_date-asc", "25/02/2023", None),
+            ("file_name-asc", "first_file.docx", -1),
+            ("file_name-asc", "first_file.docx", "5"),
+            (1, "first_file.docx", None),
+        ],
+    )
+    def test_decode_cursor_with_invalid_values_raises_value_error(
+        self, sort, sort_value, total
+    ):
+        """
+        Given a cursor whose sort value is not a date for a date sort, whose
+        total is not a count or whose sort is not a string
+        When its token is decoded
+        Then a ValueError is raised
+        """
+        token = BrowseConsignmentCursor(
+            sort, sort_value, "first_file.docx", str(uuid.uuid4()), total=total
+        ).encode()
+
+        with pytest.raises(ValueError):
+            BrowseConsignmentCursor.decode(token)
@@ -1,6 +1,10 @@
+from datetime import datetime
+
+import pytest
 from flask.testing import FlaskClient
 
 from app.main.db.queries import build_browse_query
+from app.tests.factories import ConsignmentFactory, FileFactory
 
 
 class TestBrowse:
@@ -132,3 +136,85 @@ class TestBrowse:
         )
         results = query.all()
         assert results == []
+
+    @pytest.mark.parametrize(
+        "date_from, date_to, expected_number_of_results",
+        [
+            ("2023-02-07", "2023-02-07", 1),
+            (None, "2023-02-07", 1),
+            ("2023-02-07", None, 1),
+            (None, "2023-02-06", 0),
+            ("2023-02-08", None, 0),
+        ],
+    )
+    def test_build_browse_query_date_filter_includes_whole_days(
+        self,
+        client: FlaskClient,
+        date_from,
+        date_to,
+        expected_number_of_results,
+    ):
+        """
+        Given a consignment whose transfer completed in the afternoon of a day
+        When build_browse_query is called with a date range and is executed
+        Then its series is returned if the day is within the range, including
+            when it is the last day of the range
+        """
+        consignment = ConsignmentFactory(
+            TransferCompleteDatetime=datetime(2023, 2, 7, 15, 30)
+        )
+        FileFactory(consignment=consignment, FileType="file")
+
+        results = build_browse_query(
+            filters={"date_from": date_from, "date_to": date_to}
+        ).all()
+
+        assert len(results) == expected_number_of_results
+
+    @pytest.mark.parametrize(
+        "filters, sorting_orders",
+        [
+            (None, None),
+            ({"transferring_body": "first"}, None),
+            (
+                {"date_from": "2023-01-01", "date_to": "2023-12-31"},
+                {"records_held": "desc", "series": "asc"},
+            ),
+            (None, {"consignment_in_series": "desc", "series": "asc"}),
+        ],
+    )
+    def test_build_browse_query_from_consignment_browse_summary(
+        self,
+        client: FlaskClient,
+        browse_files,
+        use_consignment_browse_summary,
+        filters,
+        sorting_orders,
+    ):
+        """
+        Given files in several series and transferring bodies
+        When build_browse_query is called and executed with
+            USE_CONSIGNMENT_BROWSE_SUMMARY enabled
+        Then the same rows are returned as when aggregating the File table
+        """
+        expected_results = build_browse_query(
+            filters=filters, sorting_orders=sorting_orders
+        ).all()
+        expected_body_results = build_browse_query(
+            transferring_body_id=browse_files[0].consignment.series.BodyId
+        ).all()
+
+        use_consignment_browse_summary()
+
+        assert (
+            build_browse_query(
+                filters=filters, sorting_orders=sorting_orders
+            ).all()
+            == expected_results
+        )
+        assert (
+            build_browse_query(
+                transferring_body_id=browse_files[0].consignment.series.BodyId
+            ).all()
+            == expected_body_results
+        )
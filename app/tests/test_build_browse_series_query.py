@@ -1,3 +1,4 @@
+import pytest
 from flask.testing import FlaskClient
 
 from app.main.db.queries import build_browse_series_query
@@ -69,3 +70,39 @@ class TestBrowseSeries:
         query = build_browse_series_query(series_id=series_id, filters=filters)
         results = query.all()
         assert results == []
+
+    @pytest.mark.parametrize(
+        "filters, sorting_orders",
+        [
+            (None, None),
+            ({"date_from": "2023-01-01"}, None),
+            (None, {"records_held": "desc", "consignment_reference": "asc"}),
+        ],
+    )
+    def test_build_browse_series_query_from_consignment_browse_summary(
+        self,
+        client: FlaskClient,
+        browse_transferring_body_files,
+        use_consignment_browse_summary,
+        filters,
+        sorting_orders,
+    ):
+        """
+        Given files in several consignments of a series
+        When build_browse_series_query is called and executed with
+            USE_CONSIGNMENT_BROWSE_SUMMARY enabled
+        Then the same rows are returned as when aggregating the File table
+        """
+        series_id = browse_transferring_body_files[
+            0
+        ].consignment.series.SeriesId
+        expected_results = build_browse_series_query(
+            series_id, filters, sorting_orders
+        ).all()
+
+        use_consignment_browse_summary()
+
+        results = build_browse_series_query(
+            series_id, filters, sorting_orders
+        ).all()
+        assert results == expected_results
@@ -0,0 +1,67 @@
+from app.main.util.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_returns_default_for_missing_key():
+    cache = TTLCache(max_size=2)
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+
+
+def test_ttl_cache_entry_expires_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=2, default_ttl=10, clock=clock)
+    cache.set("key", "value")
+
+    clock.now = 9
+    assert cache.get("key") == "value"
+
+    clock.now = 10
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_per_entry_ttl_overrides_default():
+    clock = FakeClock()
+    cache = TTLCache(max_size=2, default_ttl=10, clock=clock)
+    cache.set("key", "value", ttl=2)
+
+    clock.now = 3
+    assert cache.get("key") is None
+
+
+def test_ttl_cache_does_not_store_non_positive_ttl():
+    cache = TTLCache(max_size=2, default_ttl=10)
+    cache.set("key", "value", ttl=0)
+    assert "key" not in cache
+
+
+def test_ttl_cache_evicts_least_recently_used_entry():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_ttl_cache_pop_and_clear():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+
+    cache.clear()
+    assert len(cache) == 0
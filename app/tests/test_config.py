@@ -68,6 +68,7 @@ def test_local_env_vars_config_initialized(monkeypatch):
     assert config.DEFAULT_DATE_FORMAT == "test_default_date_format"
     assert config.RECORD_BUCKET_NAME == "test_record_bucket_name"
     assert config.ACCESS_COPY_BUCKET == "test_access_copy_bucket"
+    assert config.PDF_METADATA_S3_BUCKET == "test_access_copy_bucket"
     assert config.FLASKS3_ACTIVE is False
     assert config.FLASKS3_CDN_DOMAIN == "test_flasks3_cdn_domain"
     assert config.FLASKS3_BUCKET_NAME == "test_flasks3_bucket_name"
@@ -302,6 +303,7 @@ def test_aws_secrets_manager_config_initialized(monkeypatch):
 
     assert config.RECORD_BUCKET_NAME == "test_record_bucket_name"
     assert config.ACCESS_COPY_BUCKET == "test_access_copy_bucket"
+    assert config.PDF_METADATA_S3_BUCKET == "test_access_copy_bucket"
     assert config.FLASKS3_ACTIVE is False
     assert config.FLASKS3_CDN_DOMAIN == "test_flasks3_cdn_domain"
     assert config.FLASKS3_BUCKET_NAME == "test_flasks3_bucket_name"
@@ -311,13 +313,13 @@ def test_aws_secrets_manager_config_initialized(monkeypatch):
 
     aws_auth = config.OPEN_SEARCH_HTTP_AUTH
     assert isinstance(aws_auth, AWS4Auth)
-    assert aws_auth.access_id == "test_access_key"
+    credentials = aws_auth.refreshable_credentials.get_frozen_credentials()
+    assert credentials.access_key == "test_access_key"
     assert aws_auth.region == "test_aws_region"
     assert aws_auth.service == "es"
-    assert aws_auth.session_token == "test_token"
+    assert credentials.token == "test_token"
     assert (
-        aws_auth.signing_key.secret_key
-        == "test_secret_key"  # pragma: allowlist secret
+        credentials.secret_key == "test_secret_key"  # pragma: allowlist secret
     )
 
     assert config.CSP_CONNECT_SRC == [
@@ -448,3 +450,24 @@ def test_aws_secrets_manager_config_variable_not_set_error(monkeypatch):
         inspect.getmembers(config)
 
     assert str(error.value) == "'DEFAULT_DATE_FORMAT'"
+
+
+@pytest.mark.parametrize(
+    "lambda_function_name, expected_workers",
+    [(None, 1), ("ayr-webapp", 0)],
+)
+def test_page_prerender_workers_default_disabled_on_lambda(
+    monkeypatch, lambda_function_name, expected_workers
+):
+    """
+    Given PAGE_PRERENDER_WORKERS is not set
+    When the config is read inside and outside an AWS Lambda
+    Then pre-rendering is disabled on Lambda, which freezes background threads
+    """
+    monkeypatch.delenv("PAGE_PRERENDER_WORKERS", raising=False)
+    if lambda_function_name is None:
+        monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    else:
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", lambda_function_name)
+
+    assert EnvConfig().PAGE_PRERENDER_WORKERS == expected_workers
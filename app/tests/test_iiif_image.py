@@ -0,0 +1,178 @@
+import pymupdf
+import pytest
+
+from app.main.util.iiif_image import (
+    IIIFImageRequest,
+    generate_iiif_image_info,
+    generate_iiif_image_service,
+    parse_iiif_image_request,
+    render_iiif_image,
+)
+
+
+@pytest.mark.parametrize(
+    "region, size, expected_region, expected_size",
+    [
+        ("full", "full", (0, 0, 1000, 800), (1000, 800)),
+        ("full", "max", (0, 0, 1000, 800), (1000, 800)),
+        ("square", "full", (100, 0, 800, 800), (800, 800)),
+        ("0,0,512,512", "512,", (0, 0, 512, 512), (512, 512)),
+        ("512,512,512,512", "full", (512, 512, 488, 288), (488, 288)),
+        ("pct:50,50,50,50", "pct:50", (500, 400, 500, 400), (250, 200)),
+        ("full", "250,", (0, 0, 1000, 800), (250, 200)),
+        ("full", ",200", (0, 0, 1000, 800), (250, 200)),
+        ("full", "!250,250", (0, 0, 1000, 800), (250, 200)),
+        ("full", "100,100", (0, 0, 1000, 800), (100, 100)),
+    ],
+)
+def test_parse_iiif_image_request(region, size, expected_region, expected_size):
+    image_request = parse_iiif_image_request(
+        region, size, "0", "default", 1000, 800
+    )
+
+    assert image_request == IIIFImageRequest(
+        expected_region, expected_size, 0, "color"
+    )
+
+
+@pytest.mark.parametrize(
+    "region, size",
+    [
+        ("1000,0,10,10", "full"),
+        ("0,0,0,10", "full"),
+        ("full", "2000,"),
+        ("full", "!250,"),
+        ("full", ","),
+        ("bad", "full"),
+        ("full", "bad"),
+    ],
+)
+def test_parse_iiif_image_request_invalid(region, size):
+    with pytest.raises(ValueError):
+        parse_iiif_image_request(region, size, "0", "default", 1000, 800)
+
+
+@pytest.mark.parametrize(
+    "region, size, expected_size",
+    [
+        ("full", "full", (500, 400)),
+        ("full", "max", (500, 400)),
+        ("0,0,1000,200", "max", (500, 100)),
+        ("full", "400,", (400, 320)),
+        ("0,0,512,512", "256,256", (256, 256)),
+    ],
+)
+def test_parse_iiif_image_request_within_maximum_size(
+    region, size, expected_size
+):
+    image_request = parse_iiif_image_request(
+        region, size, "0", "default", 1000, 800, max_width=500, max_area=250000
+    )
+
+    assert image_request.size == expected_size
+
+
+@pytest.mark.parametrize("size", ["600,", ",600", "pct:60", "!1000,1000"])
+def test_parse_iiif_image_request_larger_than_maximum_size(size):
+    with pytest.raises(ValueError):
+        parse_iiif_image_request(
+            "full",
+            size,
+            "0",
+            "default",
+            1000,
+            800,
+            max_width=500,
+            max_area=250000,
+        )
+
+
+def test_parse_iiif_image_request_larger_than_maximum_area():
+    with pytest.raises(ValueError):
+        parse_iiif_image_request(
+            "full", "450,", "0", "default", 1000, 800, max_area=100000
+        )
+
+
+def test_iiif_image_request_canonical():
+    image_request = IIIFImageRequest((0, 512, 512, 256), (256, 128), 90, "gray")
+
+    assert image_request.canonical == "0,512,512,256/256,128/90/gray"
+
+
+def test_generate_iiif_image_info():
+    info = generate_iiif_image_info("http://localhost/iiif", 2480, 3508, 512)
+
+    assert info["@id"] == "http://localhost/iiif"
+    assert (info["width"], info["height"]) == (2480, 3508)
+    assert info["tiles"] == [{"width": 512, "scaleFactors": [1, 2, 4, 8]}]
+    assert info["profile"][0] == "http://iiif.io/api/image/2/level1.json"
+    assert "maxWidth" not in info["profile"][1]
+
+
+def test_generate_iiif_image_info_advertises_maximum_size():
+    info = generate_iiif_image_info(
+        "http://localhost/iiif", 2480, 3508, 512, max_width=4096, max_area=1000
+    )
+
+    assert info["profile"][1]["maxWidth"] == 4096
+    assert info["profile"][1]["maxArea"] == 1000
+
+
+def test_generate_iiif_image_service():
+    assert generate_iiif_image_service("http://localhost/iiif") == {
+        "@context": "http://iiif.io/api/image/2/context.json",
+        "@id": "http://localhost/iiif",
+        "profile": "http://iiif.io/api/image/2/level1.json",
+    }
+
+
+def _page_with_black_left_half():
+    pdf_document = pymupdf.open()
+    page = pdf_document.new_page(width=200, height=100)
+    page.draw_rect(pymupdf.Rect(0, 0, 100, 100), fill=(0, 0, 0))
+    return pdf_document, page
+
+
+def test_render_iiif_image_renders_only_the_region():
+    pdf_document, page = _page_with_black_left_half()
+
+    with pdf_document:
+        left = render_iiif_image(
+            page,
+            800,
+            400,
+            parse_iiif_image_request(
+                "0,0,400,400", "200,", "0", "default", 800, 400
+            ),
+        )
+        right = render_iiif_image(
+            page,
+            800,
+            400,
+            parse_iiif_image_request(
+                "400,0,400,400", "full", "0", "gray", 800, 400
+            ),
+        )
+
+    assert (left.width, left.height, left.n) == (200, 200, 3)
+    assert left.pixel(100, 100) == (0, 0, 0)
+    assert (right.width, right.height, right.n) == (400, 400, 1)
+    assert right.pixel(200, 200) == (255,)
+
+
+def test_render_iiif_image_rotated():
+    pdf_document, page = _page_with_black_left_half()
+
+    with pdf_document:
+        pix = render_iiif_image(
+            page,
+            200,
+            100,
+            parse_iiif_image_request("full", "full", "90", "default", 200, 100),
+        )
+
+    assert (pix.width, pix.height) == (100, 200)
+    # the black left half is at the top once rotated clockwise
+    assert pix.pixel(50, 50) == (0, 0, 0)
+    assert pix.pixel(50, 150) == (255, 255, 255)
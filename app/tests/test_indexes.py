@@ -0,0 +1,201 @@
+from unittest.mock import patch
+
+from flask.testing import FlaskClient
+from sqlalchemy import event, text
+
+from app.main.db.indexes import (
+    AYR_INDEXES,
+    apply_indexes,
+    get_missing_indexes,
+    report_missing_indexes,
+)
+from app.main.db.models import db
+
+DROPPED_INDEX_NAMES = [
+    "ix_file_consignment_id_lower_file_type",
+    "ix_file_metadata_file_id_property_name",
+]
+
+
+def _drop_indexes(index_names):
+    with db.engine.begin() as connection:
+        for index_name in index_names:
+            connection.execute(text(f"DROP INDEX {index_name}"))
+
+
+def test_no_missing_indexes_after_create_all(client: FlaskClient):
+    """
+    Given a database created from the models
+    When get_missing_indexes is called
+    Then no indexes are missing
+    """
+    with db.engine.connect() as connection:
+        assert get_missing_indexes(connection) == []
+
+
+def test_equivalent_index_under_another_name_is_not_missing(
+    client: FlaskClient,
+):
+    """
+    Given a database where one of the indexes was replaced by an index on the
+    same columns, followed by another column, under another name
+    When get_missing_indexes is called
+    Then no indexes are missing
+    """
+    _drop_indexes(["ix_file_metadata_file_id_property_name"])
+    with db.engine.begin() as connection:
+        connection.execute(
+            text(
+                'CREATE INDEX "FileMetadata_FileId_PropertyName_Value_idx" '
+                'ON "FileMetadata" ("FileId", "PropertyName", "Value")'
+            )
+        )
+
+    with db.engine.connect() as connection:
+        assert get_missing_indexes(connection) == []
+
+
+def test_partial_or_reordered_index_is_missing(client: FlaskClient):
+    """
+    Given a database where one of the indexes was replaced by a partial index,
+    and another by an index on its columns in another order
+    When get_missing_indexes is called
+    Then both indexes are missing
+    """
+    _drop_indexes(DROPPED_INDEX_NAMES)
+    with db.engine.begin() as connection:
+        connection.execute(
+            text(
+                'CREATE INDEX ix_partial ON "File" '
+                '("ConsignmentId", lower("FileType")) '
+                """WHERE "FileType" = 'File'"""
+            )
+        )
+        connection.execute(
+            text(
+                'CREATE INDEX ix_reordered ON "FileMetadata" '
+                '("PropertyName", "FileId")'
+            )
+        )
+
+    with db.engine.connect() as connection:
+        assert [
+            index.name for index in get_missing_indexes(connection)
+        ] == DROPPED_INDEX_NAMES
+
+
+def test_invalid_index_is_missing_and_rebuilt(app, client: FlaskClient):
+    """
+    Given a database where one of the indexes is invalid, as left by a failed
+    CREATE INDEX CONCURRENTLY
+    When `flask db-indexes check`, `flask db-indexes apply` and then
+        `flask db-indexes check` again are run
+    Then the first check lists the invalid index and fails, apply rebuilds it
+        and the second check passes
+    """
+    index = AYR_INDEXES[0]
+    with db.engine.begin() as connection:
+        connection.execute(
+            text(
+                "UPDATE pg_index SET indisvalid = false "
+                f"WHERE indexrelid = '{index.name}'::regclass"
+            )
+        )
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["db-indexes", "check"])
+    assert result.exit_code == 1
+    assert f"Missing: {index.name} on {index.table.name}" in result.output
+
+    result = runner.invoke(args=["db-indexes", "apply"])
+    assert result.exit_code == 0
+    assert f"Created: {index.name}" in result.output
+
+    result = runner.invoke(args=["db-indexes", "check"])
+    assert result.exit_code == 0
+    assert "All indexes exist." in result.output
+    with db.engine.connect() as connection:
+        assert connection.execute(
+            text(
+                "SELECT indisvalid FROM pg_index "
+                f"WHERE indexrelid = '{index.name}'::regclass"
+            )
+        ).scalar_one()
+
+
+def test_report_missing_indexes_logs_missing_indexes(app, client: FlaskClient):
+    """
+    Given a database missing two of the indexes
+    When report_missing_indexes is called
+    Then their names are returned and logged in a warning
+    """
+    _drop_indexes(DROPPED_INDEX_NAMES)
+
+    with patch.object(app, "app_logger") as mock_app_logger:
+        missing_index_names = report_missing_indexes()
+
+    assert missing_index_names == DROPPED_INDEX_NAMES
+    warning = mock_app_logger.warning.call_args.args[0]
+    assert all(index_name in warning for index_name in DROPPED_INDEX_NAMES)
+
+
+def test_apply_indexes_creates_missing_indexes_concurrently(
+    client: FlaskClient,
+):
+    """
+    Given a database missing two of the indexes
+    When apply_indexes is called
+    Then only those indexes are created, concurrently
+    And no indexes are missing afterwards
+    """
+    _drop_indexes(DROPPED_INDEX_NAMES)
+    statements = []
+
+    def record_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record_statement)
+    try:
+        created_index_names = apply_indexes(db.engine)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record_statement)
+
+    assert created_index_names == DROPPED_INDEX_NAMES
+    drop_statements = [s for s in statements if s.startswith("DROP")]
+    assert drop_statements == [
+        f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"
+        for index_name in DROPPED_INDEX_NAMES
+    ]
+    create_statements = [s for s in statements if s.startswith("CREATE")]
+    assert len(create_statements) == 2
+    assert all(
+        s.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS")
+        for s in create_statements
+    )
+    with db.engine.connect() as connection:
+        assert get_missing_indexes(connection) == []
+
+
+def test_db_indexes_commands(app, client: FlaskClient):
+    """
+    Given a database missing one of the indexes
+    When `flask db-indexes check`, `flask db-indexes apply` and then
+        `flask db-indexes check` again are run
+    Then the first check lists the missing index and fails, apply creates it
+        and the second check passes
+    """
+    index = AYR_INDEXES[0]
+    _drop_indexes([index.name])
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["db-indexes", "check"])
+    assert result.exit_code == 1
+    assert f"Missing: {index.name} on {index.table.name}" in result.output
+
+    result = runner.invoke(args=["db-indexes", "apply", "--no-concurrently"])
+    assert result.exit_code == 0
+    assert f"Created: {index.name}" in result.output
+
+    result = runner.invoke(args=["db-indexes", "check"])
+    assert result.exit_code == 0
+    assert "All indexes exist." in result.output
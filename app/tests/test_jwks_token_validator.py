@@ -0,0 +1,323 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import keycloak
+import pytest
+from flask import url_for
+from jwcrypto import jwk, jwt
+
+from app.main.authorize.access_token_sign_in_required import (
+    access_token_sign_in_required,
+)
+from app.main.authorize.jwks_token_validator import (
+    JWKSKeyStore,
+    JWKSUnavailableError,
+    decode_access_token_locally,
+    get_expected_token_issuer,
+)
+
+ISSUER = "https://keycloak.example.com/realms/tdr"
+CLIENT_ID = "ayr"
+
+
+def _generate_key(kid):
+    return jwk.JWK.generate(kty="RSA", size=2048, kid=kid, alg="RS256")
+
+
+def _export_jwks(*keys):
+    key_set = jwk.JWKSet()
+    for key in keys:
+        key_set.add(key)
+    return json.loads(key_set.export(private_keys=False))
+
+
+def _sign_token(key, **claims):
+    default_claims = {
+        "iss": ISSUER,
+        "azp": CLIENT_ID,
+        "sub": "test_user",
+        "groups": ["/ayr_user_type/view_all"],
+        "exp": int(time.time()) + 300,
+    }
+    token = jwt.JWT(
+        header={"alg": "RS256", "kid": key.get("kid"), "typ": "JWT"},
+        claims={**default_claims, **claims},
+    )
+    token.make_signed_token(key)
+    return token.serialize()
+
+
+@pytest.fixture
+def signing_key():
+    return _generate_key("test_key")
+
+
+@pytest.fixture
+def jwks_app(app, signing_key, tmp_path):
+    jwks_file = tmp_path / "jwks.json"
+    jwks_file.write_text(json.dumps(_export_jwks(signing_key)))
+    app.config["TOKEN_VALIDATION_MODE"] = "jwks"
+    app.config["KEYCLOAK_JWKS_FILE"] = str(jwks_file)
+    app.config["KEYCLOAK_TOKEN_ISSUER"] = ISSUER
+    app.config["KEYCLOAK_CLIENT_ID"] = CLIENT_ID
+    return app
+
+
+class TestJWKSKeyStore:
+    def test_key_set_is_fetched_once(self):
+        fetch_jwks = MagicMock(return_value=_export_jwks(_generate_key("a")))
+        key_store = JWKSKeyStore(fetch_jwks)
+
+        key_store.get_key_set("a")
+        key_store.get_key_set("a")
+
+        fetch_jwks.assert_called_once()
+
+    def test_key_set_is_refreshed_on_kid_miss(self):
+        old_key, new_key = _generate_key("old"), _generate_key("new")
+        fetch_jwks = MagicMock(
+            side_effect=[_export_jwks(old_key), _export_jwks(old_key, new_key)]
+        )
+        key_store = JWKSKeyStore(fetch_jwks, min_refresh_interval=0)
+
+        assert key_store.get_key_set("old").get_key("new") is None
+        assert key_store.get_key_set("new").get_key("new") is not None
+        assert fetch_jwks.call_count == 2
+
+    def test_refreshes_on_kid_miss_are_rate_limited(self):
+        now = [0]
+        fetch_jwks = MagicMock(return_value=_export_jwks(_generate_key("a")))
+        key_store = JWKSKeyStore(
+            fetch_jwks, min_refresh_interval=30, clock=lambda: now[0]
+        )
+
+        key_store.get_key_set("a")
+        key_store.get_key_set("unknown")
+        assert fetch_jwks.call_count == 1
+
+        now[0] = 30
+        key_store.get_key_set("unknown")
+        assert fetch_jwks.call_count == 2
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            FileNotFoundError("jwks.json"),
+            keycloak.exceptions.KeycloakConnectionError("Can't connect"),
+        ],
+    )
+    def test_fetch_failure_raises_jwks_unavailable(self, error):
+        key_store = JWKSKeyStore(MagicMock(side_effect=error))
+
+        with pytest.raises(JWKSUnavailableError):
+            key_store.get_key_set()
+
+
+class TestDecodeAccessTokenLocally:
+    def test_valid_token_returns_active_claims(self, jwks_app, signing_key):
+        with jwks_app.app_context():
+            decoded_token = decode_access_token_locally(
+                _sign_token(signing_key)
+            )
+
+        assert decoded_token["active"] is True
+        assert decoded_token["sub"] == "test_user"
+        assert decoded_token["groups"] == ["/ayr_user_type/view_all"]
+        assert "exp" in decoded_token
+
+    def test_expired_token_is_inactive(self, jwks_app, signing_key):
+        token = _sign_token(signing_key, exp=int(time.time()) - 3600)
+        with jwks_app.app_context():
+            assert decode_access_token_locally(token) == {"active": False}
+
+    def test_token_from_another_issuer_is_inactive(self, jwks_app, signing_key):
+        token = _sign_token(signing_key, iss="https://elsewhere/realms/tdr")
+        with jwks_app.app_context():
+            assert decode_access_token_locally(token) == {"active": False}
+
+    def test_token_signed_with_unknown_key_is_inactive(self, jwks_app):
+        token = _sign_token(_generate_key("test_key"))
+        with jwks_app.app_context():
+            assert decode_access_token_locally(token) == {"active": False}
+
+    def test_token_issued_to_another_client_is_inactive(
+        self, jwks_app, signing_key
+    ):
+        token = _sign_token(signing_key, azp="other-client", aud="account")
+        with jwks_app.app_context():
+            assert decode_access_token_locally(token) == {"active": False}
+
+    def test_token_with_client_in_audience_is_active(
+        self, jwks_app, signing_key
+    ):
+        token = _sign_token(
+            signing_key, azp="other-client", aud=["account", CLIENT_ID]
+        )
+        with jwks_app.app_context():
+            assert decode_access_token_locally(token)["active"] is True
+
+    def test_missing_jwks_file_raises_jwks_unavailable(
+        self, jwks_app, signing_key, tmp_path
+    ):
+        jwks_app.config["KEYCLOAK_JWKS_FILE"] = str(tmp_path / "missing.json")
+        with jwks_app.app_context():
+            with pytest.raises(JWKSUnavailableError):
+                decode_access_token_locally(_sign_token(signing_key))
+
+    def test_malformed_token_is_inactive(self, jwks_app):
+        with jwks_app.app_context():
+            assert decode_access_token_locally("not_a_jwt") == {"active": False}
+
+
+def test_expected_token_issuer_is_derived_from_keycloak_config(app):
+    app.config["KEYCLOAK_BASE_URI"] = "https://keycloak.example.com/"
+    app.config["KEYCLOAK_REALM_NAME"] = "tdr"
+    app.config["KEYCLOAK_TOKEN_ISSUER"] = None
+
+    with app.app_context():
+        assert get_expected_token_issuer() == ISSUER
+
+
+@patch(
+    "app.main.authorize.access_token_sign_in_required.get_keycloak_instance_from_flask_config"
+)
+def test_jwks_mode_grants_access_without_introspection(
+    mock_keycloak, jwks_app, signing_key
+):
+    """
+    Given TOKEN_VALIDATION_MODE is 'jwks' and a validly signed access token in the session,
+    When accessing a route protected by the 'access_token_sign_in_required' decorator,
+    Then it should grant access without introspecting the token with Keycloak
+    """
+    view_name = "/protected_view"
+
+    @jwks_app.route(view_name)
+    @access_token_sign_in_required
+    def protected_view():
+        return "Access granted"
+
+    with jwks_app.test_client() as client:
+        with client.session_transaction() as session:
+            session["access_token"] = _sign_token(signing_key)
+            session["refresh_token"] = "active_refresh_token"
+            session["user_groups"] = ["/ayr_user_type/view_all"]
+
+        response = client.get(view_name)
+
+    assert response.status_code == 200
+    mock_keycloak.return_value.introspect.assert_not_called()
+    mock_keycloak.return_value.refresh_token.assert_not_called()
+
+
+@patch(
+    "app.main.authorize.access_token_sign_in_required.get_keycloak_instance_from_flask_config"
+)
+def test_jwks_mode_falls_back_to_introspection_when_jwks_unavailable(
+    mock_keycloak, jwks_app, signing_key, tmp_path
+):
+    """
+    Given TOKEN_VALIDATION_MODE is 'jwks' and the JWKS cannot be fetched,
+    When accessing a route protected by the 'access_token_sign_in_required' decorator,
+    Then the access token should be introspected with Keycloak instead
+    """
+    view_name = "/protected_view"
+
+    @jwks_app.route(view_name)
+    @access_token_sign_in_required
+    def protected_view():
+        return "Access granted"
+
+    jwks_app.config["KEYCLOAK_JWKS_FILE"] = str(tmp_path / "missing.json")
+    mock_keycloak.return_value.introspect.return_value = {
+        "active": True,
+        "groups": ["/ayr_user_type/view_all"],
+    }
+    access_token = _sign_token(signing_key)
+
+    with jwks_app.test_client() as client:
+        with client.session_transaction() as session:
+            session["access_token"] = access_token
+            session["refresh_token"] = "active_refresh_token"
+            session["user_groups"] = ["/ayr_user_type/view_all"]
+
+        response = client.get(view_name)
+
+    assert response.status_code == 200
+    mock_keycloak.return_value.introspect.assert_called_once_with(access_token)
+    mock_keycloak.return_value.refresh_token.assert_not_called()
+
+
+@patch(
+    "app.main.authorize.access_token_sign_in_required.get_keycloak_instance_from_flask_config"
+)
+def test_jwks_mode_refreshes_expired_token(
+    mock_keycloak, jwks_app, signing_key
+):
+    """
+    Given TOKEN_VALIDATION_MODE is 'jwks' and an expired access token in the session,
+    When accessing a route protected by the 'access_token_sign_in_required' decorator,
+    Then the tokens should be refreshed and the new access token introspected for its groups
+    """
+    view_name = "/protected_view"
+
+    @jwks_app.route(view_name)
+    @access_token_sign_in_required
+    def protected_view():
+        return "Access granted"
+
+    valid_groups = ["/ayr_user_type/view_all"]
+    mock_keycloak.return_value.refresh_token.return_value = {
+        "access_token": "new_access_token",
+        "refresh_token": "new_refresh_token",
+    }
+    mock_keycloak.return_value.introspect.return_value = {
+        "active": True,
+        "groups": valid_groups,
+    }
+
+    with jwks_app.test_client() as client:
+        with client.session_transaction() as session:
+            session["access_token"] = _sign_token(
+                signing_key, exp=int(time.time()) - 3600
+            )
+            session["refresh_token"] = "active_refresh_token"
+
+        response = client.get(view_name)
+
+        assert response.status_code == 200
+        with client.session_transaction() as updated_session:
+            assert updated_session["access_token"] == "new_access_token"
+            assert updated_session["user_groups"] == valid_groups
+
+    mock_keycloak.return_value.introspect.assert_called_once_with(
+        "new_access_token"
+    )
+
+
+@patch(
+    "app.main.authorize.access_token_sign_in_required.get_keycloak_instance_from_flask_config"
+)
+def test_jwks_mode_redirects_to_sign_in_when_refresh_fails(
+    mock_keycloak, jwks_app
+):
+    view_name = "/protected_view"
+
+    @jwks_app.route(view_name)
+    @access_token_sign_in_required
+    def protected_view():
+        return "Access granted"
+
+    mock_keycloak.return_value.refresh_token.side_effect = (
+        keycloak.exceptions.KeycloakPostError
+    )
+
+    with jwks_app.test_client() as client:
+        with client.session_transaction() as session:
+            session["access_token"] = "not_a_jwt"
+            session["refresh_token"] = "inactive_refresh_token"
+
+        response = client.get(view_name)
+
+        assert response.status_code == 302
+        assert response.headers["Location"] == url_for("main.sign_in")
@@ -2,6 +2,8 @@ from unittest.mock import patch
 
 from flask import url_for
 
+from app.main.authorize.token_cache import get_token_introspection_cache
+
 
 @patch("app.main.routes.get_keycloak_instance_from_flask_config")
 def test_sign_out(mock_keycloak, client, mock_standard_user):
@@ -25,3 +27,20 @@ def test_sign_out(mock_keycloak, client, mock_standard_user):
 
     with client.session_transaction() as cleared_session:
         assert cleared_session == {}
+
+
+@patch("app.main.routes.get_keycloak_instance_from_flask_config")
+def test_sign_out_invalidates_cached_token_introspection(
+    mock_keycloak, app, client, mock_standard_user
+):
+    """
+    Given a signed in user whose access token introspection has been cached,
+    When a request with this session is made to the 'main.sign_out' route,
+    Then the cached introspection for the access token should be removed
+    """
+    mock_standard_user(client)
+    client.get(url_for("main.sign_out"))
+
+    with app.app_context():
+        cache = get_token_introspection_cache()
+        assert cache.get("valid_access_token") is None
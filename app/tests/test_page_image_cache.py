@@ -0,0 +1,197 @@
+import os
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.main.util.page_image_cache import (
+    DISK_CACHE_TEMP_FILE_PREFIX,
+    DiskPageImageCache,
+    MemoryPageImageCache,
+    PageImageKey,
+    S3PageImageCache,
+    TieredPageImageCache,
+    get_page_image_cache,
+)
+
+
+def _key(page_number=1, size="full", etag="etag-1"):
+    return PageImageKey("bucket", "TDR-2024/file-id", etag, page_number, size)
+
+
+def test_page_image_key_digest_differs_by_every_field():
+    digests = {
+        _key().digest,
+        _key(page_number=2).digest,
+        _key(size="thumbnail").digest,
+        _key(etag="etag-2").digest,
+        PageImageKey("other", "TDR-2024/file-id", "etag-1", 1, "full").digest,
+    }
+
+    assert len(digests) == 5
+
+
+@pytest.mark.parametrize(
+    "size, media_type",
+    [
+        ("full", "image/jpeg"),
+        ("w800.webp", "image/webp"),
+        ("thumbnail.webp", "image/webp"),
+        ("iiif/full/max/0/default.jpg", "image/jpeg"),
+    ],
+)
+def test_page_image_key_media_type(size, media_type):
+    assert _key(size=size).media_type == media_type
+
+
+def test_memory_cache_evicts_least_recently_used_beyond_byte_budget():
+    cache = MemoryPageImageCache(max_bytes=10)
+    cache.set(_key(1), b"aaaa")
+    cache.set(_key(2), b"bbbb")
+    assert cache.get(_key(1)) == b"aaaa"
+
+    cache.set(_key(3), b"cccc")
+
+    assert cache.get(_key(1)) == b"aaaa"
+    assert cache.get(_key(2)) is None
+    assert cache.get(_key(3)) == b"cccc"
+    assert cache.size == 8
+
+
+def test_memory_cache_does_not_cache_images_larger_than_budget():
+    cache = MemoryPageImageCache(max_bytes=4)
+    cache.set(_key(1), b"aaaaa")
+
+    assert cache.get(_key(1)) is None
+    assert len(cache) == 0
+
+
+def test_disk_cache_round_trip_and_eviction(tmp_path):
+    cache = DiskPageImageCache(str(tmp_path), max_bytes=10)
+    cache.set(_key(1), b"aaaa")
+    os.utime(cache._path(_key(1)), (1, 1))
+    cache.set(_key(2), b"bbbb")
+    assert cache.get(_key(1)) == b"aaaa"
+
+    cache.set(_key(3), b"cccc")
+
+    assert cache.get(_key(1)) is None
+    assert cache.get(_key(2)) == b"bbbb"
+    assert cache.get(_key(3)) == b"cccc"
+
+
+def test_disk_cache_eviction_skips_files_being_written(tmp_path):
+    cache = DiskPageImageCache(str(tmp_path), max_bytes=10)
+    cache.set(_key(1), b"aaaa")
+    os.utime(cache._path(_key(1)), (2, 2))
+    shard_directory = os.path.dirname(cache._path(_key(2)))
+    os.makedirs(shard_directory, exist_ok=True)
+    temp_path = os.path.join(
+        shard_directory, f"{DISK_CACHE_TEMP_FILE_PREFIX}partial"
+    )
+    with open(temp_path, "wb") as temp_file:
+        temp_file.write(b"partial image")
+    os.utime(temp_path, (1, 1))
+
+    cache.set(_key(2), b"bbbb")
+    cache.set(_key(3), b"cccc")
+
+    assert os.path.exists(temp_path)
+    assert cache.get(_key(1)) is None
+    assert cache.get(_key(3)) == b"cccc"
+
+
+def test_disk_cache_miss(tmp_path):
+    cache = DiskPageImageCache(str(tmp_path), max_bytes=10)
+
+    assert cache.get(_key(1)) is None
+
+
+@mock_aws
+def test_s3_cache_round_trip_and_miss(app):
+    boto3.client("s3", region_name="us-east-1").create_bucket(
+        Bucket="cache-bucket"
+    )
+    cache = S3PageImageCache("cache-bucket", "page-images/")
+
+    with app.app_context():
+        assert cache.get(_key(1)) is None
+        cache.set(_key(1), b"aaaa")
+        assert cache.get(_key(1)) == b"aaaa"
+
+    assert (
+        boto3.client("s3", region_name="us-east-1").list_objects_v2(
+            Bucket="cache-bucket"
+        )["Contents"][0]["Key"]
+        == f"page-images/{_key(1).digest}"
+    )
+
+
+@mock_aws
+def test_s3_cache_stores_images_with_their_media_type(app):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="cache-bucket")
+    cache = S3PageImageCache("cache-bucket", "page-images/")
+
+    with app.app_context():
+        cache.set(_key(size="full"), b"aaaa")
+        cache.set(_key(size="full.webp"), b"bbbb")
+
+    assert [
+        s3.head_object(
+            Bucket="cache-bucket", Key=f"page-images/{_key(size=size).digest}"
+        )["ContentType"]
+        for size in ("full", "full.webp")
+    ] == ["image/jpeg", "image/webp"]
+
+
+@mock_aws
+def test_s3_cache_errors_are_misses(app):
+    cache = S3PageImageCache("missing-bucket", "page-images/")
+
+    with app.app_context():
+        app.app_logger = MagicMock()
+        cache.set(_key(1), b"aaaa")
+        assert cache.get(_key(1)) is None
+
+    assert app.app_logger.warning.call_count == 2
+
+
+def test_tiered_cache_copies_hits_into_faster_tiers(tmp_path):
+    memory_cache = MemoryPageImageCache(max_bytes=100)
+    disk_cache = DiskPageImageCache(str(tmp_path), max_bytes=100)
+    cache = TieredPageImageCache([memory_cache, disk_cache])
+    disk_cache.set(_key(1), b"aaaa")
+
+    assert cache.get(_key(1)) == b"aaaa"
+    assert memory_cache.get(_key(1)) == b"aaaa"
+    assert cache.get(_key(2)) is None
+
+    cache.set(_key(2), b"bbbb")
+    assert memory_cache.get(_key(2)) == b"bbbb"
+    assert disk_cache.get(_key(2)) == b"bbbb"
+
+
+def test_get_page_image_cache_tiers_from_config(app, tmp_path):
+    app.config["PAGE_IMAGE_CACHE_MAX_BYTES"] = 1024
+    app.config["PAGE_IMAGE_CACHE_DIR"] = str(tmp_path)
+    app.config["PAGE_IMAGE_CACHE_S3_BUCKET"] = "cache-bucket"
+
+    with app.app_context():
+        cache = get_page_image_cache()
+        assert get_page_image_cache() is cache
+
+    memory_cache, disk_cache, s3_cache = cache.tiers
+    assert memory_cache.max_bytes == 1024
+    assert disk_cache.directory == str(tmp_path)
+    assert s3_cache.bucket == "cache-bucket"
+    assert s3_cache.prefix == "page-images/"
+
+
+def test_get_page_image_cache_memory_only_by_default(app):
+    with app.app_context():
+        cache = get_page_image_cache()
+
+    assert len(cache.tiers) == 1
+    assert cache.tiers[0].max_bytes == 64 * 1024 * 1024
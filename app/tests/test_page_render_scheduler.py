@@ -0,0 +1,225 @@
+import threading
+import time
+from unittest.mock import patch
+
+from app.main.util.page_image_cache import MemoryPageImageCache, PageImageKey
+from app.main.util.page_render_scheduler import (
+    PageRenderScheduler,
+    get_page_render_scheduler,
+)
+
+
+def _key(page_number=1, size="full"):
+    return PageImageKey(
+        "bucket", "TDR-2024/file-id", "etag-1", page_number, size
+    )
+
+
+def _scheduler(app, max_workers=2, max_pending=10, wait_timeout=5):
+    return PageRenderScheduler(
+        app,
+        MemoryPageImageCache(max_bytes=1024),
+        max_workers=max_workers,
+        max_pending=max_pending,
+        wait_timeout=wait_timeout,
+    )
+
+
+class _Renderer:
+    def __init__(self, image_bytes=b"image", started=None, release=None):
+        self.image_bytes = image_bytes
+        self.started = started or threading.Event()
+        self.release = release
+        self.call_count = 0
+
+    def __call__(self):
+        self.call_count += 1
+        self.started.set()
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        return self.image_bytes
+
+
+def test_render_stores_image_in_page_image_cache(app):
+    scheduler = _scheduler(app)
+
+    assert scheduler.render(_key(), _Renderer()) == b"image"
+    assert scheduler.page_image_cache.get(_key()) == b"image"
+
+
+def test_concurrent_renders_of_a_page_share_one_render(app):
+    scheduler = _scheduler(app)
+    release = threading.Event()
+    render_page = _Renderer(release=release)
+    results = []
+
+    def render():
+        results.append(scheduler.render(_key(), render_page))
+
+    first = threading.Thread(target=render)
+    first.start()
+    assert render_page.started.wait(timeout=5)
+    others = [threading.Thread(target=render) for _ in range(3)]
+    for thread in others:
+        thread.start()
+    release.set()
+    for thread in [first, *others]:
+        thread.join()
+
+    assert results == [b"image"] * 4
+    assert render_page.call_count == 1
+
+
+def test_render_error_raised_to_waiting_requests(app):
+    scheduler = _scheduler(app)
+    release = threading.Event()
+    started = threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        release.wait(timeout=5)
+        raise ValueError("Invalid page number")
+
+    def render(render_page):
+        try:
+            scheduler.render(_key(), render_page)
+        except ValueError as e:
+            errors.append(e)
+
+    first = threading.Thread(target=render, args=(fail,))
+    first.start()
+    assert started.wait(timeout=5)
+    second = threading.Thread(target=render, args=(_Renderer(),))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert len(errors) == 2
+    assert scheduler.render(_key(), _Renderer()) == b"image"
+
+
+def test_request_waits_for_scheduled_render(app):
+    scheduler = _scheduler(app)
+    release = threading.Event()
+    scheduled_render = _Renderer(release=release)
+
+    assert scheduler.schedule(_key(), scheduled_render)
+    assert scheduled_render.started.wait(timeout=5)
+    request_render = _Renderer(b"other")
+    threading.Timer(0.1, release.set).start()
+
+    assert scheduler.render(_key(), request_render) == b"image"
+    assert request_render.call_count == 0
+
+
+def test_request_renders_page_whose_scheduled_render_is_queued(app):
+    scheduler = _scheduler(app, max_workers=1)
+    release = threading.Event()
+    blocking_render = _Renderer(release=release)
+    queued_render = _Renderer(b"queued")
+
+    assert scheduler.schedule(_key(1), blocking_render)
+    assert blocking_render.started.wait(timeout=5)
+    assert scheduler.schedule(_key(2), queued_render)
+    request_render = _Renderer(b"request")
+
+    assert scheduler.render(_key(2), request_render) == b"request"
+    assert request_render.call_count == 1
+    release.set()
+    scheduler._executor.shutdown(wait=True)
+
+    assert queued_render.call_count == 0
+    assert scheduler._pending == 0
+    assert scheduler.page_image_cache.get(_key(2)) == b"request"
+
+
+def test_request_renders_page_after_waiting_wait_timeout(app):
+    scheduler = _scheduler(app, wait_timeout=0.1)
+    release = threading.Event()
+    scheduled_render = _Renderer(b"scheduled", release=release)
+
+    assert scheduler.schedule(_key(), scheduled_render)
+    assert scheduled_render.started.wait(timeout=5)
+    request_render = _Renderer(b"request")
+
+    with app.app_context():
+        assert scheduler.render(_key(), request_render) == b"request"
+    assert _key() in scheduler._in_flight
+    release.set()
+    scheduler._executor.shutdown(wait=True)
+
+    assert request_render.call_count == 1
+    assert _key() not in scheduler._in_flight
+
+
+def test_schedule_skips_cached_and_in_flight_pages(app):
+    scheduler = _scheduler(app)
+    scheduler.page_image_cache.set(_key(1), b"cached")
+    release = threading.Event()
+    render_page = _Renderer(release=release)
+
+    assert scheduler.schedule(_key(1), render_page)
+    assert scheduler.schedule(_key(2), render_page)
+    assert not scheduler.schedule(_key(2), render_page)
+    release.set()
+    for _ in range(50):
+        if scheduler.page_image_cache.get(_key(2)) is not None:
+            break
+        time.sleep(0.1)
+
+    assert scheduler.page_image_cache.get(_key(2)) == b"image"
+
+    assert render_page.call_count == 1
+    assert scheduler.page_image_cache.get(_key(1)) == b"cached"
+
+
+def test_schedule_drops_renders_beyond_max_pending(app):
+    scheduler = _scheduler(app, max_workers=1, max_pending=1)
+    release = threading.Event()
+    blocking_render = _Renderer(release=release)
+
+    assert scheduler.schedule(_key(1), blocking_render)
+    assert blocking_render.started.wait(timeout=5)
+    assert scheduler.schedule(_key(2), _Renderer())
+    assert not scheduler.schedule(_key(3), _Renderer())
+    release.set()
+
+
+def test_failed_scheduled_render_is_logged(app):
+    scheduler = _scheduler(app)
+
+    def fail():
+        raise RuntimeError("S3 unavailable")
+
+    with patch.object(app, "app_logger") as mock_app_logger:
+        assert scheduler.schedule(_key(), fail)
+        for _ in range(50):
+            if mock_app_logger.warning.called:
+                break
+            time.sleep(0.1)
+
+    assert "S3 unavailable" in mock_app_logger.warning.call_args.args[0]
+    assert scheduler.render(_key(), _Renderer()) == b"image"
+
+
+def test_nothing_scheduled_without_workers(app):
+    scheduler = _scheduler(app, max_workers=0)
+
+    assert not scheduler.schedule(_key(), _Renderer())
+    assert not scheduler.submit(lambda: None)
+
+
+def test_get_page_render_scheduler_from_config(app):
+    app.config["PAGE_PRERENDER_WORKERS"] = 3
+    app.config["PAGE_PRERENDER_MAX_PENDING"] = 5
+    app.config["PAGE_RENDER_WAIT_TIMEOUT"] = 2
+
+    with app.app_context():
+        scheduler = get_page_render_scheduler()
+        assert get_page_render_scheduler() is scheduler
+
+    assert scheduler._executor._max_workers == 3
+    assert scheduler.max_pending == 5
+    assert scheduler.wait_timeout == 2
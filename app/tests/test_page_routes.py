@@ -2,6 +2,7 @@ from flask.testing import FlaskClient
 from moto import mock_aws
 
 from app.tests.factories import FileFactory
+from app.tests.test_render_utils import MINIMAL_VALID_PDF_TWO_PAGES
 from app.tests.test_routes import create_mock_s3_bucket_with_object
 from configs.base_config import CONVERTIBLE_PUIDS
 
@@ -355,3 +356,606 @@ class TestPageImageRoutes:
             response = client.get(f"/record/{file.FileId}/page/1/thumbnail")
 
         assert response.status_code == 500
+
+    @mock_aws
+    def test_page_images_rendered_once_per_document_version(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record whose page image and thumbnail have been requested
+        When they are requested again
+        Then they are served from the page image cache without fetching the PDF
+        And the PDF is fetched once for both, from the PDF document cache
+        And when the PDF in S3 is replaced the page is rendered again
+        """
+        from unittest.mock import patch
+
+        import boto3
+
+        from app.main.util.render_utils import get_pdf_from_s3
+
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        bucket_name = "test-bucket"
+        app.config["RECORD_BUCKET_NAME"] = bucket_name
+        create_mock_s3_bucket_with_object(bucket_name, file)
+
+        with patch(
+            "app.main.routes.get_pdf_from_s3", wraps=get_pdf_from_s3
+        ) as mock_get_pdf:
+            first_image = client.get(f"/record/{file.FileId}/page/1")
+            first_thumbnail = client.get(
+                f"/record/{file.FileId}/page/1/thumbnail"
+            )
+            assert mock_get_pdf.call_count == 1
+
+            second_image = client.get(f"/record/{file.FileId}/page/1")
+            second_thumbnail = client.get(
+                f"/record/{file.FileId}/page/1/thumbnail"
+            )
+            assert mock_get_pdf.call_count == 1
+            assert second_image.data == first_image.data
+            assert second_thumbnail.data == first_thumbnail.data
+            assert second_image.data != second_thumbnail.data
+
+            s3 = boto3.client("s3", region_name="us-east-1")
+            key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+            pdf_bytes = s3.get_object(Bucket=bucket_name, Key=key)[
+                "Body"
+            ].read()
+            s3.put_object(
+                Bucket=bucket_name, Key=key, Body=pdf_bytes + b"\n%%EOF\n"
+            )
+
+            third_image = client.get(f"/record/{file.FileId}/page/1")
+            assert third_image.status_code == 200
+            assert mock_get_pdf.call_count == 2
+
+    @mock_aws
+    def test_page_image_variants_negotiated_and_cached_separately(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record with a 200pt square page
+        When its page image and thumbnail are requested by a browser that
+            accepts WebP, and with a width
+        Then WebP images are served, varying on Accept
+        And the width is rounded up to the next of PAGE_IMAGE_WIDTHS
+        And each variant is cached separately from the JPEG images
+        """
+        from io import BytesIO
+
+        import boto3
+        from PIL import Image
+
+        from app.main.util.page_image_cache import PageImageKey
+
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        bucket_name = "test-bucket"
+        app.config["RECORD_BUCKET_NAME"] = bucket_name
+        app.config["PAGE_IMAGE_WIDTHS"] = [100, 300]
+        create_mock_s3_bucket_with_object(bucket_name, file)
+        url = f"/record/{file.FileId}/page/1"
+        webp = {"Accept": "image/avif,image/webp,image/*,*/*;q=0.8"}
+
+        jpeg_image = client.get(url, headers={"Accept": "image/*,*/*"})
+        webp_image = client.get(url, headers=webp)
+        webp_thumbnail = client.get(f"{url}/thumbnail", headers=webp)
+        narrow_image = client.get(f"{url}?width=150", headers=webp)
+        wide_image = client.get(f"{url}?width=1000")
+
+        assert jpeg_image.content_type == "image/jpeg"
+        assert webp_image.content_type == "image/webp"
+        assert webp_thumbnail.content_type == "image/webp"
+        assert "Accept" in jpeg_image.vary and "Accept" in webp_image.vary
+        assert Image.open(BytesIO(narrow_image.data)).size == (300, 300)
+        assert wide_image.data == jpeg_image.data
+        assert client.get(f"{url}?width=0").status_code == 400
+
+        page_image_cache = app.extensions["page_image_cache"]
+        key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+        etag = (
+            boto3.client("s3", region_name="us-east-1")
+            .head_object(Bucket=bucket_name, Key=key)["ETag"]
+            .strip('"')
+        )
+        for size, response in [
+            ("full", jpeg_image),
+            ("full.webp", webp_image),
+            ("thumbnail.webp", webp_thumbnail),
+            ("w300.webp", narrow_image),
+        ]:
+            assert (
+                page_image_cache.get(
+                    PageImageKey(bucket_name, key, etag, 1, size)
+                )
+                == response.data
+            )
+
+    @mock_aws
+    def test_large_pdf_rendered_from_temporary_file(
+        self, app, client: FlaskClient, mock_all_access_user, tmp_path
+    ):
+        """
+        Given a PDF record larger than S3_SPOOL_MAX_MEMORY_BYTES
+        When its manifest and a page image are requested
+        Then they are rendered from the PDF streamed to a temporary file
+        And no temporary file is left behind
+        """
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        app.config["RECORD_BUCKET_NAME"] = "test-bucket"
+        app.config["S3_SPOOL_MAX_MEMORY_BYTES"] = 0
+        app.config["S3_SPOOL_DIR"] = str(tmp_path)
+        create_mock_s3_bucket_with_object("test-bucket", file)
+
+        manifest = client.get(f"/record/{file.FileId}/manifest")
+        image = client.get(f"/record/{file.FileId}/page/1")
+
+        assert len(manifest.json["sequences"][0]["canvases"]) == 1
+        assert image.status_code == 200
+        assert image.data[:2] == b"\xff\xd8"
+        assert list(tmp_path.iterdir()) == []
+
+    @mock_aws
+    def test_page_images_revalidated_with_etag(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record whose page image has been served
+        When it is requested again with its ETag
+        Then 304 Not Modified is returned without rendering or reading it
+        And the ETag changes with the requested variant and the PDF version
+        """
+        from unittest.mock import patch
+
+        import boto3
+
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        bucket_name = "test-bucket"
+        app.config["RECORD_BUCKET_NAME"] = bucket_name
+        app.config["PRIVATE_CACHE_MAX_AGE"] = 600
+        create_mock_s3_bucket_with_object(bucket_name, file)
+        url = f"/record/{file.FileId}/page/1"
+
+        image = client.get(url)
+        thumbnail = client.get(f"{url}/thumbnail")
+        webp_image = client.get(url, headers={"Accept": "image/webp"})
+        etag = image.headers["ETag"]
+
+        with patch("app.main.routes.get_page_image_cache") as mock_cache:
+            not_modified = client.get(url, headers={"If-None-Match": etag})
+        mock_cache.return_value.get.assert_not_called()
+
+        assert image.headers["Cache-Control"] == "private, max-age=600"
+        assert "Pragma" not in image.headers
+        assert not_modified.status_code == 304
+        assert not_modified.data == b""
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.headers["Cache-Control"] == "private, max-age=600"
+        assert "Accept" in not_modified.vary
+        assert (
+            len({etag, thumbnail.headers["ETag"], webp_image.headers["ETag"]})
+            == 3
+        )
+
+        key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+        boto3.client("s3", region_name="us-east-1").put_object(
+            Bucket=bucket_name, Key=key, Body=MINIMAL_VALID_PDF_TWO_PAGES
+        )
+        modified = client.get(url, headers={"If-None-Match": etag})
+
+        assert modified.status_code == 200
+        assert modified.headers["ETag"] != etag
+
+    @mock_aws
+    def test_page_image_errors_not_cached(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        app.config["RECORD_BUCKET_NAME"] = "test-bucket"
+        create_mock_s3_bucket_with_object("test-bucket", file)
+
+        response = client.get(f"/record/{file.FileId}/page/99")
+
+        assert response.status_code == 400
+        assert "no-store" in response.headers["Cache-Control"]
+        assert "ETag" not in response.headers
+
+    @mock_aws
+    def test_pdf_manifest_revalidated_with_etag(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        app.config["RECORD_BUCKET_NAME"] = "test-bucket"
+        create_mock_s3_bucket_with_object("test-bucket", file)
+        url = f"/record/{file.FileId}/manifest"
+
+        manifest = client.get(url)
+        not_modified = client.get(
+            url, headers={"If-None-Match": manifest.headers["ETag"]}
+        )
+
+        assert manifest.status_code == 200
+        assert manifest.headers["Cache-Control"].startswith("private")
+        assert not_modified.status_code == 304
+
+    @mock_aws
+    def test_pdf_manifest_declares_negotiated_image_format(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        app.config["RECORD_BUCKET_NAME"] = "test-bucket"
+        create_mock_s3_bucket_with_object("test-bucket", file)
+        url = f"/record/{file.FileId}/manifest"
+
+        jpeg_manifest = client.get(url, headers={"Accept": "*/*"})
+        webp_manifest = client.get(
+            url, headers={"Accept": "image/webp,*/*;q=0.8"}
+        )
+
+        for manifest, image_format in (
+            (jpeg_manifest, "image/jpeg"),
+            (webp_manifest, "image/webp"),
+        ):
+            canvas = manifest.json["sequences"][0]["canvases"][0]
+            assert canvas["thumbnail"]["format"] == image_format
+            assert canvas["images"][0]["resource"]["format"] == image_format
+            assert "Accept" in manifest.vary
+        assert jpeg_manifest.headers["ETag"] != webp_manifest.headers["ETag"]
+
+    @mock_aws
+    def test_manifest_generation_prerenders_pages(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record and page pre-rendering of its first page
+        When its manifest is generated
+        Then the first page image and every thumbnail are rendered into the
+            page image cache in the background
+        And requesting them does not fetch the PDF again
+        """
+        import time
+        from unittest.mock import patch
+
+        import boto3
+
+        from app.main.util.page_image_cache import PageImageKey
+
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        bucket_name = "test-bucket"
+        app.config["RECORD_BUCKET_NAME"] = bucket_name
+        app.config["PAGE_PRERENDER_WORKERS"] = 2
+        app.config["PAGE_PRERENDER_FIRST_PAGES"] = 1
+        create_mock_s3_bucket_with_object(bucket_name, file)
+        key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.put_object(
+            Bucket=bucket_name, Key=key, Body=MINIMAL_VALID_PDF_TWO_PAGES
+        )
+        etag = s3.head_object(Bucket=bucket_name, Key=key)["ETag"].strip('"')
+
+        response = client.get(f"/record/{file.FileId}/manifest")
+        assert response.status_code == 200
+
+        expected_keys = [
+            PageImageKey(bucket_name, key, etag, 1, "full"),
+            PageImageKey(bucket_name, key, etag, 1, "thumbnail"),
+            PageImageKey(bucket_name, key, etag, 2, "thumbnail"),
+        ]
+        page_image_cache = app.extensions["page_image_cache"]
+        for _ in range(50):
+            if all(page_image_cache.get(k) for k in expected_keys):
+                break
+            time.sleep(0.1)
+
+        assert all(page_image_cache.get(k) for k in expected_keys)
+        assert (
+            page_image_cache.get(
+                PageImageKey(bucket_name, key, etag, 2, "full")
+            )
+            is None
+        )
+        with patch("app.main.routes.get_pdf_from_s3") as mock_get_pdf:
+            thumbnail = client.get(f"/record/{file.FileId}/page/1/thumbnail")
+        assert thumbnail.status_code == 200
+        mock_get_pdf.assert_not_called()
+
+    @mock_aws
+    def test_manifest_generated_without_reading_pdf_again(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record whose manifest has been generated
+        When its manifest is generated again
+        Then the PDF is not read from S3 again
+        And when the PDF in S3 is replaced it is read for its new manifest
+        """
+        from unittest.mock import patch
+
+        import boto3
+
+        from app.main.util.render_utils import get_pdf_from_s3
+
+        mock_all_access_user(client)
+
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+
+        bucket_name = "test-bucket"
+        app.config["RECORD_BUCKET_NAME"] = bucket_name
+        create_mock_s3_bucket_with_object(bucket_name, file)
+
+        with patch(
+            "app.main.util.render_utils.get_pdf_from_s3", wraps=get_pdf_from_s3
+        ) as mock_get_pdf:
+            first = client.get(f"/record/{file.FileId}/manifest")
+            second = client.get(f"/record/{file.FileId}/manifest")
+            assert mock_get_pdf.call_count == 1
+            assert second.json == first.json
+
+            key = f"{file.consignment.ConsignmentReference}/{file.FileId}"
+            boto3.client("s3", region_name="us-east-1").put_object(
+                Bucket=bucket_name, Key=key, Body=MINIMAL_VALID_PDF_TWO_PAGES
+            )
+            third = client.get(f"/record/{file.FileId}/manifest")
+            assert mock_get_pdf.call_count == 2
+
+        assert len(third.json["sequences"][0]["canvases"]) == 2
+
+
+class TestIIIFImageRoutes:
+    """Tests for the IIIF Image API routes of PDF pages and images."""
+
+    @staticmethod
+    def _pdf_file(app):
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/18",
+            ffid_metadata__Extension="pdf",
+            FileName="test.pdf",
+        )
+        app.config["RECORD_BUCKET_NAME"] = "test-bucket"
+        create_mock_s3_bucket_with_object("test-bucket", file)
+        return file
+
+    @mock_aws
+    def test_base_uri_redirects_to_info(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        mock_all_access_user(client)
+        file = self._pdf_file(app)
+
+        response = client.get(f"/record/{file.FileId}/page/1/iiif")
+
+        assert response.status_code == 303
+        assert response.location.endswith(
+            f"/record/{file.FileId}/page/1/iiif/info.json"
+        )
+
+    @mock_aws
+    def test_pdf_page_info(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record with a 200pt square page
+        When the IIIF info.json of the page is requested
+        Then its size is that of the page rendered at IIIF_PDF_DPI
+        """
+        mock_all_access_user(client)
+        file = self._pdf_file(app)
+
+        response = client.get(f"/record/{file.FileId}/page/1/iiif/info.json")
+
+        assert response.status_code == 200
+        assert response.json["@id"] == (
+            f"http://localhost/record/{file.FileId}/page/1/iiif"
+        )
+        assert (response.json["width"], response.json["height"]) == (833, 833)
+        assert response.json["tiles"] == [
+            {"width": 512, "scaleFactors": [1, 2]}
+        ]
+        assert response.json["profile"][1]["maxWidth"] == 4096
+        assert response.json["profile"][1]["maxArea"] == 4096 * 4096
+
+    @mock_aws
+    def test_pdf_page_limited_to_maximum_size(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record and a maximum IIIF image width below its page size
+        When the full page is requested at full size and at a larger size
+        Then the full size is scaled down to the maximum width
+        And the larger size is refused
+        """
+        from io import BytesIO
+
+        from PIL import Image
+
+        mock_all_access_user(client)
+        file = self._pdf_file(app)
+        app.config["IIIF_MAX_WIDTH"] = 400
+        url = f"/record/{file.FileId}/page/1/iiif/full"
+
+        full = client.get(f"{url}/full/0/default.jpg")
+        too_large = client.get(f"{url}/500,/0/default.jpg")
+
+        assert full.status_code == 200
+        assert Image.open(BytesIO(full.data)).size == (400, 400)
+        assert too_large.status_code == 400
+
+    @mock_aws
+    def test_pdf_page_tile(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given a PDF record
+        When a region of a page is requested scaled down
+        Then a JPEG of the requested size is returned
+        And requesting it again is served from the page image cache
+        """
+        from io import BytesIO
+        from unittest.mock import patch
+
+        from PIL import Image
+
+        mock_all_access_user(client)
+        file = self._pdf_file(app)
+        url = (
+            f"/record/{file.FileId}/page/1/iiif/0,0,512,512/256,/0/default.jpg"
+        )
+
+        response = client.get(url)
+        with patch("app.main.routes.render_iiif_tile") as mock_render:
+            cached = client.get(url)
+
+        assert response.status_code == 200
+        assert response.content_type == "image/jpeg"
+        assert Image.open(BytesIO(response.data)).size == (256, 256)
+        assert cached.data == response.data
+        mock_render.assert_not_called()
+
+    @mock_aws
+    def test_tile_revalidated_with_etag(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        from unittest.mock import patch
+
+        mock_all_access_user(client)
+        file = self._pdf_file(app)
+        url = f"/record/{file.FileId}/page/1/iiif/full/256,/0/default.jpg"
+
+        tile = client.get(url)
+        with patch("app.main.routes.render_iiif_tile") as mock_render:
+            not_modified = client.get(
+                url, headers={"If-None-Match": tile.headers["ETag"]}
+            )
+        info = client.get(f"/record/{file.FileId}/page/1/iiif/info.json")
+
+        assert tile.headers["Cache-Control"].startswith("private")
+        assert not_modified.status_code == 304
+        mock_render.assert_not_called()
+        assert info.headers["Cache-Control"].startswith("private")
+        assert "ETag" in info.headers
+
+    @mock_aws
+    def test_invalid_tile_requests(
+        self, app, client: FlaskClient, mock_all_access_user
+    ):
+        mock_all_access_user(client)
+        file = self._pdf_file(app)
+        url = f"/record/{file.FileId}/page"
+
+        assert (
+            client.get(
+                f"{url}/1/iiif/900,0,10,10/full/0/default.jpg"
+            ).status_code
+            == 400
+        )
+        assert (
+            client.get(f"{url}/1/iiif/full/1000,/0/default.jpg").status_code
+            == 400
+        )
+        assert (
+            client.get(f"{url}/1/iiif/full/full/45/default.jpg").status_code
+            == 400
+        )
+        assert (
+            client.get(f"{url}/1/iiif/full/full/0/default.png").status_code
+            == 400
+        )
+        assert (
+            client.get(f"{url}/2/iiif/full/full/0/default.jpg").status_code
+            == 404
+        )
+        assert client.get(f"{url}/2/iiif/info.json").status_code == 404
+
+    @mock_aws
+    def test_image_tile(self, app, client: FlaskClient, mock_all_access_user):
+        """
+        Given a PNG image record
+        When its IIIF info.json and a grayscale tile are requested
+        Then the info has the image's own size and the tile is rendered
+        """
+        from io import BytesIO
+
+        from PIL import Image
+
+        from app.tests.test_routes import (
+            create_mock_s3_bucket_with_image_object,
+        )
+
+        mock_all_access_user(client)
+        file = FileFactory(
+            ffid_metadata__PUID="fmt/11",
+            ffid_metadata__Extension="png",
+            FileName="test.png",
+        )
+        app.config["RECORD_BUCKET_NAME"] = "test-bucket"
+        create_mock_s3_bucket_with_image_object("test-bucket", file)
+
+        info = client.get(f"/record/{file.FileId}/page/1/iiif/info.json")
+        tile = client.get(
+            f"/record/{file.FileId}/page/1/iiif/square/300,300/90/gray.jpg"
+        )
+
+        assert (info.json["width"], info.json["height"]) == (800, 600)
+        assert tile.status_code == 200
+        image = Image.open(BytesIO(tile.data))
+        assert (image.size, image.mode) == ((300, 300), "L")
@@ -1,38 +1,23 @@
 import pytest
+import werkzeug
+from flask.testing import FlaskClient
+from sqlalchemy import event
 
+from app.main.db.models import db
+from app.main.db.queries import (
+    BrowseConsignmentCursor,
+    build_browse_consignment_query,
+    build_browse_query,
+)
 from app.main.util.pagination import (
     calculate_total_pages,
     get_pagination,
-    paginate,
+    paginate_keyset_query,
+    paginate_query,
 )
 
 
 class TestPaginationUtilities:
-    @pytest.mark.parametrize(
-        "items, current_page, page_size, expected_result",
-        [
-            ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 2, 3, [4, 5, 6]),
-            ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 4, 3, [10]),
-            ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], -2, 3, []),
-            ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], -2, -3, []),
-            ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 2, -3, []),
-            ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 2, 5, [6, 7, 8, 9, 10]),
-            ([1], 10, 1, []),
-            ([1], 1, 1000, [1]),
-            ([1, 2], 1, 1, [1]),
-            ([1, 2], 1, 2, [1, 2]),
-            ([], 10, 2, []),
-        ],
-    )
-    def test_paginate_scenarios(
-        self, items, current_page, page_size, expected_result
-    ):
-        """
-        Test the calculation of total pages based on total records and records per page in different scenarios.
-        """
-        result = paginate(items, current_page, page_size)
-        assert result == expected_result
-
     @pytest.mark.parametrize(
         "total_records, records_per_page, expected_result",
         [
@@ -80,6 +65,21 @@ class TestPaginationUtilities:
         assert result["previous"] == 99
         assert result["next"] is None
 
+    def test_cursors_added_for_previous_and_next_pages(self):
+        """
+        Test that cursors are only added for the previous and next pages that exist
+        """
+        assert get_pagination(2, 3, "prev-token", "next-token") == {
+            "pages": [1, 2, 3],
+            "previous": 1,
+            "next": 3,
+            "previous_cursor": "prev-token",
+            "next_cursor": "next-token",
+        }
+        result = get_pagination(1, 3, "prev-token", "next-token")
+        assert "previous_cursor" not in result
+        assert result["next_cursor"] == "next-token"
+
     @pytest.mark.parametrize(
         "current_page, total_pages, expected_result",
         [
@@ -217,3 +217,169 @@ class TestPaginationUtilities:
         """
         result = get_pagination(current_page, total_pages)
         assert result == expected_result
+
+
+class TestPaginateQuery:
+    @pytest.mark.parametrize("page, per_page", [(1, 2), (2, 2), (1, 100)])
+    def test_paginate_query_returns_page_and_totals(
+        self, client: FlaskClient, browse_files, page, per_page
+    ):
+        """
+        Given a browse query
+        When paginate_query is called with it and a column to total
+        Then the page of rows, the total number of rows and the column total
+            across all pages are returned
+        """
+        query = build_browse_query()
+        all_rows = query.all()
+
+        query_page = paginate_query(
+            query, page, per_page, sum_column="records_held"
+        )
+
+        start = (page - 1) * per_page
+        assert [tuple(row[:-2]) for row in query_page] == [
+            tuple(row) for row in all_rows[start : start + per_page]
+        ]
+        assert query_page.total == len(all_rows)
+        assert query_page.column_total == sum(
+            row.records_held for row in all_rows
+        )
+        assert query_page.pages == calculate_total_pages(
+            len(all_rows), per_page
+        )
+
+    def test_paginate_query_uses_a_single_query(
+        self, client: FlaskClient, browse_files
+    ):
+        """
+        Given a browse query
+        When paginate_query is called with it and a column to total
+        Then exactly one statement is sent to the database
+        """
+        db.session.flush()
+        query = build_browse_query()
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record_statement)
+        try:
+            paginate_query(query, 1, 2, sum_column="records_held")
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record_statement)
+
+        assert len(statements) == 1
+
+    def test_paginate_query_without_results(self, client: FlaskClient):
+        """
+        Given a browse query without results
+        When paginate_query is called with it for the first page
+        Then an empty page with zero totals is returned
+        """
+        query_page = paginate_query(
+            build_browse_query(), 1, 5, sum_column="records_held"
+        )
+
+        assert list(query_page) == []
+        assert query_page.total == 0
+        assert query_page.column_total == 0
+        assert query_page.pages == 0
+
+    def test_paginate_query_page_out_of_range(
+        self, client: FlaskClient, browse_files
+    ):
+        """
+        Given a browse query
+        When paginate_query is called with it for a page after the last one
+        Then werkzeug.exceptions.NotFound is raised
+        """
+        with pytest.raises(werkzeug.exceptions.NotFound):
+            paginate_query(build_browse_query(), 1000, 5)
+
+
+class TestPaginateKeysetQuery:
+    def test_paginate_keyset_query_with_offset_and_cursors(
+        self, client: FlaskClient, browse_consignment_files
+    ):
+        """
+        Given a keyset browse consignment query
+        When paginate_keyset_query is called with it for a page by offset, and
+            with the query restricted to the rows after and before a cursor
+        Then the same pages of rows are returned in order with the total number
+            of rows
+        """
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+        all_rows = build_browse_consignment_query(
+            consignment_id, keyset=True
+        ).all()
+
+        second_page = paginate_keyset_query(
+            build_browse_consignment_query(consignment_id, keyset=True), 2, 2
+        )
+        assert list(second_page) == all_rows[2:4]
+        assert second_page.total == 5
+        assert second_page.pages == 3
+
+        next_page = paginate_keyset_query(
+            build_browse_consignment_query(
+                consignment_id,
+                keyset=True,
+                cursor=BrowseConsignmentCursor.from_row(
+                    "file_name-asc", all_rows[1]
+                ),
+            ),
+            2,
+            2,
+            from_cursor=True,
+        )
+        previous_page = paginate_keyset_query(
+            build_browse_consignment_query(
+                consignment_id,
+                keyset=True,
+                cursor=BrowseConsignmentCursor.from_row(
+                    "file_name-asc", all_rows[4], before=True
+                ),
+            ),
+            2,
+            2,
+            from_cursor=True,
+            reverse=True,
+        )
+        assert list(next_page) == list(previous_page) == all_rows[2:4]
+        assert next_page.total == previous_page.total == 5
+
+        counted_page = paginate_keyset_query(
+            build_browse_consignment_query(
+                consignment_id,
+                keyset=True,
+                cursor=BrowseConsignmentCursor.from_row(
+                    "file_name-asc", all_rows[1], total=5
+                ),
+            ),
+            2,
+            2,
+            from_cursor=True,
+            total=5,
+        )
+        assert [row.file_id for row in counted_page] == [
+            row.file_id for row in all_rows[2:4]
+        ]
+        assert counted_page.total == 5
+
+    def test_paginate_keyset_query_page_out_of_range(
+        self, client: FlaskClient, browse_consignment_files
+    ):
+        """
+        Given a keyset browse consignment query
+        When paginate_keyset_query is called with it for a page after the last one
+        Then werkzeug.exceptions.NotFound is raised
+        """
+        consignment_id = browse_consignment_files[0].consignment.ConsignmentId
+        with pytest.raises(werkzeug.exceptions.NotFound):
+            paginate_keyset_query(
+                build_browse_consignment_query(consignment_id, keyset=True),
+                1000,
+                5,
+            )
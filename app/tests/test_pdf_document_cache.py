@@ -0,0 +1,295 @@
+import threading
+import time
+
+import pytest
+
+from app.main.util.pdf_document_cache import (
+    PYMUPDF_LOCK,
+    PDFDocumentCache,
+    PDFDocumentCacheFullError,
+    PDFDocumentKey,
+    get_pdf_document_cache,
+)
+from app.tests.test_render_utils import MINIMAL_VALID_PDF_TWO_PAGES
+
+PDF_SIZE = len(MINIMAL_VALID_PDF_TWO_PAGES)
+
+
+def _key(key="TDR-2024/file-id", etag="etag-1"):
+    return PDFDocumentKey("bucket", key, etag)
+
+
+class _Loader:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.call_count = 0
+
+    def __call__(self):
+        self.call_count += 1
+        time.sleep(self.delay)
+        return MINIMAL_VALID_PDF_TWO_PAGES
+
+
+def test_document_loaded_once_and_then_served_from_cache():
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE * 2)
+    load_pdf_bytes = _Loader()
+
+    with cache.document(_key(), load_pdf_bytes) as first_document:
+        assert first_document.page_count == 2
+    with cache.document(_key(), load_pdf_bytes) as second_document:
+        assert second_document is first_document
+
+    assert load_pdf_bytes.call_count == 1
+    assert not first_document.is_closed
+    assert cache.stats == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "documents": 1,
+        "bytes": PDF_SIZE,
+        "open_bytes": PDF_SIZE,
+    }
+
+
+def test_new_etag_is_a_different_document():
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE * 2)
+    load_pdf_bytes = _Loader()
+
+    with cache.document(_key(etag="etag-1"), load_pdf_bytes):
+        pass
+    with cache.document(_key(etag="etag-2"), load_pdf_bytes):
+        pass
+
+    assert load_pdf_bytes.call_count == 2
+
+
+def test_concurrent_requests_share_a_single_load():
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE * 2)
+    load_pdf_bytes = _Loader(delay=0.2)
+    page_counts = []
+
+    def render():
+        with cache.document(_key(), load_pdf_bytes) as pdf_document:
+            page_counts.append(pdf_document.page_count)
+
+    threads = [threading.Thread(target=render) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert page_counts == [2] * 5
+    assert load_pdf_bytes.call_count == 1
+    assert cache.misses == 1
+    assert cache.hits == 4
+
+
+def test_documents_are_used_one_thread_at_a_time():
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE * 2)
+    other_thread_acquired = []
+
+    def try_acquire():
+        acquired = PYMUPDF_LOCK.acquire(blocking=False)
+        if acquired:
+            PYMUPDF_LOCK.release()
+        other_thread_acquired.append(acquired)
+
+    with cache.document(_key("first"), _Loader()):
+        thread = threading.Thread(target=try_acquire)
+        thread.start()
+        thread.join()
+    thread = threading.Thread(target=try_acquire)
+    thread.start()
+    thread.join()
+
+    assert other_thread_acquired == [False, True]
+
+
+def test_failed_load_is_raised_and_not_cached():
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE * 2)
+
+    def fail():
+        raise RuntimeError("S3 unavailable")
+
+    with pytest.raises(RuntimeError, match="S3 unavailable"):
+        with cache.document(_key(), fail):
+            pass
+
+    with cache.document(_key(), _Loader()) as pdf_document:
+        assert pdf_document.page_count == 2
+    assert cache.misses == 2
+
+
+def test_least_recently_used_document_evicted_and_closed_beyond_count():
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE * 10)
+    load_pdf_bytes = _Loader()
+
+    with cache.document(_key("a"), load_pdf_bytes) as document_a:
+        pass
+    with cache.document(_key("b"), load_pdf_bytes) as document_b:
+        pass
+    with cache.document(_key("a"), load_pdf_bytes):
+        pass
+    with cache.document(_key("c"), load_pdf_bytes):
+        pass
+
+    assert document_b.is_closed
+    assert not document_a.is_closed
+    assert cache.evictions == 1
+    assert cache.stats["documents"] == 2
+
+
+def test_documents_evicted_beyond_byte_budget():
+    cache = PDFDocumentCache(max_documents=10, max_bytes=PDF_SIZE * 2)
+    load_pdf_bytes = _Loader()
+
+    for key in ["a", "b", "c"]:
+        with cache.document(_key(key), load_pdf_bytes):
+            pass
+
+    assert cache.evictions == 1
+    assert cache.stats["bytes"] == PDF_SIZE * 2
+
+
+def test_document_evicted_while_in_use_closed_once_released():
+    cache = PDFDocumentCache(max_documents=1, max_bytes=PDF_SIZE * 10)
+    load_pdf_bytes = _Loader()
+
+    with cache.document(_key("a"), load_pdf_bytes) as document_a:
+        with cache.document(_key("b"), load_pdf_bytes):
+            assert cache.evictions == 1
+        assert not document_a.is_closed
+        assert document_a.page_count == 2
+
+    assert document_a.is_closed
+
+
+def test_document_larger_than_budget_not_cached():
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE - 1)
+    load_pdf_bytes = _Loader()
+
+    with cache.document(_key(), load_pdf_bytes) as pdf_document:
+        assert pdf_document.page_count == 2
+
+    assert pdf_document.is_closed
+    assert cache.stats["documents"] == 0
+    with cache.document(_key(), load_pdf_bytes):
+        pass
+    assert load_pdf_bytes.call_count == 2
+
+
+def test_document_opened_from_temporary_file_counted_at_its_size(tmp_path):
+    """
+    Given a PDF streamed to a temporary file
+    When it is opened through the cache
+    Then the file is removed once open
+    And the document is counted at the size of the file it holds on disk
+    """
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE)
+    pdf_path = tmp_path / "s3-object"
+    pdf_path.write_bytes(MINIMAL_VALID_PDF_TWO_PAGES)
+
+    with cache.document(_key(), lambda: str(pdf_path)) as pdf_document:
+        assert not pdf_path.exists()
+        assert pdf_document.load_page(1).rect.width == 200
+
+    assert not pdf_document.is_closed
+    assert cache.stats["documents"] == 1
+    assert cache.stats["bytes"] == PDF_SIZE
+
+
+def test_temporary_file_larger_than_budget_not_cached(tmp_path):
+    cache = PDFDocumentCache(max_documents=2, max_bytes=PDF_SIZE - 1)
+    pdf_path = tmp_path / "s3-object"
+    pdf_path.write_bytes(MINIMAL_VALID_PDF_TWO_PAGES)
+
+    with cache.document(_key(), lambda: str(pdf_path)) as pdf_document:
+        pass
+
+    assert pdf_document.is_closed
+    assert cache.stats["documents"] == 0
+    assert cache.stats["open_bytes"] == 0
+
+
+def test_idle_documents_evicted_to_stay_within_open_bytes():
+    cache = PDFDocumentCache(
+        max_documents=10, max_bytes=PDF_SIZE * 10, max_open_bytes=PDF_SIZE * 2
+    )
+    load_pdf_bytes = _Loader()
+
+    with cache.document(_key("a"), load_pdf_bytes) as document_a:
+        pass
+    with cache.document(_key("b"), load_pdf_bytes):
+        pass
+    with cache.document(_key("c"), load_pdf_bytes):
+        pass
+
+    assert document_a.is_closed
+    assert cache.evictions == 1
+    assert cache.stats["open_bytes"] == PDF_SIZE * 2
+
+
+def test_document_waits_for_documents_in_use_to_be_closed():
+    """
+    Given a document in use by another thread, too large to be cached, that
+    leaves no room under max_open_bytes
+    When another document is requested
+    Then it is opened once the first is closed
+    """
+    cache = PDFDocumentCache(
+        max_documents=10,
+        max_bytes=PDF_SIZE - 1,
+        max_open_bytes=PDF_SIZE,
+        wait_timeout=5,
+    )
+    load_pdf_bytes = _Loader()
+    in_use = threading.Event()
+    documents = []
+
+    def use_document_a():
+        with cache.document(_key("a"), load_pdf_bytes) as document_a:
+            documents.append(document_a)
+            in_use.set()
+            time.sleep(0.2)
+
+    thread = threading.Thread(target=use_document_a)
+    thread.start()
+    in_use.wait()
+    with cache.document(_key("b"), load_pdf_bytes) as document_b:
+        assert documents[0].is_closed
+        assert document_b.page_count == 2
+    thread.join()
+
+    assert cache.stats["open_bytes"] == 0
+
+
+def test_document_raises_if_no_room_within_wait_timeout():
+    cache = PDFDocumentCache(
+        max_documents=10,
+        max_bytes=PDF_SIZE * 10,
+        max_open_bytes=PDF_SIZE,
+        wait_timeout=0.1,
+    )
+    load_pdf_bytes = _Loader()
+
+    with cache.document(_key("a"), load_pdf_bytes):
+        with pytest.raises(PDFDocumentCacheFullError):
+            with cache.document(_key("b"), load_pdf_bytes):
+                pass
+
+    assert cache.stats["open_bytes"] == PDF_SIZE
+    assert cache.stats["documents"] == 1
+
+
+def test_get_pdf_document_cache_from_config(app):
+    app.config["PDF_DOCUMENT_CACHE_MAX_DOCUMENTS"] = 3
+    app.config["PDF_DOCUMENT_CACHE_MAX_BYTES"] = 1024
+    app.config["PDF_DOCUMENT_MAX_OPEN_BYTES"] = 4096
+
+    with app.app_context():
+        cache = get_pdf_document_cache()
+        assert get_pdf_document_cache() is cache
+
+    assert cache.max_documents == 3
+    assert cache.max_bytes == 1024
+    assert cache.max_open_bytes == 4096
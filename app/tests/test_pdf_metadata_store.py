@@ -0,0 +1,98 @@
+from unittest.mock import MagicMock
+
+import boto3
+import pymupdf
+from moto import mock_aws
+
+from app.main.util.pdf_document_cache import PDFDocumentKey
+from app.main.util.pdf_metadata_store import (
+    PDFMetadata,
+    PDFMetadataStore,
+    get_pdf_metadata,
+    get_pdf_metadata_store,
+)
+from app.tests.test_render_utils import MINIMAL_VALID_PDF_TWO_PAGES
+
+
+def _key(key="TDR-2024/file-id", etag="etag-1"):
+    return PDFDocumentKey("record-bucket", key, etag)
+
+
+def test_pdf_metadata_from_document_and_json():
+    with pymupdf.open("pdf", MINIMAL_VALID_PDF_TWO_PAGES) as pdf_document:
+        metadata = PDFMetadata.from_document(pdf_document)
+
+    assert metadata.page_count == 2
+    assert metadata.page_sizes == [(200.0, 200.0), (200.0, 200.0)]
+    assert PDFMetadata.from_json(metadata.to_json()) == metadata
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = PDFMetadataStore(max_entries=2)
+    store.set(_key("a"), PDFMetadata([(1, 1)]))
+    store.set(_key("b"), PDFMetadata([(2, 2)]))
+    assert store.get(_key("a")) == PDFMetadata([(1, 1)])
+
+    store.set(_key("c"), PDFMetadata([(3, 3)]))
+
+    assert store.get(_key("a")) == PDFMetadata([(1, 1)])
+    assert store.get(_key("b")) is None
+    assert store.get(_key("c")) == PDFMetadata([(3, 3)])
+
+
+@mock_aws
+def test_s3_store_persists_metadata_for_other_workers(app):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="metadata-bucket")
+    metadata = PDFMetadata([(595.0, 842.0)])
+
+    with app.app_context():
+        PDFMetadataStore(1, "metadata-bucket", "pdf-metadata/").set(
+            _key(), metadata
+        )
+        other_store = PDFMetadataStore(1, "metadata-bucket", "pdf-metadata/")
+        assert other_store.get(_key()) == metadata
+        assert other_store.get(_key(etag="etag-2")) is None
+
+    assert (
+        s3.list_objects_v2(Bucket="metadata-bucket")["Contents"][0]["Key"]
+        == "pdf-metadata/record-bucket/TDR-2024/file-id/etag-1.json"
+    )
+
+
+@mock_aws
+def test_s3_store_errors_are_misses(app):
+    store = PDFMetadataStore(0, "missing-bucket", "pdf-metadata/")
+
+    with app.app_context():
+        app.app_logger = MagicMock()
+        store.set(_key(), PDFMetadata([(1, 1)]))
+        assert store.get(_key()) is None
+
+    assert app.app_logger.warning.call_count == 2
+
+
+def test_get_pdf_metadata_reads_pdf_once(app):
+    load_pdf_bytes = MagicMock(return_value=MINIMAL_VALID_PDF_TWO_PAGES)
+
+    with app.app_context():
+        first = get_pdf_metadata(_key(), load_pdf_bytes)
+        second = get_pdf_metadata(_key(), load_pdf_bytes)
+        assert get_pdf_metadata_store().get(_key()) == first
+
+    assert first == second
+    assert first.page_count == 2
+    load_pdf_bytes.assert_called_once()
+
+
+def test_get_pdf_metadata_store_from_config(app):
+    app.config["PDF_METADATA_CACHE_MAX_ENTRIES"] = 10
+    app.config["PDF_METADATA_S3_BUCKET"] = "metadata-bucket"
+
+    with app.app_context():
+        store = get_pdf_metadata_store()
+        assert get_pdf_metadata_store() is store
+
+    assert store.max_entries == 10
+    assert store.s3_bucket == "metadata-bucket"
+    assert store.s3_prefix == "pdf-metadata/"
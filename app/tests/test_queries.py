@@ -4,10 +4,15 @@ from datetime import datetime
 import pytest
 import werkzeug
 from flask.testing import FlaskClient
+from sqlalchemy import event
 
+from app.main.db.models import db
 from app.main.db.queries import (
+    FileRecord,
     get_file_metadata,
+    get_file_record,
 )
+from app.tests.factories import FileFactory
 
 per_page = 5
 db_date_format = "%Y-%m-%d"
@@ -218,3 +223,97 @@ class TestGetFileMetadata:
         result = get_file_metadata(file_id=file.FileId)
         # Should use end_date (15/06/2023) over date_last_modified (10/01/2023)
         assert result["date_of_record"] == "15/06/2023"
+
+    @pytest.mark.parametrize("record_index", [1, 3])
+    def test_get_file_metadata_from_file_metadata_flat(
+        self,
+        client: FlaskClient,
+        record_files,
+        use_file_metadata_flat,
+        record_index,
+    ):
+        """
+        Given a file, with or without associated metadata,
+        When get_file_metadata is called with its UUID with
+            USE_FILE_METADATA_FLAT enabled,
+        Then the same dict is returned as when FileMetadata is pivoted
+        """
+        file = record_files[record_index]["file_object"]
+        expected_file_metadata = get_file_metadata(file_id=file.FileId)
+
+        use_file_metadata_flat()
+
+        assert get_file_metadata(file_id=file.FileId) == expected_file_metadata
+
+
+class TestGetFileRecord:
+    def test_get_file_record_return_no_results(self, client: FlaskClient):
+        """
+        Given a UUID not corresponding to the id of a file in the database
+        When get_file_record is called with it
+        Then None is returned
+        """
+        assert get_file_record(uuid.uuid4()) is None
+
+    def test_get_file_record_return_results(self, client: FlaskClient):
+        """
+        Given a file with a consignment, series, body and FFID metadata
+        When get_file_record is called with its UUID
+        Then a FileRecord holding the values of all of them is returned
+        """
+        file = FileFactory()
+        consignment = file.consignment
+        series = consignment.series
+        body = series.body
+
+        assert get_file_record(file.FileId) == FileRecord(
+            FileId=file.FileId,
+            FileName=file.FileName,
+            CiteableReference=file.CiteableReference,
+            ConsignmentId=consignment.ConsignmentId,
+            ConsignmentReference=consignment.ConsignmentReference,
+            SeriesId=series.SeriesId,
+            SeriesName=series.Name,
+            BodyId=body.BodyId,
+            BodyName=body.Name,
+            PUID=file.ffid_metadata.PUID,
+            Extension=file.ffid_metadata.Extension,
+        )
+
+    def test_get_file_record_without_ffid_metadata(self, client: FlaskClient):
+        """
+        Given a file without FFID metadata
+        When get_file_record is called with its UUID
+        Then a FileRecord is returned with PUID and Extension set to None
+        """
+        file = FileFactory(ffid_metadata=None)
+
+        file_record = get_file_record(file.FileId)
+
+        assert file_record.FileId == file.FileId
+        assert file_record.PUID is None
+        assert file_record.Extension is None
+
+    def test_get_file_record_uses_a_single_query(self, client: FlaskClient):
+        """
+        Given a file with a consignment, series, body and FFID metadata
+        When get_file_record is called with its UUID
+        Then exactly one statement is sent to the database
+        """
+        file = FileFactory()
+        body_name = file.consignment.series.body.Name
+        db.session.flush()
+        db.session.expunge_all()
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record_statement)
+        try:
+            file_record = get_file_record(file.FileId)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record_statement)
+
+        assert file_record.BodyName == body_name
+        assert len(statements) == 1
@@ -1,8 +1,17 @@
+import io
 from unittest.mock import Mock, patch
 
+import boto3
+import pymupdf
+import pytest
 from flask import Flask
+from moto import mock_aws
+from PIL import Image
 
+from app.main.util.pdf_document_cache import PDFDocumentKey
+from app.main.util.pdf_metadata_store import get_pdf_metadata_store
 from app.main.util.render_utils import (
+    ImageInfo,
     create_presigned_url,
     extract_pdf_pages_as_images,
     extract_single_page_as_image,
@@ -11,12 +20,15 @@ from app.main.util.render_utils import (
     get_download_filename,
     get_file_extension,
     get_file_puid,
+    get_s3_image_info,
+    get_s3_pdf_metadata,
+    read_image_info,
 )
 
 
 def test_get_file_extension_with_ffid_extension():
     mock_file = Mock()
-    mock_file.ffid_metadata.Extension = "PDF"
+    mock_file.Extension = "PDF"
     mock_file.FileName = "ignored.txt"
 
     ext = get_file_extension(mock_file)
@@ -25,28 +37,32 @@ def test_get_file_extension_with_ffid_extension():
 
 def test_get_file_puid_with_ffid_puid():
     mock_file = Mock()
-    mock_file.ffid_metadata.PUID = "fmt/40"
+    mock_file.PUID = "fmt/40"
     puid = get_file_puid(mock_file)
     assert puid == "fmt/40"
 
 
 def test_get_file_extension_with_ffid_extension_none_uses_filename():
     mock_file = Mock()
-    mock_file.ffid_metadata.Extension = None
+    mock_file.Extension = None
     mock_file.FileName = "example.DOC"
 
     ext = get_file_extension(mock_file)
     assert ext == "doc"
 
 
+def test_get_file_puid_without_ffid_puid():
+    mock_file = Mock()
+    mock_file.PUID = None
+    assert get_file_puid(mock_file) is None
+
+
 def test_generate_breadcrumb_values():
     mock_file = Mock()
-    mock_file.consignment.consignment_id = "consignment_id"
-    mock_file.consignment.series.series_id = "series_id"
-    mock_file.consignment.series.body.BodyId = "body_id"
-    mock_file.consignment.series.Name = "Series Name"
-    mock_file.consignment.ConsignmentId = "consignment_id"
-    mock_file.consignment.ConsignmentReference = "consignment_reference"
+    mock_file.BodyId = "body_id"
+    mock_file.SeriesName = "Series Name"
+    mock_file.ConsignmentId = "consignment_id"
+    mock_file.ConsignmentReference = "consignment_reference"
     mock_file.FileName = "file_name.pdf"
 
     result = generate_breadcrumb_values(mock_file)
@@ -77,7 +93,7 @@ def test_create_presigned_url(mock_boto_client):
     mock_file = Mock()
     mock_file.FileName = "test.pdf"
     mock_file.FileId = "file_id"
-    mock_file.consignment.ConsignmentReference = "consignment_reference"
+    mock_file.ConsignmentReference = "consignment_reference"
 
     mock_s3_client = mock_boto_client.return_value
     mock_s3_client.generate_presigned_url.return_value = "http://presigned.url"
@@ -173,6 +189,39 @@ def test_extract_single_page_as_image_invalid_page_too_high():
         assert "2 pages" in str(e)
 
 
+def test_extract_single_page_as_image_variants():
+    """
+    Test that full size pages are progressive JPEGs, that WebP can be
+    requested, and that a width limits the size the page is rendered at.
+    """
+    import io
+
+    from PIL import Image
+
+    full_jpeg = Image.open(
+        io.BytesIO(extract_single_page_as_image(MINIMAL_VALID_PDF_TWO_PAGES, 1))
+    )
+    narrow_webp = Image.open(
+        io.BytesIO(
+            extract_single_page_as_image(
+                MINIMAL_VALID_PDF_TWO_PAGES, 1, width=100, image_format="webp"
+            )
+        )
+    )
+    wide = Image.open(
+        io.BytesIO(
+            extract_single_page_as_image(
+                MINIMAL_VALID_PDF_TWO_PAGES, 1, width=5000
+            )
+        )
+    )
+
+    assert (full_jpeg.format, full_jpeg.size) == ("JPEG", (417, 417))
+    assert full_jpeg.info.get("progressive")
+    assert (narrow_webp.format, narrow_webp.size) == ("WEBP", (100, 100))
+    assert wide.size == (417, 417)
+
+
 # Tests for extract_single_page_as_thumbnail
 def test_extract_single_page_as_thumbnail_success():
     """Test extracting a valid page as a thumbnail."""
@@ -187,6 +236,10 @@ def test_extract_single_page_as_thumbnail_success():
     # Thumbnail should be smaller than full image
     full_image = extract_single_page_as_image(MINIMAL_VALID_PDF_TWO_PAGES, 1)
     assert len(thumbnail_bytes) < len(full_image)
+    webp_thumbnail_bytes = extract_single_page_as_thumbnail(
+        MINIMAL_VALID_PDF_TWO_PAGES, 1, image_format="webp"
+    )
+    assert webp_thumbnail_bytes[8:12] == b"WEBP"
 
 
 def test_extract_single_page_as_thumbnail_invalid_page():
@@ -196,3 +249,196 @@ def test_extract_single_page_as_thumbnail_invalid_page():
         assert False, "Expected ValueError"
     except ValueError as e:
         assert "Invalid page number" in str(e)
+
+
+def test_extract_single_page_as_image_from_open_document():
+    """Test that an open pymupdf document renders the same as its bytes."""
+    import pymupdf
+
+    with pymupdf.open("pdf", MINIMAL_VALID_PDF_TWO_PAGES) as pdf_document:
+        image_bytes = extract_single_page_as_image(pdf_document, 2)
+        assert not pdf_document.is_closed
+
+    assert image_bytes == extract_single_page_as_image(
+        MINIMAL_VALID_PDF_TWO_PAGES, 2
+    )
+
+
+def _image_bytes(image_format):
+    import io
+
+    from PIL import Image
+
+    image_bytes = io.BytesIO()
+    Image.new("RGB", (800, 600)).save(image_bytes, format=image_format)
+    return image_bytes.getvalue()
+
+
+@pytest.mark.parametrize("image_format", ["GIF", "JPEG", "PNG", "TIFF", "WEBP"])
+def test_read_image_info_from_leading_bytes(image_format):
+    assert read_image_info(_image_bytes(image_format)[:4096]) == ImageInfo(
+        800, 600, image_format
+    )
+
+
+def test_read_image_info_inconclusive_header():
+    assert read_image_info(_image_bytes("JPEG")[:16]) is None
+
+
+@mock_aws
+def test_get_s3_image_info_reads_header_once_per_version(app):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="test-bucket")
+    s3.put_object(Bucket="test-bucket", Key="image", Body=_image_bytes("PNG"))
+    app.config["IMAGE_HEADER_PROBE_BYTES"] = 1024
+
+    s3_spy = Mock(wraps=s3)
+
+    with app.app_context(), patch(
+        "app.main.util.render_utils.get_pdf_from_s3"
+    ) as mock_get_pdf, patch(
+        "app.main.util.render_utils.boto3.client", return_value=s3_spy
+    ):
+        assert get_s3_image_info("test-bucket", "image") == ImageInfo(
+            800, 600, "PNG"
+        )
+        assert get_s3_image_info("test-bucket", "image") == ImageInfo(
+            800, 600, "PNG"
+        )
+
+        s3.put_object(
+            Bucket="test-bucket", Key="image", Body=_image_bytes("JPEG")
+        )
+        assert get_s3_image_info("test-bucket", "image") == ImageInfo(
+            800, 600, "JPEG"
+        )
+
+    mock_get_pdf.assert_not_called()
+    assert s3_spy.get_object.call_count == 2
+    assert all(
+        call.kwargs["Range"] == "bytes=0-1023"
+        for call in s3_spy.get_object.call_args_list
+    )
+
+
+@mock_aws
+def test_get_s3_image_info_looks_up_etag_again_if_object_replaced(app):
+    """
+    Given an image replaced in S3 between its ETag being looked up and its
+    header being read
+    When get_s3_image_info is called
+    Then the ETag is looked up again and the new image's header is read
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="test-bucket")
+    s3.put_object(Bucket="test-bucket", Key="image", Body=_image_bytes("PNG"))
+    stale_etag = s3.head_object(Bucket="test-bucket", Key="image")["ETag"]
+    s3.put_object(Bucket="test-bucket", Key="image", Body=_image_bytes("JPEG"))
+    etag = s3.head_object(Bucket="test-bucket", Key="image")["ETag"]
+
+    with app.app_context(), patch(
+        "app.main.util.render_utils.get_s3_object_etag",
+        side_effect=[stale_etag.strip('"'), etag.strip('"')],
+    ):
+        assert get_s3_image_info("test-bucket", "image") == ImageInfo(
+            800, 600, "JPEG"
+        )
+
+
+@mock_aws
+def test_get_s3_pdf_metadata_looks_up_etag_again_if_object_replaced(app):
+    """
+    Given a PDF replaced in S3 between its ETag being looked up and the PDF
+    being read
+    When get_s3_pdf_metadata is called
+    Then the ETag is looked up again, the new PDF's metadata is returned and
+    nothing is stored under the old ETag
+    """
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="test-bucket")
+    with pymupdf.open() as pdf_document:
+        pdf_document.new_page()
+        one_page_pdf = pdf_document.tobytes()
+    s3.put_object(Bucket="test-bucket", Key="pdf", Body=one_page_pdf)
+    stale_etag = s3.head_object(Bucket="test-bucket", Key="pdf")["ETag"]
+    s3.put_object(
+        Bucket="test-bucket", Key="pdf", Body=MINIMAL_VALID_PDF_TWO_PAGES
+    )
+    etag = s3.head_object(Bucket="test-bucket", Key="pdf")["ETag"]
+
+    with app.app_context(), patch(
+        "app.main.util.render_utils.get_s3_object_etag",
+        side_effect=[stale_etag.strip('"'), etag.strip('"')],
+    ):
+        assert get_s3_pdf_metadata("test-bucket", "pdf").page_count == 2
+        assert (
+            get_pdf_metadata_store().get(
+                PDFDocumentKey("test-bucket", "pdf", stale_etag.strip('"'))
+            )
+            is None
+        )
+
+
+@mock_aws
+def test_get_s3_image_info_reads_whole_image_if_header_inconclusive(app):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="test-bucket")
+    s3.put_object(Bucket="test-bucket", Key="image", Body=_image_bytes("JPEG"))
+    app.config["IMAGE_HEADER_PROBE_BYTES"] = 16
+
+    with app.app_context():
+        assert get_s3_image_info("test-bucket", "image") == ImageInfo(
+            800, 600, "JPEG"
+        )
+
+
+def _extract_page_via_png_and_pil(pdf_bytes, page_number, thumbnail=False):
+    """
+    The page rendering path extract_single_page_as_image replaced, encoding
+    the same JPEG.
+    """
+    with pymupdf.open("pdf", io.BytesIO(pdf_bytes)) as pdf_document:
+        page = pdf_document.load_page(page_number - 1)
+        pix = page.get_pixmap(matrix=pymupdf.Matrix(150 / 72, 150 / 72))
+        page_image = Image.open(io.BytesIO(pix.tobytes("png")))
+        if thumbnail:
+            page_image.thumbnail((150, 200), Image.Resampling.LANCZOS)
+        output_buffer = io.BytesIO()
+        page_image.save(
+            output_buffer,
+            format="JPEG",
+            quality=70 if thumbnail else 75,
+            progressive=not thumbnail,
+        )
+        return output_buffer.getvalue()
+
+
+@pytest.mark.parametrize("thumbnail", [False, True])
+def test_extract_single_page_as_image_matches_png_path(thumbnail):
+    """
+    Test that rendering a page straight to JPEG gives an image of the same
+    size, to the pixel, and kind as the PNG and PIL round trip it replaced.
+    """
+    with pymupdf.open() as pdf_document:
+        page = pdf_document.new_page(width=595, height=842)
+        page.insert_text((40, 40), "Line of the record")
+        pdf_bytes = pdf_document.tobytes()
+
+    image = Image.open(
+        io.BytesIO(
+            extract_single_page_as_image(pdf_bytes, 1, thumbnail=thumbnail)
+        )
+    )
+    png_path_image = Image.open(
+        io.BytesIO(
+            _extract_page_via_png_and_pil(pdf_bytes, 1, thumbnail=thumbnail)
+        )
+    )
+
+    assert image.format == png_path_image.format == "JPEG"
+    # Rendering at the thumbnail's resolution may round a side differently
+    assert all(
+        abs(side - png_path_side) <= 1
+        for side, png_path_side in zip(image.size, png_path_image.size)
+    )
+    assert bool(image.info.get("progressive")) == (not thumbnail)
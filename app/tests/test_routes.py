@@ -160,7 +160,10 @@ class TestRoutes:
 
         # Mock S3 get_object to return valid PDF bytes
         s3_mock = mock_boto_client.return_value
-        s3_mock.get_object.return_value = {"Body": BytesIO(MINIMAL_VALID_PDF)}
+        s3_mock.get_object.return_value = {
+            "Body": BytesIO(MINIMAL_VALID_PDF),
+            "ContentLength": len(MINIMAL_VALID_PDF),
+        }
 
         mock_all_access_user(client)
         file = FileFactory(ffid_metadata__PUID="fmt/276", FileName="test.pdf")
@@ -202,6 +205,11 @@ class TestRoutes:
                                         "format": "image/jpeg",
                                         "height": 416,
                                         "width": 416,
+                                        "service": {
+                                            "@context": "http://iiif.io/api/image/2/context.json",
+                                            "@id": f"http://localhost/record/{file.FileId}/page/1/iiif",
+                                            "profile": "http://iiif.io/api/image/2/level1.json",
+                                        },
                                     },
                                 },
                             ],
@@ -301,9 +309,52 @@ class TestRoutes:
                     }
                 ],
             }
+            if ext != "webp":
+                expected_image_manifest["sequences"][0]["canvases"][0][
+                    "images"
+                ][0]["resource"]["service"] = {
+                    "@context": "http://iiif.io/api/image/2/context.json",
+                    "@id": f"http://localhost/record/{file.FileId}/page/1/iiif",
+                    "profile": "http://iiif.io/api/image/2/level1.json",
+                }
             actual_manifest = json.loads(response.text)
             assert actual_manifest == expected_image_manifest
 
+    @mock_aws
+    @patch("app.main.routes.create_presigned_url")
+    @pytest.mark.parametrize("put_object", [True, False])
+    def test_route_generate_image_manifest_for_empty_or_missing_image(
+        self,
+        mock_create_presigned_url,
+        put_object,
+        app,
+        client: FlaskClient,
+        mock_all_access_user,
+    ):
+        """
+        Given an image record whose object in S3 is empty or missing
+        When its manifest is requested
+        Then the response is a 404 rather than a server error
+        """
+        mock_all_access_user(client)
+        file = FileFactory(ffid_metadata__PUID="fmt/11", FileName="test.png")
+        app.config["RECORD_BUCKET_NAME"] = "test-bucket"
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-bucket")
+        if put_object:
+            s3.put_object(
+                Bucket="test-bucket",
+                Key=f"{file.consignment.ConsignmentReference}/{file.FileId}",
+                Body=b"",
+            )
+        mock_create_presigned_url.return_value = (
+            "https://presigned-url.com/download.png"
+        )
+
+        response = client.get(f"{self.record_route_url}/{file.FileId}/manifest")
+
+        assert response.status_code == 404
+
     @pytest.mark.parametrize(
         "form_data, args_data, expected_redirect_route, expected_params",
         [
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from app.main.util.s3_streaming import (
+    open_s3_object_document,
+    open_s3_object_file,
+    read_s3_object,
+)
+from app.tests.test_render_utils import MINIMAL_VALID_PDF_TWO_PAGES
+
+
+@pytest.fixture
+def s3_object(app, tmp_path):
+    app.config["S3_SPOOL_DIR"] = str(tmp_path)
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-bucket")
+        s3.put_object(
+            Bucket="test-bucket",
+            Key="TDR-2024/file-id",
+            Body=MINIMAL_VALID_PDF_TWO_PAGES,
+        )
+        yield "test-bucket", "TDR-2024/file-id"
+
+
+def test_small_object_read_into_memory(app, s3_object, tmp_path):
+    app.config["S3_SPOOL_MAX_MEMORY_BYTES"] = len(MINIMAL_VALID_PDF_TWO_PAGES)
+
+    with app.app_context():
+        content = read_s3_object(*s3_object)
+
+    assert content == MINIMAL_VALID_PDF_TWO_PAGES
+    assert list(tmp_path.iterdir()) == []
+    with open_s3_object_document(content) as pdf_document:
+        assert pdf_document.page_count == 2
+
+
+def test_large_object_streamed_to_temporary_file(app, s3_object, tmp_path):
+    """
+    Given an S3 object larger than S3_SPOOL_MAX_MEMORY_BYTES
+    When it is read
+    Then it is streamed to a file in S3_SPOOL_DIR
+    And the file is removed once opened, and readable until closed
+    """
+    app.config["S3_SPOOL_MAX_MEMORY_BYTES"] = 16
+
+    with app.app_context(), patch(
+        "app.main.util.s3_streaming.S3_CHUNK_SIZE", 64
+    ):
+        content = read_s3_object(*s3_object)
+
+    assert isinstance(content, str)
+    assert list(tmp_path.iterdir()) == [tmp_path / content.split("/")[-1]]
+    with open(content, "rb") as spool_file:
+        assert spool_file.read() == MINIMAL_VALID_PDF_TWO_PAGES
+
+    with open_s3_object_document(content) as pdf_document:
+        assert list(tmp_path.iterdir()) == []
+        assert pdf_document.load_page(1).rect.width == 200
+
+    with app.app_context():
+        content = read_s3_object(*s3_object)
+    with open_s3_object_file(content) as object_file:
+        assert list(tmp_path.iterdir()) == []
+        assert object_file.read() == MINIMAL_VALID_PDF_TWO_PAGES
+
+
+def test_temporary_file_removed_if_streaming_fails(app, s3_object, tmp_path):
+    from botocore.response import StreamingBody
+
+    app.config["S3_SPOOL_MAX_MEMORY_BYTES"] = 16
+
+    with app.app_context(), patch.object(
+        StreamingBody, "iter_chunks", side_effect=ConnectionError
+    ):
+        with pytest.raises(ConnectionError):
+            read_s3_object(*s3_object)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_object_read_only_if_etag_matches(app, s3_object):
+    bucket, key = s3_object
+    s3 = boto3.client("s3", region_name="us-east-1")
+    etag = s3.head_object(Bucket=bucket, Key=key)["ETag"]
+
+    with app.app_context():
+        content = read_s3_object(bucket, key, etag=etag.strip('"'))
+        with pytest.raises(ClientError) as exc_info:
+            read_s3_object(bucket, key, etag="stale-etag")
+
+    assert content == MINIMAL_VALID_PDF_TWO_PAGES
+    assert exc_info.value.response["Error"]["Code"] == "PreconditionFailed"
@@ -32,7 +32,8 @@ os_mock_return_summary = {
                     },
                 }
             ]
-        }
+        },
+        "transferring_body_count": {"value": 1},
     },
 }
 os_mock_return_tb = {
@@ -257,7 +258,8 @@ class TestSearchResultsSummary:
             search_return_value={
                 "hits": {"total": {"value": 0}, "hits": []},
                 "aggregations": {
-                    "aggregate_by_transferring_body": {"buckets": []}
+                    "aggregate_by_transferring_body": {"buckets": []},
+                    "transferring_body_count": {"value": 0},
                 },
             }
         )
@@ -298,8 +300,9 @@ class TestSearchResultsSummary:
         """
         mock_search_client.return_value = MockOpenSearch(
             search_return_value={
-                "hits": {"total": {"value": 0}, "hits": []},
+                "hits": {"total": {"value": 69}, "hits": []},
                 "aggregations": {
+                    "transferring_body_count": {"value": 2},
                     "aggregate_by_transferring_body": {
                         "buckets": [
                             {
@@ -333,7 +336,7 @@ class TestSearchResultsSummary:
                                 },
                             },
                         ]
-                    }
+                    },
                 },
             }
         )
@@ -348,6 +351,42 @@ class TestSearchResultsSummary:
         assert heading and browse_details_div
         assert heading_text == "Records found 69"
 
+    @patch("app.main.util.search_utils.OpenSearch")
+    def test_search_results_summary_pages_transferring_bodies_server_side(
+        self, mock_search_client, client: FlaskClient, mock_all_access_user
+    ):
+        """
+        Given an all_access_user with a search results summary query
+        When they request the second page of the search results summary page
+        Then only the buckets of that page are requested from OpenSearch
+        and the page count comes from the number of transferring bodies
+        """
+        mock_search = mock_search_client.return_value.search
+        mock_search.return_value = {
+            **os_mock_return_summary,
+            "aggregations": {
+                **os_mock_return_summary["aggregations"],
+                "transferring_body_count": {"value": 25},
+            },
+        }
+        mock_all_access_user(client)
+
+        response = client.get(
+            f"{self.route_url}", data={"query": "fi", "page": 2, "per_page": 5}
+        )
+
+        assert response.status_code == 200
+        dsl_query = mock_search.call_args.kwargs["body"]
+        assert dsl_query["size"] == 0
+        terms_aggregation = dsl_query["aggs"]["aggregate_by_transferring_body"]
+        assert terms_aggregation["terms"]["size"] == 10
+        assert terms_aggregation["aggs"]["transferring_body_page"] == {
+            "bucket_sort": {"from": 5, "size": 5}
+        }
+        soup = BeautifulSoup(response.data, "html.parser")
+        pagination_links = soup.find("nav", {"class": "govuk-pagination"})
+        assert pagination_links.find("a", string="5")
+
     @patch("app.main.util.search_utils.OpenSearch")
     def test_search_results_summary_timeout_shows_504_bad_gateway(
         self, mock_search_client, client: FlaskClient, mock_all_access_user
@@ -541,6 +580,123 @@ class TestSearchTransferringBody:
             == f"Search results – {app.config['SERVICE_NAME']} – GOV.UK"
         )
 
+    @patch("app.main.util.search_utils.OpenSearch")
+    def test_search_transferring_body_deep_pages_use_cursors(
+        self,
+        mock_search_client,
+        app,
+        client: FlaskClient,
+        mock_standard_user,
+        browse_consignment_files,
+    ):
+        """
+        Given a standard user on a page of search results past
+            OPEN_SEARCH_MAX_RESULT_WINDOW results
+        When they follow its next page link
+        Then the links to the neighbouring pages carry cursors, and the next
+            page is searched after the last result through a point in time
+        """
+        app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 10
+        mock_open_search = mock_search_client.return_value
+        mock_open_search.count.return_value = {"count": 22}
+        mock_open_search.create_pit.return_value = {"pit_id": "pit-id"}
+        hit = os_mock_return_tb["hits"]["hits"][0]
+        mock_open_search.search.side_effect = lambda **kwargs: {
+            "hits": {
+                "total": {"value": 22},
+                "hits": [
+                    {**hit, "sort": [2.0, "file-id-1"]},
+                    {**hit, "sort": [1.0, "file-id-2"]},
+                ],
+            },
+        }
+        mock_standard_user(
+            client, browse_consignment_files[0].consignment.series.body.Name
+        )
+        transferring_body_id = browse_consignment_files[
+            0
+        ].consignment.series.body.BodyId
+        url = f"{self.route_url}/{transferring_body_id}?query=test&per_page=5"
+
+        response = client.get(f"{url}&page=4")
+
+        assert response.status_code == 200
+        soup = BeautifulSoup(response.data, "html.parser")
+        next_link = soup.find("a", rel="next")["href"].strip().split("#")[0]
+        assert "cursor=" in next_link
+        assert "cursor=" in soup.find("a", rel="prev")["href"]
+        for page in (3, 5):
+            page_link = soup.find("a", attrs={"aria-label": f"Page {page}"})
+            assert "cursor=" in page_link["href"]
+
+        response = client.get(next_link)
+
+        assert response.status_code == 200
+        mock_open_search.create_pit.assert_called_once()
+        body = mock_open_search.search.call_args.kwargs["body"]
+        # page 4 was found in reverse, so file-id-1 was its last result
+        assert body["search_after"] == [2.0, "file-id-1"]
+        assert body["pit"]["id"] == "pit-id"
+
+    def test_search_transferring_body_invalid_cursor(
+        self,
+        client: FlaskClient,
+        mock_standard_user,
+        browse_consignment_files,
+    ):
+        """
+        Given a standard user
+        When they search their transferring body with a cursor that is not valid
+        Then they receive a 400 response
+        """
+        mock_standard_user(
+            client, browse_consignment_files[0].consignment.series.body.Name
+        )
+        transferring_body_id = browse_consignment_files[
+            0
+        ].consignment.series.body.BodyId
+
+        response = client.get(
+            f"{self.route_url}/{transferring_body_id}"
+            "?query=test&page=2&cursor=not-a-cursor"
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.main.util.search_utils.OpenSearch")
+    def test_search_transferring_body_caches_search_results(
+        self,
+        mock_search_client,
+        app,
+        client: FlaskClient,
+        mock_standard_user,
+        browse_consignment_files,
+    ):
+        """
+        Given a standard user who has searched their transferring body
+        When they request the same search again, and then a different page
+        Then OpenSearch is only searched for the first request of each page
+        """
+        app.config["SEARCH_RESULT_CACHE_MAX_SIZE"] = 16
+        mock_search = mock_search_client.return_value.search
+        mock_search.return_value = os_mock_return_tb
+        mock_standard_user(
+            client, browse_consignment_files[0].consignment.series.body.Name
+        )
+        transferring_body_id = browse_consignment_files[
+            0
+        ].consignment.series.body.BodyId
+        url = f"{self.route_url}/{transferring_body_id}"
+
+        first_response = client.get(url, data={"query": "test, foo"})
+        second_response = client.get(url, data={"query": "foo,test"})
+        client.get(url, data={"query": "test, foo", "page": 2})
+
+        assert first_response.status_code == 200
+        assert second_response.status_code == 200
+        assert mock_search.call_count == 2
+        assert b"fifth_file.doc" in second_response.data
+
     @patch("app.main.util.search_utils.OpenSearch")
     def test_search_top_search(
         self,
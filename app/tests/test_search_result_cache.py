@@ -0,0 +1,140 @@
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from sqlalchemy import text
+
+from app.main.db.models import SearchIndexGeneration, db
+from app.main.util.search_result_cache import (
+    SearchResultCache,
+    SearchResultKey,
+    get_search_result_cache,
+)
+
+BODY_ID = uuid.UUID("8ccc8cd1-c0ee-431d-afad-70cf404ba337")
+
+
+def _key(app, quoted_phrases=(), single_terms=("foo",), page=1):
+    with app.app_context():
+        return SearchResultKey.for_search(
+            BODY_ID,
+            list(quoted_phrases),
+            list(single_terms),
+            "everywhere",
+            "file_name",
+            page,
+            10,
+        )
+
+
+def _set_generation(app, generation):
+    with app.app_context():
+        db.session.merge(
+            SearchIndexGeneration(
+                BodyId=BODY_ID,
+                generation=generation,
+                indexed_at=datetime(2024, 1, 1),
+            )
+        )
+        db.session.commit()
+
+
+def test_search_result_key_normalises_search_terms(app):
+    key = _key(app, ['"a b"'], ["foo", "bar", "foo"])
+
+    assert key == _key(app, ['"a b"'], ["bar", "foo"])
+    assert key.single_terms == ("bar", "foo")
+    assert key.generation == 0
+    assert key != _key(app, ['"a b"'], ["bar", "foo"], page=2)
+
+
+def test_search_result_key_changes_with_search_index_generation(app):
+    key = _key(app)
+    _set_generation(app, 1)
+    indexed_key = _key(app)
+    _set_generation(app, 2)
+
+    assert indexed_key.generation == 1
+    assert len({key, indexed_key, _key(app)}) == 3
+
+
+def test_search_result_key_generation_0_without_generation_table(app):
+    """
+    Given the indexer has not yet created search_index_generation
+    When a search result key is built
+    Then its generation is 0
+    And the session can still be queried
+    """
+    with app.app_context():
+        SearchIndexGeneration.__table__.drop(db.engine)
+        try:
+            key = SearchResultKey.for_search(
+                BODY_ID, [], ["foo"], "everywhere", "file_name", 1, 10
+            )
+            assert db.session.execute(text("SELECT 1")).scalar() == 1
+        finally:
+            db.session.rollback()
+            SearchIndexGeneration.__table__.create(db.engine)
+
+    assert key.generation == 0
+
+
+def test_get_or_search_substitutes_highlight_tag():
+    cache = SearchResultCache(max_size=10, ttl=60)
+    search = MagicMock(
+        side_effect=lambda tag: {"highlight": f"<{tag}>foo</{tag}>"}
+    )
+    key = SearchResultKey(
+        "body", 0, (), ("foo",), "everywhere", "", 1, 10, None
+    )
+
+    first = cache.get_or_search(key, "tag_1", search)
+    second = cache.get_or_search(key, "tag_2", search)
+
+    search.assert_called_once_with(cache.highlight_placeholder)
+    assert first == {"highlight": "<tag_1>foo</tag_1>"}
+    assert second == {"highlight": "<tag_2>foo</tag_2>"}
+
+
+def test_get_or_search_results_are_not_shared():
+    cache = SearchResultCache(max_size=10, ttl=60)
+    key = SearchResultKey(
+        "body", 0, (), ("foo",), "everywhere", "", 1, 10, None
+    )
+
+    cache.get_or_search(key, "tag", lambda tag: {"hits": []})["hits"].append(1)
+
+    assert cache.get_or_search(key, "tag", MagicMock()) == {"hits": []}
+
+
+def test_get_or_search_without_cache_always_searches():
+    cache = SearchResultCache(max_size=0, ttl=60)
+    search = MagicMock(return_value={"hits": []})
+    key = SearchResultKey(
+        "body", 0, (), ("foo",), "everywhere", "", 1, 10, None
+    )
+
+    cache.get_or_search(key, "tag", search)
+    cache.get_or_search(key, "tag", search)
+
+    assert search.call_count == 2
+    assert len(cache) == 0
+
+
+def test_get_search_result_cache_from_config(app):
+    app.config["SEARCH_RESULT_CACHE_MAX_SIZE"] = 5
+    app.config["SEARCH_RESULT_CACHE_TTL"] = 30
+
+    with app.app_context():
+        cache = get_search_result_cache()
+        assert get_search_result_cache() is cache
+
+    assert cache._cache.max_size == 5
+    assert cache._cache.default_ttl == 30
+
+
+def test_get_search_result_cache_disabled(app):
+    app.config["SEARCH_RESULT_CACHE_MAX_SIZE"] = 0
+
+    with app.app_context():
+        assert get_search_result_cache() is None
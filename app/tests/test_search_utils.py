@@ -1,14 +1,25 @@
-from unittest.mock import patch
+import re
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import opensearchpy
 import pytest
 from opensearchpy import OpenSearch
+from requests_aws4auth import AWS4Auth
+from werkzeug.exceptions import HTTPException
 
 from app.main.util.search_utils import (
     OPENSEARCH_FIELD_NAME_MAP,
+    SEARCH_RESULT_SOURCE_FIELDS,
+    OpenSearchClientRegistry,
+    PointInTimeRegistry,
+    SearchCursor,
     build_dsl_search_query,
     build_search_results_summary_query,
     build_search_transferring_body_query,
     build_should_clauses,
+    execute_aggregation_search,
+    execute_paginated_search,
     execute_search,
     extract_search_terms,
     filter_opensearch_highlight_results,
@@ -16,10 +27,13 @@ from app.main.util.search_utils import (
     get_all_fields_excluding,
     get_filtered_list,
     get_open_search_fields_to_search_on_and_sorting,
+    get_opensearch_client,
     get_pagination_info,
+    get_search_cursors,
     is_fuzzy_field,
     rearrange_opensearch_results_for_relevant_fields,
     reorder_fields,
+    reverse_sorting,
     setup_opensearch,
 )
 
@@ -267,6 +281,91 @@ def test_setup_opensearch(app):
     assert client.transport.kwargs.get("ca_certs") == "test/path/to/certs"
 
 
+def test_setup_opensearch_pool_maxsize(app):
+    app.config["OPEN_SEARCH_HOST"] = "localhost"
+    app.config["OPEN_SEARCH_POOL_MAXSIZE"] = 25
+    client = setup_opensearch()
+    connection = client.transport.get_connection()
+    assert connection.session.adapters["http://"]._pool_maxsize == 25
+
+
+@patch("app.main.util.search_utils.setup_opensearch")
+def test_get_opensearch_client_is_shared(mock_setup_opensearch, app):
+    with app.app_context():
+        client = get_opensearch_client()
+        assert get_opensearch_client() is client
+
+    mock_setup_opensearch.assert_called_once()
+    client.ping.assert_not_called()
+
+
+@patch("app.main.util.search_utils.setup_opensearch")
+def test_opensearch_client_registry_rebuilds_on_new_credentials(
+    mock_setup_opensearch, app
+):
+    mock_setup_opensearch.side_effect = lambda: MagicMock()
+    registry = OpenSearchClientRegistry(health_check_interval=60)
+
+    with app.app_context():
+        app.config["OPEN_SEARCH_HTTP_AUTH"] = ("user", "password")
+        client = registry.client()
+        assert registry.client() is client
+
+        app.config["OPEN_SEARCH_HTTP_AUTH"] = ("user", "rotated")
+        rotated_client = registry.client()
+
+    assert rotated_client is not client
+    assert mock_setup_opensearch.call_count == 2
+    client.transport.close.assert_called_once()
+    rotated_client.transport.close.assert_not_called()
+
+
+@patch("app.main.util.search_utils.setup_opensearch")
+def test_opensearch_client_registry_keeps_client_for_refreshable_auth(
+    mock_setup_opensearch, app
+):
+    mock_setup_opensearch.side_effect = lambda: MagicMock()
+    credentials = MagicMock()
+    credentials.get_frozen_credentials.side_effect = [
+        ("access-key", "secret-key", "token"),
+        ("rotated-access-key", "rotated-secret-key", "rotated-token"),
+    ]
+    registry = OpenSearchClientRegistry(health_check_interval=60)
+
+    with app.app_context():
+        app.config["OPEN_SEARCH_HTTP_AUTH"] = AWS4Auth(
+            refreshable_credentials=credentials,
+            region="eu-west-2",
+            service="es",
+        )
+        client = registry.client()
+        assert registry.client() is client
+
+    mock_setup_opensearch.assert_called_once()
+
+
+@patch("app.main.util.search_utils.setup_opensearch")
+def test_opensearch_client_registry_rebuilds_on_failed_health_check(
+    mock_setup_opensearch, app
+):
+    unhealthy_client = MagicMock()
+    unhealthy_client.ping.return_value = False
+    healthy_client = MagicMock()
+    mock_setup_opensearch.side_effect = [unhealthy_client, healthy_client]
+    registry = OpenSearchClientRegistry(health_check_interval=0)
+
+    with app.app_context():
+        app.app_logger = MagicMock()
+        assert registry.client() is unhealthy_client
+        assert registry.client() is healthy_client
+        healthy_client.ping.return_value = True
+        assert registry.client() is healthy_client
+
+    unhealthy_client.ping.assert_called_once()
+    unhealthy_client.transport.close.assert_called_once()
+    app.app_logger.warning.assert_called_once()
+
+
 @patch("app.main.util.search_utils.OpenSearch")
 def test_execute_search(mock_open_search, app):
     dsl_query = {"query": {"match_all": {}}}
@@ -276,6 +375,318 @@ def test_execute_search(mock_open_search, app):
     )
 
 
+@patch("app.main.util.search_utils.OpenSearch")
+def test_execute_aggregation_search(mock_open_search, app):
+    dsl_query = {"query": {"match_all": {}}, "size": 0}
+    execute_aggregation_search(mock_open_search, dsl_query)
+    mock_open_search.search.assert_called_once_with(
+        body={"query": {"match_all": {}}, "size": 0}, timeout=10
+    )
+
+
+DEEP_SEARCH_QUERY = {
+    "query": {"match_all": {}},
+    "sort": [
+        {"_score": {"order": "desc"}},
+        {"file_id.keyword": {"order": "asc"}},
+    ],
+}
+REVERSED_DEEP_SEARCH_SORT = [
+    {"_score": {"order": "asc"}},
+    {"file_id.keyword": {"order": "desc"}},
+]
+
+
+def _hits(*file_ids):
+    return {
+        "hits": {
+            "total": {"value": 100},
+            "hits": [
+                {"_id": file_id, "sort": [1.5, file_id]} for file_id in file_ids
+            ],
+        }
+    }
+
+
+def test_search_cursor_encode_and_decode():
+    cursor = SearchCursor("file_name", [1.5, "file-id"], "pit-id", True)
+
+    assert SearchCursor.decode(cursor.encode()) == cursor
+    assert SearchCursor.from_hit(
+        "file_name", _hits("a")["hits"]["hits"][0], None
+    ) == (SearchCursor("file_name", [1.5, "a"]))
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "not-a-cursor",
+        SearchCursor("file_name", [1.5]).encode(),
+        SearchCursor("file_name", ["1.5", "file-id"]).encode(),
+        SearchCursor("file_name", [1.5, "file-id"], 1).encode(),
+    ],
+)
+def test_search_cursor_decode_invalid(token):
+    with pytest.raises(ValueError):
+        SearchCursor.decode(token)
+
+
+def test_reverse_sorting():
+    assert (
+        reverse_sorting(DEEP_SEARCH_QUERY["sort"]) == REVERSED_DEEP_SEARCH_SORT
+    )
+
+
+def test_execute_paginated_search_shallow_page_uses_from(app):
+    open_search = MagicMock()
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context():
+        execute_paginated_search(
+            open_search,
+            DEEP_SEARCH_QUERY,
+            3,
+            10,
+            SearchCursor("file_name", [1.5, "a"]),
+        )
+
+    open_search.search.assert_called_once_with(
+        body=DEEP_SEARCH_QUERY, from_=20, size=10, timeout=10
+    )
+    open_search.create_pit.assert_not_called()
+
+
+def test_execute_paginated_search_deep_page_uses_search_after(app):
+    open_search = MagicMock()
+    open_search.create_pit.return_value = {"pit_id": "new-pit-id"}
+    open_search.search.return_value = _hits("b", "c")
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context():
+        results = execute_paginated_search(
+            open_search,
+            DEEP_SEARCH_QUERY,
+            4,
+            10,
+            SearchCursor("file_name", [1.5, "a"]),
+        )
+
+    open_search.create_pit.assert_called_once_with(
+        index="documents", params={"keep_alive": "1m"}
+    )
+    open_search.search.assert_called_once_with(
+        body={
+            **DEEP_SEARCH_QUERY,
+            "pit": {"id": "new-pit-id", "keep_alive": "1m"},
+            "search_after": [1.5, "a"],
+        },
+        size=10,
+        timeout=10,
+    )
+    assert results == _hits("b", "c")
+
+
+def test_execute_paginated_search_deep_page_before_cursor(app):
+    open_search = MagicMock()
+    open_search.search.return_value = _hits("c", "b")
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context():
+        results = execute_paginated_search(
+            open_search,
+            DEEP_SEARCH_QUERY,
+            4,
+            10,
+            SearchCursor("file_name", [1.5, "d"], "pit-id", before=True),
+        )
+
+    open_search.create_pit.assert_not_called()
+    body = open_search.search.call_args.kwargs["body"]
+    assert body["sort"] == REVERSED_DEEP_SEARCH_SORT
+    assert body["pit"]["id"] == "pit-id"
+    assert results == _hits("b", "c")
+
+
+def test_execute_paginated_search_expired_pit_opens_new_pit(app):
+    open_search = MagicMock()
+    open_search.create_pit.return_value = {"pit_id": "new-pit-id"}
+    open_search.search.side_effect = [
+        opensearchpy.exceptions.NotFoundError(404, "pit expired"),
+        _hits("b"),
+    ]
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context():
+        results = execute_paginated_search(
+            open_search,
+            DEEP_SEARCH_QUERY,
+            4,
+            10,
+            SearchCursor("file_name", [1.5, "a"], "expired-pit-id"),
+        )
+
+    assert results == _hits("b")
+    assert [
+        call.kwargs["body"]["pit"]["id"]
+        for call in open_search.search.call_args_list
+    ] == ["expired-pit-id", "new-pit-id"]
+
+
+def test_execute_paginated_search_invalid_pit_opens_new_pit(app):
+    open_search = MagicMock()
+    open_search.create_pit.return_value = {"pit_id": "new-pit-id"}
+    open_search.search.side_effect = [
+        opensearchpy.exceptions.RequestError(400, "malformed pit id"),
+        _hits("b"),
+    ]
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context():
+        results = execute_paginated_search(
+            open_search,
+            DEEP_SEARCH_QUERY,
+            4,
+            10,
+            SearchCursor("file_name", [1.5, "a"], "malformed-pit-id"),
+        )
+
+    assert results == _hits("b")
+    assert [
+        call.kwargs["body"]["pit"]["id"]
+        for call in open_search.search.call_args_list
+    ] == ["malformed-pit-id", "new-pit-id"]
+
+
+def test_execute_paginated_search_invalid_cursor_aborts_with_400(app):
+    open_search = MagicMock()
+    open_search.create_pit.return_value = {"pit_id": "new-pit-id"}
+    open_search.search.side_effect = opensearchpy.exceptions.RequestError(
+        400, "search_after has wrong number of values"
+    )
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context(), pytest.raises(HTTPException) as exc_info:
+        execute_paginated_search(
+            open_search,
+            DEEP_SEARCH_QUERY,
+            4,
+            10,
+            SearchCursor("file_name", [1.5], "pit-id"),
+        )
+
+    assert exc_info.value.code == 400
+    assert open_search.search.call_count == 2
+
+
+def test_execute_paginated_search_closes_oldest_pit(app):
+    open_search = MagicMock()
+    open_search.create_pit.side_effect = [
+        {"pit_id": "first-pit-id"},
+        {"pit_id": "second-pit-id"},
+    ]
+    open_search.search.return_value = _hits("b")
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+    app.config["OPEN_SEARCH_MAX_OPEN_PITS"] = 1
+
+    with app.app_context():
+        for _ in range(2):
+            execute_paginated_search(
+                open_search,
+                DEEP_SEARCH_QUERY,
+                4,
+                10,
+                SearchCursor("file_name", [1.5, "a"]),
+            )
+
+    open_search.delete_pit.assert_called_once_with(
+        body={"pit_id": ["first-pit-id"]}
+    )
+
+
+def test_point_in_time_registry_logs_failure_to_close(app):
+    open_search = MagicMock()
+    open_search.delete_pit.side_effect = (
+        opensearchpy.exceptions.ConnectionError("N/A", "unreachable", None)
+    )
+    registry = PointInTimeRegistry(max_pits=1)
+
+    with app.app_context(), patch.object(
+        app.app_logger, "warning"
+    ) as mock_warning:
+        registry.add(open_search, "first-pit-id")
+        registry.add(open_search, "second-pit-id")
+
+    open_search.delete_pit.assert_called_once_with(
+        body={"pit_id": ["first-pit-id"]}
+    )
+    mock_warning.assert_called_once()
+
+
+def test_execute_paginated_search_last_page_without_cursor(app):
+    open_search = MagicMock()
+    open_search.count.return_value = {"count": 95}
+    open_search.search.return_value = _hits("e", "d")
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context():
+        results = execute_paginated_search(
+            open_search, DEEP_SEARCH_QUERY, 10, 10
+        )
+
+    open_search.count.assert_called_once_with(
+        body={"query": DEEP_SEARCH_QUERY["query"]}
+    )
+    open_search.search.assert_called_once_with(
+        body={**DEEP_SEARCH_QUERY, "sort": REVERSED_DEEP_SEARCH_SORT},
+        from_=0,
+        size=5,
+        timeout=10,
+    )
+    assert results == _hits("d", "e")
+
+
+@pytest.mark.parametrize("page, expected_status", [(5, 400), (11, 404)])
+def test_execute_paginated_search_deep_page_without_cursor_aborts(
+    app, page, expected_status
+):
+    open_search = MagicMock()
+    open_search.count.return_value = {"count": 100}
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+
+    with app.app_context(), pytest.raises(HTTPException) as exc_info:
+        execute_paginated_search(open_search, DEEP_SEARCH_QUERY, page, 10)
+
+    assert exc_info.value.code == expected_status
+    open_search.search.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "page, has_previous_cursor, has_next_cursor",
+    [(2, False, False), (3, False, True), (5, True, True)],
+)
+def test_get_search_cursors(app, page, has_previous_cursor, has_next_cursor):
+    app.config["OPEN_SEARCH_MAX_RESULT_WINDOW"] = 30
+    results = {**_hits("a", "b"), "pit_id": "pit-id"}
+
+    with app.app_context():
+        previous_cursor, next_cursor = get_search_cursors(
+            results, "file_name", page, 10
+        )
+
+    if has_previous_cursor:
+        assert SearchCursor.decode(previous_cursor) == SearchCursor(
+            "file_name", [1.5, "a"], "pit-id", before=True
+        )
+    else:
+        assert previous_cursor is None
+    if has_next_cursor:
+        assert SearchCursor.decode(next_cursor) == SearchCursor(
+            "file_name", [1.5, "b"], "pit-id"
+        )
+    else:
+        assert next_cursor is None
+
+
 @patch("app.main.util.pagination.calculate_total_pages", return_value=10)
 @patch("app.main.util.pagination.get_pagination", return_value={"page": 1})
 def test_get_pagination_info(mock_calculate_total_pages, mock_get_pagination):
@@ -347,7 +758,7 @@ def test_build_dsl_search_query():
             }
         },
         "sort": {"sort": "foobar"},
-        "_source": True,
+        "_source": {"includes": SEARCH_RESULT_SOURCE_FIELDS},
     }
 
     dsl_query = build_dsl_search_query(
@@ -400,7 +811,7 @@ def test_build_dsl_search_query_and_non_fuzzy_fuzzy_search():
             }
         },
         "sort": {"sort": "foobar"},
-        "_source": True,
+        "_source": {"includes": SEARCH_RESULT_SOURCE_FIELDS},
     }
 
     dsl_query = build_dsl_search_query(
@@ -420,7 +831,8 @@ def test_build_search_results_summary_query():
         ["field_1"],
         quoted_phrases,
         single_terms,
-        {"sort": "foobar"},
+        3,
+        10,
     )
     assert dsl_query == {
         "query": {
@@ -439,20 +851,29 @@ def test_build_search_results_summary_query():
                 "filter": [],
             }
         },
-        "sort": {"sort": "foobar"},
-        "_source": True,
+        "size": 0,
+        "track_total_hits": True,
         "aggs": {
             "aggregate_by_transferring_body": {
-                "terms": {"field": "transferring_body_id.keyword"},
+                "terms": {
+                    "field": "transferring_body_id.keyword",
+                    "size": 30,
+                },
                 "aggs": {
                     "top_transferring_body_hits": {
                         "top_hits": {
                             "size": 1,
                             "_source": ["transferring_body"],
                         }
-                    }
+                    },
+                    "transferring_body_page": {
+                        "bucket_sort": {"from": 20, "size": 10}
+                    },
                 },
-            }
+            },
+            "transferring_body_count": {
+                "cardinality": {"field": "transferring_body_id.keyword"}
+            },
         },
     }
 
@@ -480,7 +901,7 @@ def test_build_search_transferring_body_query():
         "test_highlight_key",
         quoted_phrases,
         single_terms,
-        {"sort": "foobar"},
+        [{"_score": {"order": "desc"}}],
     )
     assert dsl_query == {
         "query": {
@@ -533,8 +954,12 @@ def test_build_search_transferring_body_query():
                 ],
             }
         },
-        "sort": {"sort": "foobar"},
-        "_source": True,
+        "sort": [
+            {"_score": {"order": "desc"}},
+            {"file_id.keyword": {"order": "asc"}},
+        ],
+        "_source": {"includes": SEARCH_RESULT_SOURCE_FIELDS},
+        "track_total_hits": True,
         "highlight": {
             "pre_tags": ["<test_highlight_key>"],
             "post_tags": ["</test_highlight_key>"],
@@ -551,6 +976,22 @@ def test_build_search_transferring_body_query():
     }
 
 
+def test_search_result_source_fields_cover_search_results_template():
+    template_path = (
+        Path(__file__).parents[1]
+        / "templates"
+        / "main"
+        / "search-transferring-body.html"
+    )
+    with open(template_path) as template:
+        rendered_fields = set(
+            re.findall(r"\['_source'\]\['(\w+)'\]", template.read())
+        )
+
+    assert rendered_fields
+    assert rendered_fields <= set(SEARCH_RESULT_SOURCE_FIELDS)
+
+
 @pytest.mark.parametrize(
     "input_results, expected_output",
     [
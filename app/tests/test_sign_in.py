@@ -2,6 +2,8 @@ from unittest.mock import patch
 
 from flask import url_for
 
+from app.tests.factories import BodyFactory
+
 
 @patch("app.main.routes.get_keycloak_instance_from_flask_config")
 def test_sign_in(mock_keycloak, client):
@@ -67,6 +69,31 @@ def test_callback_route_standard_user(mock_keycloak, client):
     with client.session_transaction() as sess:
         assert "user_type" in sess
         assert sess["user_type"] == "standard_user"
+        assert sess["transferring_body"] is None
+
+
+@patch("app.main.routes.get_keycloak_instance_from_flask_config")
+def test_callback_route_stores_resolved_transferring_body_in_session(
+    mock_keycloak, client
+):
+    body = BodyFactory(Name="foo")
+    mock_keycloak.return_value.token.return_value = {
+        "access_token": "valid_access_token",
+        "refresh_token": "valid_refresh_token",
+    }
+    mock_keycloak.return_value.introspect.return_value = {
+        "groups": ["/ayr_user_type/view_dept", "/transferring_body_user/foo"],
+        "sub": "test_standard_user",
+    }
+
+    response = client.get("/callback?code=valid_code")
+
+    assert response.status_code == 302
+    with client.session_transaction() as sess:
+        assert sess["transferring_body"] == {
+            "BodyId": str(body.BodyId),
+            "Name": "foo",
+        }
 
 
 @patch("app.main.routes.get_keycloak_instance_from_flask_config")
@@ -0,0 +1,130 @@
+import json
+import time
+from unittest.mock import MagicMock
+
+import redis
+
+from app.main.authorize.token_cache import (
+    REDIS_KEY_PREFIX,
+    TokenIntrospectionCache,
+    get_token_introspection_cache,
+    introspect_access_token,
+)
+
+ACTIVE_INTROSPECTION = {"active": True, "groups": ["/ayr_user_type/view_all"]}
+
+
+def test_active_introspection_is_cached_by_token_hash():
+    cache = TokenIntrospectionCache(max_size=10, ttl=60)
+    cache.set("access_token", ACTIVE_INTROSPECTION)
+
+    assert cache.get("access_token") == ACTIVE_INTROSPECTION
+    assert cache.get("another_access_token") is None
+    assert "access_token" not in cache._local_cache
+    assert cache.hash_token("access_token") in cache._local_cache
+
+
+def test_inactive_introspection_is_not_cached():
+    cache = TokenIntrospectionCache(max_size=10, ttl=60)
+    cache.set("access_token", {"active": False})
+
+    assert cache.get("access_token") is None
+
+
+def test_cache_ttl_is_bounded_by_token_expiry():
+    cache = TokenIntrospectionCache(max_size=10, ttl=60)
+
+    assert cache._get_ttl({"exp": time.time() + 30}) in (29, 30)
+    assert cache._get_ttl({"exp": time.time() + 3600}) == 60
+    assert cache._get_ttl({}) == 60
+
+
+def test_expired_token_is_not_cached():
+    cache = TokenIntrospectionCache(max_size=10, ttl=60)
+    cache.set("access_token", {**ACTIVE_INTROSPECTION, "exp": time.time() - 1})
+
+    assert cache.get("access_token") is None
+
+
+def test_invalidate_removes_cached_introspection(app):
+    with app.app_context():
+        cache = TokenIntrospectionCache(max_size=10, ttl=60)
+        cache.set("access_token", ACTIVE_INTROSPECTION)
+        cache.invalidate("access_token")
+
+        assert cache.get("access_token") is None
+
+
+def test_redis_tier_is_written_read_and_invalidated(app):
+    redis_client = MagicMock()
+    cache = TokenIntrospectionCache(
+        max_size=10, ttl=60, redis_client=redis_client
+    )
+    redis_key = f"{REDIS_KEY_PREFIX}{cache.hash_token('access_token')}"
+
+    with app.app_context():
+        cache.set("access_token", ACTIVE_INTROSPECTION)
+        redis_client.setex.assert_called_once_with(
+            redis_key, 60, json.dumps(ACTIVE_INTROSPECTION)
+        )
+
+        other_worker_cache = TokenIntrospectionCache(
+            max_size=10, ttl=60, redis_client=redis_client
+        )
+        redis_client.get.return_value = json.dumps(ACTIVE_INTROSPECTION)
+        assert other_worker_cache.get("access_token") == ACTIVE_INTROSPECTION
+        redis_client.get.assert_called_once_with(redis_key)
+
+        other_worker_cache.invalidate("access_token")
+        redis_client.delete.assert_called_once_with(redis_key)
+
+
+def test_redis_errors_are_treated_as_cache_misses(app):
+    redis_client = MagicMock()
+    redis_client.get.side_effect = redis.exceptions.ConnectionError
+    redis_client.setex.side_effect = redis.exceptions.ConnectionError
+    cache = TokenIntrospectionCache(
+        max_size=10, ttl=60, redis_client=redis_client
+    )
+
+    with app.app_context():
+        assert cache.get("access_token") is None
+        cache.set("access_token", ACTIVE_INTROSPECTION)
+        assert cache.get("access_token") == ACTIVE_INTROSPECTION
+
+
+def test_get_token_introspection_cache_is_scoped_to_the_app(app):
+    app.config["TOKEN_CACHE_TTL"] = 30
+    app.config["TOKEN_CACHE_MAX_SIZE"] = 5
+
+    with app.app_context():
+        cache = get_token_introspection_cache()
+        assert get_token_introspection_cache() is cache
+        assert cache.ttl == 30
+        assert cache._local_cache.max_size == 5
+        assert cache.redis_client is None
+
+
+def test_introspect_access_token_only_calls_keycloak_once_while_active(app):
+    keycloak_openid = MagicMock()
+    keycloak_openid.introspect.return_value = ACTIVE_INTROSPECTION
+
+    with app.app_context():
+        for _ in range(3):
+            assert (
+                introspect_access_token(keycloak_openid, "access_token")
+                == ACTIVE_INTROSPECTION
+            )
+
+    keycloak_openid.introspect.assert_called_once_with("access_token")
+
+
+def test_introspect_access_token_always_calls_keycloak_while_inactive(app):
+    keycloak_openid = MagicMock()
+    keycloak_openid.introspect.return_value = {"active": False}
+
+    with app.app_context():
+        introspect_access_token(keycloak_openid, "access_token")
+        introspect_access_token(keycloak_openid, "access_token")
+
+    assert keycloak_openid.introspect.call_count == 2
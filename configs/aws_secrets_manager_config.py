@@ -79,13 +79,13 @@ class AWSSecretsManagerConfig(BaseConfig):
 
     @property
     def OPEN_SEARCH_HTTP_AUTH(self):
+        # refreshable credentials, so requests are signed with the current
+        # credentials once temporary ones are rotated
         session = boto3.Session()
         credentials = session.get_credentials()
         auth = AWS4Auth(
-            credentials.access_key,
-            credentials.secret_key,
-            self.AWS_REGION,
-            "es",
-            session_token=credentials.token,
+            refreshable_credentials=credentials,
+            region=self.AWS_REGION,
+            service="es",
         )
         return auth
@@ -1,3 +1,5 @@
+import os
+
 from .db_utils import build_database_url
 
 SELF = "'self'"
@@ -89,6 +91,16 @@ class BaseConfig(object):
         additional_values = self._parse_config_value(config_value)
         return default_values + additional_values
 
+    def _get_optional_config_value(self, variable_name, default):
+        """Fetches a configuration value, falling back to `default` when it is unset or empty."""
+        try:
+            config_value = self._get_config_value(variable_name)
+        except KeyError:
+            return default
+        if config_value is None or config_value == "":
+            return default
+        return config_value
+
     @property
     def AWS_REGION(self):
         return self._get_config_value("AWS_REGION")
@@ -220,6 +232,259 @@ class BaseConfig(object):
     def PERF_TEST(self):
         return self._get_config_value("PERF_TEST") == "True"
 
+    @property
+    def TOKEN_CACHE_TTL(self) -> int:
+        return int(self._get_optional_config_value("TOKEN_CACHE_TTL", 60))
+
+    @property
+    def TOKEN_CACHE_MAX_SIZE(self) -> int:
+        return int(
+            self._get_optional_config_value("TOKEN_CACHE_MAX_SIZE", 1024)
+        )
+
+    @property
+    def TOKEN_CACHE_REDIS_URL(self):
+        return self._get_optional_config_value("TOKEN_CACHE_REDIS_URL", None)
+
+    @property
+    def TRANSFERRING_BODY_CACHE_TTL(self) -> int:
+        return int(
+            self._get_optional_config_value("TRANSFERRING_BODY_CACHE_TTL", 300)
+        )
+
+    @property
+    def TOKEN_VALIDATION_MODE(self):
+        return self._get_optional_config_value(
+            "TOKEN_VALIDATION_MODE", "introspect"
+        )
+
+    @property
+    def KEYCLOAK_JWKS_FILE(self):
+        return self._get_optional_config_value("KEYCLOAK_JWKS_FILE", None)
+
+    @property
+    def KEYCLOAK_TOKEN_ISSUER(self):
+        return self._get_optional_config_value("KEYCLOAK_TOKEN_ISSUER", None)
+
+    @property
+    def USE_FILE_METADATA_FLAT(self) -> bool:
+        return (
+            self._get_optional_config_value("USE_FILE_METADATA_FLAT", "false")
+            == "true"
+        )
+
+    @property
+    def USE_CONSIGNMENT_BROWSE_SUMMARY(self) -> bool:
+        return (
+            self._get_optional_config_value(
+                "USE_CONSIGNMENT_BROWSE_SUMMARY", "false"
+            )
+            == "true"
+        )
+
+    @property
+    def PAGE_IMAGE_CACHE_MAX_BYTES(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "PAGE_IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024
+            )
+        )
+
+    @property
+    def PAGE_IMAGE_CACHE_DIR(self):
+        return self._get_optional_config_value("PAGE_IMAGE_CACHE_DIR", None)
+
+    @property
+    def PAGE_IMAGE_CACHE_DIR_MAX_BYTES(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "PAGE_IMAGE_CACHE_DIR_MAX_BYTES", 512 * 1024 * 1024
+            )
+        )
+
+    @property
+    def PAGE_IMAGE_CACHE_S3_BUCKET(self):
+        return self._get_optional_config_value(
+            "PAGE_IMAGE_CACHE_S3_BUCKET", None
+        )
+
+    @property
+    def PAGE_IMAGE_CACHE_S3_PREFIX(self):
+        return self._get_optional_config_value(
+            "PAGE_IMAGE_CACHE_S3_PREFIX", "page-images/"
+        )
+
+    @property
+    def PDF_DOCUMENT_CACHE_MAX_DOCUMENTS(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "PDF_DOCUMENT_CACHE_MAX_DOCUMENTS", 8
+            )
+        )
+
+    @property
+    def PDF_DOCUMENT_CACHE_MAX_BYTES(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "PDF_DOCUMENT_CACHE_MAX_BYTES", 128 * 1024 * 1024
+            )
+        )
+
+    @property
+    def PDF_DOCUMENT_MAX_OPEN_BYTES(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "PDF_DOCUMENT_MAX_OPEN_BYTES", 512 * 1024 * 1024
+            )
+        )
+
+    @property
+    def PAGE_PRERENDER_WORKERS(self) -> int:
+        # Lambda freezes background threads once a response is sent
+        default_workers = 0 if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else 1
+        return int(
+            self._get_optional_config_value(
+                "PAGE_PRERENDER_WORKERS", default_workers
+            )
+        )
+
+    @property
+    def PAGE_PRERENDER_FIRST_PAGES(self) -> int:
+        return int(
+            self._get_optional_config_value("PAGE_PRERENDER_FIRST_PAGES", 3)
+        )
+
+    @property
+    def PAGE_PRERENDER_MAX_PENDING(self) -> int:
+        return int(
+            self._get_optional_config_value("PAGE_PRERENDER_MAX_PENDING", 256)
+        )
+
+    @property
+    def PAGE_RENDER_WAIT_TIMEOUT(self) -> float:
+        return float(
+            self._get_optional_config_value("PAGE_RENDER_WAIT_TIMEOUT", 10)
+        )
+
+    @property
+    def PDF_METADATA_CACHE_MAX_ENTRIES(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "PDF_METADATA_CACHE_MAX_ENTRIES", 1024
+            )
+        )
+
+    @property
+    def PDF_METADATA_S3_BUCKET(self):
+        # the access copy converter writes the metadata of the PDFs it
+        # creates to the access copy bucket
+        return self._get_optional_config_value(
+            "PDF_METADATA_S3_BUCKET", self.ACCESS_COPY_BUCKET
+        )
+
+    @property
+    def PDF_METADATA_S3_PREFIX(self):
+        return self._get_optional_config_value(
+            "PDF_METADATA_S3_PREFIX", "pdf-metadata/"
+        )
+
+    @property
+    def IMAGE_HEADER_PROBE_BYTES(self) -> int:
+        return int(
+            self._get_optional_config_value("IMAGE_HEADER_PROBE_BYTES", 65536)
+        )
+
+    @property
+    def IIIF_PDF_DPI(self) -> int:
+        return int(self._get_optional_config_value("IIIF_PDF_DPI", 300))
+
+    @property
+    def IIIF_TILE_SIZE(self) -> int:
+        return int(self._get_optional_config_value("IIIF_TILE_SIZE", 512))
+
+    @property
+    def IIIF_MAX_WIDTH(self) -> int:
+        return int(self._get_optional_config_value("IIIF_MAX_WIDTH", 4096))
+
+    @property
+    def IIIF_MAX_AREA(self) -> int:
+        return int(
+            self._get_optional_config_value("IIIF_MAX_AREA", 4096 * 4096)
+        )
+
+    @property
+    def PAGE_IMAGE_WIDTHS(self) -> list[int]:
+        return sorted(
+            int(width)
+            for width in self._get_optional_config_value(
+                "PAGE_IMAGE_WIDTHS", "480,960,1440"
+            ).split(",")
+        )
+
+    @property
+    def PRIVATE_CACHE_MAX_AGE(self) -> int:
+        return int(
+            self._get_optional_config_value("PRIVATE_CACHE_MAX_AGE", 3600)
+        )
+
+    @property
+    def S3_SPOOL_MAX_MEMORY_BYTES(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "S3_SPOOL_MAX_MEMORY_BYTES", 16 * 1024 * 1024
+            )
+        )
+
+    @property
+    def S3_SPOOL_DIR(self):
+        return self._get_optional_config_value("S3_SPOOL_DIR", None)
+
+    @property
+    def OPEN_SEARCH_POOL_MAXSIZE(self) -> int:
+        return int(
+            self._get_optional_config_value("OPEN_SEARCH_POOL_MAXSIZE", 10)
+        )
+
+    @property
+    def OPEN_SEARCH_HEALTH_CHECK_INTERVAL(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "OPEN_SEARCH_HEALTH_CHECK_INTERVAL", 60
+            )
+        )
+
+    @property
+    def SEARCH_RESULT_CACHE_MAX_SIZE(self) -> int:
+        return int(
+            self._get_optional_config_value("SEARCH_RESULT_CACHE_MAX_SIZE", 0)
+        )
+
+    @property
+    def SEARCH_RESULT_CACHE_TTL(self) -> int:
+        return int(
+            self._get_optional_config_value("SEARCH_RESULT_CACHE_TTL", 60)
+        )
+
+    @property
+    def OPEN_SEARCH_MAX_RESULT_WINDOW(self) -> int:
+        return int(
+            self._get_optional_config_value(
+                "OPEN_SEARCH_MAX_RESULT_WINDOW", 10000
+            )
+        )
+
+    @property
+    def OPEN_SEARCH_PIT_KEEP_ALIVE(self):
+        return self._get_optional_config_value(
+            "OPEN_SEARCH_PIT_KEEP_ALIVE", "1m"
+        )
+
+    @property
+    def OPEN_SEARCH_MAX_OPEN_PITS(self) -> int:
+        return int(
+            self._get_optional_config_value("OPEN_SEARCH_MAX_OPEN_PITS", 10)
+        )
+
     @property
     def CSP_DEFAULT_SRC(self):
         return [SELF, self.FLASKS3_CDN_DOMAIN]
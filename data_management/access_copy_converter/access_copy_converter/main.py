@@ -6,6 +6,7 @@ import tempfile
 
 import boto3
 import psutil
+import pymupdf
 from botocore.exceptions import ClientError
 from sqlalchemy import MetaData, Table, create_engine, select
 from sqlalchemy.exc import SQLAlchemyError
@@ -38,6 +39,10 @@ CONVERTIBLE_PUIDS = {
 
 EXCEL_PUIDS = {"fmt/214": "xlsx", "fmt/59": "xls", "fmt/61": "xls"}
 
+# The webapp's default PDF_METADATA_S3_PREFIX, under which it reads the page
+# sizes of PDFs to generate their manifests without reading the PDFs
+PDF_METADATA_PREFIX = "pdf-metadata/"
+
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger()
@@ -208,6 +213,30 @@ def _upload_output(output_path, dest_bucket, key, file_id):
         raise Exception(f"Failed to upload {key} to Access Copy bucket: {e}")
 
 
+def get_pdf_page_sizes(pdf_path):
+    with pymupdf.open(pdf_path) as pdf_document:
+        return [
+            [page.rect.width, page.rect.height] for page in pdf_document.pages()
+        ]
+
+
+def _upload_pdf_metadata(output_path, dest_bucket, key, file_id):
+    # Best effort, as the webapp reads the page sizes from the access copy
+    # itself when they are missing
+    try:
+        page_sizes = get_pdf_page_sizes(output_path)
+        etag = s3.head_object(Bucket=dest_bucket, Key=key)["ETag"].strip('"')
+        s3.put_object(
+            Bucket=dest_bucket,
+            Key=f"{PDF_METADATA_PREFIX}{dest_bucket}/{key}/{etag}.json",
+            Body=json.dumps({"page_sizes": page_sizes}),
+            ContentType="application/json",
+        )
+        logger.info(f"Uploaded PDF metadata of {file_id}")
+    except Exception as e:
+        logger.warning(f"Failed to upload PDF metadata of {file_id}: {e}")
+
+
 def process_file(
     file_id,
     consignment_ref,
@@ -243,6 +272,7 @@ def process_file(
             f"Files in {tmpdir} after converting {file_id}: {os.listdir(tmpdir)}"
         )
         _upload_output(output_path, dest_bucket, key, file_id)
+        _upload_pdf_metadata(output_path, dest_bucket, key, file_id)
 
 
 def process_consignment(consignment_ref, source_bucket, dest_bucket, conn):
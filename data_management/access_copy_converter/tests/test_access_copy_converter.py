@@ -1,8 +1,10 @@
+import json
 import subprocess
 from unittest import mock
 
 import access_copy_converter.main as main_module
 import boto3
+import pymupdf
 import pytest
 from access_copy_converter.main import (
     already_converted,
@@ -339,3 +341,87 @@ class TestProcessConsignment:
         assert "cons1/file1" in uploaded_keys
         assert "cons1/file3" in uploaded_keys
         assert "cons1/file2" not in uploaded_keys
+
+    @mock_aws
+    def test_process_consignment_uploads_pdf_metadata(
+        self, monkeypatch, sqlite_conn
+    ):
+        s3_client = boto3.client("s3", region_name="eu-west-2")
+        for bucket in ["source-bucket", "dest-bucket"]:
+            s3_client.create_bucket(
+                Bucket=bucket,
+                CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+            )
+        s3_client.put_object(
+            Bucket="source-bucket", Key="cons1/file123", Body=b"data"
+        )
+
+        conn, metadata, ffid, file_table = sqlite_conn
+        conn.execute(insert(ffid).values(FileId="file123", PUID="fmt/40"))
+        conn.commit()
+
+        monkeypatch.setattr(main_module, "s3", s3_client)
+
+        def fake_convert(input_path, output_path, convert_to="pdf"):
+            pdf_document = pymupdf.open()
+            pdf_document.new_page(width=100, height=200)
+            pdf_document.new_page(width=300, height=400)
+            pdf_document.save(output_path)
+            pdf_document.close()
+
+        monkeypatch.setattr(
+            main_module, "convert_with_libreoffice", fake_convert
+        )
+
+        failed = process_consignment(
+            "cons1", "source-bucket", "dest-bucket", conn
+        )
+
+        assert failed == []
+        etag = s3_client.head_object(Bucket="dest-bucket", Key="cons1/file123")[
+            "ETag"
+        ].strip('"')
+        metadata_object = s3_client.get_object(
+            Bucket="dest-bucket",
+            Key=f"pdf-metadata/dest-bucket/cons1/file123/{etag}.json",
+        )
+        assert json.loads(metadata_object["Body"].read()) == {
+            "page_sizes": [[100, 200], [300, 400]]
+        }
+
+    @mock_aws
+    def test_process_consignment_uploads_access_copy_without_pdf_metadata(
+        self, monkeypatch, sqlite_conn, caplog
+    ):
+        s3_client = boto3.client("s3", region_name="eu-west-2")
+        for bucket in ["source-bucket", "dest-bucket"]:
+            s3_client.create_bucket(
+                Bucket=bucket,
+                CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+            )
+        s3_client.put_object(
+            Bucket="source-bucket", Key="cons1/file123", Body=b"data"
+        )
+
+        conn, metadata, ffid, file_table = sqlite_conn
+        conn.execute(insert(ffid).values(FileId="file123", PUID="fmt/40"))
+        conn.commit()
+
+        monkeypatch.setattr(main_module, "s3", s3_client)
+
+        def fake_convert(input_path, output_path, convert_to="pdf"):
+            with open(output_path, "wb") as fh:
+                fh.write(b"not a pdf")
+
+        monkeypatch.setattr(
+            main_module, "convert_with_libreoffice", fake_convert
+        )
+
+        failed = process_consignment(
+            "cons1", "source-bucket", "dest-bucket", conn
+        )
+
+        assert failed == []
+        response = s3_client.list_objects_v2(Bucket="dest-bucket")
+        assert [obj["Key"] for obj in response["Contents"]] == ["cons1/file123"]
+        assert "Failed to upload PDF metadata of file123" in caplog.text
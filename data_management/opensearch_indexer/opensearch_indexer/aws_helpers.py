@@ -1,6 +1,8 @@
 import json
 import logging
-from typing import Any, Dict
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict
 from urllib.parse import quote_plus
 
 import boto3
@@ -10,10 +12,31 @@ logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
-def get_s3_file(bucket_name: str, object_key: str) -> bytes:
+S3_CHUNK_SIZE = 1024 * 1024
+
+
+def get_s3_file(bucket_name: str, object_key: str) -> BinaryIO:
+    """
+    Stream an S3 object in chunks into a temporary file, held in memory up to
+    S3_SPOOL_MAX_MEMORY_BYTES and on disk beyond, so large records are not
+    read into memory. The file is returned rewound, and is removed once
+    closed.
+    """
     s3 = boto3.client("s3")
     s3_file_object = s3.get_object(Bucket=bucket_name, Key=object_key)
-    return s3_file_object["Body"].read()
+    file_stream = tempfile.SpooledTemporaryFile(
+        max_size=int(
+            os.getenv("S3_SPOOL_MAX_MEMORY_BYTES", str(16 * 1024 * 1024))
+        )
+    )
+    try:
+        for chunk in s3_file_object["Body"].iter_chunks(S3_CHUNK_SIZE):
+            file_stream.write(chunk)
+    except BaseException:
+        file_stream.close()
+        raise
+    file_stream.seek(0)
+    return file_stream
 
 
 def get_secret_data(secret_id: str) -> Dict[str, Any]:
@@ -0,0 +1,102 @@
+"""
+Script to fill the tables the opensearch indexer maintains for the webapp for
+every consignment in the database.
+
+The indexer only rebuilds the rows of the consignments it indexes, so this must
+be run once before the webapp is set to read from a table, to fill it for the
+consignments indexed before the indexer started maintaining it.
+Each consignment's rows are rebuilt in their own transaction, so it can be run
+again at any time, e.g. after a failure.
+
+Usage:
+    python -m data_management.opensearch_indexer.opensearch_indexer.backfill_tables [--table TABLE ...]
+
+Tables default to all of: file_metadata_flat, consignment_browse_summary
+
+Required environment variables:
+    DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_SSL_ROOT_CERTIFICATE
+"""
+
+import argparse
+import logging
+import sys
+
+from configs.db_utils import build_database_url
+
+from .consignment_browse_summary import (
+    CONSIGNMENT_BROWSE_SUMMARY_TABLE,
+    refresh_consignment_browse_summary,
+)
+from .file_metadata_flat import (
+    FILE_METADATA_FLAT_TABLE,
+    refresh_file_metadata_flat,
+)
+from .index_all_consignments import get_all_consignment_references
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+TABLE_REFRESHERS = {
+    FILE_METADATA_FLAT_TABLE: refresh_file_metadata_flat,
+    CONSIGNMENT_BROWSE_SUMMARY_TABLE: refresh_consignment_browse_summary,
+}
+
+
+def backfill_tables(database_url: str, tables: list[str]) -> list[str]:
+    """
+    Rebuild the rows of each of `tables` for every consignment in the database.
+
+    Args:
+        database_url (str): The database connection URL.
+        tables (list[str]): Names of tables in `TABLE_REFRESHERS`.
+
+    Returns:
+        list[str]: The references of the consignments that failed.
+    """
+    consignment_references = get_all_consignment_references(database_url)
+
+    failed_consignments = []
+    for i, consignment_reference in enumerate(consignment_references, 1):
+        logger.info(
+            f"Backfilling consignment {i}/{len(consignment_references)}: {consignment_reference}"
+        )
+        try:
+            for table in tables:
+                TABLE_REFRESHERS[table](consignment_reference, database_url)
+        except Exception as e:
+            logger.error(
+                f"Failed to backfill {consignment_reference}: {e}",
+                exc_info=True,
+            )
+            failed_consignments.append(consignment_reference)
+    return failed_consignments
+
+
+def main(argv=None):
+    """Fill the indexer's tables for all consignments in the database."""
+    parser = argparse.ArgumentParser(
+        description="Fill the opensearch indexer's tables for all consignments."
+    )
+    parser.add_argument(
+        "--table",
+        action="append",
+        choices=list(TABLE_REFRESHERS),
+        help="Table to fill, may be repeated. Defaults to all tables.",
+    )
+    args = parser.parse_args(argv)
+    tables = args.table or list(TABLE_REFRESHERS)
+
+    logger.info(f"Starting backfill of {', '.join(tables)}")
+    failed_consignments = backfill_tables(build_database_url(), tables)
+
+    if failed_consignments:
+        logger.error(f"Failed consignments: {', '.join(failed_consignments)}")
+        sys.exit(1)
+    logger.info("Backfill complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import logging
+
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+CONSIGNMENT_BROWSE_SUMMARY_TABLE = "consignment_browse_summary"
+
+CREATE_CONSIGNMENT_BROWSE_SUMMARY_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CONSIGNMENT_BROWSE_SUMMARY_TABLE} (
+        "ConsignmentId" uuid PRIMARY KEY
+            REFERENCES "Consignment" ("ConsignmentId"),
+        "ConsignmentReference" text,
+        "SeriesId" uuid REFERENCES "Series" ("SeriesId"),
+        "TransferCompleteDatetime" timestamp,
+        "records_held" integer NOT NULL
+    );
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_{CONSIGNMENT_BROWSE_SUMMARY_TABLE}_series_id
+    ON {CONSIGNMENT_BROWSE_SUMMARY_TABLE} ("SeriesId");
+    """,
+]
+
+REFRESH_CONSIGNMENT_BROWSE_SUMMARY_STATEMENTS = [
+    f"""
+    DELETE FROM {CONSIGNMENT_BROWSE_SUMMARY_TABLE}
+    WHERE "ConsignmentReference" = :consignment_reference;
+    """,
+    f"""
+    INSERT INTO {CONSIGNMENT_BROWSE_SUMMARY_TABLE} (
+        "ConsignmentId",
+        "ConsignmentReference",
+        "SeriesId",
+        "TransferCompleteDatetime",
+        "records_held"
+    )
+    SELECT
+        c."ConsignmentId",
+        c."ConsignmentReference",
+        c."SeriesId",
+        c."TransferCompleteDatetime",
+        count(f."FileId")
+    FROM
+        "Consignment" c
+    JOIN
+        "File" f ON f."ConsignmentId" = c."ConsignmentId"
+    WHERE
+        c."ConsignmentReference" = :consignment_reference
+        AND lower(f."FileType") = 'file'
+    GROUP BY
+        c."ConsignmentId";
+    """,
+]
+
+
+def refresh_consignment_browse_summary(
+    consignment_reference: str, database_url: str
+) -> None:
+    """
+    Rebuild the `consignment_browse_summary` row for a consignment.
+
+    The table holds one row per consignment holding files, with the number of
+    files it holds, so the webapp browse pages can aggregate series and
+    transferring bodies from it instead of from every row of the `File` table.
+    The consignment's row is deleted and re-inserted in a single transaction.
+
+    Args:
+        consignment_reference (str): The unique reference identifying the consignment.
+        database_url (str): The database connection URL.
+    """
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            for statement in CREATE_CONSIGNMENT_BROWSE_SUMMARY_STATEMENTS:
+                connection.execute(text(statement))
+            for statement in REFRESH_CONSIGNMENT_BROWSE_SUMMARY_STATEMENTS:
+                connection.execute(
+                    text(statement),
+                    {"consignment_reference": consignment_reference},
+                )
+    finally:
+        engine.dispose()
+
+    logger.info(
+        f"Refreshed {CONSIGNMENT_BROWSE_SUMMARY_TABLE} for consignment: {consignment_reference}"
+    )
@@ -0,0 +1,140 @@
+import logging
+
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+FILE_METADATA_FLAT_TABLE = "file_metadata_flat"
+
+# FileMetadata PropertyName -> (file_metadata_flat column, column type)
+FILE_METADATA_FLAT_COLUMNS = {
+    "former_reference_department": ("former_reference", "text"),
+    "title_alternate": ("alternative_title", "text"),
+    "description": ("description", "text"),
+    "description_alternate": ("alternative_description", "text"),
+    "closure_type": ("closure_type", "text"),
+    "closure_start_date": ("closure_start_date", "date"),
+    "closure_period": ("closure_period", "text"),
+    "opening_date": ("opening_date", "date"),
+    "date_last_modified": ("date_last_modified", "date"),
+    "end_date": ("end_date", "date"),
+    "foi_exemption_code": ("foi_exemption_code", "text"),
+    "file_name_translation": ("translated_title", "text"),
+    "related_material": ("related_material", "text"),
+    "restrictions_on_use": ("restrictions_on_use", "text"),
+    "note": ("note", "text"),
+    "held_by": ("held_by", "text"),
+    "legal_status": ("legal_status", "text"),
+    "rights_copyright": ("rights_copyright", "text"),
+    "language": ("language", "text"),
+}
+
+FILE_METADATA_FLAT_INDEXES = {
+    "ix_file_metadata_flat_consignment_id": "ConsignmentId",
+    "ix_file_metadata_flat_closure_type": "closure_type",
+    "ix_file_metadata_flat_end_date": "end_date",
+    "ix_file_metadata_flat_date_last_modified": "date_last_modified",
+    "ix_file_metadata_flat_opening_date": "opening_date",
+}
+
+
+def build_create_file_metadata_flat_statements():
+    """
+    Build the statements creating the `file_metadata_flat` table and its indexes
+    if they do not already exist.
+    """
+    column_definitions = "".join(
+        f',\n        "{column}" {column_type}'
+        for column, column_type in FILE_METADATA_FLAT_COLUMNS.values()
+    )
+    statements = [
+        f"""
+    CREATE TABLE IF NOT EXISTS {FILE_METADATA_FLAT_TABLE} (
+        "FileId" uuid PRIMARY KEY REFERENCES "File" ("FileId"),
+        "ConsignmentId" uuid REFERENCES "Consignment" ("ConsignmentId"){column_definitions}
+    );
+    """
+    ]
+    for index_name, column in FILE_METADATA_FLAT_INDEXES.items():
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS {index_name} "
+            f'ON {FILE_METADATA_FLAT_TABLE} ("{column}");'
+        )
+    return statements
+
+
+def build_refresh_file_metadata_flat_statements():
+    """
+    Build the statements replacing the `file_metadata_flat` rows of every file in
+    the consignment bound to `:consignment_reference`.
+    """
+    consignment_ids = """
+        SELECT "ConsignmentId" FROM "Consignment"
+        WHERE "ConsignmentReference" = :consignment_reference
+    """
+    delete_statement = f"""
+    DELETE FROM {FILE_METADATA_FLAT_TABLE}
+    WHERE "ConsignmentId" IN ({consignment_ids});
+    """
+
+    column_names = ", ".join(
+        f'"{column}"' for column, _ in FILE_METADATA_FLAT_COLUMNS.values()
+    )
+    pivoted_values = ",\n".join(
+        f"""        max(CASE WHEN fm."PropertyName" = '{property_name}' """
+        f"""THEN fm."Value"::{column_type} END)"""
+        for property_name, (
+            _,
+            column_type,
+        ) in FILE_METADATA_FLAT_COLUMNS.items()
+    )
+    insert_statement = f"""
+    INSERT INTO {FILE_METADATA_FLAT_TABLE} ("FileId", "ConsignmentId", {column_names})
+    SELECT
+        f."FileId",
+        f."ConsignmentId",
+{pivoted_values}
+    FROM
+        "File" f
+    LEFT JOIN
+        "FileMetadata" fm ON f."FileId" = fm."FileId"
+    WHERE
+        f."ConsignmentId" IN ({consignment_ids})
+    GROUP BY
+        f."FileId", f."ConsignmentId";
+    """
+    return [delete_statement, insert_statement]
+
+
+def refresh_file_metadata_flat(
+    consignment_reference: str, database_url: str
+) -> None:
+    """
+    Rebuild the `file_metadata_flat` rows for the files in a consignment.
+
+    The table holds one row per file with its `FileMetadata` properties pivoted
+    into typed columns, so the webapp can read them without pivoting the
+    `FileMetadata` table on every request. The consignment's rows are deleted
+    and re-inserted in a single transaction.
+
+    Args:
+        consignment_reference (str): The unique reference identifying the consignment.
+        database_url (str): The database connection URL.
+    """
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            for statement in build_create_file_metadata_flat_statements():
+                connection.execute(text(statement))
+            for statement in build_refresh_file_metadata_flat_statements():
+                connection.execute(
+                    text(statement),
+                    {"consignment_reference": consignment_reference},
+                )
+    finally:
+        engine.dispose()
+
+    logger.info(
+        f"Refreshed {FILE_METADATA_FLAT_TABLE} for consignment: {consignment_reference}"
+    )
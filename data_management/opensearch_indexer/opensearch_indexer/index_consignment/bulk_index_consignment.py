@@ -15,6 +15,9 @@ from ..aws_helpers import (
     _get_opensearch_auth,
     get_s3_file,
 )
+from ..consignment_browse_summary import refresh_consignment_browse_summary
+from ..file_metadata_flat import refresh_file_metadata_flat
+from ..search_index_generation import bump_search_index_generation
 from ..text_extraction import TextExtractionStatus, add_text_content
 
 logger = logging.getLogger()
@@ -42,7 +45,13 @@ def bulk_index_consignment_from_aws(
     Args:
         consignment_reference (str): The reference identifier for the consignment.
         secret_string (str):  AWS secret storing s3 record bucket name,
-            and database and OpenSearch credentials.
+            and database and OpenSearch credentials. If it holds
+            `REFRESH_FILE_METADATA_FLAT` or `REFRESH_CONSIGNMENT_BROWSE_SUMMARY`
+            set to "true", the consignment's rows in the `file_metadata_flat`
+            or `consignment_browse_summary` table are rebuilt before indexing.
+            If it holds `REFRESH_SEARCH_INDEX_GENERATION` set to "true", the
+            search index generation of the consignment's transferring body is
+            bumped after indexing, even if indexing failed.
         db_secret_string (str): AWS secret storing database credentials.
 
     Returns:
@@ -50,20 +59,51 @@ def bulk_index_consignment_from_aws(
     """
     bucket_name = secret_string["RECORD_BUCKET_NAME"]
     database_url = _build_db_url(db_secret_string)
+
+    if secret_string.get("REFRESH_FILE_METADATA_FLAT") == "true":
+        refresh_file_metadata_flat(consignment_reference, database_url)
+    if secret_string.get("REFRESH_CONSIGNMENT_BROWSE_SUMMARY") == "true":
+        refresh_consignment_browse_summary(consignment_reference, database_url)
+
     open_search_host_url = secret_string["OPEN_SEARCH_HOST"]
     open_search_http_auth = _get_opensearch_auth(secret_string)
     open_search_bulk_index_timeout = int(
         secret_string["OPEN_SEARCH_BULK_INDEX_TIMEOUT"]
     )
 
-    bulk_index_consignment(
-        consignment_reference,
-        bucket_name,
-        database_url,
-        open_search_host_url,
-        open_search_http_auth,
-        open_search_bulk_index_timeout,
-    )
+    try:
+        bulk_index_consignment(
+            consignment_reference,
+            bucket_name,
+            database_url,
+            open_search_host_url,
+            open_search_http_auth,
+            open_search_bulk_index_timeout,
+        )
+    finally:
+        # documents may have been indexed even if some failed
+        if secret_string.get("REFRESH_SEARCH_INDEX_GENERATION") == "true":
+            try_bump_search_index_generation(
+                consignment_reference, database_url
+            )
+
+
+def try_bump_search_index_generation(
+    consignment_reference: str, database_url: str
+) -> None:
+    """
+    Bump the search index generation of the transferring body of a
+    consignment, logging rather than raising any error, so it never hides the
+    outcome of indexing the consignment.
+    """
+    try:
+        bump_search_index_generation(consignment_reference, database_url)
+    except Exception as e:
+        logger.error(
+            f"Failed to bump search index generation for consignment "
+            f"{consignment_reference}: {e}",
+            exc_info=True,
+        )
 
 
 def bulk_index_consignment(
@@ -167,8 +207,8 @@ def construct_documents(files: List[Dict], bucket_name: str) -> List[Dict]:
         logger.info(f"[{thread_name}] Processing file: {object_key}")
 
         try:
-            file_stream = get_s3_file(bucket_name, object_key)
-            document = add_text_content(file, file_stream)
+            with get_s3_file(bucket_name, object_key) as file_stream:
+                document = add_text_content(file, file_stream)
             return {"file_id": file["file_id"], "document": document}
         except Exception as e:
             logger.error(f"Failed to obtain file {object_key}: {e}")
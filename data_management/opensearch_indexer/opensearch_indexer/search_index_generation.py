@@ -0,0 +1,69 @@
+import logging
+
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SEARCH_INDEX_GENERATION_TABLE = "search_index_generation"
+
+CREATE_SEARCH_INDEX_GENERATION_STATEMENT = f"""
+CREATE TABLE IF NOT EXISTS {SEARCH_INDEX_GENERATION_TABLE} (
+    "BodyId" uuid PRIMARY KEY,
+    "generation" integer NOT NULL,
+    "indexed_at" timestamp NOT NULL
+);
+"""
+
+BUMP_SEARCH_INDEX_GENERATION_STATEMENT = f"""
+INSERT INTO {SEARCH_INDEX_GENERATION_TABLE} (
+    "BodyId",
+    "generation",
+    "indexed_at"
+)
+SELECT DISTINCT
+    s."BodyId",
+    1,
+    now() AT TIME ZONE 'utc'
+FROM
+    "Consignment" c
+JOIN
+    "Series" s ON c."SeriesId" = s."SeriesId"
+WHERE
+    c."ConsignmentReference" = :consignment_reference
+    AND s."BodyId" IS NOT NULL
+ON CONFLICT ("BodyId") DO UPDATE SET
+    "generation" = {SEARCH_INDEX_GENERATION_TABLE}."generation" + 1,
+    "indexed_at" = excluded."indexed_at";
+"""
+
+
+def bump_search_index_generation(
+    consignment_reference: str, database_url: str
+) -> None:
+    """
+    Increment the search index generation of the transferring body of a
+    consignment once its documents have been indexed.
+
+    The webapp keys its cache of search results on the generation of the
+    transferring body searched, so results cached before the consignment was
+    indexed are no longer served.
+
+    Args:
+        consignment_reference (str): The unique reference identifying the consignment.
+        database_url (str): The database connection URL.
+    """
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(CREATE_SEARCH_INDEX_GENERATION_STATEMENT))
+            connection.execute(
+                text(BUMP_SEARCH_INDEX_GENERATION_STATEMENT),
+                {"consignment_reference": consignment_reference},
+            )
+    finally:
+        engine.dispose()
+
+    logger.info(
+        f"Bumped {SEARCH_INDEX_GENERATION_TABLE} for consignment: {consignment_reference}"
+    )
@@ -1,10 +1,11 @@
 import json
 import logging
 import os
+import shutil
 import subprocess  # nosec
 import tempfile
 from enum import Enum
-from typing import Dict
+from typing import BinaryIO, Dict
 
 import boto3
 
@@ -78,7 +79,7 @@ SUPPORTED_TEXTRACT_PUIDS = {
 }
 
 
-def add_text_content(file: Dict, file_stream: bytes) -> Dict:
+def add_text_content(file: Dict, file_stream: BinaryIO) -> Dict:
 
     file_puid = file["file_puid"] if file["file_puid"] else None
     file_id = file["file_id"]
@@ -113,11 +114,11 @@ def add_text_content(file: Dict, file_stream: bytes) -> Dict:
     return file
 
 
-def extract_text(file_stream: bytes, file_puid: str) -> str:
+def extract_text(file_stream: BinaryIO, file_puid: str) -> str:
     with tempfile.NamedTemporaryFile(
         suffix=f".{SUPPORTED_TEXTRACT_PUIDS[file_puid]}", delete=True
     ) as temp:
-        temp.write(file_stream)
+        shutil.copyfileobj(file_stream, temp)
         temp.flush()
         file_path = temp.name
 
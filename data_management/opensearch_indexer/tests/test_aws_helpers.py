@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+from opensearch_indexer.aws_helpers import get_s3_file
+
+
+@mock_aws
+def test_get_s3_file_streams_object_to_temporary_file(monkeypatch):
+    """
+    Given an S3 object larger than S3_SPOOL_MAX_MEMORY_BYTES
+    When it is fetched
+    Then it is streamed in chunks to a temporary file on disk
+    And the file is returned rewound
+    """
+    monkeypatch.setenv("S3_SPOOL_MAX_MEMORY_BYTES", "16")
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="test-bucket")
+    s3.put_object(Bucket="test-bucket", Key="TDR-2024/file-id", Body=b"a" * 100)
+
+    with patch("opensearch_indexer.aws_helpers.S3_CHUNK_SIZE", 10):
+        with get_s3_file("test-bucket", "TDR-2024/file-id") as file_stream:
+            assert file_stream._rolled
+            assert file_stream.read() == b"a" * 100
+
+
+@mock_aws
+def test_get_s3_file_keeps_small_object_in_memory():
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="test-bucket")
+    s3.put_object(Bucket="test-bucket", Key="TDR-2024/file-id", Body=b"record")
+
+    with get_s3_file("test-bucket", "TDR-2024/file-id") as file_stream:
+        assert not file_stream._rolled
+        assert file_stream.read() == b"record"
@@ -0,0 +1,179 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from data_management.conftest import (
+    Base,
+    Body,
+    Consignment,
+    File,
+    FileMetadata,
+    Series,
+)
+from data_management.opensearch_indexer.opensearch_indexer.backfill_tables import (
+    TABLE_REFRESHERS,
+    backfill_tables,
+    main,
+)
+from data_management.opensearch_indexer.opensearch_indexer.consignment_browse_summary import (
+    CONSIGNMENT_BROWSE_SUMMARY_TABLE,
+)
+from data_management.opensearch_indexer.opensearch_indexer.file_metadata_flat import (
+    FILE_METADATA_FLAT_TABLE,
+)
+
+MODULE = "data_management.opensearch_indexer.opensearch_indexer.backfill_tables"
+
+
+@pytest.fixture
+def engine(database):
+    engine = create_engine(database.url())
+    Base.metadata.create_all(engine)
+    yield engine
+    with engine.begin() as connection:
+        for table in TABLE_REFRESHERS:
+            connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    engine.dispose()
+
+
+def _add_consignment(session, consignment_reference):
+    body_id = uuid4()
+    series_id = uuid4()
+    consignment_id = uuid4()
+    file_id = uuid4()
+    session.add_all(
+        [
+            Body(BodyId=body_id, Name=f"body-{consignment_reference}"),
+            Series(SeriesId=series_id, Name="series-name", BodyId=body_id),
+            Consignment(
+                ConsignmentId=consignment_id,
+                ConsignmentType="foo",
+                ConsignmentReference=consignment_reference,
+                SeriesId=series_id,
+            ),
+            File(
+                FileId=file_id,
+                FileType="File",
+                FileName="test-document.txt",
+                FileReference="file-123",
+                FilePath="/path/to/file",
+                ConsignmentId=consignment_id,
+            ),
+            FileMetadata(
+                MetadataId=uuid4(),
+                FileId=file_id,
+                PropertyName="closure_type",
+                Value="Open",
+            ),
+        ]
+    )
+    session.commit()
+    return consignment_id
+
+
+def _count_rows_by_consignment(engine, table):
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                f'SELECT "ConsignmentId", count(*) FROM {table} '
+                'GROUP BY "ConsignmentId"'
+            )
+        ).fetchall()
+    return dict(rows)
+
+
+def test_backfill_tables_fills_every_consignment(engine, database):
+    """
+    Given two consignments that have never been indexed
+    When backfill_tables is called for file_metadata_flat
+    Then file_metadata_flat holds the rows of both consignments
+    """
+    session = sessionmaker(bind=engine)()
+    consignment_id = _add_consignment(session, "TDR-2024-AAAA")
+    other_consignment_id = _add_consignment(session, "TDR-2024-BBBB")
+    session.close()
+
+    failed_consignments = backfill_tables(
+        database.url(), [FILE_METADATA_FLAT_TABLE]
+    )
+
+    assert failed_consignments == []
+    assert _count_rows_by_consignment(engine, FILE_METADATA_FLAT_TABLE) == {
+        consignment_id: 1,
+        other_consignment_id: 1,
+    }
+
+
+def test_backfill_tables_fills_consignment_browse_summary(engine, database):
+    """
+    Given two consignments that have never been indexed
+    When backfill_tables is called for every table
+    Then consignment_browse_summary holds a row for both consignments
+    """
+    session = sessionmaker(bind=engine)()
+    consignment_id = _add_consignment(session, "TDR-2024-AAAA")
+    other_consignment_id = _add_consignment(session, "TDR-2024-BBBB")
+    session.close()
+
+    failed_consignments = backfill_tables(
+        database.url(), list(TABLE_REFRESHERS)
+    )
+
+    assert failed_consignments == []
+    assert _count_rows_by_consignment(
+        engine, CONSIGNMENT_BROWSE_SUMMARY_TABLE
+    ) == {consignment_id: 1, other_consignment_id: 1}
+
+
+def test_backfill_tables_continues_after_failed_consignment(engine, database):
+    """
+    Given two consignments and a refresh that fails for the first
+    When backfill_tables is called
+    Then the second is still refreshed and the first is returned as failed
+    """
+    session = sessionmaker(bind=engine)()
+    _add_consignment(session, "TDR-2024-AAAA")
+    _add_consignment(session, "TDR-2024-BBBB")
+    session.close()
+
+    refreshed = []
+
+    def refresh(consignment_reference, database_url):
+        if consignment_reference == "TDR-2024-AAAA":
+            raise Exception("refresh failed")
+        refreshed.append(consignment_reference)
+
+    with patch.dict(f"{MODULE}.TABLE_REFRESHERS", {"table": refresh}):
+        failed_consignments = backfill_tables(database.url(), ["table"])
+
+    assert failed_consignments == ["TDR-2024-AAAA"]
+    assert refreshed == ["TDR-2024-BBBB"]
+
+
+@patch(f"{MODULE}.build_database_url", return_value="database_url")
+@patch(f"{MODULE}.backfill_tables", return_value=[])
+def test_main_backfills_all_tables_by_default(
+    mock_backfill_tables, mock_build_database_url
+):
+    main([])
+
+    mock_backfill_tables.assert_called_once_with(
+        "database_url", list(TABLE_REFRESHERS)
+    )
+
+
+@patch(f"{MODULE}.build_database_url", return_value="database_url")
+@patch(f"{MODULE}.backfill_tables", return_value=["TDR-2024-AAAA"])
+def test_main_exits_with_error_when_consignments_fail(
+    mock_backfill_tables, mock_build_database_url
+):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--table", FILE_METADATA_FLAT_TABLE])
+
+    assert exc_info.value.code == 1
+    mock_backfill_tables.assert_called_once_with(
+        "database_url", [FILE_METADATA_FLAT_TABLE]
+    )
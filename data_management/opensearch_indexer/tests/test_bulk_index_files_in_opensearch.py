@@ -10,6 +10,7 @@ from moto import mock_aws
 from opensearch_indexer.index_consignment.bulk_index_consignment import (
     ConsignmentBulkIndexError,
     bulk_index_consignment,
+    bulk_index_consignment_from_aws,
     bulk_index_files_in_opensearch,
     construct_documents,
     fetch_files_in_consignment,
@@ -678,3 +679,88 @@ def test_bulk_index_consignment_error_handling(
                 open_search_http_auth,
                 open_search_bulk_index_timeout,
             )
+
+
+BULK_INDEX_CONSIGNMENT_MODULE = (
+    "opensearch_indexer.index_consignment.bulk_index_consignment"
+)
+
+SECRET_STRING = {
+    "RECORD_BUCKET_NAME": "test-bucket",
+    "OPEN_SEARCH_HOST": "https://opensearch.example.com",
+    "OPEN_SEARCH_BULK_INDEX_TIMEOUT": "30",
+}
+
+
+@pytest.mark.parametrize(
+    "refresh_search_index_generation, expected_bump_count",
+    [(None, 0), ("false", 0), ("true", 1)],
+)
+@mock.patch(f"{BULK_INDEX_CONSIGNMENT_MODULE}.bump_search_index_generation")
+@mock.patch(f"{BULK_INDEX_CONSIGNMENT_MODULE}.bulk_index_consignment")
+@mock.patch(f"{BULK_INDEX_CONSIGNMENT_MODULE}._get_opensearch_auth")
+@mock.patch(
+    f"{BULK_INDEX_CONSIGNMENT_MODULE}._build_db_url",
+    return_value="database_url",
+)
+def test_bulk_index_consignment_from_aws_bumps_generation_only_if_enabled(
+    mock_build_db_url,
+    mock_get_opensearch_auth,
+    mock_bulk_index_consignment,
+    mock_bump_search_index_generation,
+    refresh_search_index_generation,
+    expected_bump_count,
+):
+    secret_string = dict(SECRET_STRING)
+    if refresh_search_index_generation is not None:
+        secret_string["REFRESH_SEARCH_INDEX_GENERATION"] = (
+            refresh_search_index_generation
+        )
+
+    bulk_index_consignment_from_aws("TDR-2024-XYWZ", secret_string, {})
+
+    mock_bulk_index_consignment.assert_called_once()
+    assert mock_bump_search_index_generation.call_count == expected_bump_count
+
+
+@mock.patch(
+    f"{BULK_INDEX_CONSIGNMENT_MODULE}.bump_search_index_generation",
+    side_effect=sqlalchemy.exc.OperationalError("CREATE TABLE", {}, None),
+)
+@mock.patch(
+    f"{BULK_INDEX_CONSIGNMENT_MODULE}.bulk_index_consignment",
+    side_effect=ConsignmentBulkIndexError("Bulk indexing failed"),
+)
+@mock.patch(f"{BULK_INDEX_CONSIGNMENT_MODULE}._get_opensearch_auth")
+@mock.patch(
+    f"{BULK_INDEX_CONSIGNMENT_MODULE}._build_db_url",
+    return_value="database_url",
+)
+def test_bulk_index_consignment_from_aws_bump_failure_does_not_hide_error(
+    mock_build_db_url,
+    mock_get_opensearch_auth,
+    mock_bulk_index_consignment,
+    mock_bump_search_index_generation,
+    caplog,
+):
+    """
+    Given indexing a consignment fails and bumping its generation fails too
+    When bulk_index_consignment_from_aws is called with the generation enabled
+    Then the generation is still bumped after the failed indexing
+    And the indexing error is raised, with the bump's error logged
+    """
+    secret_string = {
+        **SECRET_STRING,
+        "REFRESH_SEARCH_INDEX_GENERATION": "true",
+    }
+
+    with pytest.raises(ConsignmentBulkIndexError, match="Bulk indexing failed"):
+        bulk_index_consignment_from_aws("TDR-2024-XYWZ", secret_string, {})
+
+    mock_bump_search_index_generation.assert_called_once_with(
+        "TDR-2024-XYWZ", "database_url"
+    )
+    assert (
+        "Failed to bump search index generation for consignment TDR-2024-XYWZ"
+        in caplog.text
+    )
@@ -0,0 +1,111 @@
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from opensearch_indexer.consignment_browse_summary import (
+    CONSIGNMENT_BROWSE_SUMMARY_TABLE,
+    refresh_consignment_browse_summary,
+)
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from data_management.conftest import Base, Body, Consignment, File, Series
+
+
+@pytest.fixture
+def engine(database):
+    engine = create_engine(database.url())
+    Base.metadata.create_all(engine)
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"DROP TABLE IF EXISTS {CONSIGNMENT_BROWSE_SUMMARY_TABLE}")
+        )
+    engine.dispose()
+
+
+def _add_consignment(session, series_id, consignment_reference, file_types):
+    consignment_id = uuid4()
+    session.add(
+        Consignment(
+            ConsignmentId=consignment_id,
+            ConsignmentType="foo",
+            ConsignmentReference=consignment_reference,
+            SeriesId=series_id,
+            TransferCompleteDatetime=datetime(2024, 1, 1, 12, 0),
+        )
+    )
+    session.add_all(
+        File(
+            FileId=uuid4(),
+            FileType=file_type,
+            FileName="test-document.txt",
+            FileReference="file-123",
+            FilePath="/path/to/file",
+            ConsignmentId=consignment_id,
+        )
+        for file_type in file_types
+    )
+    session.commit()
+    return consignment_id
+
+
+def _get_summary_rows(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(f"SELECT * FROM {CONSIGNMENT_BROWSE_SUMMARY_TABLE}")
+        ).fetchall()
+    return {row.ConsignmentId: row for row in rows}
+
+
+def test_refresh_consignment_browse_summary(engine, database):
+    """
+    Given two consignments holding files and folders, one of which is already
+        in consignment_browse_summary
+    When files are added to it and refresh_consignment_browse_summary is called
+        with each consignment's reference
+    Then consignment_browse_summary holds one row per consignment with the number
+        of files, but not folders, it holds
+    """
+    session = sessionmaker(bind=engine)()
+    body_id = uuid4()
+    series_id = uuid4()
+    session.add_all(
+        [
+            Body(BodyId=body_id, Name="body-name"),
+            Series(SeriesId=series_id, Name="series-name", BodyId=body_id),
+        ]
+    )
+    consignment_id = _add_consignment(
+        session, series_id, "TDR-2024-AAAA", ["File", "Folder"]
+    )
+    other_consignment_id = _add_consignment(
+        session, series_id, "TDR-2024-BBBB", ["File", "file", "File"]
+    )
+    refresh_consignment_browse_summary("TDR-2024-AAAA", database.url())
+
+    session.add(
+        File(
+            FileId=uuid4(),
+            FileType="File",
+            FileName="test-document.txt",
+            FileReference="file-123",
+            FilePath="/path/to/file",
+            ConsignmentId=consignment_id,
+        )
+    )
+    session.commit()
+    session.close()
+
+    refresh_consignment_browse_summary("TDR-2024-AAAA", database.url())
+    refresh_consignment_browse_summary("TDR-2024-BBBB", database.url())
+
+    rows = _get_summary_rows(engine)
+    assert set(rows) == {consignment_id, other_consignment_id}
+    assert rows[consignment_id].ConsignmentReference == "TDR-2024-AAAA"
+    assert rows[consignment_id].SeriesId == series_id
+    assert rows[consignment_id].TransferCompleteDatetime == datetime(
+        2024, 1, 1, 12, 0
+    )
+    assert rows[consignment_id].records_held == 2
+    assert rows[other_consignment_id].records_held == 3
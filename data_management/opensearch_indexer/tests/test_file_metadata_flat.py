@@ -0,0 +1,157 @@
+from datetime import date
+from uuid import uuid4
+
+import pytest
+from opensearch_indexer.file_metadata_flat import (
+    FILE_METADATA_FLAT_TABLE,
+    refresh_file_metadata_flat,
+)
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from data_management.conftest import (
+    Base,
+    Body,
+    Consignment,
+    File,
+    FileMetadata,
+    Series,
+)
+
+
+@pytest.fixture
+def engine(database):
+    engine = create_engine(database.url())
+    Base.metadata.create_all(engine)
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"DROP TABLE IF EXISTS {FILE_METADATA_FLAT_TABLE}")
+        )
+    engine.dispose()
+
+
+def _add_consignment(session, consignment_reference, files_metadata):
+    body_id = uuid4()
+    series_id = uuid4()
+    consignment_id = uuid4()
+    session.add_all(
+        [
+            Body(BodyId=body_id, Name="body-name"),
+            Series(SeriesId=series_id, Name="series-name", BodyId=body_id),
+            Consignment(
+                ConsignmentId=consignment_id,
+                ConsignmentType="foo",
+                ConsignmentReference=consignment_reference,
+                SeriesId=series_id,
+            ),
+        ]
+    )
+    file_ids = []
+    for file_metadata in files_metadata:
+        file_id = uuid4()
+        file_ids.append(file_id)
+        session.add(
+            File(
+                FileId=file_id,
+                FileType="File",
+                FileName="test-document.txt",
+                FileReference="file-123",
+                FilePath="/path/to/file",
+                ConsignmentId=consignment_id,
+            )
+        )
+        session.add_all(
+            FileMetadata(
+                MetadataId=uuid4(),
+                FileId=file_id,
+                PropertyName=property_name,
+                Value=value,
+            )
+            for property_name, value in file_metadata.items()
+        )
+    session.commit()
+    return consignment_id, file_ids
+
+
+def _get_flat_rows(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(f"SELECT * FROM {FILE_METADATA_FLAT_TABLE}")
+        ).fetchall()
+    return {row.FileId: row for row in rows}
+
+
+def test_refresh_file_metadata_flat_pivots_consignment_file_metadata(
+    engine, database
+):
+    """
+    Given a consignment with a file with metadata and a file without metadata
+    When refresh_file_metadata_flat is called with its reference
+    Then file_metadata_flat holds one row per file with the metadata pivoted
+        into typed columns
+    """
+    session = sessionmaker(bind=engine)()
+    consignment_id, (file_id, file_without_metadata_id) = _add_consignment(
+        session,
+        "TDR-2024-XYWZ",
+        [
+            {
+                "closure_type": "Closed",
+                "end_date": "2023-01-31",
+                "date_last_modified": "2022-12-01",
+                "opening_date": "2050-01-01",
+                "file_name_translation": "translated title",
+                "former_reference_department": "former reference",
+            },
+            {},
+        ],
+    )
+    session.close()
+
+    refresh_file_metadata_flat("TDR-2024-XYWZ", database.url())
+
+    rows = _get_flat_rows(engine)
+    assert set(rows) == {file_id, file_without_metadata_id}
+    assert rows[file_id].ConsignmentId == consignment_id
+    assert rows[file_id].closure_type == "Closed"
+    assert rows[file_id].end_date == date(2023, 1, 31)
+    assert rows[file_id].date_last_modified == date(2022, 12, 1)
+    assert rows[file_id].opening_date == date(2050, 1, 1)
+    assert rows[file_id].translated_title == "translated title"
+    assert rows[file_id].former_reference == "former reference"
+    assert rows[file_without_metadata_id].ConsignmentId == consignment_id
+    assert rows[file_without_metadata_id].closure_type is None
+
+
+def test_refresh_file_metadata_flat_only_replaces_rows_of_consignment(
+    engine, database
+):
+    """
+    Given two consignments whose rows are in file_metadata_flat
+    When the metadata of a file in one consignment changes and
+        refresh_file_metadata_flat is called with that consignment's reference
+    Then that consignment's rows are replaced and the other's are left as they were
+    """
+    session = sessionmaker(bind=engine)()
+    _, (file_id,) = _add_consignment(
+        session, "TDR-2024-AAAA", [{"closure_type": "Open"}]
+    )
+    _, (other_file_id,) = _add_consignment(
+        session, "TDR-2024-BBBB", [{"closure_type": "Open"}]
+    )
+    refresh_file_metadata_flat("TDR-2024-AAAA", database.url())
+    refresh_file_metadata_flat("TDR-2024-BBBB", database.url())
+
+    session.query(FileMetadata).filter(
+        FileMetadata.FileId.in_([file_id, other_file_id])
+    ).update({"Value": "Closed"}, synchronize_session=False)
+    session.commit()
+    session.close()
+
+    refresh_file_metadata_flat("TDR-2024-AAAA", database.url())
+
+    rows = _get_flat_rows(engine)
+    assert len(rows) == 2
+    assert rows[file_id].closure_type == "Closed"
+    assert rows[other_file_id].closure_type == "Open"
@@ -0,0 +1,90 @@
+from uuid import uuid4
+
+import pytest
+from opensearch_indexer.search_index_generation import (
+    SEARCH_INDEX_GENERATION_TABLE,
+    bump_search_index_generation,
+)
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from data_management.conftest import Base, Body, Consignment, Series
+
+
+@pytest.fixture
+def engine(database):
+    engine = create_engine(database.url())
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"DROP TABLE IF EXISTS {SEARCH_INDEX_GENERATION_TABLE}")
+        )
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"DROP TABLE IF EXISTS {SEARCH_INDEX_GENERATION_TABLE}")
+        )
+    engine.dispose()
+
+
+def _add_body_with_consignment(session, consignment_reference):
+    body_id = uuid4()
+    series_id = uuid4()
+    session.add_all(
+        [
+            Body(BodyId=body_id, Name=f"body-{consignment_reference}"),
+            Series(SeriesId=series_id, Name="series-name", BodyId=body_id),
+            Consignment(
+                ConsignmentId=uuid4(),
+                ConsignmentType="foo",
+                ConsignmentReference=consignment_reference,
+                SeriesId=series_id,
+            ),
+        ]
+    )
+    session.commit()
+    return body_id
+
+
+def _get_generation_rows(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(f"SELECT * FROM {SEARCH_INDEX_GENERATION_TABLE}")
+        ).fetchall()
+    return {row.BodyId: row for row in rows}
+
+
+def test_bump_search_index_generation(engine, database):
+    """
+    Given two transferring bodies each with a consignment
+    When bump_search_index_generation is called twice with the first
+        consignment's reference and once with the second's
+    Then search_index_generation holds the number of times each transferring
+        body had a consignment indexed
+    """
+    session = sessionmaker(bind=engine)()
+    body_id = _add_body_with_consignment(session, "TDR-2024-AAAA")
+    other_body_id = _add_body_with_consignment(session, "TDR-2024-BBBB")
+    session.close()
+
+    bump_search_index_generation("TDR-2024-AAAA", database.url())
+    first_indexed_at = _get_generation_rows(engine)[body_id].indexed_at
+    bump_search_index_generation("TDR-2024-AAAA", database.url())
+    bump_search_index_generation("TDR-2024-BBBB", database.url())
+
+    rows = _get_generation_rows(engine)
+    assert set(rows) == {body_id, other_body_id}
+    assert rows[body_id].generation == 2
+    assert rows[body_id].indexed_at >= first_indexed_at
+    assert rows[other_body_id].generation == 1
+
+
+def test_bump_search_index_generation_unknown_consignment(engine, database):
+    """
+    Given no consignment with a reference
+    When bump_search_index_generation is called with it
+    Then search_index_generation is created empty
+    """
+    bump_search_index_generation("TDR-2024-NONE", database.url())
+
+    assert _get_generation_rows(engine) == {}
@@ -1,3 +1,4 @@
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import patch
 
@@ -75,10 +76,8 @@ class TestExtractText:
     )
     def test_extract_text(self, file_name, file_type, expected_output):
         path = Path(__file__).parent / f"test_files/{file_name}"
-        with open(path, "rb") as file:
-            file_stream = file.read()
-
-        assert extract_text(file_stream, file_type) == expected_output
+        with open(path, "rb") as file_stream:
+            assert extract_text(file_stream, file_type) == expected_output
 
 
 # Mock ENVIRONMENT for slack alerts
@@ -112,7 +111,7 @@ def test_add_text_content_success(mock_extract_text, caplog):
         "content": "",
         "text_extraction_status": "",
     }
-    file_stream = b"Some file content"
+    file_stream = BytesIO(b"Some file content")
     mock_extract_text.return_value = "Extracted text"
 
     # When
@@ -144,7 +143,7 @@ def test_add_text_content_no_ffid_metadata_success(mock_extract_text, caplog):
         "content": "",
         "text_extraction_status": "",
     }
-    file_stream = b"Some file content"
+    file_stream = BytesIO(b"Some file content")
     mock_extract_text.return_value = "Extracted text"
 
     # When
@@ -177,7 +176,7 @@ def test_add_text_content_unsupported_format(caplog):
         "content": "",
         "text_extraction_status": "",
     }
-    file_stream = b"Some content that won't be extracted"
+    file_stream = BytesIO(b"Some content that won't be extracted")
 
     # When
     result = add_text_content(file, file_stream)
@@ -211,7 +210,7 @@ def test_add_text_content_failure(mock_extract_text, caplog):
         "content": "",
         "text_extraction_status": "",
     }
-    file_stream = b"Some content"
+    file_stream = BytesIO(b"Some content")
 
     # Simulate a failure in text extraction
     mock_extract_text.side_effect = Exception("Text extraction failed")
@@ -248,7 +247,7 @@ def test_add_text_content_no_extension():
         "content": "",
         "text_extraction_status": "",
     }
-    file_stream = b"Some content"
+    file_stream = BytesIO(b"Some content")
 
     # When
     result = add_text_content(file, file_stream)
@@ -274,7 +273,7 @@ def test_add_text_content_fallback_success():
         "content": "",
         "text_extraction_status": "",
     }
-    file_stream = b"original xls content"
+    file_stream = BytesIO(b"original xls content")
 
     with patch(
         "opensearch_indexer.text_extraction.textract.process"
@@ -305,7 +304,7 @@ def test_extract_text_libreoffice_conversion_failure():
     And LibreOffice conversion also fails (e.g. subprocess error),
     Then extract_text should raise the conversion exception.
     """
-    file_bytes = b"dummy content"
+    file_bytes = BytesIO(b"dummy content")
 
     with patch(
         "opensearch_indexer.text_extraction.textract.process"
@@ -328,7 +327,7 @@ def test_extract_text_fallback_conversion_failure():
     Given textract fails on both original and converted files,
     Then extract_text should raise the second exception.
     """
-    file_bytes = b"dummy file content"
+    file_bytes = BytesIO(b"dummy file content")
     converted_path = "/tmp/converted.xlsx"
 
     with patch(
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of rendering an A4 page straight to JPEG, as
+extract_single_page_as_image does, against the PNG and PIL round trip it
+replaced, by median latency and peak memory of the Python buffers allocated.
+
+Usage, from the root of the repository:
+    python -m performance_tests.render_benchmark [--runs RUNS]
+"""
+
+import argparse
+import io
+import statistics
+import time
+import tracemalloc
+
+import pymupdf
+from PIL import Image
+
+from app.main.util.render_utils import extract_single_page_as_image
+
+
+def extract_page_via_png_and_pil(pdf_bytes, page_number, thumbnail=False):
+    with pymupdf.open("pdf", io.BytesIO(pdf_bytes)) as pdf_document:
+        page = pdf_document.load_page(page_number - 1)
+        pix = page.get_pixmap(matrix=pymupdf.Matrix(150 / 72, 150 / 72))
+        page_image = Image.open(io.BytesIO(pix.tobytes("png")))
+        if thumbnail:
+            page_image.thumbnail((150, 200), Image.Resampling.LANCZOS)
+        output_buffer = io.BytesIO()
+        page_image.save(
+            output_buffer,
+            format="JPEG",
+            quality=70 if thumbnail else 75,
+            progressive=not thumbnail,
+        )
+        return output_buffer.getvalue()
+
+
+def create_a4_pdf():
+    with pymupdf.open() as pdf_document:
+        page = pdf_document.new_page(width=595, height=842)
+        for line in range(60):
+            page.insert_text(
+                (40, 40 + line * 13), f"Line {line} of the record " * 4
+            )
+        page.draw_rect(pymupdf.Rect(300, 300, 550, 800), fill=(0.2, 0.4, 0.6))
+        return pdf_document.tobytes()
+
+
+def benchmark(extract, pdf_bytes, thumbnail, runs):
+    # Warm up, so lazy imports and caches are not measured
+    extract(pdf_bytes, 1, thumbnail=thumbnail)
+
+    durations = []
+    tracemalloc.start()
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            extract(pdf_bytes, 1, thumbnail=thumbnail)
+            durations.append(time.perf_counter() - start)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(durations), peak_memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark rendering PDF pages to JPEG."
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    pdf_bytes = create_a4_pdf()
+    for thumbnail in (False, True):
+        for name, extract in (
+            ("direct", extract_single_page_as_image),
+            ("png and pil", extract_page_via_png_and_pil),
+        ):
+            duration, peak_memory = benchmark(
+                extract, pdf_bytes, thumbnail, args.runs
+            )
+            print(
+                f"thumbnail={thumbnail} {name}: {duration * 1000:.1f}ms median, "
+                f"{peak_memory} bytes peak"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark of the size of a page of search results over an index of synthetic
+documents with 1MB of extracted content each, as the search transferring body
+query returns them with only the fields the search results template renders,
+against full documents.
+
+The documents are indexed into a temporary index of the OpenSearch cluster
+that the webapp connects to, e.g. the one in local_services, which is deleted
+afterwards. The sizes are those of the response bodies OpenSearch returns.
+
+Usage, from the root of the repository:
+    python -m performance_tests.search_payload_benchmark [--documents DOCUMENTS] [--query QUERY]
+
+Required environment variables:
+    OPEN_SEARCH_HOST, OPEN_SEARCH_USERNAME, OPEN_SEARCH_PASSWORD
+Optional environment variables:
+    OPEN_SEARCH_CA_CERTS
+"""
+
+import argparse
+import json
+import os
+import uuid
+
+from opensearchpy import OpenSearch, RequestsHttpConnection
+
+from app.main.util.search_utils import (
+    build_search_transferring_body_query,
+    extract_search_terms,
+    get_open_search_fields_to_search_on_and_sorting,
+)
+
+BENCHMARK_INDEX = "search_payload_benchmark"
+TRANSFERRING_BODY_ID = str(uuid.UUID(int=20_000))
+
+
+def synthetic_document(number):
+    """A document as the opensearch indexer indexes it, with 1MB of content"""
+    return {
+        "file_id": str(uuid.UUID(int=number)),
+        "file_name": f"file_{number}.docx",
+        "file_reference": f"ZD{number}",
+        "file_path": f"data/series/file_{number}.docx",
+        "citeable_reference": f"TSTA 1/Z/{number}",
+        "series_id": str(uuid.UUID(int=10_000 + number)),
+        "series_name": "TSTA 1",
+        "transferring_body": "Testing A",
+        "transferring_body_id": TRANSFERRING_BODY_ID,
+        "transferring_body_description": "Testing A description",
+        "consignment_id": str(uuid.UUID(int=30_000)),
+        "consignment_reference": "TDR-2024-ABCD",
+        "file_extension": "docx",
+        "file_puid": "fmt/412",
+        "closure_type": "Open",
+        "opening_date": "2024-01-01T00:00:00",
+        "end_date": "2023-12-31T00:00:00",
+        "date_last_modified": "2023-12-31T00:00:00",
+        "description": f"Description of file {number}",
+        "content": f"Line {number} of the extracted text of a record. "
+        * 20_000,
+        "text_extraction_status": "SUCCEEDED",
+    }
+
+
+def setup_opensearch():
+    """Return an OpenSearch client configured as the webapp's"""
+    return OpenSearch(
+        hosts=os.environ["OPEN_SEARCH_HOST"],
+        http_auth=(
+            os.environ["OPEN_SEARCH_USERNAME"],
+            os.environ["OPEN_SEARCH_PASSWORD"],
+        ),
+        connection_class=RequestsHttpConnection,
+        use_ssl=True,
+        verify_certs=True,
+        ca_certs=os.getenv("OPEN_SEARCH_CA_CERTS") or None,
+        timeout=60,
+    )
+
+
+def index_documents(open_search, documents):
+    open_search.indices.create(index=BENCHMARK_INDEX)
+    for document in documents:
+        open_search.index(
+            index=BENCHMARK_INDEX, id=document["file_id"], body=document
+        )
+    open_search.indices.refresh(index=BENCHMARK_INDEX)
+
+
+def search_response_size(open_search, dsl_query, per_page):
+    """
+    Return the size in bytes of the body of the response to `dsl_query`, as
+    OpenSearch sends it before the client deserialises it.
+    """
+    connection = open_search.transport.get_connection()
+    _, _, response_body = connection.perform_request(
+        "POST",
+        f"/{BENCHMARK_INDEX}/_search",
+        params={"size": per_page},
+        body=json.dumps(dsl_query).encode(),
+    )
+    return len(response_body.encode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the size of a page of search results."
+    )
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--query", default="record")
+    args = parser.parse_args(argv)
+
+    quoted_phrases, single_terms = extract_search_terms(args.query)
+    search_fields, sorting = get_open_search_fields_to_search_on_and_sorting(
+        "everywhere"
+    )
+    dsl_query = build_search_transferring_body_query(
+        search_fields,
+        TRANSFERRING_BODY_ID,
+        "uuid_prefix_tag",
+        quoted_phrases,
+        single_terms,
+        sorting,
+    )
+    full_dsl_query = {**dsl_query, "_source": True}
+
+    open_search = setup_opensearch()
+    try:
+        index_documents(
+            open_search,
+            [synthetic_document(number) for number in range(args.documents)],
+        )
+        size = search_response_size(open_search, dsl_query, args.documents)
+        full_size = search_response_size(
+            open_search, full_dsl_query, args.documents
+        )
+    finally:
+        open_search.indices.delete(index=BENCHMARK_INDEX)
+
+    print(f"source includes: {size} bytes")
+    print(f"full documents: {full_size} bytes")
+
+
+if __name__ == "__main__":
+    main()